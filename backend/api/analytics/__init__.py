@@ -0,0 +1,19 @@
+"""Vectorized analytics for the Construction Cost Tracker API."""
+
+from .loader import change_watermark, fetch_rows
+from .cost import CostReport, LineItemFrame, compute_cost_report
+from .cashflow import CashFlowProjection, project_cash_flow
+from .spend import aggregate_spend, query_daily_spend
+# .vendors depends on api.core (database settings) and is imported directly,
+# keeping this package importable by the simulation worker processes.
+from .similarity import ProjectFeatureIndex, ProjectIndexRegistry
+from .risk import OverrunModel, RiskInputs, SimulationResult, fit_overrun_model, build_risk_inputs, simulate
+
+__all__ = [
+    "change_watermark", "fetch_rows",
+    "CostReport", "LineItemFrame", "compute_cost_report",
+    "CashFlowProjection", "project_cash_flow",
+    "aggregate_spend", "query_daily_spend",
+    "ProjectFeatureIndex", "ProjectIndexRegistry",
+    "OverrunModel", "RiskInputs", "SimulationResult", "fit_overrun_model", "build_risk_inputs", "simulate",
+]
@@ -0,0 +1,116 @@
+"""
+Cost-per-square-foot benchmarking across the portfolio.
+
+For every completed project the actual cost of each category is divided by
+the project's square footage. Percentile bands of those figures per
+category form the benchmark, which is stored in ``cost_benchmarks`` so
+comparing a new estimate against it is a single small read. A project's
+categories are flagged when their cost per square foot (estimate at
+completion) falls outside the P10-P90 band.
+"""
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+
+from .cost import CostReport, LineItemFrame
+
+BENCHMARK_COLUMNS = "category,sample_count,p10_cents,p25_cents,p50_cents,p75_cents,p90_cents,refreshed_at"
+BAND_PERCENTILES = (10, 25, 50, 75, 90)
+BAND_KEYS = ("p10_cents", "p25_cents", "p50_cents", "p75_cents", "p90_cents")
+COMPLETED_STATUS = "completed"
+
+# Outliers are only flagged when enough projects back the band
+MIN_BENCHMARK_SAMPLES = 3
+
+OUTLIER_LOW = "low"
+OUTLIER_HIGH = "high"
+TYPICAL = "typical"
+NO_BENCHMARK = "insufficient_data"
+
+
+def project_square_feet(projects: Sequence[Dict[str, Any]], completed_only: bool = False) -> Dict[int, int]:
+    """Map project id to ``total_sqft`` for projects with a usable floor area."""
+    return {
+        row["id"]: row["total_sqft"]
+        for row in projects
+        if (row.get("total_sqft") or 0) > 0
+        and (not completed_only or str(row.get("status") or "").lower() == COMPLETED_STATUS)
+    }
+
+
+def _category_cost(frame: LineItemFrame, values: np.ndarray, project_ids: np.ndarray):
+    """Sum ``values`` per (project, category) for the given projects."""
+    size = max(len(frame.categories), 1)
+    mask = np.isin(frame.project_id, project_ids)
+    pair = frame.project_id[mask] * size + frame.category_code[mask]
+    keys, code = np.unique(pair, return_inverse=True)
+    totals = np.bincount(code, weights=values[mask], minlength=len(keys))
+    return keys // size, keys % size, totals
+
+
+def compute_benchmarks(frame: LineItemFrame, square_feet: Dict[int, int]) -> List[Dict[str, Any]]:
+    """
+    Per-category percentile bands of actual cost per square foot (cents/sqft).
+
+    ``square_feet`` should only contain completed projects.
+    """
+    if not square_feet or not len(frame):
+        return []
+    ids = np.fromiter(square_feet.keys(), dtype=np.int64, count=len(square_feet))
+    area = np.fromiter(square_feet.values(), dtype=np.float64, count=len(square_feet))
+    order = np.argsort(ids)
+    ids, area = ids[order], area[order]
+
+    project, category, cost = _category_cost(frame, frame.actual.astype(np.float64), ids)
+    per_sqft = cost / area[np.searchsorted(ids, project)]
+
+    rows = []
+    by_category = np.argsort(category, kind="stable")
+    present, starts, counts = np.unique(category[by_category], return_index=True, return_counts=True)
+    for code, start, count in zip(present.tolist(), starts.tolist(), counts.tolist()):
+        values = per_sqft[by_category[start:start + count]]
+        bands = np.rint(np.percentile(values, BAND_PERCENTILES)).astype(np.int64).tolist()
+        rows.append({"category": frame.categories[code], "sample_count": count, **dict(zip(BAND_KEYS, bands))})
+    return rows
+
+
+def _position(value: int, band: Dict[str, Any]) -> str:
+    if band["sample_count"] < MIN_BENCHMARK_SAMPLES:
+        return NO_BENCHMARK
+    if value < band["p10_cents"]:
+        return OUTLIER_LOW
+    if value > band["p90_cents"]:
+        return OUTLIER_HIGH
+    return TYPICAL
+
+
+def compare_project(
+    report: CostReport,
+    project_id: int,
+    square_feet: int,
+    benchmarks: Sequence[Dict[str, Any]],
+) -> List[Dict[str, Any]]:
+    """
+    Cost per square foot of each of a project's categories against the bands.
+
+    Uses the estimate at completion, so a new build's estimate (nothing spent
+    yet) and a project in progress are judged on their expected final cost.
+    """
+    frame = report.frame
+    _, category, eac = _category_cost(frame, report.eac.astype(np.float64), np.array([project_id]))
+    bands = {row["category"]: row for row in benchmarks}
+
+    rows = []
+    for code, total in zip(category.tolist(), eac.tolist()):
+        name = frame.categories[code]
+        value = int(round(total / square_feet))
+        band = bands.get(name)
+        rows.append({
+            "category": name,
+            "eac": int(round(total)),
+            "cost_per_sqft_cents": value,
+            "benchmark": band,
+            "position": _position(value, band) if band else NO_BENCHMARK,
+        })
+    return rows
+
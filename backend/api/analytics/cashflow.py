@@ -0,0 +1,171 @@
+"""
+Cash-flow projection and draw-trigger forecasting.
+
+For every project the engine estimates the cash on hand today (the latest
+draw tracker snapshot minus expenses dated after it), the daily burn rate
+over a trailing window, and the remaining cost to complete from the cost
+engine. From those it predicts when cash runs out and when the next draw
+should be requested so the money arrives in time. All projects are
+projected together in a few array operations.
+"""
+from dataclasses import dataclass
+from datetime import date
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .cost import EXPENSE_COLUMNS
+
+DRAW_COLUMNS = "id,project_id,cash_on_hand_cents,last_draw_date,draw_triggered,created_at"
+DATED_EXPENSE_COLUMNS = EXPENSE_COLUMNS + ",date"
+
+DEFAULT_WINDOW_DAYS = 30
+DEFAULT_LEAD_TIME_DAYS = 10
+
+
+def _dates(values: Sequence[Optional[str]]) -> np.ndarray:
+    """Parse ISO date/timestamp strings to ``datetime64[D]`` (missing values become NaT)."""
+    return np.array([value[:10] if value else None for value in values], dtype="datetime64[D]")
+
+
+@dataclass
+class CashFlowProjection:
+    """Per-project cash-flow forecast; arrays are aligned with ``project_id``."""
+    project_id: np.ndarray
+    today: np.datetime64
+    cash_on_hand: np.ndarray
+    burn_rate: np.ndarray
+    remaining_cost: np.ndarray
+    runway_days: np.ndarray
+    funding_gap: np.ndarray
+    cash_out_date: np.ndarray
+    next_draw_date: np.ndarray
+    has_tracker: np.ndarray
+
+    @property
+    def draw_recommended(self) -> np.ndarray:
+        """Projects whose next draw should already have been requested."""
+        due = ~np.isnat(self.next_draw_date) & (self.next_draw_date <= self.today)
+        out_of_cash = (self.cash_on_hand <= 0) & (self.funding_gap > 0)
+        return self.has_tracker & (due | out_of_cash)
+
+    def rows(self) -> List[Dict[str, Any]]:
+        """Projection as plain dicts (money in cents, dates as ``date`` objects)."""
+        runway = np.where(np.isfinite(self.runway_days), np.floor(self.runway_days), -1).astype(np.int64)
+        columns = zip(
+            self.project_id.tolist(), self.has_tracker.tolist(), self.cash_on_hand.tolist(),
+            self.burn_rate.tolist(), self.remaining_cost.tolist(), self.funding_gap.tolist(),
+            runway.tolist(), self.cash_out_date.tolist(), self.next_draw_date.tolist(),
+            self.draw_recommended.tolist(),
+        )
+        return [
+            {
+                "project_id": project_id,
+                "has_draw_tracker": has_tracker,
+                "cash_on_hand": cash if has_tracker else None,
+                "burn_rate_per_day": burn,
+                "remaining_cost": remaining,
+                "funding_gap": gap if has_tracker else None,
+                "runway_days": days if days >= 0 and has_tracker else None,
+                "cash_out_date": cash_out,
+                "next_draw_date": next_draw,
+                "draw_recommended": recommended,
+            }
+            for (project_id, has_tracker, cash, burn, remaining, gap, days,
+                 cash_out, next_draw, recommended) in columns
+        ]
+
+
+def latest_draws(draws: Sequence[Dict[str, Any]]) -> Dict[int, Dict[str, Any]]:
+    """Most recent draw tracker row per project (by last draw date, then id)."""
+    latest: Dict[int, Dict[str, Any]] = {}
+    for row in sorted(draws, key=lambda row: (row.get("last_draw_date") or "", row.get("id") or 0)):
+        latest[row["project_id"]] = row
+    return latest
+
+
+def project_cash_flow(
+    project_ids: Sequence[int],
+    draws: Sequence[Dict[str, Any]],
+    expenses: Sequence[Dict[str, Any]],
+    remaining_cost: Dict[int, int],
+    today: Optional[date] = None,
+    window_days: int = DEFAULT_WINDOW_DAYS,
+    lead_time_days: int = DEFAULT_LEAD_TIME_DAYS,
+) -> CashFlowProjection:
+    """
+    Project cash runway and the next draw date for every project at once.
+
+    ``remaining_cost`` maps project id to its estimate to complete in cents.
+    Cash on hand is taken from the latest draw tracker row as of its draw
+    date (or, without one, when the row was created) and reduced by expenses
+    dated after that. ``updated_at`` is deliberately ignored: editing notes
+    or the trigger flag doesn't make the balance any more recent.
+    """
+    today64 = np.datetime64(today or date.today(), "D")
+    ids = np.unique(np.asarray(project_ids, dtype=np.int64))
+    size = len(ids)
+
+    # Latest cash snapshot per project
+    snapshots = latest_draws(draws)
+    known_ids = set(ids.tolist())
+    tracked = [row for row in snapshots.values() if row["project_id"] in known_ids]
+    tracked_pos = np.searchsorted(ids, np.fromiter((row["project_id"] for row in tracked), dtype=np.int64, count=len(tracked)))
+    has_tracker = np.zeros(size, dtype=bool)
+    has_tracker[tracked_pos] = True
+    snapshot_cash = np.zeros(size, dtype=np.int64)
+    snapshot_cash[tracked_pos] = [row.get("cash_on_hand_cents") or 0 for row in tracked]
+    snapshot_date = np.full(size, np.datetime64("NaT"), dtype="datetime64[D]")
+    snapshot_date[tracked_pos] = _dates([row.get("last_draw_date") or row.get("created_at") for row in tracked])
+
+    # Expenses aligned to the project axis
+    expense_project = np.fromiter((row["project_id"] for row in expenses), dtype=np.int64, count=len(expenses))
+    expense_amount = np.fromiter((row.get("amount_spent_cents") or 0 for row in expenses), dtype=np.int64, count=len(expenses))
+    expense_date = _dates([row.get("date") for row in expenses])
+    if size:
+        position = np.clip(np.searchsorted(ids, expense_project), 0, size - 1)
+        known = (ids[position] == expense_project) & ~np.isnat(expense_date)
+    else:
+        position = np.zeros(len(expenses), dtype=np.int64)
+        known = np.zeros(len(expenses), dtype=bool)
+    position, expense_amount, expense_date = position[known], expense_amount[known], expense_date[known]
+
+    # Burn rate over the trailing window
+    in_window = (expense_date > today64 - np.timedelta64(window_days, "D")) & (expense_date <= today64)
+    window_spend = np.bincount(position[in_window], weights=expense_amount[in_window], minlength=size)
+    burn_rate = np.rint(window_spend / max(window_days, 1)).astype(np.int64)
+
+    # Spend booked after each project's cash snapshot
+    after_snapshot = ~np.isnat(snapshot_date[position]) & (expense_date > snapshot_date[position])
+    spent_since = np.bincount(position[after_snapshot], weights=expense_amount[after_snapshot], minlength=size)
+    cash_on_hand = snapshot_cash - np.rint(spent_since).astype(np.int64)
+
+    remaining = np.fromiter((remaining_cost.get(project_id, 0) for project_id in ids.tolist()), dtype=np.int64, count=size)
+    funding_gap = np.maximum(remaining - np.maximum(cash_on_hand, 0), 0)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        runway_days = np.where(burn_rate > 0, np.maximum(cash_on_hand, 0) / np.where(burn_rate > 0, burn_rate, 1), np.inf)
+
+    # A draw is only needed when the remaining work costs more than the cash
+    # available and money is actually being spent.
+    needs_draw = has_tracker & (funding_gap > 0) & np.isfinite(runway_days)
+    runway_whole = np.where(needs_draw, np.floor(np.where(np.isfinite(runway_days), runway_days, 0)), 0).astype(np.int64)
+    cash_out_date = np.where(needs_draw, today64 + runway_whole.astype("timedelta64[D]"), np.datetime64("NaT"))
+    next_draw_date = np.where(
+        needs_draw,
+        np.maximum(cash_out_date - np.timedelta64(lead_time_days, "D"), today64),
+        np.datetime64("NaT"),
+    )
+
+    return CashFlowProjection(
+        project_id=ids,
+        today=today64,
+        cash_on_hand=cash_on_hand,
+        burn_rate=burn_rate,
+        remaining_cost=remaining,
+        runway_days=runway_days,
+        funding_gap=funding_gap,
+        cash_out_date=cash_out_date.astype("datetime64[D]"),
+        next_draw_date=next_draw_date.astype("datetime64[D]"),
+        has_tracker=has_tracker,
+    )
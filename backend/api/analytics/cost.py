@@ -0,0 +1,280 @@
+"""
+Vectorized cost-to-complete and estimate-at-completion engine.
+
+Line items are loaded into columnar NumPy arrays and scored with earned-value
+formulas in a handful of array operations, so a whole portfolio can be
+evaluated at once. All money is integer cents.
+
+- BAC: budget at completion (the line item's estimated cost)
+- AC:  actual cost to date
+- EV:  earned value, ``BAC * progress``
+- CPI: cost performance index, ``EV / AC``
+- ETC: estimate to complete, ``(BAC - EV) / CPI``
+- EAC: estimate at completion, ``AC + ETC``
+- VAC: variance at completion, ``BAC - EAC`` (negative means over budget)
+"""
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+FORECAST_COLUMNS = "id,project_id,category,estimated_cost_cents,actual_cost_cents,progress_percent,status"
+EXPENSE_COLUMNS = "id,project_id,forecast_line_item_id,amount_spent_cents"
+
+COMPLETE_STATUS = "complete"
+UNCATEGORIZED = "Uncategorized"
+
+
+def _int_column(rows: Sequence[Dict[str, Any]], key: str) -> np.ndarray:
+    return np.fromiter((row.get(key) or 0 for row in rows), dtype=np.int64, count=len(rows))
+
+
+def _group_sum(codes: np.ndarray, values: np.ndarray, size: int) -> np.ndarray:
+    """Sum ``values`` per group code. Exact for cent totals below 2**53."""
+    if size == 0:
+        return np.zeros(0, dtype=np.int64)
+    totals = np.bincount(codes, weights=values, minlength=size)
+    return np.rint(totals).astype(np.int64)
+
+
+def _optional_floats(values: np.ndarray) -> List[Optional[float]]:
+    """Round to four places and turn NaN into None for JSON output."""
+    return [None if value != value else value for value in np.round(values, 4).tolist()]
+
+
+def _ratio(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    """Element-wise ratio with NaN where the denominator is zero."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(denominator > 0, numerator / np.where(denominator > 0, denominator, 1), np.nan)
+
+
+@dataclass
+class LineItemFrame:
+    """Columnar view of forecast line items and the actual cost booked against them."""
+    item_id: np.ndarray
+    project_id: np.ndarray
+    category_code: np.ndarray
+    categories: List[str]
+    budget: np.ndarray
+    actual: np.ndarray
+    progress: np.ndarray
+    complete: np.ndarray
+    unallocated_project_id: np.ndarray
+    unallocated_actual: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.item_id)
+
+    @classmethod
+    def from_rows(
+        cls,
+        items: Sequence[Dict[str, Any]],
+        expenses: Sequence[Dict[str, Any]] = (),
+    ) -> "LineItemFrame":
+        """
+        Build the frame from ``forecast_line_items`` and ``actual_expenses`` rows.
+
+        An item's actual cost is the sum of expenses linked to it, falling back
+        to its recorded ``actual_cost_cents`` when nothing is linked. Expenses
+        not linked to a loaded item are kept per project as unallocated cost.
+        """
+        count = len(items)
+        item_id = _int_column(items, "id")
+        labels = np.array([row.get("category") or UNCATEGORIZED for row in items], dtype=object)
+        categories, category_code = np.unique(labels, return_inverse=True)
+        status = np.array([str(row.get("status") or "").lower() for row in items], dtype=object)
+
+        recorded_actual = _int_column(items, "actual_cost_cents")
+        linked_actual = np.zeros(count, dtype=np.int64)
+        has_linked = np.zeros(count, dtype=bool)
+
+        expense_item = _int_column(expenses, "forecast_line_item_id")
+        expense_amount = _int_column(expenses, "amount_spent_cents")
+        matched = np.zeros(len(expenses), dtype=bool)
+        if count and len(expenses):
+            order = np.argsort(item_id, kind="stable")
+            sorted_ids = item_id[order]
+            position = np.clip(np.searchsorted(sorted_ids, expense_item), 0, count - 1)
+            matched = (expense_item > 0) & (sorted_ids[position] == expense_item)
+            linked_rows = order[position[matched]]
+            linked_actual = _group_sum(linked_rows, expense_amount[matched], count)
+            has_linked[linked_rows] = True
+
+        unallocated_project = _int_column(expenses, "project_id")[~matched]
+        unallocated_ids, unallocated_code = np.unique(unallocated_project, return_inverse=True)
+        unallocated_actual = _group_sum(unallocated_code, expense_amount[~matched], len(unallocated_ids))
+
+        return cls(
+            item_id=item_id,
+            project_id=_int_column(items, "project_id"),
+            category_code=np.asarray(category_code, dtype=np.int64),
+            categories=[str(label) for label in categories],
+            budget=_int_column(items, "estimated_cost_cents"),
+            actual=np.where(has_linked, linked_actual, recorded_actual),
+            progress=_int_column(items, "progress_percent").astype(np.float64) / 100.0,
+            complete=status == COMPLETE_STATUS,
+            unallocated_project_id=unallocated_ids.astype(np.int64),
+            unallocated_actual=unallocated_actual,
+        )
+
+
+@dataclass
+class GroupTotals:
+    """Earned-value totals for a set of groups (categories or projects)."""
+    keys: List[Any]
+    budget: np.ndarray
+    actual: np.ndarray
+    earned: np.ndarray
+    etc: np.ndarray
+    eac: np.ndarray
+
+    @property
+    def vac(self) -> np.ndarray:
+        return self.budget - self.eac
+
+    @property
+    def cpi(self) -> np.ndarray:
+        return _ratio(self.earned.astype(np.float64), self.actual.astype(np.float64))
+
+    def rows(self, key_name: str) -> List[Dict[str, Any]]:
+        """Group totals as plain dicts (money in cents, CPI as float or None)."""
+        columns = zip(
+            self.keys, self.budget.tolist(), self.actual.tolist(), self.earned.tolist(),
+            self.etc.tolist(), self.eac.tolist(), self.vac.tolist(), _optional_floats(self.cpi),
+        )
+        return [
+            {
+                key_name: key,
+                "budget": budget,
+                "actual": actual,
+                "earned_value": earned,
+                "etc": etc,
+                "eac": eac,
+                "variance": vac,
+                "cpi": cpi,
+            }
+            for key, budget, actual, earned, etc, eac, vac, cpi in columns
+        ]
+
+
+@dataclass
+class CostReport:
+    """Per line item, per category and per project EAC results."""
+    frame: LineItemFrame
+    earned: np.ndarray
+    cpi: np.ndarray
+    etc: np.ndarray
+    eac: np.ndarray
+    categories: GroupTotals
+    projects: GroupTotals
+
+    @property
+    def variance(self) -> np.ndarray:
+        return self.frame.budget - self.eac
+
+    def line_item_rows(self) -> List[Dict[str, Any]]:
+        """Line item results as plain dicts (money in cents)."""
+        frame = self.frame
+        labels = np.asarray(frame.categories, dtype=object)[frame.category_code] if len(frame) else []
+        columns = zip(
+            frame.item_id.tolist(), frame.project_id.tolist(), list(labels),
+            frame.budget.tolist(), frame.actual.tolist(), self.earned.tolist(),
+            self.etc.tolist(), self.eac.tolist(), self.variance.tolist(), _optional_floats(self.cpi),
+        )
+        return [
+            {
+                "id": item_id,
+                "project_id": project_id,
+                "category": category,
+                "budget": budget,
+                "actual": actual,
+                "earned_value": earned,
+                "etc": etc,
+                "eac": eac,
+                "variance": vac,
+                "cpi": cpi,
+            }
+            for item_id, project_id, category, budget, actual, earned, etc, eac, vac, cpi in columns
+        ]
+
+    def project_rows(self, budgets: Optional[Dict[int, Optional[int]]] = None) -> List[Dict[str, Any]]:
+        """
+        Project results as plain dicts.
+
+        When project budgets are given, ``budget_variance`` compares the fixed
+        project budget with the estimate at completion.
+        """
+        rows = self.projects.rows("project_id")
+        for row in rows:
+            total_budget = (budgets or {}).get(row["project_id"])
+            row["total_budget"] = total_budget
+            row["budget_variance"] = None if total_budget is None else total_budget - row["eac"]
+        return rows
+
+
+def compute_cost_report(frame: LineItemFrame) -> CostReport:
+    """Score every line item and roll the results up by category and project."""
+    complete = frame.complete
+    budget = frame.budget.astype(np.float64)
+    actual = frame.actual.astype(np.float64)
+
+    progress = np.where(complete, 1.0, np.clip(frame.progress, 0.0, 1.0))
+    earned = budget * progress
+    cpi = _ratio(earned, actual)
+
+    # Remaining work is scaled by the item's own cost performance once it has
+    # both spend and progress; otherwise it is assumed to cost what was budgeted.
+    remaining = budget - earned
+    usable = np.isfinite(cpi) & (cpi > 0)
+    etc = np.where(complete, 0.0, np.where(usable, remaining / np.where(usable, cpi, 1.0), remaining))
+
+    earned_cents = np.rint(earned).astype(np.int64)
+    etc_cents = np.rint(etc).astype(np.int64)
+    eac_cents = frame.actual + etc_cents
+
+    categories = _rollup(frame.category_code, list(frame.categories), frame, earned_cents, etc_cents)
+
+    project_ids = np.union1d(frame.project_id, frame.unallocated_project_id)
+    project_code = np.searchsorted(project_ids, frame.project_id)
+    projects = _rollup(project_code, project_ids.tolist(), frame, earned_cents, etc_cents)
+    if len(frame.unallocated_project_id):
+        unallocated = np.zeros(len(project_ids), dtype=np.int64)
+        unallocated[np.searchsorted(project_ids, frame.unallocated_project_id)] = frame.unallocated_actual
+        projects.actual = projects.actual + unallocated
+        projects.eac = projects.eac + unallocated
+
+    return CostReport(
+        frame=frame,
+        earned=earned_cents,
+        cpi=cpi,
+        etc=etc_cents,
+        eac=eac_cents,
+        categories=categories,
+        projects=projects,
+    )
+
+
+def _rollup(
+    codes: np.ndarray,
+    keys: List[Any],
+    frame: LineItemFrame,
+    earned: np.ndarray,
+    etc: np.ndarray,
+) -> GroupTotals:
+    size = len(keys)
+    budget = _group_sum(codes, frame.budget, size)
+    actual = _group_sum(codes, frame.actual, size)
+    etc_total = _group_sum(codes, etc, size)
+    return GroupTotals(
+        keys=keys,
+        budget=budget,
+        actual=actual,
+        earned=_group_sum(codes, earned, size),
+        etc=etc_total,
+        eac=actual + etc_total,
+    )
+
+
+def project_budgets(projects: Iterable[Dict[str, Any]]) -> Dict[int, Optional[int]]:
+    """Map project id to ``total_budget_cents`` from ``projects`` rows."""
+    return {row["id"]: row.get("total_budget_cents") for row in projects}
@@ -0,0 +1,50 @@
+"""Paged row loading from Supabase for analytics workloads."""
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+# PostgREST caps a single response (1000 rows by default), so analytics
+# queries over a whole portfolio are read in pages.
+DEFAULT_PAGE_SIZE = 1000
+
+
+def fetch_rows(
+    client: Any,
+    table: str,
+    columns: str,
+    filters: Optional[Dict[str, Any]] = None,
+    apply: Optional[Callable[[Any], Any]] = None,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    order: Sequence[str] = ("id",),
+) -> List[Dict[str, Any]]:
+    """
+    Read every matching row of ``table`` in pages ordered by ``order``.
+
+    ``filters`` are applied as equality filters; ``apply`` can add any other
+    builder calls (ranges, ``in_`` lists) to the query before paging.
+    ``order`` must identify rows uniquely for paging to be stable.
+    """
+    rows: List[Dict[str, Any]] = []
+    start = 0
+    while True:
+        query = client.table(table).select(columns)
+        for column, value in (filters or {}).items():
+            query = query.eq(column, value)
+        if apply is not None:
+            query = apply(query)
+        for column in order:
+            query = query.order(column)
+        page = query.range(start, start + page_size - 1).execute().data or []
+        rows.extend(page)
+        if len(page) < page_size:
+            return rows
+        start += page_size
+
+
+def change_watermark(client: Any, user_id: str) -> int:
+    """
+    Highest change of the user committed so far (0 for none).
+
+    It moves on every write to the user's projects, line items, expenses and
+    draws (deletes included), so it versions anything derived from them.
+    """
+    response = client.rpc('change_watermark', {'p_user_id': user_id}).execute()
+    return response.data or 0
@@ -0,0 +1,322 @@
+"""
+Monte Carlo budget-risk simulation.
+
+Each category's cost overrun is modelled as lognormal: ``log(actual / budget)``
+of completed line items across the portfolio gives the category's mean and
+spread, falling back to the pooled history when a category has too few
+completed items. A simulation draws an overrun factor for the remaining work
+of every open line item in a project and sums the trial costs, giving the
+distribution of final project cost. Sampling is vectorized and chunked,
+and runs in a process pool so it never blocks the API workers.
+
+Memory grows with the trial count only through the trial totals (8 bytes
+each, 8 MB at the endpoint's cap of a million): normal draws are held a
+chunk at a time, and per-category percentiles come from a sample of the
+first ``CATEGORY_SAMPLE_TRIALS`` trials, with means from running sums.
+"""
+import hashlib
+import multiprocessing
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, Hashable, List, Optional
+
+import numpy as np
+
+from .cost import LineItemFrame
+
+PERCENTILES = (50, 80, 95)
+
+# Categories with fewer completed items than this use the pooled fit
+MIN_CATEGORY_SAMPLES = 5
+# Spread assumed when there is no usable history at all
+DEFAULT_SIGMA = 0.15
+# Upper bound on normal draws held in memory at once (~16 MB of float64)
+CHUNK_ELEMENTS = 2_000_000
+# Trials kept per category for its percentiles. Trials are independent, so
+# the first ones are an unbiased sample of them all.
+CATEGORY_SAMPLE_TRIALS = 50_000
+
+FIT_CATEGORY = "category"
+FIT_POOLED = "pooled"
+FIT_DEFAULT = "default"
+
+
+@dataclass
+class OverrunModel:
+    """Lognormal overrun parameters per category, aligned with ``categories``."""
+    categories: List[str]
+    mu: np.ndarray
+    sigma: np.ndarray
+    samples: np.ndarray
+    source: List[str]
+
+    def index(self, category: str) -> int:
+        return self.categories.index(category)
+
+
+def fit_overrun_model(frame: LineItemFrame, min_samples: int = MIN_CATEGORY_SAMPLES) -> OverrunModel:
+    """Fit per-category overrun distributions from completed line items."""
+    size = len(frame.categories)
+    usable = frame.complete & (frame.budget > 0) & (frame.actual > 0)
+    codes = frame.category_code[usable]
+    log_ratio = np.log(frame.actual[usable] / frame.budget[usable])
+
+    count = np.bincount(codes, minlength=size).astype(np.float64)
+    total = np.bincount(codes, weights=log_ratio, minlength=size)
+    squares = np.bincount(codes, weights=log_ratio ** 2, minlength=size)
+
+    if len(log_ratio) >= 2:
+        pooled_mu, pooled_sigma, pooled_source = float(log_ratio.mean()), float(log_ratio.std(ddof=1)), FIT_POOLED
+    else:
+        pooled_mu, pooled_sigma, pooled_source = 0.0, DEFAULT_SIGMA, FIT_DEFAULT
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = total / np.maximum(count, 1)
+        variance = (squares - count * mean ** 2) / np.maximum(count - 1, 1)
+
+    own = count >= max(min_samples, 2)
+    mu = np.where(own, mean, pooled_mu)
+    sigma = np.where(own, np.sqrt(np.maximum(variance, 0.0)), pooled_sigma)
+
+    return OverrunModel(
+        categories=list(frame.categories),
+        mu=mu,
+        sigma=sigma,
+        samples=count.astype(np.int64),
+        source=[FIT_CATEGORY if fitted else pooled_source for fitted in own.tolist()],
+    )
+
+
+@dataclass
+class RiskInputs:
+    """Everything a simulation of one project needs, in plain arrays."""
+    project_id: int
+    categories: List[str]
+    category_budget: np.ndarray
+    category_committed: np.ndarray
+    mu: np.ndarray
+    sigma: np.ndarray
+    samples: np.ndarray
+    source: List[str]
+    item_category: np.ndarray
+    item_remaining: np.ndarray
+    unallocated: int
+    total_budget: Optional[int]
+
+    @property
+    def committed(self) -> int:
+        """Cost already incurred, which every trial includes as-is."""
+        return int(self.category_committed.sum()) + self.unallocated
+
+    def digest(self, trials: int, seed: Optional[int]) -> str:
+        """Content hash identifying this version of the project's inputs."""
+        sha = hashlib.sha256()
+        sha.update(repr((self.project_id, self.categories, self.source, self.unallocated,
+                         self.total_budget, trials, seed)).encode())
+        for array in (self.category_budget, self.category_committed, self.mu, self.sigma,
+                      self.item_category, self.item_remaining):
+            sha.update(np.ascontiguousarray(array).tobytes())
+        return sha.hexdigest()
+
+
+def build_risk_inputs(
+    frame: LineItemFrame,
+    project_id: int,
+    model: OverrunModel,
+    total_budget: Optional[int] = None,
+) -> RiskInputs:
+    """Select one project's line items and attach the fitted overrun parameters."""
+    mask = frame.project_id == project_id
+    codes = frame.category_code[mask]
+    present, local = np.unique(codes, return_inverse=True)
+    size = len(present)
+
+    budget = frame.budget[mask]
+    actual = frame.actual[mask]
+    progress = np.where(frame.complete[mask], 1.0, np.clip(frame.progress[mask], 0.0, 1.0))
+    remaining = np.where(frame.complete[mask], 0.0, budget * (1.0 - progress))
+    open_items = remaining > 0
+
+    unallocated = frame.unallocated_actual[frame.unallocated_project_id == project_id]
+
+    return RiskInputs(
+        project_id=project_id,
+        categories=[model.categories[code] for code in present.tolist()],
+        category_budget=np.bincount(local, weights=budget, minlength=size).astype(np.int64),
+        category_committed=np.bincount(local, weights=actual, minlength=size).astype(np.int64),
+        mu=model.mu[present],
+        sigma=model.sigma[present],
+        samples=model.samples[present],
+        source=[model.source[code] for code in present.tolist()],
+        item_category=np.asarray(local, dtype=np.int64)[open_items],
+        item_remaining=remaining[open_items],
+        unallocated=int(unallocated.sum()),
+        total_budget=total_budget,
+    )
+
+
+@dataclass
+class SimulationResult:
+    """Percentiles of simulated final cost (cents), overall and per category."""
+    trials: int
+    mean: float
+    percentiles: np.ndarray
+    probability_over_budget: Optional[float]
+    category_mean: np.ndarray
+    category_percentiles: np.ndarray
+
+
+def simulate(
+    inputs: RiskInputs,
+    trials: int,
+    seed: int,
+    chunk_elements: int = CHUNK_ELEMENTS,
+    category_sample_trials: int = CATEGORY_SAMPLE_TRIALS,
+) -> SimulationResult:
+    """
+    Run ``trials`` Monte Carlo trials of a project's final cost.
+
+    Items are sorted by category so per-category trial costs are a single
+    ``np.add.reduceat`` per chunk. Category means use every trial; category
+    percentiles use the first ``category_sample_trials``.
+    """
+    rng = np.random.default_rng(seed)
+    size = len(inputs.categories)
+
+    order = np.argsort(inputs.item_category, kind="stable")
+    item_category = inputs.item_category[order]
+    remaining = inputs.item_remaining[order]
+    mu = inputs.mu[item_category]
+    sigma = inputs.sigma[item_category]
+    sampled, starts = np.unique(item_category, return_index=True)
+
+    count = len(remaining)
+    committed = inputs.category_committed.astype(np.float64)
+    totals = np.full(trials, float(inputs.committed))
+    category_sum = np.zeros(size)
+    kept = min(trials, max(category_sample_trials, 1))
+    by_category = np.tile(committed, (kept, 1))
+    if count:
+        rows = max(1, chunk_elements // count)
+        for start in range(0, trials, rows):
+            stop = min(start + rows, trials)
+            costs = remaining * np.exp(mu + sigma * rng.standard_normal((stop - start, count)))
+            category_costs = np.add.reduceat(costs, starts, axis=1)
+            category_sum[sampled] += category_costs.sum(axis=0)
+            if start < kept:
+                by_category[start:min(stop, kept), sampled] += category_costs[:kept - start]
+            totals[start:stop] += category_costs.sum(axis=1)
+
+    over_budget = None
+    if inputs.total_budget is not None:
+        over_budget = float(np.mean(totals > inputs.total_budget))
+
+    return SimulationResult(
+        trials=trials,
+        mean=float(totals.mean()),
+        percentiles=np.percentile(totals, PERCENTILES),
+        probability_over_budget=over_budget,
+        category_mean=committed + category_sum / trials if size else np.zeros(0),
+        category_percentiles=np.percentile(by_category, PERCENTILES, axis=0).T if size else np.zeros((0, len(PERCENTILES))),
+    )
+
+
+def seed_from_digest(digest: str) -> int:
+    """Stable seed for a given input version, so repeated runs agree."""
+    return int(digest[:16], 16)
+
+
+def risk_report(inputs: RiskInputs, result: SimulationResult) -> Dict[str, Any]:
+    """Simulation results as plain dicts (money in whole cents)."""
+    def cents(values) -> List[int]:
+        return np.rint(values).astype(np.int64).tolist()
+
+    p50, p80, p95 = cents(result.percentiles)
+    categories = [
+        {
+            "category": category,
+            "budget": budget,
+            "committed": committed,
+            "mean": mean,
+            "p50": pct[0],
+            "p80": pct[1],
+            "p95": pct[2],
+            "overrun_mu": round(mu, 4),
+            "overrun_sigma": round(sigma, 4),
+            "samples": samples,
+            "fit": source,
+        }
+        for category, budget, committed, mean, pct, mu, sigma, samples, source in zip(
+            inputs.categories, inputs.category_budget.tolist(), inputs.category_committed.tolist(),
+            cents(result.category_mean), np.rint(result.category_percentiles).astype(np.int64).tolist(),
+            inputs.mu.tolist(), inputs.sigma.tolist(), inputs.samples.tolist(), inputs.source,
+        )
+    ]
+    return {
+        "project_id": inputs.project_id,
+        "trials": result.trials,
+        "total_budget": inputs.total_budget,
+        "committed": inputs.committed,
+        "mean": int(round(result.mean)),
+        "p50": p50,
+        "p80": p80,
+        "p95": p95,
+        "probability_over_budget": result.probability_over_budget,
+        "categories": categories,
+    }
+
+
+class SimulationCache:
+    """Thread-safe LRU cache of simulations, keyed by whatever identifies their inputs."""
+
+    def __init__(self, max_entries: int = 128):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            result = self._entries.get(key)
+            if result is not None:
+                self._entries.move_to_end(key)
+            return result
+
+    def put(self, key: Hashable, result: Any) -> None:
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def get_process_pool(max_workers: Optional[int] = None) -> ProcessPoolExecutor:
+    """
+    Shared process pool for simulations, created on first use.
+
+    Workers are spawned rather than forked so they don't inherit the API
+    server's threads and open connections.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+
+def shutdown_process_pool() -> None:
+    """Stop the simulation workers (called on application shutdown)."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
@@ -0,0 +1,248 @@
+"""
+Nearest-neighbor search over completed projects for forecast generation.
+
+Each completed project is described by its floor area, budget and category
+mix (the share of its actual cost in each category). A new project is
+compared against every indexed project in one vectorized pass and the k
+most similar ones are blended into proposed line items: each category's
+cost is scaled to the new project's size and averaged, weighted by
+similarity.
+
+The index is kept per user and updated incrementally: each sync only loads
+line items for projects that completed since the last one or whose line
+items or expenses changed since then, and drops projects that are no longer
+complete.
+"""
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from .cost import LineItemFrame
+
+DEFAULT_NEIGHBORS = 5
+# Categories must appear in projects carrying this share of the neighbors'
+# total similarity to be proposed
+MIN_SUPPORT = 0.5
+# Weight of the category-mix distance relative to the size/budget distance
+MIX_WEIGHT = 1.0
+
+
+def _log_feature(value: Optional[float]) -> float:
+    return float(np.log1p(value)) if value else np.nan
+
+
+@dataclass
+class Neighbors:
+    """Nearest projects, most similar first."""
+    project_id: np.ndarray
+    similarity: np.ndarray
+    rows: np.ndarray
+
+
+class ProjectFeatureIndex:
+    """Feature matrix of completed projects for one user."""
+
+    def __init__(self):
+        self.project_id = np.zeros(0, dtype=np.int64)
+        self.square_feet = np.zeros(0)
+        self.budget = np.zeros(0)
+        self.categories: List[str] = []
+        self.costs = np.zeros((0, 0))
+        self._columns: Dict[str, int] = {}
+        # Change watermark the indexed costs were loaded at (None before the first sync)
+        self.watermark: Optional[int] = None
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self.project_id)
+
+    def _column(self, category: str) -> int:
+        column = self._columns.get(category)
+        if column is None:
+            column = self._columns[category] = len(self.categories)
+            self.categories.append(category)
+            self.costs = np.pad(self.costs, ((0, 0), (0, 1)))
+        return column
+
+    def upsert(self, projects: Sequence[Dict[str, Any]], frame: LineItemFrame) -> None:
+        """Add or replace projects using their actual cost per category from ``frame``."""
+        with self._lock:
+            self.remove(row["id"] for row in projects)
+            if not projects:
+                return
+            columns = np.array([self._column(name) for name in frame.categories], dtype=np.int64)
+            ids = np.array([row["id"] for row in projects], dtype=np.int64)
+
+            costs = np.zeros((len(ids), len(self.categories)))
+            position = np.searchsorted(np.sort(ids), frame.project_id)
+            order = np.argsort(ids)
+            known = np.isin(frame.project_id, ids)
+            if known.any() and len(columns):
+                rows = order[position[known]]
+                np.add.at(costs, (rows, columns[frame.category_code[known]]), frame.actual[known])
+
+            self.project_id = np.concatenate([self.project_id, ids])
+            self.square_feet = np.concatenate([self.square_feet, [row.get("total_sqft") or np.nan for row in projects]])
+            self.budget = np.concatenate([self.budget, [row.get("total_budget_cents") or np.nan for row in projects]])
+            self.costs = np.vstack([self.costs, costs])
+
+    def remove(self, project_ids: Iterable[int]) -> None:
+        with self._lock:
+            keep = ~np.isin(self.project_id, np.fromiter(project_ids, dtype=np.int64))
+            self.project_id = self.project_id[keep]
+            self.square_feet = self.square_feet[keep]
+            self.budget = self.budget[keep]
+            self.costs = self.costs[keep]
+
+    def sync(
+        self,
+        completed: Sequence[Dict[str, Any]],
+        load_frame: Callable[[List[int]], LineItemFrame],
+        stale: Iterable[int] = (),
+        watermark: Optional[int] = None,
+    ) -> int:
+        """
+        Bring the index in line with the user's completed projects.
+
+        Only projects not yet indexed, or listed in ``stale`` because their
+        costs changed, are loaded through ``load_frame``; floor area and
+        budget of the other indexed projects are refreshed from
+        ``completed``. ``watermark`` is remembered as the change the index
+        is now current with. Returns the number of projects loaded.
+        """
+        with self._lock:
+            by_id = {row["id"]: row for row in completed}
+            self.remove(set(self.project_id.tolist()) - set(by_id))
+
+            if len(self):
+                self.square_feet = np.array([by_id[pid].get("total_sqft") or np.nan for pid in self.project_id.tolist()], dtype=np.float64)
+                self.budget = np.array([by_id[pid].get("total_budget_cents") or np.nan for pid in self.project_id.tolist()], dtype=np.float64)
+
+            load_ids = sorted((set(by_id) - set(self.project_id.tolist())) | (set(stale) & set(by_id)))
+            if load_ids:
+                self.upsert([by_id[pid] for pid in load_ids], load_frame(load_ids))
+            if watermark is not None:
+                self.watermark = watermark
+            return len(load_ids)
+
+    def _numeric(self, square_feet: np.ndarray, budget: np.ndarray) -> np.ndarray:
+        return np.column_stack([np.log1p(square_feet), np.log1p(budget / 100.0)])
+
+    def nearest(
+        self,
+        k: int,
+        square_feet: Optional[int] = None,
+        budget: Optional[int] = None,
+        mix: Optional[Dict[str, int]] = None,
+        exclude: Iterable[int] = (),
+    ) -> Neighbors:
+        """
+        The ``k`` indexed projects most similar to the target.
+
+        Distance combines standardized log floor area and log budget (missing
+        values are skipped) with the cosine distance between category mixes
+        when the target already has line items.
+        """
+        with self._lock:
+            candidates = ~np.isin(self.project_id, np.fromiter(exclude, dtype=np.int64))
+            if not candidates.any():
+                return Neighbors(np.zeros(0, dtype=np.int64), np.zeros(0), np.zeros(0, dtype=np.int64))
+
+            features = self._numeric(self.square_feet, self.budget)
+            target = np.array([_log_feature(square_feet), _log_feature(budget / 100.0 if budget else None)])
+            scale = np.nanstd(features, axis=0) if len(self) > 1 else np.ones(2)
+            scale = np.where(np.isfinite(scale) & (scale > 0), scale, 1.0)
+            with np.errstate(invalid="ignore"):
+                squared = ((features - target) / scale) ** 2
+            usable = np.isfinite(squared)
+            numeric = np.sqrt(np.where(usable, squared, 0.0).sum(axis=1) / np.maximum(usable.sum(axis=1), 1))
+            # Projects sharing no comparable feature with the target rank last
+            numeric = np.where(usable.any(axis=1), numeric, np.inf)
+
+            distance = numeric
+            if mix:
+                vector = np.zeros(len(self.categories))
+                for category, cost in mix.items():
+                    column = self._columns.get(category)
+                    if column is not None:
+                        vector[column] += cost
+                norms = np.linalg.norm(self.costs, axis=1) * np.linalg.norm(vector)
+                with np.errstate(divide="ignore", invalid="ignore"):
+                    cosine = np.where(norms > 0, self.costs @ vector / np.where(norms > 0, norms, 1.0), 0.0)
+                distance = np.where(np.isfinite(numeric), numeric, 0.0) + MIX_WEIGHT * (1.0 - cosine)
+
+            rows = np.flatnonzero(candidates)
+            ranked = rows[np.argsort(distance[rows], kind="stable")][:k]
+            similarity = 1.0 / (1.0 + np.where(np.isfinite(distance[ranked]), distance[ranked], np.inf))
+            return Neighbors(self.project_id[ranked], similarity, ranked)
+
+    def propose(
+        self,
+        neighbors: Neighbors,
+        square_feet: Optional[int] = None,
+        budget: Optional[int] = None,
+        min_support: float = MIN_SUPPORT,
+    ) -> List[Dict[str, Any]]:
+        """
+        Blend the neighbors' actual category costs into proposed line items.
+
+        Costs are scaled by floor area when both sides have one, else by
+        budget, and averaged with similarity weights over the neighbors that
+        have the category.
+        """
+        with self._lock:
+            if not len(neighbors.rows):
+                return []
+            costs = self.costs[neighbors.rows]
+            area = self.square_feet[neighbors.rows]
+            spend = self.budget[neighbors.rows]
+
+            ratio = np.ones(len(neighbors.rows))
+            if square_feet:
+                ratio = np.where(np.isfinite(area) & (area > 0), square_feet / np.where(area > 0, area, 1.0), np.nan)
+            if budget:
+                by_budget = np.where(np.isfinite(spend) & (spend > 0), budget / np.where(spend > 0, spend, 1.0), np.nan)
+                ratio = np.where(np.isfinite(ratio), ratio, by_budget)
+            ratio = np.where(np.isfinite(ratio), ratio, 1.0)
+
+            weights = neighbors.similarity
+            present = costs > 0
+            support = (present * weights[:, None]).sum(axis=0) / max(weights.sum(), 1e-12)
+            scaled = costs * ratio[:, None]
+            weight_sum = (present * weights[:, None]).sum(axis=0)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                blended = np.where(weight_sum > 0, (scaled * weights[:, None]).sum(axis=0) / np.where(weight_sum > 0, weight_sum, 1.0), 0.0)
+
+            selected = np.flatnonzero((support >= min_support) & (blended > 0))
+            ids = neighbors.project_id.tolist()
+            return [
+                {
+                    "category": self.categories[column],
+                    "estimated_cost_cents": int(round(blended[column])),
+                    "support": round(float(support[column]), 4),
+                    "source_project_ids": [pid for pid, has in zip(ids, present[:, column].tolist()) if has],
+                }
+                for column in selected[np.argsort(-blended[selected], kind="stable")].tolist()
+            ]
+
+
+class ProjectIndexRegistry:
+    """Per-user feature indexes, least recently used evicted past ``max_users``."""
+
+    def __init__(self, max_users: int = 256):
+        self.max_users = max_users
+        self._indexes: "OrderedDict[str, ProjectFeatureIndex]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id: str) -> ProjectFeatureIndex:
+        with self._lock:
+            index = self._indexes.get(user_id)
+            if index is None:
+                index = self._indexes[user_id] = ProjectFeatureIndex()
+            self._indexes.move_to_end(user_id)
+            while len(self._indexes) > self.max_users:
+                self._indexes.popitem(last=False)
+            return index
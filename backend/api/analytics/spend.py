@@ -0,0 +1,147 @@
+"""
+Time-bucketed spend aggregation for burn charts.
+
+Spend is normally read from ``expense_daily_rollups``, which database
+triggers keep at one row per project, day, category and vendor, so a chart
+costs a few rows per day no matter how many expenses were entered. Queries
+the rollup can't answer (filtering by a single line item) fall back to a
+grouped SQL query over ``actual_expenses`` that truncates dates in the
+database. Either way the daily rows are re-bucketed here with NumPy.
+"""
+import uuid
+from datetime import date
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from api.models import ActualExpense, ForecastLineItem
+from .cost import UNCATEGORIZED
+
+BUCKETS = ("day", "week", "month", "quarter", "year")
+GROUP_DIMENSIONS = {"project": "project_id", "category": "category", "vendor": "vendor"}
+ROLLUP_COLUMNS = "project_id,category,vendor,day,amount_cents,expense_count"
+# Primary key order of expense_daily_rollups within a user, for stable paging
+ROLLUP_ORDER = ("day", "project_id", "category", "vendor")
+UNKNOWN_VENDOR = "Unknown"
+
+
+def bucket_start(days: np.ndarray, bucket: str) -> np.ndarray:
+    """First day of the bucket containing each day (weeks start on Monday)."""
+    days = days.astype("datetime64[D]")
+    if bucket == "day":
+        return days
+    if bucket == "week":
+        # Day 0 (1970-01-01) was a Thursday
+        offset = (days.astype(np.int64) + 3) % 7
+        return days - offset.astype("timedelta64[D]")
+    if bucket == "month":
+        return days.astype("datetime64[M]").astype("datetime64[D]")
+    if bucket == "quarter":
+        months = days.astype("datetime64[M]").astype(np.int64)
+        return (months - months % 3).astype("datetime64[M]").astype("datetime64[D]")
+    if bucket == "year":
+        return days.astype("datetime64[Y]").astype("datetime64[D]")
+    raise ValueError(f"Unknown bucket: {bucket}")
+
+
+def aggregate_spend(rows: Sequence[Dict[str, Any]], bucket: str, group_by: Sequence[str] = ()) -> List[Dict[str, Any]]:
+    """
+    Sum daily spend rows into buckets, optionally split by group dimensions.
+
+    Rows need ``day``, ``amount_cents`` and ``expense_count`` plus the
+    columns named by ``group_by``. Results are ordered by period, then group.
+    """
+    days = np.array([str(row["day"])[:10] if row.get("day") else None for row in rows], dtype="datetime64[D]")
+    dated = ~np.isnat(days)
+    rows = [row for row, keep in zip(rows, dated.tolist()) if keep]
+    if not rows:
+        return []
+
+    periods = bucket_start(days[dated], bucket)
+    period_values, code = np.unique(periods, return_inverse=True)
+    code = code.astype(np.int64)
+
+    labels = {}
+    for dimension in group_by:
+        column = GROUP_DIMENSIONS[dimension]
+        values, dimension_code = np.unique(np.array([row.get(column) for row in rows], dtype=object), return_inverse=True)
+        labels[column] = values
+        code = code * len(values) + dimension_code
+
+    keys, group = np.unique(code, return_inverse=True)
+    amount = np.bincount(group, weights=[row.get("amount_cents") or 0 for row in rows], minlength=len(keys))
+    count = np.bincount(group, weights=[row.get("expense_count") or 0 for row in rows], minlength=len(keys))
+
+    # Decode the mixed-radix keys back into their parts, last dimension first
+    parts = {}
+    remainder = keys
+    for dimension in reversed(list(group_by)):
+        column = GROUP_DIMENSIONS[dimension]
+        size = len(labels[column])
+        parts[column] = labels[column][remainder % size]
+        remainder = remainder // size
+    period_dates = period_values[remainder].tolist()
+
+    results = []
+    for index, (period, total, expenses) in enumerate(zip(period_dates, np.rint(amount).astype(np.int64).tolist(), count.astype(np.int64).tolist())):
+        row = {"period": period, "amount": total, "expense_count": expenses}
+        for column, values in parts.items():
+            value = values[index]
+            row[column] = value.item() if isinstance(value, np.generic) else value
+        results.append(row)
+    return results
+
+
+def query_daily_spend(
+    db: Session,
+    user_id: str,
+    bucket: str,
+    group_by: Sequence[str] = (),
+    project_id: Optional[int] = None,
+    forecast_line_item_id: Optional[int] = None,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Grouped spend straight from ``actual_expenses`` for ad-hoc queries.
+
+    On PostgreSQL dates are truncated to the bucket with ``date_trunc`` so
+    only one row per bucket and group leaves the database; other databases
+    group by day and leave the bucketing to :func:`aggregate_spend`.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        day = func.date_trunc(bucket, ActualExpense.date).label("day")
+    else:
+        day = ActualExpense.date.label("day")
+
+    dimensions = {
+        "project_id": ActualExpense.project_id,
+        "category": func.coalesce(ForecastLineItem.category, UNCATEGORIZED),
+        "vendor": func.coalesce(func.nullif(func.trim(ActualExpense.vendor), ""), UNKNOWN_VENDOR),
+    }
+    grouped = [dimensions[GROUP_DIMENSIONS[dimension]].label(GROUP_DIMENSIONS[dimension]) for dimension in group_by]
+
+    query = (
+        select(
+            day,
+            *grouped,
+            func.sum(ActualExpense.amount_spent_cents).label("amount_cents"),
+            func.count(ActualExpense.id).label("expense_count"),
+        )
+        .select_from(ActualExpense)
+        .outerjoin(ForecastLineItem, ForecastLineItem.id == ActualExpense.forecast_line_item_id)
+        .where(ActualExpense.user_id == uuid.UUID(str(user_id)), ActualExpense.date.isnot(None))
+        .group_by(day, *grouped)
+    )
+    if project_id is not None:
+        query = query.where(ActualExpense.project_id == project_id)
+    if forecast_line_item_id is not None:
+        query = query.where(ActualExpense.forecast_line_item_id == forecast_line_item_id)
+    if start is not None:
+        query = query.where(ActualExpense.date >= start)
+    if end is not None:
+        query = query.where(ActualExpense.date <= end)
+
+    return [dict(row._mapping) for row in db.execute(query)]
@@ -0,0 +1,170 @@
+"""
+Top-k vendor spend ranking.
+
+Vendors are grouped by their normalized key (``actual_expenses.vendor_key``)
+so spelling variants of the same supplier collapse. The ranking is normally
+computed in the database by the ``top_vendors`` SQL function; on the
+direct-DB path expenses are streamed through a weighted Space-Saving
+summary, which keeps a fixed number of counters however many distinct
+vendors there are and reports how far each total could be overstated.
+"""
+import heapq
+import uuid
+from datetime import date
+from typing import Any, Dict, Hashable, List, Optional, Sequence
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from api.core.vendors import normalize_vendor
+from api.models import ActualExpense, ForecastLineItem
+from .cost import UNCATEGORIZED
+
+VENDOR_SORTS = ("spend", "count")
+STREAM_BATCH_SIZE = 5000
+
+
+class SpaceSaving:
+    """
+    Weighted Space-Saving heavy hitters summary with ``capacity`` counters.
+
+    Any item whose true weight exceeds ``total_weight / capacity`` is
+    guaranteed to be tracked. When a new item arrives and every counter is
+    taken, the smallest counter is reassigned to it and its old weight is
+    recorded as the new item's error (the most its weight can be overstated).
+    """
+
+    def __init__(self, capacity: int):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self.total_weight = 0
+        self.total_amount = 0
+        self.total_count = 0
+        self._counters: Dict[Hashable, Dict[str, Any]] = {}
+        # Lazily invalidated min-heap of (weight, key); compacted when it grows
+        self._heap: List[Any] = []
+
+    def __len__(self) -> int:
+        return len(self._counters)
+
+    def add(self, key: Hashable, weight: int, amount: int, name: Optional[str] = None) -> None:
+        """Record one expense of ``amount`` cents counted with ``weight`` for ranking."""
+        self.total_weight += weight
+        self.total_amount += amount
+        self.total_count += 1
+
+        counter = self._counters.get(key)
+        if counter is None:
+            if len(self._counters) < self.capacity:
+                counter = {"weight": 0, "error": 0, "amount": 0, "count": 0, "name": name}
+            else:
+                evicted_key, evicted = self._pop_min()
+                counter = {
+                    "weight": evicted["weight"],
+                    "error": evicted["weight"],
+                    "amount": evicted["amount"],
+                    "count": evicted["count"],
+                    "name": name,
+                }
+            self._counters[key] = counter
+
+        counter["weight"] += weight
+        counter["amount"] += amount
+        counter["count"] += 1
+        if counter["name"] is None:
+            counter["name"] = name
+        heapq.heappush(self._heap, (counter["weight"], key))
+        if len(self._heap) > 4 * self.capacity:
+            self._heap = [(entry["weight"], entry_key) for entry_key, entry in self._counters.items()]
+            heapq.heapify(self._heap)
+
+    def _pop_min(self):
+        while True:
+            weight, key = heapq.heappop(self._heap)
+            counter = self._counters.get(key)
+            if counter is not None and counter["weight"] == weight:
+                return key, self._counters.pop(key)
+
+    def top(self, k: int) -> List[Dict[str, Any]]:
+        """The ``k`` heaviest counters, heaviest first (ties broken by key)."""
+        ranked = sorted(self._counters.items(), key=lambda item: (-item[1]["weight"], str(item[0])))
+        return [{"key": key, **counter} for key, counter in ranked[:k]]
+
+
+def _vendor_row(key: str, name: Optional[str], amount: int, count: int, total_amount: int, error: int = 0) -> Dict[str, Any]:
+    return {
+        "vendor_key": key,
+        "vendor": name,
+        "total_spend": amount,
+        "expense_count": count,
+        "average_ticket": amount // count if count else 0,
+        "share": round(amount / total_amount, 4) if total_amount else 0.0,
+        "exact": error == 0,
+    }
+
+
+def vendor_report(rows: Sequence[Dict[str, Any]]) -> Dict[str, Any]:
+    """Ranking from ``top_vendors`` SQL function rows."""
+    total_amount = rows[0]["grand_total_cents"] if rows else 0
+    total_count = rows[0]["grand_count"] if rows else 0
+    return {
+        "total_spend": total_amount,
+        "total_count": total_count,
+        "approximate": False,
+        "vendors": [
+            _vendor_row(row["vendor_key"], row.get("vendor"), row["total_cents"], row["expense_count"], total_amount)
+            for row in rows
+        ],
+    }
+
+
+def stream_top_vendors(
+    db: Session,
+    user_id: str,
+    k: int,
+    sort: str = "spend",
+    project_id: Optional[int] = None,
+    category: Optional[str] = None,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    capacity: Optional[int] = None,
+    batch_size: int = STREAM_BATCH_SIZE,
+) -> Dict[str, Any]:
+    """
+    Rank vendors by streaming expenses from the database in batches.
+
+    Memory is bounded by ``capacity`` counters (default ``20 * k``); results
+    are exact whenever the number of distinct vendors fits in the summary.
+    """
+    summary = SpaceSaving(capacity or max(20 * k, 200))
+
+    query = (
+        select(ActualExpense.vendor_key, ActualExpense.vendor, ActualExpense.amount_spent_cents)
+        .select_from(ActualExpense)
+        .where(ActualExpense.user_id == uuid.UUID(str(user_id)))
+    )
+    if project_id is not None:
+        query = query.where(ActualExpense.project_id == project_id)
+    if category is not None:
+        query = query.outerjoin(ForecastLineItem, ForecastLineItem.id == ActualExpense.forecast_line_item_id)\
+            .where(func.coalesce(ForecastLineItem.category, UNCATEGORIZED) == category)
+    if start is not None:
+        query = query.where(ActualExpense.date >= start)
+    if end is not None:
+        query = query.where(ActualExpense.date <= end)
+
+    for vendor_key, vendor, amount in db.execute(query.execution_options(yield_per=batch_size)):
+        key = vendor_key if vendor_key is not None else normalize_vendor(vendor)
+        summary.add(key, 1 if sort == "count" else amount, amount, vendor)
+
+    vendors = [
+        _vendor_row(entry["key"], entry["name"], entry["amount"], entry["count"], summary.total_amount, entry["error"])
+        for entry in summary.top(k)
+    ]
+    return {
+        "total_spend": summary.total_amount,
+        "total_count": summary.total_count,
+        "approximate": not all(vendor["exact"] for vendor in vendors),
+        "vendors": vendors,
+    }
@@ -1,18 +1,16 @@
 """Centralized authentication dependencies for the API."""
 from typing import Dict, Any
 import logging
-from fastapi import HTTPException, status, Security
+from fastapi import HTTPException, Request, status, Security
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from api.core.supabase import supabase
 
 # Security configuration
 security = HTTPBearer()
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-async def get_current_active_user(authorization: HTTPAuthorizationCredentials = Security(security)) -> Dict[str, Any]:
+async def get_current_active_user(request: Request, authorization: HTTPAuthorizationCredentials = Security(security)) -> Dict[str, Any]:
     """
     Centralized dependency to get the current authenticated user using Supabase JWT.
     
@@ -21,6 +19,8 @@ async def get_current_active_user(authorization: HTTPAuthorizationCredentials =
     2. Validates it with Supabase auth
     3. Returns user info including id, email, role
     
+    The user id is also kept on ``request.state.principal_id`` for request logs.
+    
     Used by all protected endpoints to ensure consistent authentication.
     """
     try:
@@ -34,6 +34,7 @@ async def get_current_active_user(authorization: HTTPAuthorizationCredentials =
                 headers={"WWW-Authenticate": "Bearer"},
             )
         
+        request.state.principal_id = user.user.id
         return {
             'id': user.user.id,
             'email': user.user.email,
@@ -41,7 +42,7 @@ async def get_current_active_user(authorization: HTTPAuthorizationCredentials =
             'token': token
         }
     except Exception as e:
-        logger.error(f"Authentication error: {str(e)}")
+        logger.error("Authentication error: %s", e)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate credentials",
@@ -0,0 +1,289 @@
+"""Negotiated gzip/brotli response compression for the API."""
+from typing import Dict, Optional
+import gzip
+import threading
+import zlib
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:  # Brotli is optional; gzip is always available
+    import brotli
+except ImportError:  # pragma: no cover - depends on the environment
+    brotli = None
+
+# Content types worth compressing. Anything else (images, PDFs, archives) is
+# already compressed and is passed through untouched.
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "application/x-ndjson",
+)
+
+# Event streams must reach the client as soon as each event is written, so
+# they are never compressed.
+EXCLUDED_TYPES = ("text/event-stream",)
+
+
+class CompressionStats:
+    """Thread-safe counters for bytes sent before and after compression."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[str, int]] = {}
+
+    def record(self, encoding: str, bytes_in: int, bytes_out: int) -> None:
+        """Record one compressed response (or stream chunk) for an encoding."""
+        with self._lock:
+            counters = self._counters.setdefault(
+                encoding, {"responses": 0, "bytes_in": 0, "bytes_out": 0}
+            )
+            counters["bytes_in"] += bytes_in
+            counters["bytes_out"] += bytes_out
+
+    def record_response(self, encoding: str) -> None:
+        """Count a response that was sent compressed."""
+        with self._lock:
+            counters = self._counters.setdefault(
+                encoding, {"responses": 0, "bytes_in": 0, "bytes_out": 0}
+            )
+            counters["responses"] += 1
+
+    def snapshot(self) -> Dict[str, object]:
+        """Return totals and per-encoding counters, including bytes saved."""
+        with self._lock:
+            encodings = {name: dict(values) for name, values in self._counters.items()}
+
+        bytes_in = sum(values["bytes_in"] for values in encodings.values())
+        bytes_out = sum(values["bytes_out"] for values in encodings.values())
+        for values in encodings.values():
+            values["bytes_saved"] = values["bytes_in"] - values["bytes_out"]
+
+        return {
+            "responses": sum(values["responses"] for values in encodings.values()),
+            "bytes_in": bytes_in,
+            "bytes_out": bytes_out,
+            "bytes_saved": bytes_in - bytes_out,
+            "ratio": round(bytes_out / bytes_in, 4) if bytes_in else None,
+            "encodings": encodings,
+        }
+
+    def reset(self) -> None:
+        """Clear all counters."""
+        with self._lock:
+            self._counters.clear()
+
+
+# Shared counters used by the middleware unless another instance is passed in
+compression_stats = CompressionStats()
+
+
+def negotiate_encoding(accept_encoding: str, brotli_available: bool = brotli is not None) -> Optional[str]:
+    """
+    Pick the best content coding from an ``Accept-Encoding`` header.
+
+    Brotli is preferred over gzip when the client accepts both with the same
+    weight. Returns ``None`` when the response should not be compressed.
+    """
+    if not accept_encoding:
+        return None
+
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        token, _, params = part.strip().partition(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        weight = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        weights[token] = weight
+
+    wildcard = weights.get("*", 0.0)
+    candidates = ["br", "gzip"] if brotli_available else ["gzip"]
+    best, best_weight = None, 0.0
+    for candidate in candidates:
+        weight = weights.get(candidate, wildcard)
+        if weight > best_weight:
+            best, best_weight = candidate, weight
+    return best
+
+
+def is_compressible(content_type: str) -> bool:
+    """Return True when a response with this content type should be compressed."""
+    content_type = (content_type or "").lower()
+    if not content_type or content_type.startswith(EXCLUDED_TYPES):
+        return False
+    base = content_type.split(";")[0].strip()
+    return base.startswith(COMPRESSIBLE_TYPES) or base.endswith(("+json", "+xml"))
+
+
+class _Compressor:
+    """Incremental compressor with a uniform interface for gzip and brotli."""
+
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        self.encoding = encoding
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=brotli_quality)
+        else:
+            # wbits=31 produces a gzip container rather than raw deflate
+            self._zlib = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        """Compress a chunk and flush it so the client can decode it immediately."""
+        if self.encoding == "br":
+            return self._brotli.process(data) + self._brotli.flush()
+        return self._zlib.compress(data) + self._zlib.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self, data: bytes = b"") -> bytes:
+        """Compress the final chunk and close the stream."""
+        if self.encoding == "br":
+            return self._brotli.process(data) + self._brotli.finish()
+        return self._zlib.compress(data) + self._zlib.flush(zlib.Z_FINISH)
+
+
+def compress_body(body: bytes, encoding: str, gzip_level: int = 6, brotli_quality: int = 4) -> bytes:
+    """Compress a complete response body in one shot."""
+    if encoding == "br":
+        return brotli.compress(body, quality=brotli_quality)
+    return gzip.compress(body, compresslevel=gzip_level)
+
+
+class CompressionMiddleware:
+    """
+    ASGI middleware that compresses responses using gzip or brotli.
+
+    - The encoding is negotiated from ``Accept-Encoding`` (brotli preferred)
+    - Complete bodies smaller than ``minimum_size`` are sent as-is
+    - Streaming responses (e.g. exports) are compressed chunk by chunk and
+      flushed after every chunk, so they stay streaming end to end
+    - Bytes before and after compression are recorded in ``stats``
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+        stats: Optional[CompressionStats] = None,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.stats = stats or compression_stats
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = _CompressionResponder(self, encoding, send)
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressionResponder:
+    """Per-request state for :class:`CompressionMiddleware`."""
+
+    def __init__(self, middleware: CompressionMiddleware, encoding: str, send: Send):
+        self.middleware = middleware
+        self.encoding = encoding
+        self._send = send
+        self._start: Optional[Message] = None
+        self._compressor: Optional[_Compressor] = None
+        self._passthrough = False
+
+    async def send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self._start = message
+            headers = Headers(raw=message["headers"])
+            status = message["status"]
+            self._passthrough = (
+                "content-encoding" in headers
+                or status < 200
+                or status in (204, 304)
+                or not is_compressible(headers.get("content-type", ""))
+            )
+            if self._passthrough:
+                await self._send(message)
+            return
+
+        if message["type"] != "http.response.body" or self._passthrough:
+            await self._send(message)
+            return
+
+        body: bytes = message.get("body", b"")
+        more_body: bool = message.get("more_body", False)
+
+        if self._compressor is None and self._start is not None:
+            start, self._start = self._start, None
+            if not more_body:
+                await self._send_complete(start, body)
+                return
+            await self._start_stream(start)
+
+        if self._compressor is None:
+            await self._send(message)
+            return
+
+        if more_body:
+            chunk = self._compressor.compress(body)
+        else:
+            chunk = self._compressor.finish(body)
+        self.middleware.stats.record(self.encoding, len(body), len(chunk))
+        await self._send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+    async def _send_complete(self, start: Message, body: bytes) -> None:
+        """Send a non-streaming response, compressing it if it is large enough."""
+        if len(body) < self.middleware.minimum_size:
+            MutableHeaders(raw=start["headers"]).add_vary_header("Accept-Encoding")
+            await self._send(start)
+            await self._send({"type": "http.response.body", "body": body})
+            return
+
+        compressed = compress_body(
+            body, self.encoding, self.middleware.gzip_level, self.middleware.brotli_quality
+        )
+        if len(compressed) >= len(body):
+            MutableHeaders(raw=start["headers"]).add_vary_header("Accept-Encoding")
+            await self._send(start)
+            await self._send({"type": "http.response.body", "body": body})
+            return
+
+        headers = self._compressed_headers(start)
+        headers["Content-Length"] = str(len(compressed))
+        self.middleware.stats.record(self.encoding, len(body), len(compressed))
+        self.middleware.stats.record_response(self.encoding)
+        await self._send(start)
+        await self._send({"type": "http.response.body", "body": compressed})
+
+    async def _start_stream(self, start: Message) -> None:
+        """Begin a compressed streaming response."""
+        headers = self._compressed_headers(start)
+        if "content-length" in headers:
+            del headers["Content-Length"]
+        self._compressor = _Compressor(
+            self.encoding, self.middleware.gzip_level, self.middleware.brotli_quality
+        )
+        self.middleware.stats.record_response(self.encoding)
+        await self._send(start)
+
+    def _compressed_headers(self, start: Message) -> MutableHeaders:
+        headers = MutableHeaders(raw=start["headers"])
+        headers["Content-Encoding"] = self.encoding
+        headers.add_vary_header("Accept-Encoding")
+        return headers
+
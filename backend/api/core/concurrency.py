@@ -0,0 +1,107 @@
+"""
+Optimistic concurrency for updates: ``If-Match`` preconditions on row versions.
+
+Versioned rows carry a ``version`` column that every update bumps. Responses
+expose it as an ``ETag``; a client sends it back in ``If-Match`` and the
+version check is part of the UPDATE's own filter, so checking and writing is
+one atomic statement. When nothing matched, one read tells a missing row
+(404) from a stale version (412 with the current row in the body).
+"""
+from typing import Any, Dict, List, Optional, Type, Union
+
+from fastapi import HTTPException, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+# If-Match: * matches any existing row
+ANY_VERSION = "*"
+
+
+class PreconditionFailed(Exception):
+    """The row exists but is not at any of the versions the client named."""
+
+    def __init__(self, row: Dict[str, Any]):
+        self.row = row
+
+
+def etag(version: Optional[int]) -> Optional[str]:
+    return f'"{version}"' if version is not None else None
+
+
+def parse_if_match(header: Optional[str]) -> Union[None, str, List[int]]:
+    """Versions named by an ``If-Match`` header, ``ANY_VERSION``, or None if absent."""
+    if header is None:
+        return None
+    if header.strip() == ANY_VERSION:
+        return ANY_VERSION
+    versions = []
+    for tag in header.split(','):
+        tag = tag.strip()
+        if tag.startswith('W/'):
+            tag = tag[2:]
+        try:
+            versions.append(int(tag.strip('"')))
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Invalid If-Match entity tag: {tag}"
+            )
+    return versions
+
+
+def update_if_match(
+    client,
+    table: str,
+    row_id: int,
+    user_id: str,
+    data: Dict[str, Any],
+    if_match: Union[None, str, List[int]] = None,
+    not_found: str = "Not found",
+) -> Dict[str, Any]:
+    """
+    Update a user's row in one statement, guarded by the ``If-Match`` versions.
+
+    Returns the updated row. Raises 404 if the row does not exist and
+    ``PreconditionFailed`` if it is at another version.
+    """
+    payload = data
+    if isinstance(if_match, list) and len(if_match) == 1:
+        # Set the next version explicitly (bump_row_version leaves it alone)
+        payload = {**data, 'version': if_match[0] + 1}
+    query = client.table(table)\
+        .update(payload)\
+        .eq('id', row_id)\
+        .eq('user_id', user_id)
+    if isinstance(if_match, list):
+        query = query.eq('version', if_match[0]) if len(if_match) == 1 else query.in_('version', if_match)
+    response = query.execute()
+    if response.data:
+        return response.data[0]
+
+    current = client.table(table)\
+        .select('*')\
+        .eq('id', row_id)\
+        .eq('user_id', user_id)\
+        .execute()
+    if not current.data:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=not_found
+        )
+    if if_match is None or if_match == ANY_VERSION:
+        raise Exception(f"Failed to update {table} row {row_id}")
+    raise PreconditionFailed(current.data[0])
+
+
+def precondition_failed_response(schema: Type[BaseModel], row: Dict[str, Any]) -> JSONResponse:
+    """412 carrying the current row, so the client can rebase without another GET."""
+    current = schema.model_validate(row)
+    headers = {}
+    if row.get('version') is not None:
+        headers['ETag'] = etag(row['version'])
+    return JSONResponse(
+        status_code=status.HTTP_412_PRECONDITION_FAILED,
+        content=jsonable_encoder(current),
+        headers=headers,
+    )
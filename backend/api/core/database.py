@@ -8,8 +8,6 @@ from sqlalchemy.pool import QueuePool, StaticPool
 from typing import Generator, Optional
 import logging
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 def get_database_url() -> str:
@@ -41,9 +39,9 @@ def get_database_url() -> str:
 # Get the database URL
 try:
     DATABASE_URL = get_database_url()
-    logger.info(f"Using database URL: {DATABASE_URL.split('@')[-1]}")
+    logger.info("Using database URL: %s", DATABASE_URL.split('@')[-1])
 except Exception as e:
-    logger.error(f"Error getting database URL: {e}")
+    logger.error("Error getting database URL: %s", e)
     raise
 
 # Configure SQLAlchemy engine with appropriate settings based on the database type
@@ -98,7 +96,7 @@ def get_db() -> Generator[Session, None, None]:
     try:
         yield db
     except Exception as e:
-        logger.error(f"Database error: {str(e)}")
+        logger.error("Database error: %s", e)
         db.rollback()
         raise
     finally:
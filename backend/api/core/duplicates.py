@@ -0,0 +1,80 @@
+"""
+Duplicate expense detection.
+
+Two expenses are likely duplicates when they share a fingerprint, the
+project, normalized vendor and amount, and their dates are within a few
+days of each other (the same receipt entered by the super and the office
+rarely carries the same date). Lookups against the database filter on the
+indexed fingerprint columns plus a date range; batches are checked in
+memory first so a bulk import makes one lookup query, not one per row.
+"""
+from collections import defaultdict
+from datetime import date, timedelta
+from typing import Any, Dict, Iterable, List, Sequence, Tuple
+
+from .vendors import normalize_vendor
+
+DEFAULT_WINDOW_DAYS = 3
+
+Fingerprint = Tuple[int, str, int]
+
+
+def _as_date(value: Any) -> date:
+    return value if isinstance(value, date) else date.fromisoformat(str(value)[:10])
+
+
+def fingerprint(row: Dict[str, Any]) -> Fingerprint:
+    """``(project_id, vendor_key, amount_spent_cents)`` of an expense row."""
+    vendor_key = row.get("vendor_key")
+    if vendor_key is None:
+        vendor_key = normalize_vendor(row.get("vendor"))
+    return (int(row["project_id"]), vendor_key, int(row["amount_spent_cents"]))
+
+
+def date_window(day: Any, window_days: int = DEFAULT_WINDOW_DAYS) -> Tuple[date, date]:
+    """Inclusive date range that counts as "the same receipt" around ``day``."""
+    day = _as_date(day)
+    return day - timedelta(days=window_days), day + timedelta(days=window_days)
+
+
+def find_matches(
+    row: Dict[str, Any],
+    existing: Iterable[Dict[str, Any]],
+    window_days: int = DEFAULT_WINDOW_DAYS,
+) -> List[int]:
+    """Ids of ``existing`` rows that look like duplicates of ``row``."""
+    key = fingerprint(row)
+    start, end = date_window(row["date"], window_days)
+    return [
+        other["id"]
+        for other in existing
+        if other.get("date") and fingerprint(other) == key and start <= _as_date(other["date"]) <= end
+    ]
+
+
+def dedupe_batch(
+    rows: Sequence[Dict[str, Any]],
+    window_days: int = DEFAULT_WINDOW_DAYS,
+) -> Tuple[List[int], Dict[int, int]]:
+    """
+    Split a batch into rows to keep and in-batch duplicates.
+
+    Returns the indexes to keep (in input order) and a map from each
+    duplicate's index to the index of the earlier row it repeats.
+    """
+    groups: Dict[Fingerprint, List[int]] = defaultdict(list)
+    for index, row in enumerate(rows):
+        groups[fingerprint(row)].append(index)
+
+    duplicates: Dict[int, int] = {}
+    for indexes in groups.values():
+        kept: List[Tuple[date, int]] = []
+        for index in sorted(indexes, key=lambda i: (_as_date(rows[i]["date"]), i)):
+            day = _as_date(rows[index]["date"])
+            original = next((first for kept_day, first in kept if (day - kept_day).days <= window_days), None)
+            if original is None:
+                kept.append((day, index))
+            else:
+                duplicates[index] = original
+
+    return [index for index in range(len(rows)) if index not in duplicates], duplicates
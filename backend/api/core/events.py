@@ -0,0 +1,280 @@
+"""
+Project change events for the server-sent events stream.
+
+Write endpoints publish an event for every forecast item, expense and draw
+they create, update or delete. The broker fans events out to the streams
+subscribed to that project, each with a bounded queue: a client that falls
+behind loses its oldest events and is told to resync instead of growing
+the queue without limit.
+
+Event records use the same response schemas as the REST endpoints (money
+as decimal strings, no internal columns), so a client can apply an event to
+what it fetched with GET. Events of rows written with a change number carry
+it as their ``change_seq`` (the SSE event id), the same cursor GET /changes
+takes, so a client that reconnects can catch up from its last event id.
+Deletes carry none.
+
+Publishing goes through a backend. The in-memory backend delivers straight
+to this process's subscribers; with several workers the Postgres backend
+sends events through ``NOTIFY`` and every worker (this one included)
+delivers what it hears on ``LISTEN``.
+"""
+import asyncio
+import json
+import logging
+import os
+import select
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, Set, Type
+
+from pydantic import BaseModel
+
+from api.schemas.draw import DrawTrackerOut
+from api.schemas.expense import ActualExpenseOut
+from api.schemas.forecast import ForecastLineItemOut
+
+logger = logging.getLogger(__name__)
+
+EVENTS_BACKEND = os.getenv('EVENTS_BACKEND', 'memory')
+EVENTS_QUEUE_SIZE = int(os.getenv('EVENTS_QUEUE_SIZE', '100'))
+EVENTS_CHANNEL = os.getenv('EVENTS_CHANNEL', 'project_events')
+
+ACTIONS = ("created", "updated", "deleted")
+
+# NOTIFY payloads are capped at 8000 bytes; larger events are sent without
+# their record and clients refetch it
+MAX_NOTIFY_PAYLOAD = 7900
+
+# Response schema of each entity that publishes events
+EVENT_SCHEMAS: Dict[str, Type[BaseModel]] = {
+    "forecast_item": ForecastLineItemOut,
+    "expense": ActualExpenseOut,
+    "draw": DrawTrackerOut,
+}
+
+def public_record(entity: str, record: Dict[str, Any]) -> Dict[str, Any]:
+    """A database row in the shape the entity's REST endpoints return."""
+    schema = EVENT_SCHEMAS.get(entity)
+    if schema is None:
+        return record
+    return schema.model_validate(record).model_dump(mode="json")
+
+
+def project_event(
+    entity: str,
+    action: str,
+    record: Dict[str, Any],
+    project_id: Optional[int] = None,
+    change_seq: Optional[int] = None,
+) -> Dict[str, Any]:
+    """Event for one written row; deletes carry no record."""
+    return {
+        "change_seq": change_seq,
+        "type": f"{entity}.{action}",
+        "entity": entity,
+        "action": action,
+        "project_id": project_id if project_id is not None else record.get("project_id"),
+        "id": record.get("id"),
+        "data": None if action == "deleted" else record,
+        "at": datetime.now(timezone.utc).isoformat(),
+    }
+
+
+def format_sse(data: Dict[str, Any], event: Optional[str] = None, event_id: Optional[Any] = None) -> str:
+    """One event in ``text/event-stream`` framing."""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    if event:
+        lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, default=str)}")
+    return "\n".join(lines) + "\n\n"
+
+
+class Subscription:
+    """A stream's bounded event queue, owned by the event loop that created it."""
+
+    def __init__(self, project_id: int, max_queue: int = EVENTS_QUEUE_SIZE):
+        self.project_id = project_id
+        self.loop = asyncio.get_running_loop()
+        self.queue: "asyncio.Queue[Dict[str, Any]]" = asyncio.Queue(maxsize=max_queue)
+        self.dropped = 0
+
+    def offer(self, event: Dict[str, Any]) -> None:
+        """Queue an event, dropping the oldest one when the client is behind."""
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(event)
+
+    async def get(self, timeout: float) -> Optional[Dict[str, Any]]:
+        """Next event, or None if nothing arrived within ``timeout`` seconds."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def take_dropped(self) -> int:
+        dropped, self.dropped = self.dropped, 0
+        return dropped
+
+
+class MemoryBackend:
+    """Delivers events to subscribers in this process only."""
+
+    broker: "EventBroker"
+
+    def start(self) -> None:
+        pass
+
+    def stop(self) -> None:
+        pass
+
+    def publish(self, event: Dict[str, Any]) -> None:
+        self.broker.dispatch(event)
+
+
+class PostgresBackend:
+    """Fans events out to every worker through Postgres ``NOTIFY``/``LISTEN``."""
+
+    def __init__(self, dsn: str, channel: str = EVENTS_CHANNEL, poll_interval: float = 5.0):
+        self.dsn = dsn
+        self.channel = channel
+        self.poll_interval = poll_interval
+        self._publish_conn = None
+        self._publish_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.broker: Optional["EventBroker"] = None
+
+    def _connect(self):
+        import psycopg2
+
+        conn = psycopg2.connect(self.dsn)
+        conn.autocommit = True
+        return conn
+
+    def start(self) -> None:
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._listen, name="project-events-listener", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.poll_interval + 1)
+        with self._publish_lock:
+            if self._publish_conn is not None:
+                self._publish_conn.close()
+                self._publish_conn = None
+
+    def publish(self, event: Dict[str, Any]) -> None:
+        payload = json.dumps(event, default=str)
+        if len(payload.encode()) > MAX_NOTIFY_PAYLOAD:
+            payload = json.dumps({**event, "data": None, "truncated": True}, default=str)
+        with self._publish_lock:
+            try:
+                if self._publish_conn is None or self._publish_conn.closed:
+                    self._publish_conn = self._connect()
+                with self._publish_conn.cursor() as cursor:
+                    cursor.execute("SELECT pg_notify(%s, %s)", (self.channel, payload))
+            except Exception:
+                self._publish_conn = None
+                raise
+
+    def _listen(self) -> None:
+        while not self._stop.is_set():
+            conn = None
+            try:
+                conn = self._connect()
+                with conn.cursor() as cursor:
+                    cursor.execute(f'LISTEN "{self.channel}"')
+                while not self._stop.is_set():
+                    if select.select([conn], [], [], self.poll_interval) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        notify = conn.notifies.pop(0)
+                        self.broker.dispatch(json.loads(notify.payload))
+            except Exception as e:
+                logger.warning("Project event listener error, reconnecting: %s", e)
+                self._stop.wait(self.poll_interval)
+            finally:
+                if conn is not None:
+                    conn.close()
+
+
+class EventBroker:
+    """Subscribers per project, fed from whichever backend is configured."""
+
+    def __init__(self, backend=None, max_queue: int = EVENTS_QUEUE_SIZE):
+        self.backend = backend or MemoryBackend()
+        self.max_queue = max_queue
+        self._subscribers: Dict[int, Set[Subscription]] = {}
+        self._lock = threading.Lock()
+        self.backend.broker = self
+
+    def subscribe(self, project_id: int) -> Subscription:
+        """Register a stream for a project; call from the stream's event loop."""
+        subscription = Subscription(project_id, self.max_queue)
+        with self._lock:
+            self._subscribers.setdefault(project_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.project_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.project_id]
+
+    def subscriber_count(self, project_id: Optional[int] = None) -> int:
+        with self._lock:
+            if project_id is not None:
+                return len(self._subscribers.get(project_id, ()))
+            return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+    def publish(self, event: Dict[str, Any]) -> None:
+        self.backend.publish(event)
+
+    def dispatch(self, event: Dict[str, Any]) -> None:
+        """Hand an event to the project's subscribers (safe from any thread)."""
+        with self._lock:
+            subscribers = list(self._subscribers.get(event.get("project_id"), ()))
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.offer, event)
+            except RuntimeError:
+                # The stream's loop has closed; it unsubscribes on its way out
+                self.unsubscribe(subscription)
+
+    def start(self) -> None:
+        self.backend.start()
+
+    def close(self) -> None:
+        self.backend.stop()
+
+
+def _create_broker() -> EventBroker:
+    if EVENTS_BACKEND == 'postgres':
+        from .database import DATABASE_URL
+
+        return EventBroker(PostgresBackend(DATABASE_URL))
+    return EventBroker()
+
+
+broker = _create_broker()
+
+
+def publish_change(entity: str, action: str, record: Dict[str, Any], project_id: Optional[int] = None) -> None:
+    """Publish a row change; failures are logged and never fail the write."""
+    try:
+        # The public record drops the change number, so take it from the row
+        change_seq = record.get("change_seq")
+        if action != "deleted":
+            record = public_record(entity, record)
+        broker.publish(project_event(entity, action, record, project_id, change_seq))
+    except Exception as e:
+        logger.warning("Failed to publish %s.%s event: %s", entity, action, e)
@@ -0,0 +1,165 @@
+"""
+Liveness and readiness.
+
+``/livez`` only says the process is serving requests. ``/readyz`` reports
+whether its dependencies are reachable: a background thread probes the
+database pool and the Supabase REST and auth endpoints every
+``HEALTH_PROBE_INTERVAL_SECONDS`` and the endpoint returns the cached
+results with each probe's latency, so load balancer polling does no I/O.
+
+A result older than ``HEALTH_STALE_SECONDS`` counts as failed; a probe stuck
+waiting on an exhausted pool or a hung connection therefore turns the
+worker unready instead of going unnoticed.
+"""
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Optional
+
+import httpx
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+HEALTH_PROBE_INTERVAL_SECONDS = float(os.getenv('HEALTH_PROBE_INTERVAL_SECONDS', '10'))
+HEALTH_PROBE_TIMEOUT_SECONDS = float(os.getenv('HEALTH_PROBE_TIMEOUT_SECONDS', '3'))
+HEALTH_STALE_SECONDS = float(os.getenv('HEALTH_STALE_SECONDS', str(3 * HEALTH_PROBE_INTERVAL_SECONDS)))
+
+
+@dataclass
+class ProbeResult:
+    ok: bool
+    latency_ms: float
+    checked_at: str
+    # time.monotonic() of the check, for staleness
+    checked: float
+    error: Optional[str] = None
+    details: Optional[Dict[str, Any]] = None
+
+
+def database_probe(engine) -> Callable[[], Optional[Dict[str, Any]]]:
+    """``SELECT 1`` on a pooled connection, reporting the pool's occupancy."""
+
+    def probe() -> Optional[Dict[str, Any]]:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1")).fetchone()
+        pool = engine.pool
+        if hasattr(pool, "checkedout"):
+            return {"pool_size": pool.size(), "checked_out": pool.checkedout(), "overflow": pool.overflow()}
+        return None
+
+    return probe
+
+
+def http_probe(
+    url: str,
+    headers: Dict[str, str],
+    method: str = "GET",
+    timeout: float = HEALTH_PROBE_TIMEOUT_SECONDS,
+) -> Callable[[], None]:
+    """Request ``url``; any response below 500 means the service is up."""
+
+    def probe() -> None:
+        response = httpx.request(method, url, headers=headers, timeout=timeout)
+        if response.status_code >= 500:
+            raise RuntimeError(f"HTTP {response.status_code}")
+
+    return probe
+
+
+def supabase_probes(url: str, key: str) -> Dict[str, Callable[[], None]]:
+    headers = {"apikey": key, "Authorization": f"Bearer {key}"}
+    base = url.rstrip("/")
+    return {
+        # HEAD: a GET on the REST root returns the whole OpenAPI document
+        "supabase_rest": http_probe(f"{base}/rest/v1/", headers, method="HEAD"),
+        "supabase_auth": http_probe(f"{base}/auth/v1/health", headers),
+    }
+
+
+class HealthMonitor:
+    """Runs the probes on a background thread and caches their results."""
+
+    def __init__(
+        self,
+        probes: Dict[str, Callable[[], Optional[Dict[str, Any]]]],
+        interval: float = HEALTH_PROBE_INTERVAL_SECONDS,
+        stale_after: float = HEALTH_STALE_SECONDS,
+    ):
+        self.probes = probes
+        self.interval = interval
+        self.stale_after = stale_after
+        self.results: Dict[str, ProbeResult] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def run_probes(self) -> None:
+        for name, probe in self.probes.items():
+            start = time.perf_counter()
+            error = None
+            details = None
+            try:
+                details = probe()
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+            latency = round((time.perf_counter() - start) * 1000, 1)
+            if error is not None and (name not in self.results or self.results[name].ok):
+                logger.warning("Health probe %s failed: %s", name, error)
+            # Replacing the whole entry keeps readers from seeing half an update
+            self.results[name] = ProbeResult(
+                ok=error is None,
+                latency_ms=latency,
+                checked_at=datetime.now(timezone.utc).isoformat(),
+                checked=time.monotonic(),
+                error=error,
+                details=details,
+            )
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self.run_probes()
+            self._stop.wait(self.interval)
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="health-probes", daemon=True)
+        self._thread.start()
+
+    def close(self) -> None:
+        self._stop.set()
+
+    def readiness(self) -> Dict[str, Any]:
+        """Cached probe results; ready when every probe passed recently."""
+        now = time.monotonic()
+        checks: Dict[str, Any] = {}
+        for name in self.probes:
+            result = self.results.get(name)
+            if result is None:
+                checks[name] = {"ok": False, "error": "not checked yet"}
+                continue
+            check: Dict[str, Any] = {"ok": result.ok, "latency_ms": result.latency_ms, "checked_at": result.checked_at}
+            if result.error is not None:
+                check["error"] = result.error
+            if result.details is not None:
+                check.update(result.details)
+            age = now - result.checked
+            if age > self.stale_after:
+                check["ok"] = False
+                check["error"] = f"no result for {age:.0f}s"
+            checks[name] = check
+        ready = all(check["ok"] for check in checks.values())
+        return {"status": "ready" if ready else "unready", "checks": checks}
+
+
+def create_monitor(engine) -> HealthMonitor:
+    probes: Dict[str, Callable[[], Any]] = {"database": database_probe(engine)}
+    url = os.getenv("SUPABASE_URL")
+    key = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
+    if url and key:
+        probes.update(supabase_probes(url, key))
+    return HealthMonitor(probes)
@@ -0,0 +1,287 @@
+"""
+``Idempotency-Key`` support for create endpoints.
+
+A client that retries a create after a dropped connection sends the same
+``Idempotency-Key`` header. The first request reserves the key (scoped to
+the user) and its response is stored when it completes; a replay with the
+same key and body gets the stored response back without the insert running
+again. A replay while the first request is still running gets 409, and
+reusing a key for a different request body gets 422. Server errors release
+the key so the retry really runs. Keys expire after ``IDEMPOTENCY_TTL_SECONDS``.
+
+Records live in memory (single worker) or in the ``idempotency_keys`` table
+(shared by all workers), picked with ``IDEMPOTENCY_BACKEND``.
+"""
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional, Tuple
+
+from fastapi import Depends, Header, HTTPException, Request, status
+from fastapi.responses import Response
+from starlette.concurrency import run_in_threadpool
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from api.core.auth import get_current_active_user
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_BACKEND = os.getenv('IDEMPOTENCY_BACKEND', 'memory')
+IDEMPOTENCY_TTL_SECONDS = int(os.getenv('IDEMPOTENCY_TTL_SECONDS', '86400'))
+# A reservation whose request never finished (worker crash) frees up after this
+PENDING_TTL_SECONDS = 60
+MAX_KEY_LENGTH = 255
+REPLAY_HEADER = "Idempotent-Replayed"
+
+STATE_KEY = "idempotency"
+
+
+@dataclass
+class IdempotencyRecord:
+    """A reserved key and, once the request finished, its response."""
+    request_hash: str
+    expires_at: float
+    status_code: Optional[int] = None
+    body: Optional[bytes] = None
+    content_type: Optional[str] = None
+
+    @property
+    def completed(self) -> bool:
+        return self.status_code is not None
+
+
+def request_fingerprint(method: str, path: str, body: bytes) -> str:
+    return hashlib.sha256(method.encode() + b" " + path.encode() + b"\n" + body).hexdigest()
+
+
+class MemoryIdempotencyStore:
+    """Per-process key store, oldest keys evicted past ``max_entries``."""
+
+    def __init__(self, ttl_seconds: int = IDEMPOTENCY_TTL_SECONDS, max_entries: int = 100000):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._records: "OrderedDict[Tuple[str, str], IdempotencyRecord]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def reserve(self, user_id: str, key: str, request_hash: str) -> Optional[IdempotencyRecord]:
+        """Reserve the key, or return the existing record if it is taken."""
+        now = time.time()
+        with self._lock:
+            record = self._records.get((user_id, key))
+            if record is not None and record.expires_at > now:
+                return record
+            self._records[(user_id, key)] = IdempotencyRecord(request_hash, now + PENDING_TTL_SECONDS)
+            self._records.move_to_end((user_id, key))
+            while len(self._records) > self.max_entries:
+                self._records.popitem(last=False)
+            return None
+
+    def complete(self, user_id: str, key: str, status_code: int, body: bytes, content_type: Optional[str]) -> None:
+        with self._lock:
+            record = self._records.get((user_id, key))
+            if record is not None:
+                record.status_code = status_code
+                record.body = body
+                record.content_type = content_type
+                record.expires_at = time.time() + self.ttl_seconds
+
+    def release(self, user_id: str, key: str) -> None:
+        with self._lock:
+            self._records.pop((user_id, key), None)
+
+
+class TableIdempotencyStore:
+    """Key store in the ``idempotency_keys`` table, shared by every worker."""
+
+    def __init__(self, client, table: str = 'idempotency_keys', ttl_seconds: int = IDEMPOTENCY_TTL_SECONDS):
+        self.client = client
+        self.table = table
+        self.ttl_seconds = ttl_seconds
+
+    @staticmethod
+    def _expiry(seconds: int) -> str:
+        return (datetime.now(timezone.utc) + timedelta(seconds=seconds)).isoformat()
+
+    def _record(self, row: Dict[str, Any]) -> IdempotencyRecord:
+        expires_at = datetime.fromisoformat(str(row['expires_at']).replace('Z', '+00:00')).timestamp()
+        body = row.get('response_body')
+        return IdempotencyRecord(
+            request_hash=row['request_hash'],
+            expires_at=expires_at,
+            status_code=row.get('status_code'),
+            body=body.encode() if body is not None else None,
+            content_type=row.get('content_type'),
+        )
+
+    def _lookup(self, user_id: str, key: str) -> Optional[IdempotencyRecord]:
+        response = self.client.table(self.table)\
+            .select('request_hash,status_code,response_body,content_type,expires_at')\
+            .eq('user_id', user_id)\
+            .eq('key', key)\
+            .execute()
+        return self._record(response.data[0]) if response.data else None
+
+    def reserve(self, user_id: str, key: str, request_hash: str) -> Optional[IdempotencyRecord]:
+        record = self._lookup(user_id, key)
+        if record is not None:
+            if record.expires_at > time.time():
+                return record
+            self.release(user_id, key)
+        try:
+            self.client.table(self.table).insert({
+                'user_id': user_id,
+                'key': key,
+                'request_hash': request_hash,
+                'expires_at': self._expiry(PENDING_TTL_SECONDS),
+            }).execute()
+        except Exception:
+            # Lost the race to a concurrent request with the same key
+            record = self._lookup(user_id, key)
+            if record is None:
+                raise
+            return record
+        return None
+
+    def complete(self, user_id: str, key: str, status_code: int, body: bytes, content_type: Optional[str]) -> None:
+        self.client.table(self.table)\
+            .update({
+                'status_code': status_code,
+                'response_body': body.decode('utf-8', errors='replace'),
+                'content_type': content_type,
+                'expires_at': self._expiry(self.ttl_seconds),
+            })\
+            .eq('user_id', user_id)\
+            .eq('key', key)\
+            .execute()
+
+    def release(self, user_id: str, key: str) -> None:
+        self.client.table(self.table)\
+            .delete()\
+            .eq('user_id', user_id)\
+            .eq('key', key)\
+            .execute()
+
+
+def _create_store():
+    if IDEMPOTENCY_BACKEND == 'table':
+        from api.core.supabase import supabase
+
+        return TableIdempotencyStore(supabase)
+    return MemoryIdempotencyStore()
+
+
+idempotency_store = _create_store()
+
+
+class IdempotentReplay(Exception):
+    """Raised by the dependency to answer a replay with the stored response."""
+
+    def __init__(self, record: IdempotencyRecord):
+        self.record = record
+
+
+async def replay_response(request: Request, exc: IdempotentReplay) -> Response:
+    """Exception handler returning the stored response of a replayed request."""
+    record = exc.record
+    return Response(
+        content=record.body,
+        status_code=record.status_code,
+        media_type=record.content_type,
+        headers={REPLAY_HEADER: "true"},
+    )
+
+
+async def idempotency_key(
+    request: Request,
+    current_user: Dict[str, Any] = Depends(get_current_active_user),
+    key: Optional[str] = Header(None, alias="Idempotency-Key"),
+) -> Optional[str]:
+    """
+    Route dependency honoring the ``Idempotency-Key`` header.
+
+    Requests without the header run normally. Otherwise the key is reserved
+    for this user and request body; ``IdempotencyMiddleware`` stores the
+    response once it has been sent.
+    """
+    if key is None:
+        return None
+    if not key or len(key) > MAX_KEY_LENGTH:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Idempotency-Key must be 1 to {MAX_KEY_LENGTH} characters"
+        )
+
+    fingerprint = request_fingerprint(request.method, request.url.path, await request.body())
+    try:
+        record = await run_in_threadpool(idempotency_store.reserve, current_user['id'], key, fingerprint)
+    except Exception as e:
+        # The key store being down should not block creates; run without it
+        logger.warning("Idempotency key store unavailable: %s", e)
+        return None
+
+    if record is not None:
+        if record.request_hash != fingerprint:
+            raise HTTPException(
+                status_code=422,  # Unprocessable Content, as in the Idempotency-Key draft
+                detail="Idempotency-Key was already used for a different request"
+            )
+        if not record.completed:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="A request with this Idempotency-Key is still in progress"
+            )
+        raise IdempotentReplay(record)
+
+    request.state.idempotency = (current_user['id'], key)
+    return key
+
+
+class IdempotencyMiddleware:
+    """Stores the response of requests that reserved an idempotency key."""
+
+    def __init__(self, app: ASGIApp, store=None):
+        self.app = app
+        self.store = store
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] != "POST":
+            await self.app(scope, receive, send)
+            return
+
+        started: Dict[str, Any] = {}
+        chunks = []
+
+        async def capture(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                started["status"] = message["status"]
+                for name, value in message.get("headers", []):
+                    if name.lower() == b"content-type":
+                        started["content_type"] = value.decode("latin-1")
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, capture)
+        finally:
+            reservation = scope.get("state", {}).get(STATE_KEY)
+            if reservation is not None:
+                await self._finish(reservation, started, b"".join(chunks))
+
+    async def _finish(self, reservation: Tuple[str, str], started: Dict[str, Any], body: bytes) -> None:
+        store = self.store or idempotency_store
+        user_id, key = reservation
+        status_code = started.get("status")
+        try:
+            if status_code is None or status_code >= 500:
+                # Let the client's retry run the request again
+                await run_in_threadpool(store.release, user_id, key)
+            else:
+                await run_in_threadpool(store.complete, user_id, key, status_code, body, started.get("content_type"))
+        except Exception as e:
+            logger.warning("Failed to store idempotent response: %s", e)
@@ -0,0 +1,182 @@
+"""
+Central logging setup.
+
+``setup_logging`` replaces per-module ``basicConfig`` calls: the root logger
+gets a single ``QueueHandler`` and a ``QueueListener`` thread does the
+formatting and writing, so a burst of log calls on a request path costs a
+queue put rather than terminal or file I/O. Records are enqueued as they
+are, so messages logged with ``%s`` arguments (and tracebacks) are only
+rendered on the writer thread; arguments must therefore not be mutated
+after the call. The queue is bounded at ``LOG_QUEUE_SIZE``: when the
+writer falls behind, records are dropped and counted instead of blocking
+requests.
+
+Output is one JSON object per line (``LOG_FORMAT=json``, the default) or
+plain text (``LOG_FORMAT=text``). Both pass through redaction: bearer
+tokens, JWTs and the values of secret-looking keys (``token``,
+``password``, ``authorization``, ...) never reach the log.
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import re
+import sys
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'json')
+LOG_QUEUE_SIZE = int(os.getenv('LOG_QUEUE_SIZE', '10000'))
+
+REDACTED = "[REDACTED]"
+SECRET_KEYS = ("token", "password", "authorization", "secret", "api_key", "apikey", "service_role_key", "cookie")
+
+_BEARER = re.compile(r"(?i)\b(bearer\s+)[\w\-.~+/]+=*")
+_JWT = re.compile(r"\beyJ[\w-]+\.[\w-]+\.[\w-]+")
+# 'token': 'abc', "password"="abc", access_token=abc ...
+_SECRET_PAIR = re.compile(
+    r"""(?i)(['"]?[\w-]*(?:%s)[\w-]*['"]?\s*[:=]\s*)(?!bearer\s)(['"]?)[^'",}\s]+\2""" % "|".join(SECRET_KEYS)
+)
+
+# Attributes every LogRecord has; anything else came in through ``extra=``
+_RECORD_FIELDS = frozenset(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "taskName"}
+
+
+def redact(text: str) -> str:
+    """Mask bearer tokens, JWTs and secret key/value pairs in ``text``."""
+    text = _BEARER.sub(lambda match: match.group(1) + REDACTED, text)
+    text = _JWT.sub(REDACTED, text)
+    return _SECRET_PAIR.sub(lambda match: match.group(1) + match.group(2) + REDACTED + match.group(2), text)
+
+
+def _redact_value(key: str, value: Any) -> Any:
+    if any(secret in key.lower() for secret in SECRET_KEYS):
+        return REDACTED
+    if isinstance(value, dict):
+        return {name: _redact_value(str(name), item) for name, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_redact_value("", item) for item in value]
+    if isinstance(value, str):
+        return redact(value)
+    if isinstance(value, (int, float, bool)) or value is None:
+        return value
+    return redact(str(value))
+
+
+def _extra_fields(record: logging.LogRecord) -> Dict[str, Any]:
+    return {
+        key: _redact_value(key, value)
+        for key, value in vars(record).items()
+        if key not in _RECORD_FIELDS and not key.startswith("_")
+    }
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record, with ``extra=`` fields included."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict[str, Any] = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": redact(record.getMessage()),
+        }
+        entry.update(_extra_fields(record))
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = redact(record.exc_text)
+        if record.stack_info:
+            entry["stack"] = self.formatStack(record.stack_info)
+        return json.dumps(entry, default=str)
+
+
+class RedactingFormatter(logging.Formatter):
+    """Plain text lines, redacted, with ``extra=`` fields appended as JSON."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        text = redact(super().format(record))
+        extra = _extra_fields(record)
+        return f"{text} {json.dumps(extra, default=str)}" if extra else text
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """Enqueues records unformatted and drops them when the queue is full."""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The stdlib version renders the message (and traceback) here, on
+        # the caller's thread; the listener does it instead
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        # Runs under the handler's lock, so ``dropped`` needs no other
+        try:
+            if self.dropped:
+                self.queue.put_nowait(logging.makeLogRecord({
+                    "name": __name__,
+                    "levelno": logging.WARNING,
+                    "levelname": "WARNING",
+                    "msg": "Dropped %d log records: log queue full",
+                    "args": (self.dropped,),
+                }))
+                self.dropped = 0
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def _formatter(log_format: str) -> logging.Formatter:
+    if log_format == "text":
+        return RedactingFormatter("%(asctime)s %(levelname)s %(name)s: %(message)s")
+    return JsonFormatter()
+
+
+def setup_logging(
+    level: str = LOG_LEVEL,
+    log_format: str = LOG_FORMAT,
+    queue_size: int = LOG_QUEUE_SIZE,
+    stream=None,
+) -> logging.handlers.QueueListener:
+    """Route all logging through one queue and a background writer (idempotent)."""
+    global _listener
+    if _listener is not None:
+        return _listener
+
+    log_queue: queue.Queue = queue.Queue(maxsize=queue_size)
+    output = logging.StreamHandler(stream or sys.stderr)
+    output.setFormatter(_formatter(log_format))
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(NonBlockingQueueHandler(log_queue))
+    root.setLevel(level)
+
+    # uvicorn's loggers write to their own handlers; send them through the queue too
+    for name in ("uvicorn", "uvicorn.error", "uvicorn.access"):
+        server_logger = logging.getLogger(name)
+        server_logger.handlers.clear()
+        server_logger.propagate = True
+
+    _listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+    return _listener
+
+
+def shutdown_logging() -> None:
+    """Write out queued records and stop the writer thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -0,0 +1,142 @@
+"""
+Prometheus request metrics.
+
+``MetricsMiddleware`` counts requests per route template, method and status,
+observes their latency in a histogram and tracks requests in flight. Routes
+are labelled by their template (``/api/v1/expenses/{expense_id}``), never the
+raw path, so label sets stay bounded.
+
+With several uvicorn workers set ``PROMETHEUS_MULTIPROC_DIR`` to an empty
+directory shared by the workers (and wiped on deploy); every worker then
+writes its samples to memory-mapped files there and ``/metrics`` sums them.
+Without ``prometheus_client`` installed the middleware passes requests
+through untouched and ``/metrics`` answers 503.
+"""
+import os
+import time
+from typing import Optional
+
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:  # prometheus_client is optional; without it nothing is recorded
+    from prometheus_client import (
+        CONTENT_TYPE_LATEST,
+        CollectorRegistry,
+        Counter,
+        Gauge,
+        Histogram,
+        generate_latest,
+        multiprocess,
+        REGISTRY,
+    )
+except ImportError:  # pragma: no cover - depends on the environment
+    multiprocess = None
+    REGISTRY = None
+
+MULTIPROC_DIR = os.getenv('PROMETHEUS_MULTIPROC_DIR')
+
+# Request latencies of a JSON API, from cached reads to analytics rebuilds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+METRICS_PATH = "/metrics"
+UNMATCHED_ROUTE = "<unmatched>"
+
+if REGISTRY is not None:
+    REQUESTS = Counter(
+        "http_requests_total",
+        "HTTP requests by route template, method and status code.",
+        ["method", "route", "status"],
+    )
+    LATENCY = Histogram(
+        "http_request_duration_seconds",
+        "Time from receiving a request to sending its response headers.",
+        ["method", "route"],
+        buckets=LATENCY_BUCKETS,
+    )
+    IN_PROGRESS = Gauge(
+        "http_requests_in_progress",
+        "HTTP requests being handled.",
+        ["method"],
+        multiprocess_mode="livesum",
+    )
+
+
+def route_template(scope: Scope) -> str:
+    """
+    Full path template of the route that handled the request.
+
+    Routes of included routers may only know their path within the router
+    (``/{expense_id}``); the router prefix is recovered from the request
+    path by rendering the route's template with the matched parameters.
+    """
+    route = scope.get("route")
+    template = getattr(route, "path_format", None) or getattr(route, "path", None)
+    if template is None:
+        return UNMATCHED_ROUTE
+    params = {name: str(value) for name, value in scope.get("path_params", {}).items()}
+    try:
+        rendered = template.format(**params)
+    except (KeyError, IndexError, ValueError):
+        return template
+    path = scope["path"]
+    if rendered and path.endswith(rendered):
+        return path[:len(path) - len(rendered)] + template
+    return template
+
+
+class MetricsMiddleware:
+    """Records count, latency and status of every HTTP request."""
+
+    def __init__(self, app: ASGIApp, skip_paths=(METRICS_PATH,)):
+        self.app = app
+        self.skip_paths = frozenset(skip_paths)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if REGISTRY is None or scope["type"] != "http" or scope["path"] in self.skip_paths:
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        start = time.perf_counter()
+        status_code: Optional[int] = None
+        latency: Optional[float] = None
+
+        async def record_start(message: Message) -> None:
+            nonlocal status_code, latency
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                # Measured to the response headers: streamed bodies (event
+                # streams, exports) would otherwise count their whole lifetime
+                latency = time.perf_counter() - start
+            await send(message)
+
+        in_progress = IN_PROGRESS.labels(method)
+        in_progress.inc()
+        try:
+            await self.app(scope, receive, record_start)
+        finally:
+            in_progress.dec()
+            route = route_template(scope)
+            if latency is None:
+                latency = time.perf_counter() - start
+            REQUESTS.labels(method, route, str(status_code or 500)).inc()
+            LATENCY.labels(method, route).observe(latency)
+
+
+def metrics_response() -> Response:
+    """Current samples in the Prometheus text format, summed over workers."""
+    if REGISTRY is None:
+        return Response("prometheus_client is not installed\n", status_code=503, media_type="text/plain")
+    if MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
+
+
+def mark_worker_dead(pid: Optional[int] = None) -> None:
+    """Drop a stopped worker's live gauges from the multiprocess files."""
+    if REGISTRY is not None and MULTIPROC_DIR:
+        multiprocess.mark_process_dead(pid or os.getpid())
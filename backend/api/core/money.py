@@ -0,0 +1,132 @@
+"""
+Fixed-point money handling for the Construction Cost Tracker API.
+
+Amounts are held as integer cents everywhere inside the API: database columns
+are ``<field>_cents`` BIGINTs, schemas carry ``int`` cents, and aggregates are
+plain integer sums. Conversion happens only at the edge:
+
+- Incoming JSON amounts (numbers or strings, in dollars) are parsed exactly
+  with ``Decimal`` and rounded half-up to the cent
+- Outgoing JSON amounts are serialized as decimal strings, e.g. ``"1500.00"``
+"""
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from typing import Any, ClassVar, Dict, Iterable, Optional, Tuple
+
+from pydantic import BaseModel, BeforeValidator, PlainSerializer, WithJsonSchema, model_validator
+from typing_extensions import Annotated
+
+_HUNDRED = Decimal(100)
+_ONE = Decimal(1)
+
+
+class Cents(int):
+    """An ``int`` that is already a number of cents (e.g. read from a ``*_cents`` column)."""
+
+
+def to_cents(value: Any) -> int:
+    """
+    Convert a dollar amount to integer cents.
+
+    Accepts ints, floats, Decimals and numeric strings. Floats are converted
+    through their shortest repr, so ``0.1`` becomes exactly 10 cents.
+    """
+    if isinstance(value, Cents):
+        return int(value)
+    if isinstance(value, bool) or value is None:
+        raise ValueError("Amount must be a number")
+    if isinstance(value, int):
+        return value * 100
+    try:
+        amount = Decimal(repr(value)) if isinstance(value, float) else Decimal(str(value).strip())
+    except InvalidOperation:
+        raise ValueError(f"Invalid amount: {value!r}")
+    if not amount.is_finite():
+        raise ValueError(f"Invalid amount: {value!r}")
+    return int((amount * _HUNDRED).quantize(_ONE, rounding=ROUND_HALF_UP))
+
+
+def from_cents(cents: int) -> Decimal:
+    """Convert integer cents to an exact ``Decimal`` dollar amount."""
+    return Decimal(int(cents)).scaleb(-2)
+
+
+def format_cents(cents: Optional[int]) -> Optional[str]:
+    """Format integer cents as a decimal string with two places, e.g. ``"-12.05"``."""
+    if cents is None:
+        return None
+    cents = int(cents)
+    sign = "-" if cents < 0 else ""
+    dollars, remainder = divmod(abs(cents), 100)
+    return f"{sign}{dollars}.{remainder:02d}"
+
+
+def sum_cents(values: Iterable[Optional[int]]) -> int:
+    """Exact sum of cent amounts, skipping missing values."""
+    return sum(int(value) for value in values if value is not None)
+
+
+# Pydantic field type for money: int cents in Python, decimal string in JSON
+Money = Annotated[
+    int,
+    BeforeValidator(to_cents),
+    PlainSerializer(format_cents, return_type=str, when_used="json"),
+    WithJsonSchema({"anyOf": [{"type": "number"}, {"type": "string"}]}, mode="validation"),
+    WithJsonSchema({"type": "string", "examples": ["1500.00"]}, mode="serialization"),
+]
+
+# Money already computed in cents (e.g. aggregates); serialized like Money
+MoneyCents = Annotated[
+    int,
+    PlainSerializer(format_cents, return_type=str, when_used="json"),
+    WithJsonSchema({"type": "string", "examples": ["1500.00"]}),
+]
+
+
+def cents_column(field: str) -> str:
+    """Name of the database column that stores ``field`` in cents."""
+    return f"{field}_cents"
+
+
+def money_to_columns(data: Dict[str, Any], fields: Iterable[str]) -> Dict[str, Any]:
+    """Rename money fields (already in cents) to their ``*_cents`` column names."""
+    for field in fields:
+        if field in data:
+            data[cents_column(field)] = data.pop(field)
+    return data
+
+
+def money_from_columns(data: Dict[str, Any], fields: Iterable[str]) -> Dict[str, Any]:
+    """Rename ``*_cents`` columns back to their field names, marking the values as cents."""
+    for field in fields:
+        column = cents_column(field)
+        if column in data:
+            cents = data.pop(column)
+            data[field] = None if cents is None else Cents(cents)
+    return data
+
+
+class CentsColumnsModel(BaseModel):
+    """
+    Base schema for resources whose money fields are stored as ``*_cents`` columns.
+
+    Subclasses list their money fields in ``money_fields``. Database rows (dicts
+    or ORM objects) are read from the ``*_cents`` columns, and ``to_row()``
+    produces a dict ready to be written back.
+    """
+    money_fields: ClassVar[Tuple[str, ...]] = ()
+
+    @model_validator(mode="before")
+    @classmethod
+    def _read_cents_columns(cls, data: Any) -> Any:
+        if not cls.money_fields:
+            return data
+        if isinstance(data, dict):
+            data = dict(data)
+        else:
+            columns = list(cls.model_fields) + [cents_column(field) for field in cls.money_fields]
+            data = {name: getattr(data, name) for name in columns if hasattr(data, name)}
+        return money_from_columns(data, cls.money_fields)
+
+    def to_row(self, **dump_kwargs: Any) -> Dict[str, Any]:
+        """Dump the model with money fields renamed to their ``*_cents`` columns."""
+        return money_to_columns(self.model_dump(**dump_kwargs), self.money_fields)
@@ -0,0 +1,314 @@
+"""
+On-demand sampling profiler for individual requests.
+
+A request is profiled when it carries ``X-Profile-Token`` matching
+``PROFILING_TOKEN``, or when it is picked at random at
+``PROFILING_SAMPLE_RATE``. While it runs, a background thread samples the
+Python stacks of the threads working on it every ``PROFILING_INTERVAL_MS``:
+the event loop thread while it is running this request's coroutines, and
+the threadpool workers running its endpoint. A worker counts as this
+request's when the context it was handed (threadpool calls run in a copy of
+the caller's context) carries this request's profile, so concurrent
+requests to the same route don't end up in each other's profiles. Samples are aggregated as
+folded stacks (``frame;frame;frame count``), ready for flamegraph.pl or
+speedscope.
+
+Two modes: ``wall`` keeps every sample (where the time went, waiting on
+PostgREST included); ``cpu`` drops samples whose innermost frame is blocked
+on a socket, selector, lock or sleep, approximating CPU time.
+
+Profiles are written to ``PROFILING_DIR`` and only the newest
+``PROFILING_MAX_PROFILES`` are kept. With neither a token nor a sample rate
+configured the middleware hands requests straight through.
+"""
+import contextvars
+import hmac
+import json
+import logging
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+from inspect import unwrap
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set
+
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .metrics import UNMATCHED_ROUTE, route_template
+
+logger = logging.getLogger(__name__)
+
+PROFILING_TOKEN = os.getenv('PROFILING_TOKEN')
+PROFILING_SAMPLE_RATE = float(os.getenv('PROFILING_SAMPLE_RATE', '0'))
+PROFILING_MODE = os.getenv('PROFILING_MODE', 'wall')
+PROFILING_INTERVAL_MS = float(os.getenv('PROFILING_INTERVAL_MS', '5'))
+PROFILING_DIR = os.getenv('PROFILING_DIR', os.path.join(tempfile.gettempdir(), 'api-profiles'))
+PROFILING_MAX_PROFILES = int(os.getenv('PROFILING_MAX_PROFILES', '50'))
+
+TOKEN_HEADER = "x-profile-token"
+MODE_HEADER = "x-profile-mode"
+ID_HEADER = "X-Profile-Id"
+# Reading profiles with the token must not record (and evict) profiles
+ADMIN_PATH = "/api/v1/admin/profiles"
+
+MODES = ("wall", "cpu")
+
+# Innermost frames that mean the thread is waiting, not computing
+IDLE_FUNCTIONS = frozenset({
+    "select", "poll", "wait", "acquire", "sleep",
+    "recv", "recv_into", "read", "readinto", "_read", "readline", "connect",
+})
+# Frames from the application's own code always count as work
+APP_ROOT = str(Path(__file__).resolve().parents[2])
+
+
+# Profile of the request the current context belongs to
+_active_profile: contextvars.ContextVar[Optional["RequestProfile"]] = contextvars.ContextVar(
+    "active_profile", default=None
+)
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _is_idle(frame) -> bool:
+    code = frame.f_code
+    return code.co_name in IDLE_FUNCTIONS and not code.co_filename.startswith(APP_ROOT)
+
+
+class RequestProfile:
+    """Samples the stacks of the threads working on one request."""
+
+    def __init__(self, scope: Scope, mode: str = PROFILING_MODE, interval: float = PROFILING_INTERVAL_MS / 1000.0):
+        self.scope = scope
+        self.mode = mode if mode in MODES else "wall"
+        self.interval = interval
+        self.id = uuid.uuid4().hex[:16]
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.started_at = datetime.now(timezone.utc)
+        self._start = time.perf_counter()
+        self.duration = 0.0
+        self._loop_thread = threading.get_ident()
+        self._anchor = None
+        self._endpoint_codes: Optional[Set[Any]] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self, anchor_frame) -> None:
+        """Start sampling; ``anchor_frame`` is the request's outermost coroutine frame."""
+        self._anchor = anchor_frame
+        self._thread = threading.Thread(target=self._run, name=f"profiler-{self.id}", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.duration = time.perf_counter() - self._start
+        self._anchor = None
+
+    def _codes(self) -> Set[Any]:
+        """Code of the endpoint, once the router has picked it."""
+        if self._endpoint_codes is None:
+            endpoint = self.scope.get("endpoint")
+            if endpoint is None:
+                return set()
+            code = getattr(unwrap(endpoint), "__code__", None)
+            self._endpoint_codes = {code} if code is not None else set()
+        return self._endpoint_codes
+
+    def _serves(self, frame) -> bool:
+        """Whether the worker thread below ``frame`` runs in this request's context."""
+        while frame is not None:
+            # The threadpool worker holds the context it runs the call in
+            # (anyio's ``WorkerThread.run``)
+            for value in list(frame.f_locals.values()):
+                if isinstance(value, contextvars.Context):
+                    return value.get(_active_profile) is self
+            frame = frame.f_back
+        # Not started through a context-copying threadpool: can't tell, keep it
+        return True
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            loop_frame = frames.get(self._loop_thread)
+            if loop_frame is not None:
+                self._record(loop_frame, lambda frame: frame is self._anchor)
+            codes = self._codes()
+            if codes:
+                for thread_id, frame in frames.items():
+                    if thread_id not in (own, self._loop_thread):
+                        self._record(frame, lambda frame: frame.f_code in codes, self._serves)
+
+    def _record(self, leaf, is_root, accept=None) -> None:
+        """Count the stack from the first frame ``is_root`` accepts up to ``leaf``."""
+        chain = []
+        frame = leaf
+        while frame is not None:
+            chain.append(frame)
+            if is_root(frame):
+                break
+            frame = frame.f_back
+        else:
+            return
+        if accept is not None and not accept(frame.f_back):
+            return
+        if self.mode == "cpu" and _is_idle(leaf):
+            return
+        self.stacks[";".join(_frame_label(item) for item in reversed(chain))] += 1
+        self.samples += 1
+
+    def folded(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def summary(self, status_code: Optional[int], trigger: str) -> Dict[str, Any]:
+        route = route_template(self.scope)
+        return {
+            "id": self.id,
+            "created_at": self.started_at.isoformat(),
+            "method": self.scope["method"],
+            "path": self.scope["path"],
+            "route": None if route == UNMATCHED_ROUTE else route,
+            "status": status_code,
+            "duration_ms": round(self.duration * 1000, 1),
+            "mode": self.mode,
+            "interval_ms": self.interval * 1000,
+            "samples": self.samples,
+            "trigger": trigger,
+        }
+
+
+class ProfileStore:
+    """Profiles on disk, oldest deleted past ``max_profiles``."""
+
+    def __init__(self, directory: str = PROFILING_DIR, max_profiles: int = PROFILING_MAX_PROFILES):
+        self.directory = Path(directory)
+        self.max_profiles = max_profiles
+        self._lock = threading.Lock()
+
+    def _path(self, profile_id: str) -> Path:
+        if not profile_id.isalnum():
+            raise KeyError(profile_id)
+        return self.directory / f"{profile_id}.json"
+
+    def save(self, summary: Dict[str, Any], folded: str) -> None:
+        with self._lock:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            path = self._path(summary["id"])
+            tmp = path.with_suffix(".tmp")
+            tmp.write_text(json.dumps({**summary, "folded": folded}))
+            tmp.replace(path)
+            files = []
+            for item in self.directory.glob("*.json"):
+                try:
+                    files.append((item.stat().st_mtime, item))
+                except OSError:
+                    continue  # removed by another worker meanwhile
+            files.sort()
+            for _, old in files[:max(len(files) - self.max_profiles, 0)]:
+                old.unlink(missing_ok=True)
+
+    def list(self) -> List[Dict[str, Any]]:
+        """Stored profiles without their stacks, newest first."""
+        summaries = []
+        for path in self.directory.glob("*.json"):
+            try:
+                data = json.loads(path.read_text())
+            except (OSError, ValueError):
+                continue  # deleted or being replaced meanwhile
+            data.pop("folded", None)
+            summaries.append(data)
+        return sorted(summaries, key=lambda item: item["created_at"], reverse=True)
+
+    def get(self, profile_id: str) -> Dict[str, Any]:
+        try:
+            return json.loads(self._path(profile_id).read_text())
+        except (OSError, ValueError):
+            raise KeyError(profile_id)
+
+    def delete(self, profile_id: str) -> bool:
+        try:
+            self._path(profile_id).unlink()
+            return True
+        except (OSError, KeyError):
+            return False
+
+
+profile_store = ProfileStore()
+
+
+def valid_token(token: Optional[str], expected: Optional[str] = None) -> bool:
+    expected = expected if expected is not None else PROFILING_TOKEN
+    return bool(expected) and token is not None and hmac.compare_digest(token, expected)
+
+
+class ProfilingMiddleware:
+    """Profiles requests that ask for it with the token, or a random sample."""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        token: Optional[str] = PROFILING_TOKEN,
+        sample_rate: float = PROFILING_SAMPLE_RATE,
+        store: Optional[ProfileStore] = None,
+        skip_prefix: str = ADMIN_PATH,
+    ):
+        self.app = app
+        self.token = token
+        self.sample_rate = sample_rate
+        self.store = store
+        self.skip_prefix = skip_prefix
+
+    def _trigger(self, scope: Scope) -> Optional[str]:
+        if self.token:
+            for name, value in scope["headers"]:
+                if name == TOKEN_HEADER.encode():
+                    return "header" if valid_token(value.decode("latin-1"), self.token) else None
+        if self.sample_rate and random.random() < self.sample_rate:
+            return "sample"
+        return None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not (self.token or self.sample_rate):
+            await self.app(scope, receive, send)
+            return
+        trigger = None if scope["path"].startswith(self.skip_prefix) else self._trigger(scope)
+        if trigger is None:
+            await self.app(scope, receive, send)
+            return
+
+        mode = Headers(scope=scope).get(MODE_HEADER, PROFILING_MODE)
+        profile = RequestProfile(scope, mode)
+        status_code: Dict[str, int] = {}
+
+        async def send_with_id(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                status_code["value"] = message["status"]
+                MutableHeaders(scope=message).append(ID_HEADER, profile.id)
+            await send(message)
+
+        profile.start(sys._getframe())
+        token = _active_profile.set(profile)
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            _active_profile.reset(token)
+            profile.stop()
+            store = self.store or profile_store
+            try:
+                await run_in_threadpool(store.save, profile.summary(status_code.get("value"), trigger), profile.folded())
+            except Exception as e:
+                logger.warning("Failed to store profile %s: %s", profile.id, e)
@@ -0,0 +1,201 @@
+"""
+Slow-request and slow-query log.
+
+``SlowRequestMiddleware`` times every request to its last response byte.
+A request over ``SLOW_REQUEST_MS`` is logged with a structured
+``slow_log`` field holding its route, the authenticated principal, request
+and response sizes and the breakdown of its upstream calls from the
+request trace (count, time and rows per kind, plus the slowest calls). Independently, each Supabase or SQL
+call over ``SLOW_QUERY_MS`` is logged as a ``slow_query`` event with the
+route it served.
+
+Under load many requests go slow at once, so events are first sampled at
+``SLOW_LOG_SAMPLE_RATE`` and then capped at ``SLOW_LOG_MAX_PER_MINUTE`` per
+worker; the next logged event reports how many were dropped meanwhile.
+The breakdown needs ``TracingMiddleware`` outside this middleware.
+
+Responses of a type in ``SLOW_LOG_SKIP_CONTENT_TYPES`` (event streams by
+default) stay open for as long as the client listens, so they are never
+logged as slow requests; their slow queries still are.
+"""
+import logging
+import os
+import random
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .metrics import UNMATCHED_ROUTE, route_template
+from .tracing import KINDS, SQL, SUPABASE, Span, Trace, current_trace
+
+logger = logging.getLogger(__name__)
+
+SLOW_REQUEST_MS = float(os.getenv('SLOW_REQUEST_MS', '1000'))
+SLOW_QUERY_MS = float(os.getenv('SLOW_QUERY_MS', '250'))
+SLOW_LOG_SAMPLE_RATE = float(os.getenv('SLOW_LOG_SAMPLE_RATE', '1'))
+SLOW_LOG_MAX_PER_MINUTE = int(os.getenv('SLOW_LOG_MAX_PER_MINUTE', '60'))
+SLOW_LOG_SKIP_CONTENT_TYPES = tuple(
+    value.strip().lower() for value in os.getenv('SLOW_LOG_SKIP_CONTENT_TYPES', 'text/event-stream').split(',') if value.strip()
+)
+
+QUERY_KINDS = (SUPABASE, SQL)
+# Slowest calls listed in a slow request entry
+TOP_CALLS = 5
+
+
+class LogLimiter:
+    """Sampling plus a token bucket refilled at ``per_minute`` events a minute."""
+
+    def __init__(self, sample_rate: float = SLOW_LOG_SAMPLE_RATE, per_minute: int = SLOW_LOG_MAX_PER_MINUTE):
+        self.sample_rate = sample_rate
+        self.per_minute = per_minute
+        self.tokens = float(per_minute)
+        self.suppressed = 0
+        self._updated = time.monotonic()
+
+    def allow(self) -> Optional[int]:
+        """None to drop the event, else the number dropped since the last one allowed."""
+        now = time.monotonic()
+        self.tokens = min(float(self.per_minute), self.tokens + (now - self._updated) * self.per_minute / 60.0)
+        self._updated = now
+        if random.random() >= self.sample_rate or self.tokens < 1:
+            self.suppressed += 1
+            return None
+        self.tokens -= 1
+        suppressed, self.suppressed = self.suppressed, 0
+        return suppressed
+
+
+def _call_entry(call: Span) -> Dict[str, Any]:
+    entry = {"kind": call.kind, "name": call.name, "duration_ms": round(call.duration * 1000, 1)}
+    for key in ("table", "operation", "rows"):
+        if key in call.attributes:
+            entry[key] = call.attributes[key]
+    if call.error:
+        entry["error"] = call.error
+    return entry
+
+
+def upstream_breakdown(trace: Trace) -> Dict[str, Any]:
+    """Per-kind totals and the slowest calls of a request."""
+    totals = trace.totals()
+    calls = trace.calls()
+    return {
+        "upstream": {
+            kind: {
+                "count": totals[kind]["count"],
+                "duration_ms": round(totals[kind]["seconds"] * 1000, 1),
+                "rows": totals[kind]["rows"],
+            }
+            for kind in KINDS if kind in totals
+        },
+        "slowest_calls": [_call_entry(call) for call in sorted(calls, key=lambda call: call.duration, reverse=True)[:TOP_CALLS]],
+    }
+
+
+class SlowRequestMiddleware:
+    """Logs requests and upstream queries that go over their time budget."""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        request_threshold_ms: float = SLOW_REQUEST_MS,
+        query_threshold_ms: float = SLOW_QUERY_MS,
+        limiter: Optional[LogLimiter] = None,
+        skip_content_types: Sequence[str] = SLOW_LOG_SKIP_CONTENT_TYPES,
+    ):
+        self.app = app
+        self.request_threshold = request_threshold_ms / 1000.0
+        self.query_threshold = query_threshold_ms / 1000.0
+        self.limiter = limiter or LogLimiter()
+        self.skip_content_types = frozenset(skip_content_types)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or self.request_threshold <= 0:
+            await self.app(scope, receive, send)
+            return
+
+        sizes = {"request_bytes": 0, "response_bytes": 0}
+        response: Dict[str, Any] = {}
+        start = time.perf_counter()
+
+        async def receive_counted() -> Message:
+            message = await receive()
+            if message["type"] == "http.request":
+                sizes["request_bytes"] += len(message.get("body", b""))
+            return message
+
+        async def send_counted(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+                for name, value in message.get("headers", ()):
+                    if name.lower() == b"content-type":
+                        response["content_type"] = value.decode("latin-1").split(";")[0].strip().lower()
+            elif message["type"] == "http.response.body":
+                sizes["response_bytes"] += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive_counted, send_counted)
+        finally:
+            duration = time.perf_counter() - start
+            try:
+                self._check(
+                    scope, duration, response.get("status", 500), sizes, current_trace(),
+                    response.get("content_type") in self.skip_content_types,
+                )
+            except Exception as e:
+                logger.warning("Failed to write slow request log: %s", e)
+
+    def _check(
+        self,
+        scope: Scope,
+        duration: float,
+        status_code: int,
+        sizes: Dict[str, int],
+        trace: Optional[Trace],
+        streamed: bool = False,
+    ) -> None:
+        route = route_template(scope)
+        context = {
+            "method": scope["method"],
+            "route": None if route == UNMATCHED_ROUTE else route,
+            "principal_id": scope.get("state", {}).get("principal_id"),
+        }
+
+        if self.query_threshold > 0 and trace is not None:
+            slow_queries: List[Span] = [
+                call for call in trace.calls()
+                if call.kind in QUERY_KINDS and call.end is not None and call.duration >= self.query_threshold
+            ]
+            for call in slow_queries:
+                entry = {"event": "slow_query", **_call_entry(call), **context, "threshold_ms": self.query_threshold * 1000}
+                if "statement" in call.attributes:
+                    entry["statement"] = call.attributes["statement"]
+                self._log(entry)
+
+        if duration >= self.request_threshold and not streamed:
+            entry = {
+                "event": "slow_request",
+                **context,
+                "path": scope["path"],
+                "status": status_code,
+                "duration_ms": round(duration * 1000, 1),
+                "threshold_ms": self.request_threshold * 1000,
+                **sizes,
+            }
+            if trace is not None:
+                entry.update(upstream_breakdown(trace))
+            self._log(entry)
+
+    def _log(self, entry: Dict[str, Any]) -> None:
+        suppressed = self.limiter.allow()
+        if suppressed is None:
+            return
+        if suppressed:
+            entry["suppressed_since_last"] = suppressed
+        logger.warning(
+            "%s %s %s %.1fms", entry["event"], entry["method"], entry["route"] or entry.get("path"), entry["duration_ms"],
+            extra={"slow_log": entry}
+        )
@@ -5,8 +5,6 @@ from typing import Optional, Dict, Any, Union
 from fastapi import HTTPException, status, Header
 import logging
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 load_dotenv()
@@ -62,14 +60,14 @@ async def get_current_user(authorization: str = Header(...)) -> Dict[str, Any]:
             return user.user.dict()
             
         except Exception as e:
-            logger.error(f"Error verifying token: {str(e)}")
+            logger.error("Error verifying token: %s", e)
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Could not validate credentials"
             )
             
     except Exception as e:
-        logger.error(f"Authentication error: {str(e)}")
+        logger.error("Authentication error: %s", e)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate credentials"
@@ -0,0 +1,278 @@
+"""
+Replay of offline mutations for POST /sync.
+
+Field crews record changes without signal and upload them later as one
+ordered batch. Each mutation carries a client-generated ``mutation_id``
+(replays of an applied id are skipped) and, for creates, a client-generated
+row ``client_id`` so a later mutation in the same batch can refer to a row
+the server has not numbered yet.
+
+Conflicts are detected per mutation. With ``base_version`` the row must
+still be at that version; otherwise, with ``client_updated_at``, the change
+only wins if it was made after the row was last written (last writer wins).
+A mutation with neither is applied as is. Every check runs before anything
+is written, so a conflicting or invalid mutation is simply reported and the
+rest of the batch is applied in the caller's transaction. Each mutation is
+written under its own savepoint, so one the database refuses (a constraint
+the schemas do not check) is rolled back and rejected on its own.
+"""
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence, Type
+
+from pydantic import BaseModel, ValidationError
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from api.core.money import cents_column
+from api.core.vendors import normalize_vendor
+from api.models import ActualExpense, ForecastLineItem, ForecastStatusEnum, Project, SyncMutation
+from api.schemas.expense import ActualExpenseCreate
+from api.schemas.forecast import ForecastLineItemCreate
+
+APPLIED = "applied"
+DUPLICATE = "duplicate"
+CONFLICT = "conflict"
+REJECTED = "rejected"
+
+
+class MutationRejected(Exception):
+    """A mutation that cannot be applied (invalid data, unknown or foreign row)."""
+
+
+@dataclass
+class SyncEntity:
+    name: str
+    model: Any
+    create_schema: Type[BaseModel]
+    # Key used for this entity in responses and change events
+    collection: str
+
+
+ENTITIES: Dict[str, SyncEntity] = {
+    "forecast_item": SyncEntity("forecast_item", ForecastLineItem, ForecastLineItemCreate, "forecast_items"),
+    "expense": SyncEntity("expense", ActualExpense, ActualExpenseCreate, "expenses"),
+}
+
+
+@dataclass
+class SyncBatch:
+    """What a batch did: per-mutation results plus the rows it touched."""
+    results: List[Dict[str, Any]] = field(default_factory=list)
+    rows: Dict[str, Dict[int, Any]] = field(default_factory=dict)
+    deleted: List[Dict[str, Any]] = field(default_factory=list)
+    # (entity, action, row dict) for change events, published after commit
+    changes: List[Any] = field(default_factory=list)
+
+    def touch(self, entity: SyncEntity, row: Any) -> None:
+        self.rows.setdefault(entity.collection, {})[row.id] = row
+
+
+def _as_aware(value: Optional[datetime]) -> Optional[datetime]:
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def _find_row(db: Session, entity: SyncEntity, owner: uuid.UUID, mutation: Any, lock: bool = False):
+    """The mutation's target row, by server id or client id."""
+    query = db.query(entity.model).filter(entity.model.user_id == owner)
+    if mutation.id is not None:
+        query = query.filter(entity.model.id == mutation.id)
+    elif mutation.client_id is not None:
+        query = query.filter(entity.model.client_id == mutation.client_id)
+    else:
+        raise MutationRejected("Mutation needs an id or client_id")
+    if lock:
+        query = query.with_for_update()
+    return query.first()
+
+
+def _conflict(row: Any, mutation: Any) -> Optional[str]:
+    """Why the mutation loses against the stored row, if it does."""
+    if mutation.base_version is not None:
+        if row.version != mutation.base_version:
+            return f"Row is at version {row.version}, change was made against {mutation.base_version}"
+        return None
+    client_time = _as_aware(mutation.client_updated_at)
+    server_time = _as_aware(row.updated_at)
+    if client_time is not None and server_time is not None and server_time > client_time:
+        return "Row was changed on the server after this change was made"
+    return None
+
+
+def _resolve_references(db: Session, owner: uuid.UUID, data: Dict[str, Any]) -> Dict[str, Any]:
+    """Swap ``forecast_line_item_client_id`` for the server id of that item."""
+    data = dict(data)
+    client_id = data.pop("forecast_line_item_client_id", None)
+    if client_id is not None:
+        item = db.query(ForecastLineItem.id)\
+            .filter(ForecastLineItem.user_id == owner, ForecastLineItem.client_id == uuid.UUID(str(client_id)))\
+            .first()
+        if item is None:
+            raise MutationRejected("Forecast item referenced by client id not found")
+        data["forecast_line_item_id"] = item.id
+    return data
+
+
+def _validated_row(entity: SyncEntity, data: Dict[str, Any]) -> Dict[str, Any]:
+    try:
+        row = entity.create_schema.model_validate(data).to_row()
+    except ValidationError as e:
+        raise MutationRejected(str(e.errors()[0].get("msg", "Invalid data")))
+    if entity.model is ActualExpense:
+        row["vendor_key"] = normalize_vendor(row.get("vendor"))
+    if entity.model is ForecastLineItem and row.get("status") is not None:
+        status = row["status"]
+        try:
+            row["status"] = ForecastStatusEnum[status] if status in ForecastStatusEnum.__members__ else ForecastStatusEnum(status)
+        except ValueError:
+            raise MutationRejected(f"Invalid status: {status}")
+    return row
+
+
+def _check_ownership(db: Session, owner: uuid.UUID, row: Dict[str, Any]) -> None:
+    project = db.query(Project.id).filter(Project.id == row["project_id"], Project.user_id == owner).first()
+    if project is None:
+        raise MutationRejected("Project not found")
+    item_id = row.get("forecast_line_item_id")
+    if item_id is not None:
+        item = db.query(ForecastLineItem.id)\
+            .filter(ForecastLineItem.id == item_id, ForecastLineItem.user_id == owner)\
+            .first()
+        if item is None:
+            raise MutationRejected("Forecast item not found")
+
+
+def _current_data(entity: SyncEntity, row: Any, changes: Dict[str, Any]) -> Dict[str, Any]:
+    """The stored row as create-schema input, with ``changes`` laid over it."""
+    schema = entity.create_schema
+    data = {name: getattr(row, name) for name in schema.model_fields if hasattr(row, name)}
+    for money_field in schema.money_fields:
+        if money_field not in changes:
+            data[cents_column(money_field)] = getattr(row, cents_column(money_field))
+    if isinstance(data.get("status"), ForecastStatusEnum):
+        data["status"] = data["status"].value
+    return {**data, **changes}
+
+
+def _create(db: Session, entity: SyncEntity, owner: uuid.UUID, mutation: Any, batch: SyncBatch) -> Dict[str, Any]:
+    if mutation.client_id is None:
+        raise MutationRejected("Creates need a client_id")
+    existing = db.query(entity.model)\
+        .filter(entity.model.user_id == owner, entity.model.client_id == mutation.client_id)\
+        .first()
+    if existing is not None:
+        batch.touch(entity, existing)
+        return {"status": DUPLICATE, "row": existing}
+
+    values = _validated_row(entity, _resolve_references(db, owner, mutation.data))
+    _check_ownership(db, owner, values)
+    row = entity.model(**values, user_id=owner, client_id=mutation.client_id)
+    db.add(row)
+    db.flush()
+    batch.touch(entity, row)
+    batch.changes.append((entity, "created", row))
+    return {"status": APPLIED, "row": row}
+
+
+def _update(db: Session, entity: SyncEntity, owner: uuid.UUID, mutation: Any, batch: SyncBatch) -> Dict[str, Any]:
+    row = _find_row(db, entity, owner, mutation, lock=True)
+    if row is None:
+        raise MutationRejected("Row not found")
+    reason = _conflict(row, mutation)
+    if reason:
+        batch.touch(entity, row)
+        return {"status": CONFLICT, "row": row, "detail": reason}
+
+    changes = _resolve_references(db, owner, mutation.data)
+    values = _validated_row(entity, _current_data(entity, row, changes))
+    _check_ownership(db, owner, values)
+    for column, value in values.items():
+        setattr(row, column, value)
+    db.flush()
+    batch.touch(entity, row)
+    batch.changes.append((entity, "updated", row))
+    return {"status": APPLIED, "row": row}
+
+
+def _delete(db: Session, entity: SyncEntity, owner: uuid.UUID, mutation: Any, batch: SyncBatch) -> Dict[str, Any]:
+    row = _find_row(db, entity, owner, mutation, lock=True)
+    if row is None:
+        # Already gone; deleting is idempotent
+        return {"status": APPLIED, "row": None}
+    reason = _conflict(row, mutation)
+    if reason:
+        batch.touch(entity, row)
+        return {"status": CONFLICT, "row": row, "detail": reason}
+
+    deleted = {"entity": entity.collection, "id": row.id, "project_id": row.project_id}
+    db.delete(row)
+    db.flush()
+    batch.deleted.append(deleted)
+    batch.changes.append((entity, "deleted", {"id": deleted["id"], "project_id": deleted["project_id"]}))
+    return {"status": APPLIED, "row": None, "id": deleted["id"]}
+
+
+ACTIONS = {"create": _create, "update": _update, "delete": _delete}
+
+
+def apply_mutations(db: Session, user_id: str, mutations: Sequence[Any]) -> SyncBatch:
+    """
+    Apply mutations in order within the session's transaction.
+
+    The caller commits (or rolls back on error). Rows touched by the batch,
+    including the server state of conflicting rows, are collected in the
+    returned batch.
+    """
+    owner = uuid.UUID(str(user_id))
+    batch = SyncBatch()
+
+    mutation_ids = [mutation.mutation_id for mutation in mutations]
+    applied_before = {
+        row.mutation_id
+        for row in db.query(SyncMutation.mutation_id)
+            .filter(SyncMutation.user_id == owner, SyncMutation.mutation_id.in_(mutation_ids))
+    }
+
+    for mutation in mutations:
+        entity = ENTITIES[mutation.entity]
+        result = {
+            "mutation_id": mutation.mutation_id,
+            "entity": mutation.entity,
+            "action": mutation.action,
+            "client_id": mutation.client_id,
+            "id": mutation.id,
+        }
+        if mutation.mutation_id in applied_before:
+            try:
+                row = _find_row(db, entity, owner, mutation)
+            except MutationRejected:
+                row = None
+            if row is not None:
+                batch.touch(entity, row)
+            outcome = {"status": DUPLICATE, "row": row}
+        else:
+            try:
+                with db.begin_nested():
+                    outcome = ACTIONS[mutation.action](db, entity, owner, mutation, batch)
+            except MutationRejected as e:
+                outcome = {"status": REJECTED, "row": None, "detail": str(e)}
+            except IntegrityError:
+                outcome = {"status": REJECTED, "row": None, "detail": "Rejected by a database constraint"}
+
+        row = outcome.get("row")
+        if row is not None:
+            result.update(id=row.id, client_id=row.client_id, version=row.version)
+        elif outcome.get("id") is not None:
+            result["id"] = outcome["id"]
+        result.update(status=outcome["status"], detail=outcome.get("detail"))
+        batch.results.append(result)
+
+        if outcome["status"] == APPLIED:
+            db.add(SyncMutation(user_id=owner, mutation_id=mutation.mutation_id, entity=mutation.entity, row_id=result["id"]))
+            applied_before.add(mutation.mutation_id)
+
+    db.flush()
+    return batch
@@ -0,0 +1,373 @@
+"""
+Per-request tracing of upstream calls.
+
+Most of a request's latency is spent waiting on round trips: PostgREST
+queries through the Supabase client, Supabase auth calls and SQL through
+the SQLAlchemy engine. ``TracingMiddleware`` opens a trace for every
+request; the instrumented clients record each call as a span carrying its
+timing, table and operation. When the response starts, the totals per kind
+of call go out in a ``Server-Timing`` header, so browser dev tools show
+where the time went.
+
+Finished traces are logged as a span tree at DEBUG level on the
+``api.core.tracing`` logger. With ``TRACING_EXPORT_FILE`` set (and
+``opentelemetry-sdk`` installed) they are also exported as OpenTelemetry
+spans, one JSON object per line, by a background thread.
+"""
+import contextvars
+import functools
+import logging
+import os
+import re
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .metrics import UNMATCHED_ROUTE, route_template
+
+logger = logging.getLogger(__name__)
+
+TRACING_ENABLED = os.getenv('TRACING_ENABLED', 'true').lower() == 'true'
+TRACING_EXPORT_FILE = os.getenv('TRACING_EXPORT_FILE')
+
+SUPABASE = "supabase"
+AUTH = "auth"
+SQL = "sql"
+# Server-Timing order; the whole request is reported as "app"
+KINDS = (AUTH, SUPABASE, SQL)
+
+# PostgREST verbs by HTTP method
+POSTGREST_OPERATIONS = {"GET": "select", "HEAD": "count", "POST": "insert", "PATCH": "update", "DELETE": "delete"}
+AUTH_METHODS = ("get_user", "sign_up", "sign_in_with_password", "refresh_session", "sign_out")
+
+_SQL_TABLE = re.compile(r'\b(?:from|into|update|join)\s+"?([\w.]+)"?', re.IGNORECASE)
+
+
+@dataclass
+class Span:
+    """One timed operation; a request's upstream calls are its children."""
+    name: str
+    kind: str
+    start: float = field(default_factory=time.perf_counter)
+    end: Optional[float] = None
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    children: List["Span"] = field(default_factory=list)
+    error: Optional[str] = None
+
+    @property
+    def duration(self) -> float:
+        return (self.end if self.end is not None else time.perf_counter()) - self.start
+
+    def walk(self) -> Iterator["Span"]:
+        yield self
+        for child in self.children:
+            yield from child.walk()
+
+
+@dataclass
+class Trace:
+    """All spans of one request under a root span."""
+    root: Span
+    # Wall clock at the root's start, to place perf_counter offsets in time
+    started_at_ns: int = field(default_factory=time.time_ns)
+
+    def totals(self) -> Dict[str, Dict[str, float]]:
+        """Count, total seconds and rows returned of the calls of each kind."""
+        totals: Dict[str, Dict[str, float]] = {}
+        for span in self.root.walk():
+            if span is self.root or span.kind not in KINDS:
+                continue
+            entry = totals.setdefault(span.kind, {"count": 0, "seconds": 0.0, "rows": 0})
+            entry["count"] += 1
+            entry["seconds"] += span.duration
+            entry["rows"] += span.attributes.get("rows", 0)
+        return totals
+
+    def calls(self) -> List[Span]:
+        """The upstream calls, in the order they started."""
+        return [span for span in self.root.walk() if span is not self.root and span.kind in KINDS]
+
+    def wall_ns(self, offset: float) -> int:
+        return self.started_at_ns + int((offset - self.root.start) * 1e9)
+
+    def server_timing(self) -> str:
+        parts = []
+        totals = self.totals()
+        for kind in KINDS:
+            if kind in totals:
+                entry = totals[kind]
+                parts.append(f'{kind};dur={entry["seconds"] * 1000:.1f};desc="{entry["count"]} calls"')
+        parts.append(f"app;dur={self.root.duration * 1000:.1f}")
+        return ", ".join(parts)
+
+    def render(self) -> str:
+        """The span tree, one indented line per span."""
+        lines = []
+
+        def visit(span: Span, depth: int) -> None:
+            details = " ".join(f"{key}={value}" for key, value in span.attributes.items() if key != "statement")
+            error = f" error={span.error}" if span.error else ""
+            lines.append(f"{'  ' * depth}{span.name} {span.duration * 1000:.1f}ms {details}{error}".rstrip())
+            for child in span.children:
+                visit(child, depth + 1)
+
+        visit(self.root, 0)
+        return "\n".join(lines)
+
+
+_current_trace: contextvars.ContextVar[Optional[Trace]] = contextvars.ContextVar("trace", default=None)
+_current_span: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("span", default=None)
+
+
+def current_trace() -> Optional[Trace]:
+    return _current_trace.get()
+
+
+@contextmanager
+def span(name: str, kind: str = "internal", **attributes: Any) -> Iterator[Optional[Span]]:
+    """Time a block as a child of the current span; a no-op outside a traced request."""
+    parent = _current_span.get()
+    if parent is None:
+        yield None
+        return
+    child = Span(name, kind, attributes=attributes)
+    parent.children.append(child)
+    token = _current_span.set(child)
+    try:
+        yield child
+    except BaseException as e:
+        child.error = type(e).__name__
+        raise
+    finally:
+        child.end = time.perf_counter()
+        _current_span.reset(token)
+
+
+# --- Supabase client ------------------------------------------------------
+
+def _postgrest_span(builder) -> Dict[str, Any]:
+    path = getattr(builder, "path", "") or ""
+    method = getattr(builder, "http_method", "")
+    parts = path.strip("/").split("/")
+    if parts[0] == "rpc":
+        return {"table": parts[-1], "operation": "rpc"}
+    operation = POSTGREST_OPERATIONS.get(method, method.lower())
+    prefer = (getattr(builder, "headers", None) or {}).get("Prefer", "")
+    if method == "POST" and "resolution=" in prefer:
+        operation = "upsert"
+    return {"table": parts[0], "operation": operation}
+
+
+def _traced_execute(execute: Callable) -> Callable:
+    @functools.wraps(execute)
+    def wrapper(self, *args, **kwargs):
+        if _current_span.get() is None:
+            return execute(self, *args, **kwargs)
+        attributes = _postgrest_span(self)
+        with span(f"{attributes['operation']} {attributes['table']}", SUPABASE, **attributes) as call:
+            response = execute(self, *args, **kwargs)
+            data = getattr(response, "data", None)
+            if isinstance(data, list):
+                call.attributes["rows"] = len(data)
+            elif data is not None:
+                call.attributes["rows"] = 1
+            return response
+
+    wrapper.__traced__ = True
+    return wrapper
+
+
+def _traced_auth(name: str, method: Callable) -> Callable:
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        if _current_span.get() is None:
+            return method(*args, **kwargs)
+        with span(f"auth {name}", AUTH, operation=name):
+            return method(*args, **kwargs)
+
+    wrapper.__traced__ = True
+    return wrapper
+
+
+def instrument_supabase(client) -> None:
+    """Trace the client's PostgREST queries and auth calls (safe to call twice)."""
+    try:
+        from postgrest._sync import request_builder
+    except ImportError:  # pragma: no cover - depends on the environment
+        request_builder = None
+
+    # MaybeSingle's execute goes through Single's, so each query is one span
+    if request_builder is not None:
+        for builder in (request_builder.SyncQueryRequestBuilder, request_builder.SyncSingleRequestBuilder):
+            if not getattr(builder.execute, "__traced__", False):
+                builder.execute = _traced_execute(builder.execute)
+
+    auth = getattr(client, "auth", None)
+    for name in AUTH_METHODS:
+        method = getattr(auth, name, None)
+        if method is not None and not getattr(method, "__traced__", False):
+            setattr(auth, name, _traced_auth(name, method))
+
+
+# --- SQLAlchemy -----------------------------------------------------------
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_span.get() is None:
+        return
+    operation = statement.lstrip().split(None, 1)[0].lower() if statement.strip() else "sql"
+    match = _SQL_TABLE.search(statement)
+    attributes = {"operation": operation, "statement": statement[:200]}
+    if match:
+        attributes["table"] = match.group(1)
+    manager = span(f"{operation} {attributes.get('table', '')}".rstrip(), SQL, **attributes)
+    statement_span = manager.__enter__()
+    conn.info.setdefault("trace_spans", []).append((manager, statement_span))
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    spans = conn.info.get("trace_spans")
+    if spans:
+        manager, statement_span = spans.pop()
+        # -1 when the driver doesn't know (SELECTs on most of them)
+        rowcount = getattr(cursor, "rowcount", -1)
+        if rowcount is not None and rowcount >= 0:
+            statement_span.attributes["rows"] = rowcount
+        manager.__exit__(None, None, None)
+
+
+def _handle_error(exception_context):
+    conn = exception_context.connection
+    spans = conn.info.get("trace_spans") if conn is not None else None
+    if spans:
+        error = exception_context.original_exception
+        manager, _ = spans.pop()
+        manager.__exit__(type(error), error, None)
+
+
+def instrument_engine(engine) -> None:
+    """Trace every statement the engine executes."""
+    from sqlalchemy import event
+
+    if event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+# --- Export ---------------------------------------------------------------
+
+class OTelFileExporter:
+    """Writes finished traces as OpenTelemetry spans to a JSON lines file."""
+
+    def __init__(self, path: str):
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+
+        self._file = open(path, "a", buffering=1)
+        self.provider = TracerProvider(resource=Resource.create({"service.name": "construction-cost-tracker-api"}))
+        self.provider.add_span_processor(BatchSpanProcessor(ConsoleSpanExporter(
+            out=self._file,
+            formatter=lambda otel_span: otel_span.to_json(indent=None) + "\n",
+        )))
+        self.tracer = self.provider.get_tracer(__name__)
+
+    def export(self, trace: Trace) -> None:
+        from opentelemetry import trace as otel_trace
+
+        def emit(span: Span, parent_context) -> None:
+            attributes = {f"{span.kind}.{key}": value for key, value in span.attributes.items()}
+            otel_span = self.tracer.start_span(
+                span.name,
+                context=parent_context,
+                start_time=trace.wall_ns(span.start),
+                attributes={"span.kind": span.kind, **attributes},
+            )
+            if span.error:
+                otel_span.set_status(otel_trace.Status(otel_trace.StatusCode.ERROR, span.error))
+            context = otel_trace.set_span_in_context(otel_span)
+            for child in span.children:
+                emit(child, context)
+            otel_span.end(end_time=trace.wall_ns(span.end if span.end is not None else time.perf_counter()))
+
+        emit(trace.root, None)
+
+    def shutdown(self) -> None:
+        self.provider.shutdown()
+        self._file.close()
+
+
+def _create_exporter() -> Optional[OTelFileExporter]:
+    if not TRACING_EXPORT_FILE:
+        return None
+    try:
+        return OTelFileExporter(TRACING_EXPORT_FILE)
+    except ImportError:
+        logger.warning("TRACING_EXPORT_FILE is set but opentelemetry-sdk is not installed; traces are not exported")
+        return None
+
+
+exporter = _create_exporter()
+
+
+def shutdown_exporter() -> None:
+    """Flush buffered spans to the export file."""
+    if exporter is not None:
+        exporter.shutdown()
+
+
+# --- Middleware -----------------------------------------------------------
+
+class TracingMiddleware:
+    """Opens a trace per request and reports it in ``Server-Timing``."""
+
+    def __init__(self, app: ASGIApp, enabled: bool = TRACING_ENABLED, export: Optional[Callable[[Trace], None]] = None):
+        self.app = app
+        self.enabled = enabled
+        self.export = export
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if not self.enabled or scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        root = Span(f"{scope['method']} {scope['path']}", "request", attributes={"method": scope["method"]})
+        trace = Trace(root)
+        trace_token = _current_trace.set(trace)
+        span_token = _current_span.set(root)
+
+        async def send_with_timing(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                root.attributes["status"] = message["status"]
+                headers = MutableHeaders(scope=message)
+                headers.append("Server-Timing", trace.server_timing())
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        except BaseException as e:
+            root.error = type(e).__name__
+            raise
+        finally:
+            root.end = time.perf_counter()
+            _current_span.reset(span_token)
+            _current_trace.reset(trace_token)
+            route = route_template(scope)
+            if route != UNMATCHED_ROUTE:
+                root.attributes["route"] = route
+            self._finish(trace)
+
+    def _finish(self, trace: Trace) -> None:
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Request trace:\n%s", trace.render())
+        export = self.export or (exporter.export if exporter is not None else None)
+        if export is not None:
+            try:
+                export(trace)
+            except Exception as e:
+                logger.warning("Failed to export trace: %s", e)
@@ -0,0 +1,26 @@
+"""
+Vendor name normalization.
+
+``actual_expenses.vendor`` is free text, so the same supplier shows up as
+"Home Depot #123", "HOME DEPOT" and "The Home Depot, Inc.". The normalized
+key collapses those variants and is stored in ``actual_expenses.vendor_key``
+for indexed duplicate lookups and vendor rollups. ``normalize_vendor()`` in
+``supabase_schema.sql`` mirrors this function for backfills; keep them in step.
+"""
+import re
+from typing import Optional
+
+_APOSTROPHES = re.compile(r"['’`]")
+# Store and location numbers: "#123", "store 45", "no. 7", "str #0612"
+_STORE_NUMBER = re.compile(r"(?:#|\b(?:store|str|no|number|num)\b\.?)\s*#?\s*\d+")
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+_STOPWORDS = frozenset({"inc", "llc", "ltd", "co", "corp", "corporation", "company", "the"})
+
+
+def normalize_vendor(name: Optional[str]) -> str:
+    """Canonical lookup key for a vendor name ("" when there is no vendor)."""
+    if not name:
+        return ""
+    key = _APOSTROPHES.sub("", name.lower()).replace("&", " and ")
+    key = _STORE_NUMBER.sub(" ", key)
+    return " ".join(token for token in _NON_ALNUM.split(key) if token and token not in _STOPWORDS)
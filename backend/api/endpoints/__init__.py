@@ -1,6 +1,6 @@
 """API endpoints for the Construction Cost Tracker application."""
 
 # Import all endpoint modules to make them available
-from . import auth, projects, forecast, expenses, draws
+from . import auth, projects, forecast, expenses, draws, analytics, sync, profiles
 
-__all__ = ["auth", "projects", "forecast", "expenses", "draws"]
+__all__ = ["auth", "projects", "forecast", "expenses", "draws", "analytics", "sync", "profiles"]
@@ -0,0 +1,562 @@
+"""Analytics endpoints for the Construction Cost Tracker API."""
+from datetime import date, datetime, timezone
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Any, List, Optional
+import asyncio
+import logging
+import os
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from api.analytics import (
+    aggregate_spend,
+    build_risk_inputs,
+    change_watermark,
+    fetch_rows,
+    fit_overrun_model,
+    project_cash_flow,
+    query_daily_spend,
+    simulate,
+)
+from api.analytics.cashflow import DATED_EXPENSE_COLUMNS, DEFAULT_WINDOW_DAYS, DRAW_COLUMNS
+from api.analytics.cost import (
+    EXPENSE_COLUMNS,
+    FORECAST_COLUMNS,
+    LineItemFrame,
+    compute_cost_report,
+    project_budgets,
+)
+from api.analytics.benchmarks import (
+    BENCHMARK_COLUMNS,
+    OUTLIER_HIGH,
+    OUTLIER_LOW,
+    compare_project,
+    compute_benchmarks,
+    project_square_feet,
+)
+from api.analytics.spend import BUCKETS, GROUP_DIMENSIONS, ROLLUP_COLUMNS, ROLLUP_ORDER
+from api.analytics.vendors import VENDOR_SORTS, stream_top_vendors, vendor_report
+from api.analytics.risk import SimulationCache, get_process_pool, risk_report, seed_from_digest, shutdown_process_pool
+from api.core.database import get_db
+from api.schemas.analytics import (
+    CostReportOut,
+    CashFlowReportOut,
+    RiskReportOut,
+    SpendReportOut,
+    VendorReportOut,
+    CostBenchmarksOut,
+    ProjectBenchmarkOut,
+)
+from api.core.supabase import supabase
+from api.core.auth import get_current_active_user
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+# Days between requesting a draw and the funds arriving
+DRAW_LEAD_TIME_DAYS = int(os.getenv('DRAW_LEAD_TIME_DAYS', '10'))
+
+# Monte Carlo risk simulation
+RISK_DEFAULT_TRIALS = int(os.getenv('RISK_DEFAULT_TRIALS', '100000'))
+RISK_MAX_WORKERS = int(os.getenv('RISK_MAX_WORKERS', '0')) or None
+risk_cache = SimulationCache(int(os.getenv('RISK_CACHE_SIZE', '128')))
+
+
+def _cost_report(user_id: str, budgets: Dict[int, Optional[int]], project_id: Optional[int], include_line_items: bool):
+    """Load line items and expenses into columnar arrays and score them."""
+    filters = {'user_id': user_id}
+    if project_id is not None:
+        filters['project_id'] = project_id
+
+    items = fetch_rows(supabase, 'forecast_line_items', FORECAST_COLUMNS, filters)
+    expenses = fetch_rows(supabase, 'actual_expenses', EXPENSE_COLUMNS, filters)
+    report = compute_cost_report(LineItemFrame.from_rows(items, expenses))
+
+    return {
+        "projects": report.project_rows(budgets),
+        "categories": report.categories.rows("category"),
+        "line_items": report.line_item_rows() if include_line_items else None,
+    }
+
+
+@router.get("/projects/{project_id}/cost", response_model=CostReportOut)
+def get_project_cost(
+    project_id: int,
+    include_line_items: bool = True,
+    db: Session = Depends(get_db),
+    current_user: Dict[str, Any] = Depends(get_current_active_user)
+):
+    """Estimate at completion, cost to complete and CPI for one project"""
+    try:
+        project = supabase.table('projects')\
+            .select('id,total_budget_cents')\
+            .eq('id', project_id)\
+            .eq('user_id', current_user['id'])\
+            .execute()
+
+        if not project.data:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Project not found"
+            )
+
+        return _cost_report(current_user['id'], project_budgets(project.data), project_id, include_line_items)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("Error computing project cost report: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to compute project cost report"
+        )
+
+@router.get("/portfolio/cost", response_model=CostReportOut)
+def get_portfolio_cost(
+    include_line_items: bool = False,
+    db: Session = Depends(get_db),
+    current_user: Dict[str, Any] = Depends(get_current_active_user)
+):
+    """Estimate at completion, cost to complete and CPI across all projects"""
+    try:
+        projects = fetch_rows(supabase, 'projects', 'id,total_budget_cents', {'user_id': current_user['id']})
+        return _cost_report(current_user['id'], project_budgets(projects), None, include_line_items)
+    except Exception as e:
+        logger.error("Error computing portfolio cost report: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to compute portfolio cost report"
+        )
+
+def _cash_flow_report(user_id: str, project_ids, project_id: Optional[int], window_days: int, lead_time_days: int):
+    """Project cash runway for the given projects in one batch."""
+    filters = {'user_id': user_id}
+    if project_id is not None:
+        filters['project_id'] = project_id
+
+    items = fetch_rows(supabase, 'forecast_line_items', FORECAST_COLUMNS, filters)
+    expenses = fetch_rows(supabase, 'actual_expenses', DATED_EXPENSE_COLUMNS, filters)
+    draws = fetch_rows(supabase, 'draw_tracker', DRAW_COLUMNS, filters)
+
+    report = compute_cost_report(LineItemFrame.from_rows(items, expenses))
+    remaining = dict(zip(report.projects.keys, report.projects.etc.tolist()))
+    today = date.today()
+    projection = project_cash_flow(
+        project_ids, draws, expenses, remaining,
+        today=today, window_days=window_days, lead_time_days=lead_time_days,
+    )
+
+    return {
+        "as_of": today,
+        "window_days": window_days,
+        "lead_time_days": lead_time_days,
+        "projects": projection.rows(),
+    }
+
+
+@router.get("/projects/{project_id}/cash-flow", response_model=CashFlowReportOut)
+def get_project_cash_flow(
+    project_id: int,
+    window_days: int = Query(DEFAULT_WINDOW_DAYS, ge=1, le=365),
+    lead_time_days: int = Query(DRAW_LEAD_TIME_DAYS, ge=0, le=180),
+    db: Session = Depends(get_db),
+    current_user: Dict[str, Any] = Depends(get_current_active_user)
+):
+    """Predict when a project runs out of cash and when to request the next draw"""
+    try:
+        project = supabase.table('projects')\
+            .select('id')\
+            .eq('id', project_id)\
+            .eq('user_id', current_user['id'])\
+            .execute()
+
+        if not project.data:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Project not found"
+            )
+
+        return _cash_flow_report(current_user['id'], [project_id], project_id, window_days, lead_time_days)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("Error projecting project cash flow: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to project cash flow"
+        )
+
+@router.get("/portfolio/cash-flow", response_model=CashFlowReportOut)
+def get_portfolio_cash_flow(
+    window_days: int = Query(DEFAULT_WINDOW_DAYS, ge=1, le=365),
+    lead_time_days: int = Query(DRAW_LEAD_TIME_DAYS, ge=0, le=180),
+    draw_recommended: Optional[bool] = None,
+    db: Session = Depends(get_db),
+    current_user: Dict[str, Any] = Depends(get_current_active_user)
+):
+    """Cash runway and next draw date for every project, computed in one batch"""
+    try:
+        projects = fetch_rows(supabase, 'projects', 'id', {'user_id': current_user['id']})
+        report = _cash_flow_report(
+            current_user['id'], [row['id'] for row in projects], None, window_days, lead_time_days
+        )
+        if draw_recommended is not None:
+            report["projects"] = [
+                row for row in report["projects"] if row["draw_recommended"] == draw_recommended
+            ]
+        return report
+    except Exception as e:
+        logger.error("Error projecting portfolio cash flow: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to project cash flow"
+        )
+
+def _risk_inputs(user_id: str, project_id: int):
+    """Fit overrun distributions from the user's portfolio and select one project."""
+    project = supabase.table('projects')\
+        .select('id,total_budget_cents')\
+        .eq('id', project_id)\
+        .eq('user_id', user_id)\
+        .execute()
+    if not project.data:
+        return None
+
+    items = fetch_rows(supabase, 'forecast_line_items', FORECAST_COLUMNS, {'user_id': user_id})
+    expenses = fetch_rows(supabase, 'actual_expenses', EXPENSE_COLUMNS, {'user_id': user_id})
+    frame = LineItemFrame.from_rows(items, expenses)
+    model = fit_overrun_model(frame)
+    return build_risk_inputs(frame, project_id, model, project.data[0].get('total_budget_cents'))
+
+
+@router.get("/projects/{project_id}/risk", response_model=RiskReportOut)
+async def get_project_risk(
+    project_id: int,
+    trials: int = Query(RISK_DEFAULT_TRIALS, ge=1000, le=1_000_000),
+    seed: Optional[int] = None,
+    db: Session = Depends(get_db),
+    current_user: Dict[str, Any] = Depends(get_current_active_user)
+):
+    """Monte Carlo P50/P80/P95 of final project cost from historical category overruns"""
+    try:
+        # The overrun model is fitted on the whole portfolio, so results are
+        # cached per portfolio version: the user's change watermark moves on
+        # any write (deletes included), and reading it is one indexed query
+        # where loading the inputs reads every line item and expense.
+        version = await run_in_threadpool(change_watermark, supabase, current_user['id'])
+        key = (current_user['id'], project_id, trials, seed, version)
+        entry = risk_cache.get(key)
+        cached = entry is not None
+        if entry is None:
+            inputs = await run_in_threadpool(_risk_inputs, current_user['id'], project_id)
+            if inputs is None:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Project not found"
+                )
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(
+                get_process_pool(RISK_MAX_WORKERS), simulate, inputs, trials,
+                seed if seed is not None else seed_from_digest(inputs.digest(trials, None)),
+            )
+            entry = (inputs, result)
+            risk_cache.put(key, entry)
+
+        inputs, result = entry
+        return {**risk_report(inputs, result), "cached": cached}
+    except HTTPException:
+        raise
+    except BrokenProcessPool as e:
+        # A worker died; drop the pool so the next request starts a fresh one
+        shutdown_process_pool()
+        logger.error("Risk simulation worker failed: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Risk simulation temporarily unavailable"
+        )
+    except Exception as e:
+        logger.error("Error simulating project cost risk: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to simulate project cost risk"
+        )
+
+def _parse_group_by(group_by: Optional[str]) -> List[str]:
+    dimensions = [part.strip() for part in (group_by or "").split(",") if part.strip()]
+    unknown = [part for part in dimensions if part not in GROUP_DIMENSIONS]
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown group_by dimension(s): {', '.join(unknown)}"
+        )
+    return list(dict.fromkeys(dimensions))
+
+
+def _rollup_rows(user_id: str, project_id: Optional[int], start: Optional[date], end: Optional[date]):
+    """Daily rollup rows for the user, filtered by project and date range."""
+    filters = {'user_id': user_id}
+    if project_id is not None:
+        filters['project_id'] = project_id
+
+    def date_range(query):
+        if start is not None:
+            query = query.gte('day', start.isoformat())
+        if end is not None:
+            query = query.lte('day', end.isoformat())
+        return query
+
+    return fetch_rows(supabase, 'expense_daily_rollups', ROLLUP_COLUMNS, filters, apply=date_range, order=ROLLUP_ORDER)
+
+
+@router.get("/spend", response_model=SpendReportOut)
+def get_spend(
+    bucket: str = "week",
+    group_by: Optional[str] = None,
+    project_id: Optional[int] = None,
+    forecast_line_item_id: Optional[int] = None,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    source: str = "auto",
+    db: Session = Depends(get_db),
+    current_user: Dict[str, Any] = Depends(get_current_active_user)
+):
+    """
+    Spend per day/week/month/quarter/year, optionally split by project, category and vendor.
+
+    Served from the daily rollup table; filtering by line item (or
+    ``source=live``) runs a grouped query over the expenses instead.
+    """
+    try:
+        if bucket not in BUCKETS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"bucket must be one of: {', '.join(BUCKETS)}"
+            )
+        if source not in ("auto", "rollup", "live"):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="source must be one of: auto, rollup, live"
+            )
+        if source == "rollup" and forecast_line_item_id is not None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="The rollup cannot be filtered by forecast_line_item_id"
+            )
+        dimensions = _parse_group_by(group_by)
+
+        rows = None
+        if source == "rollup" or (source == "auto" and forecast_line_item_id is None):
+            try:
+                rows = _rollup_rows(current_user['id'], project_id, start, end)
+                source = "rollup"
+            except Exception as e:
+                if source == "rollup":
+                    raise
+                logger.warning("Spend rollup unavailable, querying expenses: %s", e)
+
+        if rows is None:
+            rows = query_daily_spend(
+                db, current_user['id'], bucket, dimensions,
+                project_id=project_id, forecast_line_item_id=forecast_line_item_id, start=start, end=end,
+            )
+            source = "live"
+
+        return {
+            "bucket": bucket,
+            "group_by": dimensions,
+            "start": start,
+            "end": end,
+            "source": source,
+            "buckets": aggregate_spend(rows, bucket, dimensions),
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("Error aggregating spend: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to aggregate spend"
+        )
+
+@router.get("/vendors", response_model=VendorReportOut)
+def get_top_vendors(
+    k: int = Query(10, ge=1, le=100),
+    sort: str = "spend",
+    project_id: Optional[int] = None,
+    category: Optional[str] = None,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    source: str = "auto",
+    db: Session = Depends(get_db),
+    current_user: Dict[str, Any] = Depends(get_current_active_user)
+):
+    """
+    Top-k vendors by total spend or expense count, with average ticket.
+
+    Ranked by grouped SQL in the database (``top_vendors``); ``source=stream``
+    (or an unavailable function) streams expenses over the direct database
+    connection through a bounded-memory summary instead.
+    """
+    try:
+        if sort not in VENDOR_SORTS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"sort must be one of: {', '.join(VENDOR_SORTS)}"
+            )
+        if source not in ("auto", "sql", "stream"):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="source must be one of: auto, sql, stream"
+            )
+
+        report = None
+        if source in ("auto", "sql"):
+            try:
+                response = supabase.rpc('top_vendors', {
+                    'p_user_id': current_user['id'],
+                    'p_limit': k,
+                    'p_sort': sort,
+                    'p_project_id': project_id,
+                    'p_category': category,
+                    'p_start': start.isoformat() if start else None,
+                    'p_end': end.isoformat() if end else None,
+                }).execute()
+                report = vendor_report(response.data or [])
+                source = "sql"
+            except Exception as e:
+                if source == "sql":
+                    raise
+                logger.warning("top_vendors function unavailable, streaming expenses: %s", e)
+
+        if report is None:
+            report = stream_top_vendors(
+                db, current_user['id'], k, sort,
+                project_id=project_id, category=category, start=start, end=end,
+            )
+            source = "stream"
+
+        return {"k": k, "sort": sort, "source": source, **report}
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("Error ranking vendors: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to rank vendors"
+        )
+
+def _refresh_benchmarks(user_id: str) -> List[Dict[str, Any]]:
+    """Recompute cost per square foot bands from completed projects and store them."""
+    projects = fetch_rows(supabase, 'projects', 'id,status,total_sqft', {'user_id': user_id})
+    square_feet = project_square_feet(projects, completed_only=True)
+
+    rows = []
+    if square_feet:
+        completed = sorted(square_feet)
+
+        def only_completed(query):
+            return query.in_('project_id', completed)
+
+        items = fetch_rows(supabase, 'forecast_line_items', FORECAST_COLUMNS, {'user_id': user_id}, apply=only_completed)
+        expenses = fetch_rows(supabase, 'actual_expenses', EXPENSE_COLUMNS, {'user_id': user_id}, apply=only_completed)
+        rows = compute_benchmarks(LineItemFrame.from_rows(items, expenses), square_feet)
+
+    refreshed_at = datetime.now(timezone.utc).isoformat()
+    for row in rows:
+        row.update(user_id=user_id, refreshed_at=refreshed_at)
+    if rows:
+        supabase.table('cost_benchmarks').upsert(rows).execute()
+
+    # Drop categories that no longer have any completed project behind them
+    supabase.table('cost_benchmarks')\
+        .delete()\
+        .eq('user_id', user_id)\
+        .lt('refreshed_at', refreshed_at)\
+        .execute()
+    return rows
+
+
+def _stored_benchmarks(user_id: str) -> List[Dict[str, Any]]:
+    return fetch_rows(supabase, 'cost_benchmarks', BENCHMARK_COLUMNS, {'user_id': user_id}, order=('category',))
+
+
+@router.post("/benchmarks/refresh", response_model=CostBenchmarksOut)
+def refresh_benchmarks(
+    db: Session = Depends(get_db),
+    current_user: Dict[str, Any] = Depends(get_current_active_user)
+):
+    """Rebuild the cost per square foot benchmark table from completed projects"""
+    try:
+        return {"benchmarks": _refresh_benchmarks(current_user['id'])}
+    except Exception as e:
+        logger.error("Error refreshing cost benchmarks: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to refresh cost benchmarks"
+        )
+
+@router.get("/benchmarks", response_model=CostBenchmarksOut)
+def get_benchmarks(
+    db: Session = Depends(get_db),
+    current_user: Dict[str, Any] = Depends(get_current_active_user)
+):
+    """Cost per square foot percentile bands by category across completed projects"""
+    try:
+        return {"benchmarks": _stored_benchmarks(current_user['id'])}
+    except Exception as e:
+        logger.error("Error listing cost benchmarks: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to retrieve cost benchmarks"
+        )
+
+@router.get("/projects/{project_id}/benchmark", response_model=ProjectBenchmarkOut)
+def get_project_benchmark(
+    project_id: int,
+    db: Session = Depends(get_db),
+    current_user: Dict[str, Any] = Depends(get_current_active_user)
+):
+    """Compare a project's cost per square foot by category with the portfolio bands"""
+    try:
+        project = supabase.table('projects')\
+            .select('id,total_sqft')\
+            .eq('id', project_id)\
+            .eq('user_id', current_user['id'])\
+            .execute()
+
+        if not project.data:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Project not found"
+            )
+        total_sqft = project.data[0].get('total_sqft') or 0
+        if total_sqft <= 0:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Project has no total_sqft to benchmark against"
+            )
+
+        filters = {'user_id': current_user['id'], 'project_id': project_id}
+        items = fetch_rows(supabase, 'forecast_line_items', FORECAST_COLUMNS, filters)
+        expenses = fetch_rows(supabase, 'actual_expenses', EXPENSE_COLUMNS, filters)
+        report = compute_cost_report(LineItemFrame.from_rows(items, expenses))
+
+        benchmarks = _stored_benchmarks(current_user['id']) or _refresh_benchmarks(current_user['id'])
+        categories = compare_project(report, project_id, total_sqft, benchmarks)
+
+        return {
+            "project_id": project_id,
+            "total_sqft": total_sqft,
+            "categories": categories,
+            "outliers": [row["category"] for row in categories if row["position"] in (OUTLIER_LOW, OUTLIER_HIGH)],
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("Error benchmarking project: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to benchmark project"
+        )
@@ -5,8 +5,6 @@ import logging
 from api.core.supabase import supabase, supabase_admin
 from api.schemas.auth import Token, UserCreate, UserLogin
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
@@ -15,7 +13,7 @@ router = APIRouter()
 @router.post("/register", response_model=Dict[str, Any])
 async def register(user: UserCreate):
     """Register a new user and return tokens (auto-login)."""
-    logger.info(f"Attempting to register user with email: {user.email}")
+    logger.info("Attempting to register user with email: %s", user.email)
 
     try:
         # Use public sign_up to avoid admin privileges requirement
@@ -38,13 +36,13 @@ async def register(user: UserCreate):
         })
 
         if not auth_response.user or not auth_response.session:
-            logger.warning(f"Auto login after register failed for: {user.email}")
+            logger.warning("Auto login after register failed for: %s", user.email)
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Registration succeeded but auto login failed"
             )
 
-        logger.info(f"User registered and logged in: {user.email}")
+        logger.info("User registered and logged in: %s", user.email)
         return {
             "access_token": auth_response.session.access_token,
             "token_type": "bearer",
@@ -74,7 +72,7 @@ async def register(user: UserCreate):
 @router.post("/login", response_model=Dict[str, Any])
 async def login(credentials: UserLogin):
     """Login user and return access token"""
-    logger.info(f"Login attempt for user: {credentials.email}")
+    logger.info("Login attempt for user: %s", credentials.email)
     
     try:
         # Authenticate with Supabase
@@ -84,13 +82,13 @@ async def login(credentials: UserLogin):
         })
         
         if not auth_response.user:
-            logger.warning(f"Login failed for user: {credentials.email}")
+            logger.warning("Login failed for user: %s", credentials.email)
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid email or password"
             )
         
-        logger.info(f"User logged in successfully: {credentials.email}")
+        logger.info("User logged in successfully: %s", credentials.email)
         return {
             "access_token": auth_response.session.access_token,
             "token_type": "bearer",
@@ -173,7 +171,7 @@ async def get_current_user(authorization: Optional[str] = Header(None)):
                 detail="Invalid or expired token"
             )
         
-        logger.info(f"Current user retrieved: {user_response.user.email}")
+        logger.info("Current user retrieved: %s", user_response.user.email)
         return {
             "id": user_response.user.id,
             "email": user_response.user.email,
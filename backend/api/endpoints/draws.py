@@ -1,24 +1,25 @@
 """Draw tracker endpoints for the Construction Cost Tracker API."""
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 import logging
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Response, status
 from sqlalchemy.orm import Session
 
+from api.core.concurrency import PreconditionFailed, etag, parse_if_match, precondition_failed_response, update_if_match
 from api.core.database import get_db
+from api.core.events import publish_change
+from api.core.idempotency import idempotency_key
 from api.models.draw import DrawTracker
-from api.schemas.draw import DrawTrackerCreate, DrawTrackerOut
+from api.schemas.draw import DrawTrackerCreate, DrawTrackerOut, DrawTrackerUpdate
 from api.core.supabase import supabase
 from api.core.auth import get_current_active_user
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
 
-@router.post("/", response_model=DrawTrackerOut)
+@router.post("/", response_model=DrawTrackerOut, dependencies=[Depends(idempotency_key)])
 def create_draw(
     draw: DrawTrackerCreate, 
     db: Session = Depends(get_db),
@@ -26,7 +27,7 @@ def create_draw(
 ):
     """Create a new draw tracker"""
     try:
-        draw_data = draw.model_dump()
+        draw_data = draw.to_row()
         draw_data['user_id'] = current_user['id']
         
         # Convert date to string for Supabase
@@ -37,9 +38,10 @@ def create_draw(
         if not response.data:
             raise Exception("Failed to create draw in Supabase")
         
+        publish_change('draw', 'created', response.data[0])
         return response.data[0]
     except Exception as e:
-        logger.error(f"Error creating draw: {str(e)}")
+        logger.error("Error creating draw: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to create draw"
@@ -59,7 +61,7 @@ def list_draws(
         
         return response.data
     except Exception as e:
-        logger.error(f"Error listing draws: {str(e)}")
+        logger.error("Error listing draws: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to retrieve draws"
@@ -68,6 +70,7 @@ def list_draws(
 @router.get("/{draw_id}", response_model=DrawTrackerOut)
 def get_draw(
     draw_id: int, 
+    http_response: Response,
     db: Session = Depends(get_db),
     current_user: Dict[str, Any] = Depends(get_current_active_user)
 ):
@@ -85,11 +88,13 @@ def get_draw(
                 detail="Draw not found"
             )
         
+        if response.data[0].get('version') is not None:
+            http_response.headers['ETag'] = etag(response.data[0]['version'])
         return response.data[0]
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error getting draw: {str(e)}")
+        logger.error("Error getting draw: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to retrieve draw"
@@ -99,40 +104,70 @@ def get_draw(
 def update_draw(
     draw_id: int, 
     draw: DrawTrackerCreate, 
+    http_response: Response,
+    if_match: Optional[str] = Header(None),
     db: Session = Depends(get_db),
     current_user: Dict[str, Any] = Depends(get_current_active_user)
 ):
-    """Update a draw tracker"""
+    """
+    Update a draw tracker.
+
+    Send the draw's ``ETag`` as ``If-Match`` to update only if nobody else
+    has changed it since; otherwise 412 returns the current draw.
+    """
+    draw_data = draw.to_row()
+    if draw_data.get('last_draw_date'):
+        draw_data['last_draw_date'] = str(draw_data['last_draw_date'])
+    return _write_draw(draw_id, draw_data, if_match, http_response, current_user)
+
+@router.patch("/{draw_id}", response_model=DrawTrackerOut)
+def patch_draw(
+    draw_id: int, 
+    changes: DrawTrackerUpdate, 
+    http_response: Response,
+    if_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+    current_user: Dict[str, Any] = Depends(get_current_active_user)
+):
+    """
+    Change only the fields sent; the others keep their stored values.
+
+    Honors ``If-Match`` like PUT.
+    """
+    draw_data = changes.to_row(exclude_unset=True)
+    if not draw_data:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No fields to update"
+        )
+    if draw_data.get('last_draw_date'):
+        draw_data['last_draw_date'] = str(draw_data['last_draw_date'])
+    return _write_draw(draw_id, draw_data, if_match, http_response, current_user)
+
+def _write_draw(
+    draw_id: int,
+    draw_data: Dict[str, Any],
+    if_match: Optional[str],
+    http_response: Response,
+    current_user: Dict[str, Any],
+):
+    """Write the columns in ``draw_data``, guarded by ``If-Match``."""
     try:
-        # First check if draw exists and belongs to user
-        existing = supabase.table('draw_tracker')\
-            .select('id')\
-            .eq('id', draw_id)\
-            .eq('user_id', current_user['id'])\
-            .execute()
-        
-        if not existing.data:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND, 
-                detail="Draw not found"
-            )
-        
-        # Update the draw
-        draw_data = draw.model_dump()
-        response = supabase.table('draw_tracker')\
-            .update(draw_data)\
-            .eq('id', draw_id)\
-            .eq('user_id', current_user['id'])\
-            .execute()
-        
-        if not response.data:
-            raise Exception("Failed to update draw")
+        row = update_if_match(
+            supabase, 'draw_tracker', draw_id, current_user['id'], draw_data,
+            parse_if_match(if_match), not_found="Draw not found",
+        )
         
-        return response.data[0]
+        publish_change('draw', 'updated', row)
+        if row.get('version') is not None:
+            http_response.headers['ETag'] = etag(row['version'])
+        return row
+    except PreconditionFailed as e:
+        return precondition_failed_response(DrawTrackerOut, e.row)
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error updating draw: {str(e)}")
+        logger.error("Error updating draw: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to update draw"
@@ -148,7 +183,7 @@ def delete_draw(
     try:
         # First check if draw exists and belongs to user
         existing = supabase.table('draw_tracker')\
-            .select('id')\
+            .select('id,project_id')\
             .eq('id', draw_id)\
             .eq('user_id', current_user['id'])\
             .execute()
@@ -166,11 +201,12 @@ def delete_draw(
             .eq('user_id', current_user['id'])\
             .execute()
         
+        publish_change('draw', 'deleted', existing.data[0])
         return {"deleted": True}
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error deleting draw: {str(e)}")
+        logger.error("Error deleting draw: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to delete draw"
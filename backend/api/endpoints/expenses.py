@@ -1,53 +1,182 @@
 """Actual expense endpoints for the Construction Cost Tracker API."""
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 import logging
+import os
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Body, Depends, Header, HTTPException, Response, status
 from sqlalchemy.orm import Session
 
+from api.analytics.loader import fetch_rows
+from api.core.concurrency import PreconditionFailed, etag, parse_if_match, precondition_failed_response, update_if_match
 from api.core.database import get_db
+from api.core.events import publish_change
+from api.core.idempotency import idempotency_key
+from api.core.duplicates import date_window, dedupe_batch, find_matches
+from api.core.vendors import normalize_vendor
 from api.models.expense import ActualExpense
-from api.schemas.expense import ActualExpenseCreate, ActualExpenseOut
+from api.schemas.expense import ActualExpenseCreate, ActualExpenseOut, ActualExpenseBulkOut, ActualExpenseUpdate
 from api.core.supabase import supabase
 from api.core.auth import get_current_active_user
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Expenses with the same project, vendor and amount this many days apart
+# are flagged as likely duplicates
+DUPLICATE_WINDOW_DAYS = int(os.getenv('DUPLICATE_WINDOW_DAYS', '3'))
+MAX_BULK_EXPENSES = 1000
+# Fingerprints per duplicate lookup of a bulk import; the lookup is a GET,
+# and a whole batch's in_() lists would overflow the gateway's URL limit
+DUPLICATE_LOOKUP_CHUNK = 100
 
-@router.post("/", response_model=ActualExpenseOut)
+FINGERPRINT_COLUMNS = 'id,project_id,vendor_key,amount_spent_cents,date'
+
+
+def _expense_row(expense: ActualExpenseCreate) -> Dict[str, Any]:
+    """Supabase row for an expense, with its normalized vendor key."""
+    expense_data = expense.to_row()
+    expense_data['vendor_key'] = normalize_vendor(expense_data.get('vendor'))
+
+    # Convert date to string for Supabase
+    if 'date' in expense_data and expense_data['date']:
+        expense_data['date'] = str(expense_data['date'])
+    return expense_data
+
+
+def _find_duplicates(user_id: str, expense_data: Dict[str, Any]) -> List[int]:
+    """Ids of the user's expenses matching this one's fingerprint (indexed lookup)."""
+    start, end = date_window(expense_data['date'], DUPLICATE_WINDOW_DAYS)
+    response = supabase.table('actual_expenses')\
+        .select(FINGERPRINT_COLUMNS)\
+        .eq('project_id', expense_data['project_id'])\
+        .eq('vendor_key', expense_data['vendor_key'])\
+        .eq('amount_spent_cents', expense_data['amount_spent_cents'])\
+        .gte('date', start.isoformat())\
+        .lte('date', end.isoformat())\
+        .eq('user_id', user_id)\
+        .execute()
+    return find_matches(expense_data, response.data or [], DUPLICATE_WINDOW_DAYS)
+
+
+def _find_existing(user_id: str, candidates: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """The user's expenses that may match any candidate, in lookups of ``DUPLICATE_LOOKUP_CHUNK``."""
+    # Sorted so each chunk covers few vendors and amounts
+    ordered = sorted(candidates, key=lambda row: (row['vendor_key'] or '', row['amount_spent_cents'], row['date']))
+    existing: Dict[int, Dict[str, Any]] = {}
+    for offset in range(0, len(ordered), DUPLICATE_LOOKUP_CHUNK):
+        chunk = ordered[offset:offset + DUPLICATE_LOOKUP_CHUNK]
+        windows = [date_window(row['date'], DUPLICATE_WINDOW_DAYS) for row in chunk]
+        start = min(window[0] for window in windows)
+        end = max(window[1] for window in windows)
+        rows = fetch_rows(
+            supabase, 'actual_expenses', FINGERPRINT_COLUMNS, {'user_id': user_id},
+            apply=lambda query: query
+                .in_('project_id', sorted({row['project_id'] for row in chunk}))
+                .in_('vendor_key', sorted({row['vendor_key'] for row in chunk}))
+                .in_('amount_spent_cents', sorted({row['amount_spent_cents'] for row in chunk}))
+                .gte('date', start.isoformat())
+                .lte('date', end.isoformat()),
+        )
+        existing.update((row['id'], row) for row in rows)
+    return list(existing.values())
+
+
+@router.post("/", response_model=ActualExpenseOut, dependencies=[Depends(idempotency_key)])
 def create_expense(
     expense: ActualExpenseCreate, 
+    reject_duplicates: bool = False,
     db: Session = Depends(get_db),
     current_user: Dict[str, Any] = Depends(get_current_active_user)
 ):
-    """Create a new actual expense"""
+    """Create a new actual expense, flagging likely duplicates in ``duplicate_of``"""
     try:
-        expense_data = expense.model_dump()
+        expense_data = _expense_row(expense)
         expense_data['user_id'] = current_user['id']
-        
-        # Convert date to string for Supabase
-        if 'date' in expense_data and expense_data['date']:
-            expense_data['date'] = str(expense_data['date'])
+
+        duplicates = _find_duplicates(current_user['id'], expense_data)
+        if duplicates and reject_duplicates:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail={"message": "Likely duplicate expense", "duplicate_of": duplicates}
+            )
         
         response = supabase.table('actual_expenses').insert(expense_data).execute()
         if not response.data:
-            logger.error(f"Supabase response: {response}")
+            logger.error("Supabase returned no row for the new expense (project %s)", expense.project_id)
             raise Exception("Failed to create expense in Supabase")
         
-        return response.data[0]
+        publish_change('expense', 'created', response.data[0])
+        return {**response.data[0], "duplicate_of": duplicates}
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"Error creating expense: {str(e)}")
-        logger.error(f"Expense data: {expense_data}")
-        logger.error(f"Current user: {current_user}")
+        logger.error(
+            "Error creating expense: %s", e,
+            extra={"project_id": expense.project_id, "user_id": current_user.get('id')}
+        )
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to create expense: {str(e)}"
         )
 
+@router.post("/bulk", response_model=ActualExpenseBulkOut, dependencies=[Depends(idempotency_key)])
+def create_expenses_bulk(
+    expenses: List[ActualExpenseCreate] = Body(..., max_length=MAX_BULK_EXPENSES),
+    skip_duplicates: bool = True,
+    db: Session = Depends(get_db),
+    current_user: Dict[str, Any] = Depends(get_current_active_user)
+):
+    """
+    Import a batch of expenses in one insert.
+
+    Repeats within the batch are dropped in memory, then the remaining rows
+    are checked against existing expenses, a hundred fingerprints per
+    lookup. Likely
+    duplicates are skipped (or only flagged when ``skip_duplicates=false``).
+    """
+    try:
+        rows = [_expense_row(expense) for expense in expenses]
+        for row in rows:
+            row['user_id'] = current_user['id']
+
+        keep, in_batch = dedupe_batch(rows, DUPLICATE_WINDOW_DAYS)
+        skipped = [
+            {"index": index, "duplicate_of_index": original}
+            for index, original in sorted(in_batch.items())
+        ]
+        if not keep:
+            return {"created": [], "skipped": skipped}
+
+        existing = _find_existing(current_user['id'], [rows[index] for index in keep])
+
+        to_insert = []
+        matches = []
+        for index in keep:
+            duplicates = find_matches(rows[index], existing, DUPLICATE_WINDOW_DAYS)
+            if duplicates and skip_duplicates:
+                skipped.append({"index": index, "duplicate_of": duplicates})
+            else:
+                to_insert.append(rows[index])
+                matches.append(duplicates)
+
+        created = []
+        if to_insert:
+            response = supabase.table('actual_expenses').insert(to_insert).execute()
+            if not response.data:
+                raise Exception("Failed to create expenses in Supabase")
+            created = [{**row, "duplicate_of": duplicates} for row, duplicates in zip(response.data, matches)]
+            for row in response.data:
+                publish_change('expense', 'created', row)
+
+        return {"created": created, "skipped": sorted(skipped, key=lambda item: item["index"])}
+    except Exception as e:
+        logger.error("Error importing expenses: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to import expenses"
+        )
+
 @router.get("/", response_model=List[ActualExpenseOut])
 def list_expenses(
     db: Session = Depends(get_db),
@@ -62,7 +191,7 @@ def list_expenses(
         
         return response.data
     except Exception as e:
-        logger.error(f"Error listing expenses: {str(e)}")
+        logger.error("Error listing expenses: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to retrieve expenses"
@@ -71,6 +200,7 @@ def list_expenses(
 @router.get("/{expense_id}", response_model=ActualExpenseOut)
 def get_expense(
     expense_id: int, 
+    http_response: Response,
     db: Session = Depends(get_db),
     current_user: Dict[str, Any] = Depends(get_current_active_user)
 ):
@@ -88,11 +218,13 @@ def get_expense(
                 detail="Expense not found"
             )
         
+        if response.data[0].get('version') is not None:
+            http_response.headers['ETag'] = etag(response.data[0]['version'])
         return response.data[0]
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error getting expense: {str(e)}")
+        logger.error("Error getting expense: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to retrieve expense"
@@ -102,40 +234,69 @@ def get_expense(
 def update_expense(
     expense_id: int, 
     expense: ActualExpenseCreate, 
+    http_response: Response,
+    if_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+    current_user: Dict[str, Any] = Depends(get_current_active_user)
+):
+    """
+    Update an actual expense.
+
+    Send the expense's ``ETag`` as ``If-Match`` to update only if nobody else
+    has changed it since; otherwise 412 returns the current expense.
+    """
+    return _write_expense(expense_id, _expense_row(expense), if_match, http_response, current_user)
+
+@router.patch("/{expense_id}", response_model=ActualExpenseOut)
+def patch_expense(
+    expense_id: int, 
+    changes: ActualExpenseUpdate, 
+    http_response: Response,
+    if_match: Optional[str] = Header(None),
     db: Session = Depends(get_db),
     current_user: Dict[str, Any] = Depends(get_current_active_user)
 ):
-    """Update an actual expense"""
+    """
+    Change only the fields sent; the others keep their stored values.
+
+    Honors ``If-Match`` like PUT.
+    """
+    expense_data = changes.to_row(exclude_unset=True)
+    if not expense_data:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No fields to update"
+        )
+    if 'vendor' in expense_data:
+        expense_data['vendor_key'] = normalize_vendor(expense_data['vendor'])
+    if expense_data.get('date'):
+        expense_data['date'] = str(expense_data['date'])
+    return _write_expense(expense_id, expense_data, if_match, http_response, current_user)
+
+def _write_expense(
+    expense_id: int,
+    expense_data: Dict[str, Any],
+    if_match: Optional[str],
+    http_response: Response,
+    current_user: Dict[str, Any],
+):
+    """Write the columns in ``expense_data``, guarded by ``If-Match``."""
     try:
-        # First check if expense exists and belongs to user
-        existing = supabase.table('actual_expenses')\
-            .select('id')\
-            .eq('id', expense_id)\
-            .eq('user_id', current_user['id'])\
-            .execute()
-        
-        if not existing.data:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND, 
-                detail="Expense not found"
-            )
-        
-        # Update the expense
-        expense_data = expense.model_dump()
-        response = supabase.table('actual_expenses')\
-            .update(expense_data)\
-            .eq('id', expense_id)\
-            .eq('user_id', current_user['id'])\
-            .execute()
-        
-        if not response.data:
-            raise Exception("Failed to update expense")
+        row = update_if_match(
+            supabase, 'actual_expenses', expense_id, current_user['id'], expense_data,
+            parse_if_match(if_match), not_found="Expense not found",
+        )
         
-        return response.data[0]
+        publish_change('expense', 'updated', row)
+        if row.get('version') is not None:
+            http_response.headers['ETag'] = etag(row['version'])
+        return row
+    except PreconditionFailed as e:
+        return precondition_failed_response(ActualExpenseOut, e.row)
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error updating expense: {str(e)}")
+        logger.error("Error updating expense: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to update expense"
@@ -151,7 +312,7 @@ def delete_expense(
     try:
         # First check if expense exists and belongs to user
         existing = supabase.table('actual_expenses')\
-            .select('id')\
+            .select('id,project_id')\
             .eq('id', expense_id)\
             .eq('user_id', current_user['id'])\
             .execute()
@@ -169,11 +330,12 @@ def delete_expense(
             .eq('user_id', current_user['id'])\
             .execute()
         
+        publish_change('expense', 'deleted', existing.data[0])
         return {"deleted": True}
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error deleting expense: {str(e)}")
+        logger.error("Error deleting expense: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to delete expense"
@@ -1,24 +1,39 @@
 """Forecast line item endpoints for the Construction Cost Tracker API."""
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Set
 import logging
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Response, status
 from sqlalchemy.orm import Session
 
+from api.analytics.cost import EXPENSE_COLUMNS, FORECAST_COLUMNS, LineItemFrame
+from api.analytics.loader import change_watermark, fetch_rows
+from api.analytics.similarity import ProjectIndexRegistry
+from api.core.concurrency import PreconditionFailed, etag, parse_if_match, precondition_failed_response, update_if_match
 from api.core.database import get_db
+from api.core.events import publish_change
+from api.core.idempotency import idempotency_key
 from api.models.forecast import ForecastLineItem
-from api.schemas.forecast import ForecastLineItemCreate, ForecastLineItemOut
+from api.schemas.forecast import (
+    ForecastLineItemCreate,
+    ForecastLineItemOut,
+    ForecastLineItemUpdate,
+    ForecastGenerateRequest,
+    ForecastGenerateOut,
+)
 from api.core.supabase import supabase
 from api.core.auth import get_current_active_user
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Completed-project feature indexes for forecast generation, per user
+project_indexes = ProjectIndexRegistry()
 
-@router.post("/", response_model=ForecastLineItemOut)
+PROJECT_FEATURE_COLUMNS = 'id,status,total_sqft,total_budget_cents'
+
+
+@router.post("/", response_model=ForecastLineItemOut, dependencies=[Depends(idempotency_key)])
 def create_forecast_item(
     item: ForecastLineItemCreate, 
     db: Session = Depends(get_db),
@@ -26,21 +41,151 @@ def create_forecast_item(
 ):
     """Create a new forecast line item"""
     try:
-        item_data = item.model_dump()
+        item_data = item.to_row()
         item_data['user_id'] = current_user['id']
         
         response = supabase.table('forecast_line_items').insert(item_data).execute()
         if not response.data:
             raise Exception("Failed to create forecast item in Supabase")
         
+        publish_change('forecast_item', 'created', response.data[0])
         return response.data[0]
     except Exception as e:
-        logger.error(f"Error creating forecast item: {str(e)}")
+        logger.error("Error creating forecast item: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to create forecast item"
         )
 
+def _load_completed_frame(user_id: str, project_ids: List[int]) -> LineItemFrame:
+    """Line items and expenses of completed projects, for the feature index."""
+    def only_these(query):
+        return query.in_('project_id', project_ids)
+
+    items = fetch_rows(supabase, 'forecast_line_items', FORECAST_COLUMNS, {'user_id': user_id}, apply=only_these)
+    expenses = fetch_rows(supabase, 'actual_expenses', EXPENSE_COLUMNS, {'user_id': user_id}, apply=only_these)
+    return LineItemFrame.from_rows(items, expenses)
+
+
+def _changed_projects(user_id: str, since: int, until: int) -> Set[int]:
+    """Projects whose line items or expenses changed or were deleted after ``since`` and up to ``until``."""
+    def changed(query):
+        return query.gt('change_seq', since).lte('change_seq', until)
+
+    def deleted(query):
+        return changed(query).in_('table_name', ['forecast_line_items', 'actual_expenses'])
+
+    rows = []
+    for table, apply in (('forecast_line_items', changed), ('actual_expenses', changed), ('deleted_rows', deleted)):
+        rows += fetch_rows(supabase, table, 'project_id', {'user_id': user_id}, apply=apply, order=('change_seq',))
+    return {row['project_id'] for row in rows if row.get('project_id') is not None}
+
+
+@router.post("/generate", response_model=ForecastGenerateOut, dependencies=[Depends(idempotency_key)])
+def generate_forecast(
+    request: ForecastGenerateRequest,
+    db: Session = Depends(get_db),
+    current_user: Dict[str, Any] = Depends(get_current_active_user)
+):
+    """
+    Propose line items for a project from its most similar completed projects.
+
+    Similarity compares floor area, budget and (when the project already has
+    line items) category mix. Categories the project already has are left
+    alone; the rest are inserted in one batch unless ``dry_run`` is set.
+    """
+    try:
+        project = supabase.table('projects')\
+            .select(PROJECT_FEATURE_COLUMNS)\
+            .eq('id', request.project_id)\
+            .eq('user_id', current_user['id'])\
+            .execute()
+
+        if not project.data:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Project not found"
+            )
+        target = project.data[0]
+
+        completed = fetch_rows(
+            supabase, 'projects', PROJECT_FEATURE_COLUMNS,
+            {'user_id': current_user['id'], 'status': 'completed'},
+        )
+        # Costs of indexed projects are reloaded when their line items or
+        # expenses changed since the index was last synced
+        watermark = change_watermark(supabase, current_user['id'])
+        index = project_indexes.get(current_user['id'])
+        stale: Set[int] = set()
+        if len(index) and index.watermark is not None and watermark > index.watermark:
+            stale = _changed_projects(current_user['id'], index.watermark, watermark)
+        index.sync(
+            completed, lambda project_ids: _load_completed_frame(current_user['id'], project_ids),
+            stale, watermark,
+        )
+
+        existing = fetch_rows(
+            supabase, 'forecast_line_items', 'id,category,estimated_cost_cents',
+            {'user_id': current_user['id'], 'project_id': request.project_id},
+        )
+        mix: Dict[str, int] = {}
+        for row in existing:
+            mix[row['category']] = mix.get(row['category'], 0) + (row.get('estimated_cost_cents') or 0)
+
+        neighbors = index.nearest(
+            request.k, target.get('total_sqft'), target.get('total_budget_cents'), mix,
+            exclude=[request.project_id],
+        )
+        proposals = [
+            proposal
+            for proposal in index.propose(
+                neighbors, target.get('total_sqft'), target.get('total_budget_cents'), request.min_support
+            )
+            if proposal['category'] not in mix
+            and (request.categories is None or proposal['category'] in request.categories)
+        ]
+
+        created = []
+        if proposals and not request.dry_run:
+            rows = [
+                {
+                    'user_id': current_user['id'],
+                    'project_id': request.project_id,
+                    'category': proposal['category'],
+                    'description': "Generated from similar completed projects",
+                    'estimated_cost_cents': proposal['estimated_cost_cents'],
+                    'actual_cost_cents': 0,
+                    'progress_percent': 0,
+                    'status': 'Not Started',
+                    'notes': "Blended from projects " + ", ".join(f"#{pid}" for pid in proposal['source_project_ids']),
+                }
+                for proposal in proposals
+            ]
+            response = supabase.table('forecast_line_items').insert(rows).execute()
+            if not response.data:
+                raise Exception("Failed to create forecast items in Supabase")
+            created = response.data
+            for row in created:
+                publish_change('forecast_item', 'created', row)
+
+        return {
+            "project_id": request.project_id,
+            "neighbors": [
+                {"project_id": project_id, "similarity": round(similarity, 4)}
+                for project_id, similarity in zip(neighbors.project_id.tolist(), neighbors.similarity.tolist())
+            ],
+            "proposals": proposals,
+            "created": created,
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("Error generating forecast: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to generate forecast"
+        )
+
 @router.get("/", response_model=List[ForecastLineItemOut])
 def list_forecast_items(
     project_id: int = None,
@@ -60,7 +205,7 @@ def list_forecast_items(
         
         return response.data
     except Exception as e:
-        logger.error(f"Error listing forecast items: {str(e)}")
+        logger.error("Error listing forecast items: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to retrieve forecast items"
@@ -69,6 +214,7 @@ def list_forecast_items(
 @router.get("/{item_id}", response_model=ForecastLineItemOut)
 def get_forecast_item(
     item_id: int, 
+    http_response: Response,
     db: Session = Depends(get_db),
     current_user: Dict[str, Any] = Depends(get_current_active_user)
 ):
@@ -86,11 +232,13 @@ def get_forecast_item(
                 detail="Forecast item not found"
             )
         
+        if response.data[0].get('version') is not None:
+            http_response.headers['ETag'] = etag(response.data[0]['version'])
         return response.data[0]
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error getting forecast item: {str(e)}")
+        logger.error("Error getting forecast item: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to retrieve forecast item"
@@ -100,59 +248,86 @@ def get_forecast_item(
 def update_forecast_item(
     item_id: int, 
     item: ForecastLineItemCreate, 
+    http_response: Response,
+    if_match: Optional[str] = Header(None),
     db: Session = Depends(get_db),
     current_user: Dict[str, Any] = Depends(get_current_active_user)
 ):
-    """Update a forecast line item"""
+    """
+    Update a forecast line item.
+
+    Send the item's ``ETag`` as ``If-Match`` to update only if nobody else
+    has changed it since; otherwise 412 returns the current item.
+    """
+    # Filter out actual_cost if the column doesn't exist yet
+    item_data = item.to_row()
+    
+    # Check if actual_cost column exists by trying to get current record
     try:
-        # First check if item exists and belongs to user
-        existing = supabase.table('forecast_line_items')\
-            .select('id')\
+        current_record = supabase.table('forecast_line_items')\
+            .select('*')\
             .eq('id', item_id)\
-            .eq('user_id', current_user['id'])\
+            .limit(1)\
             .execute()
         
-        if not existing.data:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND, 
-                detail="Forecast item not found"
-            )
-        
-        # Update the item - filter out actual_cost if column doesn't exist yet
-        item_data = item.model_dump()
-        
-        # Check if actual_cost column exists by trying to get current record
-        try:
-            current_record = supabase.table('forecast_line_items')\
-                .select('*')\
-                .eq('id', item_id)\
-                .limit(1)\
-                .execute()
+        # If actual_cost_cents is not in the current record, remove it from update data
+        if current_record.data and 'actual_cost_cents' not in current_record.data[0]:
+            logger.warning("actual_cost_cents column not found in database, removing from update")
+            item_data.pop('actual_cost_cents', None)
             
-            # If actual_cost is not in the current record, remove it from update data
-            if current_record.data and 'actual_cost' not in current_record.data[0]:
-                logger.warning("actual_cost column not found in database, removing from update")
-                item_data.pop('actual_cost', None)
-                
-        except Exception as column_check_error:
-            logger.warning(f"Could not check for actual_cost column: {str(column_check_error)}")
-            # Remove actual_cost to be safe
-            item_data.pop('actual_cost', None)
-        
-        response = supabase.table('forecast_line_items')\
-            .update(item_data)\
-            .eq('id', item_id)\
-            .eq('user_id', current_user['id'])\
-            .execute()
-        
-        if not response.data:
-            raise Exception("Failed to update forecast item")
+    except Exception as column_check_error:
+        logger.warning("Could not check for actual_cost column: %s", column_check_error)
+        # Remove actual_cost_cents to be safe
+        item_data.pop('actual_cost_cents', None)
+    
+    return _write_forecast_item(item_id, item_data, if_match, http_response, current_user)
+
+@router.patch("/{item_id}", response_model=ForecastLineItemOut)
+def patch_forecast_item(
+    item_id: int, 
+    changes: ForecastLineItemUpdate, 
+    http_response: Response,
+    if_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+    current_user: Dict[str, Any] = Depends(get_current_active_user)
+):
+    """
+    Change only the fields sent; the others keep their stored values.
+
+    Honors ``If-Match`` like PUT.
+    """
+    item_data = changes.to_row(exclude_unset=True)
+    if not item_data:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No fields to update"
+        )
+    return _write_forecast_item(item_id, item_data, if_match, http_response, current_user)
+
+def _write_forecast_item(
+    item_id: int,
+    item_data: Dict[str, Any],
+    if_match: Optional[str],
+    http_response: Response,
+    current_user: Dict[str, Any],
+):
+    """Write the columns in ``item_data``, guarded by ``If-Match``."""
+    try:
+        row = update_if_match(
+            supabase, 'forecast_line_items', item_id, current_user['id'], item_data,
+            parse_if_match(if_match), not_found="Forecast item not found",
+        )
         
-        return response.data[0]
+        publish_change('forecast_item', 'updated', row)
+        if row.get('version') is not None:
+            http_response.headers['ETag'] = etag(row['version'])
+        return row
+    except PreconditionFailed as e:
+        return precondition_failed_response(ForecastLineItemOut, e.row)
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error updating forecast item: {str(e)}")
+        logger.error("Error updating forecast item: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to update forecast item"
@@ -168,7 +343,7 @@ def delete_forecast_item(
     try:
         # First check if item exists and belongs to user
         existing = supabase.table('forecast_line_items')\
-            .select('id')\
+            .select('id,project_id')\
             .eq('id', item_id)\
             .eq('user_id', current_user['id'])\
             .execute()
@@ -186,11 +361,12 @@ def delete_forecast_item(
             .eq('user_id', current_user['id'])\
             .execute()
         
+        publish_change('forecast_item', 'deleted', existing.data[0])
         return {"deleted": True}
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error deleting forecast item: {str(e)}")
+        logger.error("Error deleting forecast item: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to delete forecast item"
@@ -0,0 +1,60 @@
+"""Admin endpoints for stored request profiles."""
+from typing import Any, Dict, List, Optional
+import logging
+
+from fastapi import APIRouter, Depends, Header, HTTPException, status
+from fastapi.responses import PlainTextResponse
+from starlette.concurrency import run_in_threadpool
+
+from api.core.profiling import profile_store, valid_token
+
+logger = logging.getLogger(__name__)
+
+
+def require_profiling_token(x_profile_token: Optional[str] = Header(None)) -> None:
+    """Profiles expose code paths and timings; only holders of PROFILING_TOKEN may read them."""
+    if not valid_token(x_profile_token):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="A valid X-Profile-Token header is required"
+        )
+
+
+router = APIRouter(dependencies=[Depends(require_profiling_token)])
+
+
+@router.get("/")
+async def list_profiles() -> List[Dict[str, Any]]:
+    """Stored profiles, newest first (without their stacks)"""
+    return await run_in_threadpool(profile_store.list)
+
+
+@router.get("/{profile_id}")
+async def get_profile(profile_id: str, format: str = "json"):
+    """
+    One profile with its folded stacks.
+
+    ``format=folded`` returns just the stacks as text, to pipe into
+    flamegraph.pl or load into speedscope.
+    """
+    try:
+        profile = await run_in_threadpool(profile_store.get, profile_id)
+    except KeyError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Profile not found"
+        )
+    if format == "folded":
+        return PlainTextResponse(profile["folded"])
+    return profile
+
+
+@router.delete("/{profile_id}")
+async def delete_profile(profile_id: str):
+    """Delete a stored profile"""
+    if not await run_in_threadpool(profile_store.delete, profile_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Profile not found"
+        )
+    return {"deleted": True}
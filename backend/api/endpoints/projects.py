@@ -1,8 +1,10 @@
 """Project endpoints for the Construction Cost Tracker API."""
 from typing import List, Dict, Any
 import logging
+import os
 
-from fastapi import APIRouter, Depends, HTTPException, status, Response
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
 from api.core.database import get_db
@@ -10,13 +12,18 @@ from api.models.project import Project
 from api.schemas.project import ProjectCreate, ProjectUpdate, ProjectOut
 from api.core.supabase import supabase
 from api.core.auth import get_current_active_user
+from api.core.events import broker, format_sse
+from api.core.idempotency import idempotency_key
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Comment lines sent on idle event streams so proxies keep them open
+EVENTS_HEARTBEAT_SECONDS = float(os.getenv('EVENTS_HEARTBEAT_SECONDS', '15'))
+# Client reconnect delay advertised on event streams
+EVENTS_RETRY_MS = 5000
+
 
 @router.get("/", response_model=List[ProjectOut])
 async def list_projects(
@@ -34,7 +41,7 @@ async def list_projects(
         return response.data if response.data else []
         
     except Exception as e:
-        logger.error(f"Error listing projects: {str(e)}")
+        logger.error("Error listing projects: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to retrieve projects"
@@ -66,13 +73,13 @@ async def get_project(
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error getting project: {str(e)}")
+        logger.error("Error getting project: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to retrieve project"
         )
 
-@router.post("/", response_model=ProjectOut, status_code=status.HTTP_201_CREATED)
+@router.post("/", response_model=ProjectOut, status_code=status.HTTP_201_CREATED, dependencies=[Depends(idempotency_key)])
 async def create_project(
     project: ProjectCreate,
     db: Session = Depends(get_db),
@@ -81,7 +88,7 @@ async def create_project(
     """Create a new project."""
     try:
         # Add user_id to project data
-        project_data = project.dict()
+        project_data = project.to_row()
         project_data['user_id'] = current_user['id']
         
         # Convert date objects to strings for JSON serialization
@@ -90,10 +97,6 @@ async def create_project(
         if project_data.get('target_completion_date'):
             project_data['target_completion_date'] = project_data['target_completion_date'].isoformat()
         
-        # Convert Decimal objects to float for JSON serialization
-        if project_data.get('total_budget'):
-            project_data['total_budget'] = float(project_data['total_budget'])
-        
         # Create in Supabase only
         response = supabase.table('projects')\
             .insert(project_data)\
@@ -107,7 +110,7 @@ async def create_project(
             
     except Exception as e:
         db.rollback()
-        logger.error(f"Error creating project: {str(e)}")
+        logger.error("Error creating project: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to create project"
@@ -123,7 +126,7 @@ async def update_project(
     """Update a project"""
     try:
         # First update in Supabase
-        update_data = project.dict(exclude_unset=True)
+        update_data = project.to_row(exclude_unset=True)
         
         # Convert date objects to strings for JSON serialization
         if update_data.get('start_date'):
@@ -131,10 +134,6 @@ async def update_project(
         if update_data.get('target_completion_date'):
             update_data['target_completion_date'] = update_data['target_completion_date'].isoformat()
         
-        # Convert Decimal objects to float for JSON serialization
-        if update_data.get('total_budget'):
-            update_data['total_budget'] = float(update_data['total_budget'])
-        
         try:
             # Check if project exists and belongs to user
             response = supabase.table('projects')\
@@ -182,7 +181,7 @@ async def update_project(
             raise
             
         except Exception as e:
-            logger.error(f"Supabase error: {str(e)}")
+            logger.error("Supabase error: %s", e)
             # Fallback to local database
             db_project = db.query(Project).filter(
                 Project.id == project_id,
@@ -207,7 +206,7 @@ async def update_project(
         raise
     except Exception as e:
         db.rollback()
-        logger.error(f"Error updating project: {str(e)}")
+        logger.error("Error updating project: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to update project"
@@ -247,7 +246,7 @@ async def delete_project(
             raise
             
         except Exception as e:
-            logger.error(f"Supabase error: {str(e)}")
+            logger.error("Supabase error: %s", e)
             # Continue with local deletion even if Supabase fails
             
         # Delete from local database
@@ -266,8 +265,70 @@ async def delete_project(
         raise
     except Exception as e:
         db.rollback()
-        logger.error(f"Error deleting project: {str(e)}")
+        logger.error("Error deleting project: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to delete project"
         )
+
+@router.get("/{project_id}/events")
+async def stream_project_events(
+    project_id: int,
+    request: Request,
+    current_user: Dict[str, Any] = Depends(get_current_active_user)
+):
+    """
+    Server-sent events for a project's forecast items, expenses and draws.
+
+    Each write made through the API arrives as a ``<entity>.<action>`` event
+    (for example ``expense.created``) carrying the written row. Idle streams
+    get a heartbeat comment every ``EVENTS_HEARTBEAT_SECONDS``. A client too
+    slow to keep up loses its oldest events and receives a ``resync`` event
+    telling it to refetch the project. Event ids are the row's change number,
+    so after reconnecting a client can pass its ``Last-Event-ID`` to
+    GET /changes as ``since`` to fetch what it missed.
+    """
+    try:
+        response = supabase.table('projects')\
+            .select('id')\
+            .eq('id', project_id)\
+            .eq('user_id', current_user['id'])\
+            .execute()
+
+        if not response.data:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Project not found"
+            )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("Error opening event stream: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to open event stream"
+        )
+
+    # No database session is held for the life of the stream
+    subscription = broker.subscribe(project_id)
+
+    async def events():
+        try:
+            yield f"retry: {EVENTS_RETRY_MS}\n\n"
+            while not await request.is_disconnected():
+                event = await subscription.get(EVENTS_HEARTBEAT_SECONDS)
+                if event is None:
+                    yield ": heartbeat\n\n"
+                    continue
+                dropped = subscription.take_dropped()
+                if dropped:
+                    yield format_sse({"project_id": project_id, "dropped": dropped}, event="resync")
+                yield format_sse(event, event=event["type"], event_id=event.get("change_seq"))
+        finally:
+            broker.unsubscribe(subscription)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,165 @@
+"""Delta sync endpoints for the Construction Cost Tracker API."""
+from typing import Dict, Any, List, Optional
+import heapq
+import logging
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import inspect
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.exc import StaleDataError
+
+from api.analytics.loader import change_watermark
+from api.core.database import get_db
+from api.core.events import publish_change
+from api.core.sync import apply_mutations
+from api.schemas.sync import ChangesOut, SyncOut, SyncRequest
+from api.core.supabase import supabase
+from api.core.auth import get_current_active_user
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+# Response key and table of every synced entity
+SYNC_TABLES = (
+    ("projects", "projects"),
+    ("forecast_items", "forecast_line_items"),
+    ("expenses", "actual_expenses"),
+    ("draws", "draw_tracker"),
+)
+ENTITY_BY_TABLE = {table: entity for entity, table in SYNC_TABLES}
+
+DEFAULT_CHANGES_LIMIT = 500
+MAX_CHANGES_LIMIT = 2000
+
+
+def _changed_rows(
+    table: str, user_id: str, since: int, until: int, limit: int, project_id: Optional[int]
+) -> List[Dict[str, Any]]:
+    """Up to ``limit`` rows of one table changed after ``since`` and up to ``until``, in change order."""
+    query = supabase.table(table)\
+        .select('*')\
+        .eq('user_id', user_id)\
+        .gt('change_seq', since)\
+        .lte('change_seq', until)
+    if project_id is not None:
+        query = query.eq('id' if table == 'projects' else 'project_id', project_id)
+    response = query.order('change_seq').limit(limit).execute()
+    return response.data or []
+
+
+@router.get("/changes", response_model=ChangesOut)
+def list_changes(
+    since: int = Query(0, ge=0, description="Cursor from the previous response; 0 for everything"),
+    limit: int = Query(DEFAULT_CHANGES_LIMIT, ge=1, le=MAX_CHANGES_LIMIT),
+    project_id: Optional[int] = None,
+    current_user: Dict[str, Any] = Depends(get_current_active_user)
+):
+    """
+    Projects, forecast items, expenses, draws and deletions changed since a cursor.
+
+    Every write takes the next value of a database-wide change sequence, so
+    one integer cursor orders changes across all tables. Each page holds the
+    ``limit`` oldest changes after ``since``; pass the returned ``cursor`` back
+    until ``has_more`` is false. A row changed several times appears once,
+    in its latest state.
+
+    A user's changes are numbered in commit order (see ``next_change_seq``
+    in supabase_schema.sql), and the tables are read one query at a time,
+    so the page is capped at the watermark read before them: a write that
+    commits between two of the queries can't move the cursor past a change
+    committed just before it in a table already read.
+    """
+    try:
+        watermark = change_watermark(supabase, current_user['id'])
+        # Each table's first limit + 1 rows are enough to find the global
+        # first limit changes and whether more remain
+        sources = [
+            [
+                (row['change_seq'], entity, row)
+                for row in _changed_rows(table, current_user['id'], since, watermark, limit + 1, project_id)
+            ]
+            for entity, table in SYNC_TABLES + (("deleted", "deleted_rows"),)
+        ]
+        merged = list(heapq.merge(*sources, key=lambda change: change[0]))
+        page = merged[:limit]
+
+        result: Dict[str, Any] = {entity: [] for entity, _ in SYNC_TABLES}
+        result["deleted"] = []
+        for _, entity, row in page:
+            if entity == "deleted":
+                result["deleted"].append({
+                    "entity": ENTITY_BY_TABLE.get(row['table_name'], row['table_name']),
+                    "id": row['row_id'],
+                    "project_id": row.get('project_id'),
+                })
+            else:
+                result[entity].append(row)
+
+        return {
+            "cursor": page[-1][0] if page else since,
+            "has_more": len(merged) > limit,
+            **result,
+        }
+    except Exception as e:
+        logger.error("Error listing changes: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to list changes"
+        )
+
+
+def _column_values(row: Any) -> Dict[str, Any]:
+    """An ORM row as a plain dict of its columns, like a Supabase row."""
+    return {column.key: getattr(row, column.key) for column in inspect(row).mapper.column_attrs}
+
+
+@router.post("/sync", response_model=SyncOut)
+def sync_mutations(
+    request: SyncRequest,
+    db: Session = Depends(get_db),
+    current_user: Dict[str, Any] = Depends(get_current_active_user)
+):
+    """
+    Apply an ordered batch of offline forecast item and expense changes.
+
+    The batch runs in one database transaction. Each mutation is reported as
+    ``applied``, ``duplicate`` (its ``mutation_id`` or create ``client_id``
+    was seen before), ``conflict`` (the row moved on since the change was
+    made; nothing written) or ``rejected`` (invalid data or unknown row).
+    The response carries the server state of every row the batch touched.
+    """
+    try:
+        batch = apply_mutations(db, current_user['id'], request.mutations)
+        events = [
+            (entity.name, action, row if isinstance(row, dict) else _column_values(row))
+            for entity, action, row in batch.changes
+        ]
+        db.commit()
+    except StaleDataError as e:
+        db.rollback()
+        logger.warning("Sync batch lost a concurrent update: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Rows changed while the batch was applied; retry the sync"
+        )
+    except Exception as e:
+        db.rollback()
+        logger.error("Error applying sync batch: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to apply sync batch"
+        )
+
+    for entity, action, record in events:
+        publish_change(entity, action, record)
+
+    deleted_ids = {(row["entity"], row["id"]) for row in batch.deleted}
+    return {
+        "results": batch.results,
+        "deleted": batch.deleted,
+        **{
+            collection: [row for row_id, row in rows.items() if (collection, row_id) not in deleted_ids]
+            for collection, rows in batch.rows.items()
+        },
+    }
@@ -5,6 +5,8 @@ from .project import Project, ProjectStatusEnum
 from .forecast import ForecastLineItem, ForecastStatusEnum
 from .expense import ActualExpense
 from .draw import DrawTracker
+from .deleted_row import DeletedRow
+from .sync_mutation import SyncMutation
 
 # Export all models and enums
 __all__ = [
@@ -12,5 +14,7 @@ __all__ = [
     "Project", "ProjectStatusEnum",
     "ForecastLineItem", "ForecastStatusEnum", 
     "ActualExpense",
-    "DrawTracker"
+    "DrawTracker",
+    "DeletedRow",
+    "SyncMutation"
 ]
@@ -0,0 +1,17 @@
+"""Tombstone model for the delta sync change feed."""
+
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.sql import func
+from .base import Base
+
+class DeletedRow(Base):
+    """A deleted project, forecast item, expense or draw (written by database triggers)."""
+    __tablename__ = "deleted_rows"
+
+    change_seq = Column(BigInteger, primary_key=True)
+    user_id = Column(UUID(as_uuid=True), nullable=False)
+    table_name = Column(String, nullable=False)
+    row_id = Column(Integer, nullable=False)
+    project_id = Column(Integer)
+    deleted_at = Column(DateTime(timezone=True), server_default=func.now())
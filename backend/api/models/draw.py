@@ -1,6 +1,6 @@
 """Draw tracker model."""
 
-from sqlalchemy import Column, Integer, Float, Date, ForeignKey, Boolean, Text
+from sqlalchemy import Column, Integer, BigInteger, Date, ForeignKey, Boolean, Text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from .base import Base
@@ -12,10 +12,12 @@ class DrawTracker(Base):
     id = Column(Integer, primary_key=True)
     user_id = Column(UUID(as_uuid=True), nullable=False)
     project_id = Column(Integer, ForeignKey("projects.id"), nullable=False)
-    cash_on_hand = Column(Float, nullable=False)
+    cash_on_hand_cents = Column(BigInteger, nullable=False)  # Stored in cents
     last_draw_date = Column(Date)
     draw_triggered = Column(Boolean, default=False)
     notes = Column(Text)
+    version = Column(Integer, nullable=False, default=1)
+    change_seq = Column(BigInteger)  # Position in the change feed (set by the database)
     
     # Relationships
     project = relationship("Project", back_populates="draws")
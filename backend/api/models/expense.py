@@ -1,6 +1,7 @@
 """Actual expense model."""
 
-from sqlalchemy import Column, Integer, String, Float, Date, ForeignKey
+from sqlalchemy import Column, Integer, BigInteger, String, Date, ForeignKey, Index, DateTime
+from sqlalchemy.sql import func
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from .base import Base
@@ -14,10 +15,22 @@ class ActualExpense(Base):
     project_id = Column(Integer, ForeignKey("projects.id"), nullable=False)
     forecast_line_item_id = Column(Integer, ForeignKey("forecast_line_items.id"), nullable=True)
     vendor = Column(String)
-    amount_spent = Column(Float, nullable=False)
+    vendor_key = Column(String)  # Normalized vendor name (api/core/vendors.py)
+    amount_spent_cents = Column(BigInteger, nullable=False)  # Stored in cents
     date = Column(Date)
     receipt_url = Column(String)
+    client_id = Column(UUID(as_uuid=True))  # Id generated by an offline client (POST /sync)
+    version = Column(Integer, nullable=False, default=1)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    change_seq = Column(BigInteger)  # Position in the change feed (set by the database)
     
     # Relationships
     project = relationship("Project", back_populates="expenses")
     forecast_item = relationship("ForecastLineItem", back_populates="expenses")
+
+    __table_args__ = (
+        # Duplicate detection looks up (project, vendor, amount) over a date range
+        Index("idx_actual_expenses_fingerprint", "project_id", "vendor_key", "amount_spent_cents", "date"),
+    )
+    # Updates through the ORM check and bump the version (optimistic concurrency)
+    __mapper_args__ = {"version_id_col": version}
@@ -1,6 +1,7 @@
 """Forecast line item model and related enums."""
 
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, Enum, Text
+from sqlalchemy import Column, Integer, BigInteger, String, ForeignKey, Enum, Text, DateTime
+from sqlalchemy.sql import func
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 import enum
@@ -21,13 +22,24 @@ class ForecastLineItem(Base):
     project_id = Column(Integer, ForeignKey("projects.id"), nullable=False)
     category = Column(String, nullable=False)
     description = Column(Text)  # Brief description of the line item
-    estimated_cost = Column(Float, nullable=False)
-    actual_cost = Column(Float, default=0.0)
+    estimated_cost_cents = Column(BigInteger, nullable=False)  # Stored in cents
+    actual_cost_cents = Column(BigInteger, default=0)  # Stored in cents
     unit = Column(String)
     notes = Column(Text)  # Additional notes/comments
     progress_percent = Column(Integer, default=0)
-    status = Column(Enum(ForecastStatusEnum), default=ForecastStatusEnum.not_started)
+    # Stored by value ('Not Started'), matching the CHECK constraint in supabase_schema.sql
+    status = Column(
+        Enum(ForecastStatusEnum, native_enum=False, values_callable=lambda enum: [member.value for member in enum]),
+        default=ForecastStatusEnum.not_started,
+    )
+    client_id = Column(UUID(as_uuid=True))  # Id generated by an offline client (POST /sync)
+    version = Column(Integer, nullable=False, default=1)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    change_seq = Column(BigInteger)  # Position in the change feed (set by the database)
     
     # Relationships
     project = relationship("Project", back_populates="forecast_items")
     expenses = relationship("ActualExpense", back_populates="forecast_item")
+
+    # Updates through the ORM check and bump the version (optimistic concurrency)
+    __mapper_args__ = {"version_id_col": version}
@@ -0,0 +1,16 @@
+"""Log of offline mutations already applied by POST /sync."""
+
+from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.sql import func
+from .base import Base
+
+class SyncMutation(Base):
+    """A client mutation id that has been applied, so replays are skipped."""
+    __tablename__ = "sync_mutations"
+
+    user_id = Column(UUID(as_uuid=True), primary_key=True)
+    mutation_id = Column(UUID(as_uuid=True), primary_key=True)
+    entity = Column(String, nullable=False)
+    row_id = Column(Integer)
+    applied_at = Column(DateTime(timezone=True), server_default=func.now())
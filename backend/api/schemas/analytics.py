@@ -0,0 +1,158 @@
+"""Pydantic schemas for analytics responses."""
+from datetime import date, datetime
+from typing import List, Optional
+from pydantic import BaseModel
+
+from api.core.money import CentsColumnsModel, Money, MoneyCents
+
+class CostTotals(BaseModel):
+    """Earned-value totals shared by line items, categories and projects."""
+    budget: MoneyCents
+    actual: MoneyCents
+    earned_value: MoneyCents
+    etc: MoneyCents
+    eac: MoneyCents
+    variance: MoneyCents
+    cpi: Optional[float] = None
+
+class LineItemCost(CostTotals):
+    """Estimate at completion for a single forecast line item."""
+    id: int
+    project_id: int
+    category: str
+
+class CategoryCost(CostTotals):
+    """Estimate at completion rolled up by category."""
+    category: str
+
+class ProjectCost(CostTotals):
+    """Estimate at completion rolled up by project."""
+    project_id: int
+    total_budget: Optional[MoneyCents] = None
+    budget_variance: Optional[MoneyCents] = None
+
+class CostReportOut(BaseModel):
+    """Cost-to-complete report for a project or the whole portfolio."""
+    projects: List[ProjectCost]
+    categories: List[CategoryCost]
+    line_items: Optional[List[LineItemCost]] = None
+
+class ProjectCashFlow(BaseModel):
+    """Cash runway and next draw forecast for a project."""
+    project_id: int
+    has_draw_tracker: bool
+    cash_on_hand: Optional[MoneyCents] = None
+    burn_rate_per_day: MoneyCents
+    remaining_cost: MoneyCents
+    funding_gap: Optional[MoneyCents] = None
+    runway_days: Optional[int] = None
+    cash_out_date: Optional[date] = None
+    next_draw_date: Optional[date] = None
+    draw_recommended: bool
+
+class CashFlowReportOut(BaseModel):
+    """Cash-flow projection for a project or the whole portfolio."""
+    as_of: date
+    window_days: int
+    lead_time_days: int
+    projects: List[ProjectCashFlow]
+
+class CategoryRisk(BaseModel):
+    """Simulated final cost of one category and the overrun fit behind it."""
+    category: str
+    budget: MoneyCents
+    committed: MoneyCents
+    mean: MoneyCents
+    p50: MoneyCents
+    p80: MoneyCents
+    p95: MoneyCents
+    overrun_mu: float
+    overrun_sigma: float
+    samples: int
+    fit: str
+
+class RiskReportOut(BaseModel):
+    """Monte Carlo distribution of a project's final cost."""
+    project_id: int
+    trials: int
+    cached: bool = False
+    total_budget: Optional[MoneyCents] = None
+    committed: MoneyCents
+    mean: MoneyCents
+    p50: MoneyCents
+    p80: MoneyCents
+    p95: MoneyCents
+    probability_over_budget: Optional[float] = None
+    categories: List[CategoryRisk]
+
+class SpendBucket(BaseModel):
+    """Spend in one time bucket, optionally for one project/category/vendor."""
+    period: date
+    project_id: Optional[int] = None
+    category: Optional[str] = None
+    vendor: Optional[str] = None
+    amount: MoneyCents
+    expense_count: int
+
+class SpendReportOut(BaseModel):
+    """Time-bucketed spend for burn charts."""
+    bucket: str
+    group_by: List[str]
+    start: Optional[date] = None
+    end: Optional[date] = None
+    source: str
+    buckets: List[SpendBucket]
+
+class VendorSpend(BaseModel):
+    """Spend with one (normalized) vendor."""
+    vendor_key: str
+    vendor: Optional[str] = None
+    total_spend: MoneyCents
+    expense_count: int
+    average_ticket: MoneyCents
+    share: float
+    exact: bool = True
+
+class VendorReportOut(BaseModel):
+    """Top-k vendors by spend or expense count."""
+    k: int
+    sort: str
+    source: str
+    approximate: bool = False
+    total_spend: MoneyCents
+    total_count: int
+    vendors: List[VendorSpend]
+
+class CostBenchmark(CentsColumnsModel):
+    """Percentile bands of cost per square foot for one category."""
+    money_fields = ("p10", "p25", "p50", "p75", "p90")
+
+    category: str
+    sample_count: int
+    p10: Money
+    p25: Money
+    p50: Money
+    p75: Money
+    p90: Money
+    refreshed_at: Optional[datetime] = None
+
+class CostBenchmarksOut(BaseModel):
+    """Portfolio cost per square foot benchmarks."""
+    benchmarks: List[CostBenchmark]
+
+class CategoryBenchmark(CentsColumnsModel):
+    """One project category's cost per square foot against the portfolio."""
+    money_fields = ("cost_per_sqft",)
+
+    category: str
+    eac: MoneyCents
+    cost_per_sqft: Money
+    benchmark: Optional[CostBenchmark] = None
+    position: str
+
+class ProjectBenchmarkOut(BaseModel):
+    """A project's cost per square foot by category, with outlier flags."""
+    project_id: int
+    total_sqft: int
+    categories: List[CategoryBenchmark]
+    outliers: List[str]
@@ -1,12 +1,15 @@
 """Pydantic schemas for draw tracker."""
 from datetime import date
 from typing import Optional
-from pydantic import BaseModel
+from pydantic import field_validator
+from api.core.money import CentsColumnsModel, Money
 
-class DrawTrackerBase(BaseModel):
+class DrawTrackerBase(CentsColumnsModel):
     """Base draw tracker schema."""
+    money_fields = ("cash_on_hand",)
+
     project_id: int
-    cash_on_hand: float
+    cash_on_hand: Money
     last_draw_date: Optional[date] = None
     draw_triggered: Optional[bool] = False
     notes: Optional[str] = None
@@ -15,9 +18,27 @@ class DrawTrackerCreate(DrawTrackerBase):
     """Schema for creating a new draw tracker."""
     pass
 
+class DrawTrackerUpdate(CentsColumnsModel):
+    """Schema for changing some fields of a draw tracker (omitted fields are kept)."""
+    money_fields = ("cash_on_hand",)
+
+    project_id: Optional[int] = None
+    cash_on_hand: Optional[Money] = None
+    last_draw_date: Optional[date] = None
+    draw_triggered: Optional[bool] = None
+    notes: Optional[str] = None
+
+    @field_validator("project_id", "cash_on_hand")
+    @classmethod
+    def _required_columns_not_null(cls, value):
+        if value is None:
+            raise ValueError("may be omitted but not set to null")
+        return value
+
 class DrawTrackerOut(DrawTrackerBase):
     """Schema for draw tracker responses."""
     id: int
+    version: Optional[int] = None
 
     class Config:
         from_attributes = True
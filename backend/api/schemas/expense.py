@@ -1,14 +1,19 @@
 """Pydantic schemas for actual expenses."""
+import datetime
 from datetime import date
-from typing import Optional
-from pydantic import BaseModel
+from typing import List, Optional
+from uuid import UUID
+from pydantic import BaseModel, field_validator
+from api.core.money import CentsColumnsModel, Money
 
-class ActualExpenseBase(BaseModel):
+class ActualExpenseBase(CentsColumnsModel):
     """Base actual expense schema."""
+    money_fields = ("amount_spent",)
+
     project_id: int
     forecast_line_item_id: Optional[int] = None
     vendor: Optional[str] = None
-    amount_spent: float
+    amount_spent: Money
     date: date
     receipt_url: Optional[str] = None
 
@@ -16,9 +21,43 @@ class ActualExpenseCreate(ActualExpenseBase):
     """Schema for creating a new actual expense."""
     pass
 
+class ActualExpenseUpdate(CentsColumnsModel):
+    """Schema for changing some fields of an expense (omitted fields are kept)."""
+    money_fields = ("amount_spent",)
+
+    project_id: Optional[int] = None
+    forecast_line_item_id: Optional[int] = None
+    vendor: Optional[str] = None
+    amount_spent: Optional[Money] = None
+    # ``datetime.date``: a bare ``date`` would resolve to this field's own default
+    date: Optional[datetime.date] = None
+    receipt_url: Optional[str] = None
+
+    @field_validator("project_id", "amount_spent", "date")
+    @classmethod
+    def _required_columns_not_null(cls, value):
+        if value is None:
+            raise ValueError("may be omitted but not set to null")
+        return value
+
 class ActualExpenseOut(ActualExpenseBase):
     """Schema for actual expense responses."""
     id: int
+    version: Optional[int] = None
+    client_id: Optional[UUID] = None
+    # Ids of existing expenses that look like the same receipt (set on create)
+    duplicate_of: List[int] = []
 
     class Config:
         from_attributes = True
+
+class SkippedExpense(BaseModel):
+    """A bulk import row that was not inserted because it is a likely duplicate."""
+    index: int
+    duplicate_of: List[int] = []
+    duplicate_of_index: Optional[int] = None
+
+class ActualExpenseBulkOut(BaseModel):
+    """Result of a bulk expense import."""
+    created: List[ActualExpenseOut]
+    skipped: List[SkippedExpense] = []
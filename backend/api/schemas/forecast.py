@@ -1,17 +1,21 @@
 """Pydantic schemas for forecast line items."""
-from typing import Optional
-from pydantic import BaseModel
+from typing import List, Optional
+from uuid import UUID
+from pydantic import BaseModel, Field, field_validator
+from api.core.money import CentsColumnsModel, Money
 
-class ForecastLineItemBase(BaseModel):
+class ForecastLineItemBase(CentsColumnsModel):
     """Base forecast line item schema."""
+    money_fields = ("estimated_cost", "actual_cost")
+
     project_id: int
     category: str
     description: Optional[str] = None
-    estimated_cost: float
-    actual_cost: Optional[float] = 0.0
+    estimated_cost: Money
+    actual_cost: Optional[Money] = 0
     unit: Optional[str] = None
     notes: Optional[str] = None
-    progress_percent: int = 0
+    progress_percent: int = Field(0, ge=0, le=100)
     status: Optional[str] = "not_started"
 
 class ForecastLineItemCreate(ForecastLineItemBase):
@@ -21,9 +25,61 @@ class ForecastLineItemCreate(ForecastLineItemBase):
         # Allow extra fields to be ignored if they don't exist in DB yet
         extra = "ignore"
 
+class ForecastLineItemUpdate(CentsColumnsModel):
+    """Schema for changing some fields of a forecast line item (omitted fields are kept)."""
+    money_fields = ("estimated_cost", "actual_cost")
+
+    project_id: Optional[int] = None
+    category: Optional[str] = None
+    description: Optional[str] = None
+    estimated_cost: Optional[Money] = None
+    actual_cost: Optional[Money] = None
+    unit: Optional[str] = None
+    notes: Optional[str] = None
+    progress_percent: Optional[int] = Field(None, ge=0, le=100)
+    status: Optional[str] = None
+
+    @field_validator("project_id", "category", "estimated_cost")
+    @classmethod
+    def _required_columns_not_null(cls, value):
+        if value is None:
+            raise ValueError("may be omitted but not set to null")
+        return value
+
 class ForecastLineItemOut(ForecastLineItemBase):
     """Schema for forecast line item responses."""
     id: int
+    version: Optional[int] = None
+    client_id: Optional[UUID] = None
 
     class Config:
         from_attributes = True
+
+class ForecastGenerateRequest(BaseModel):
+    """Request to propose line items from the most similar completed projects."""
+    project_id: int
+    k: int = Field(5, ge=1, le=20)
+    categories: Optional[List[str]] = None
+    min_support: float = Field(0.5, ge=0.0, le=1.0)
+    dry_run: bool = False
+
+class SimilarProject(BaseModel):
+    """A completed project used as a template, with its similarity score."""
+    project_id: int
+    similarity: float
+
+class ForecastProposal(CentsColumnsModel):
+    """A proposed line item blended from similar projects' actual costs."""
+    money_fields = ("estimated_cost",)
+
+    category: str
+    estimated_cost: Money
+    support: float
+    source_project_ids: List[int]
+
+class ForecastGenerateOut(BaseModel):
+    """Proposed (and, unless dry run, created) forecast line items."""
+    project_id: int
+    neighbors: List[SimilarProject]
+    proposals: List[ForecastProposal]
+    created: List[ForecastLineItemOut] = []
@@ -2,37 +2,41 @@
 from datetime import date
 from typing import Optional, List, Dict, Any
 from pydantic import BaseModel, Field, validator
-from decimal import Decimal
 from enum import Enum
+from api.core.money import CentsColumnsModel, Money
 
 class ProjectStatusEnum(str, Enum):
     not_started = "not_started"
     in_progress = "in_progress"
     completed = "completed"
 
-class ProjectBase(BaseModel):
+class ProjectBase(CentsColumnsModel):
     """Base project schema."""
+    money_fields = ("total_budget",)
+
     name: str
     address: Optional[str] = None
     start_date: Optional[date] = None
     target_completion_date: Optional[date] = None
     status: Optional[ProjectStatusEnum] = ProjectStatusEnum.not_started
     total_sqft: Optional[int] = None
-    total_budget: Optional[Decimal] = None
+    total_budget: Optional[Money] = None
 
 class ProjectCreate(ProjectBase):
     """Schema for creating a new project."""
     pass
 
-class ProjectUpdate(BaseModel):
+class ProjectUpdate(CentsColumnsModel):
     """Schema for updating a project (all fields are optional)."""
+    money_fields = ("total_budget",)
+
     name: Optional[str] = None
     address: Optional[str] = None
     start_date: Optional[date] = None
     target_completion_date: Optional[date] = None
     status: Optional[ProjectStatusEnum] = None
     total_sqft: Optional[int] = None
-    total_budget: Optional[Decimal] = None
+    total_budget: Optional[Money] = None
 
 class ProjectOut(ProjectBase):
     """Schema for project responses."""
@@ -0,0 +1,59 @@
+"""Pydantic schemas for delta sync."""
+from datetime import datetime
+from typing import Any, Dict, List, Literal, Optional
+from uuid import UUID
+from pydantic import BaseModel, Field
+
+from api.schemas.draw import DrawTrackerOut
+from api.schemas.expense import ActualExpenseOut
+from api.schemas.forecast import ForecastLineItemOut
+from api.schemas.project import ProjectOut
+
+class DeletedRowOut(BaseModel):
+    """A row deleted since the cursor."""
+    entity: str
+    id: int
+    project_id: Optional[int] = None
+
+class ChangesOut(BaseModel):
+    """Rows created, updated or deleted since a cursor, oldest change first."""
+    cursor: int
+    has_more: bool
+    projects: List[ProjectOut] = []
+    forecast_items: List[ForecastLineItemOut] = []
+    expenses: List[ActualExpenseOut] = []
+    draws: List[DrawTrackerOut] = []
+    deleted: List[DeletedRowOut] = []
+
+class SyncMutationIn(BaseModel):
+    """One change recorded offline, replayed in the order it was made."""
+    mutation_id: UUID  # generated by the client; replays of the same id are skipped
+    entity: Literal["forecast_item", "expense"]
+    action: Literal["create", "update", "delete"]
+    client_id: Optional[UUID] = None  # the row's client-generated id (required to create)
+    id: Optional[int] = None  # server id, when the client has it
+    base_version: Optional[int] = None  # row version the change was made against
+    client_updated_at: Optional[datetime] = None  # when the change was made, for last-writer-wins
+    data: Dict[str, Any] = {}
+
+class SyncRequest(BaseModel):
+    """An ordered batch of offline mutations."""
+    mutations: List[SyncMutationIn] = Field(..., max_length=500)
+
+class SyncMutationResult(BaseModel):
+    """Outcome of one mutation: applied, duplicate, conflict or rejected."""
+    mutation_id: UUID
+    entity: str
+    action: str
+    status: str
+    id: Optional[int] = None
+    client_id: Optional[UUID] = None
+    version: Optional[int] = None
+    detail: Optional[str] = None
+
+class SyncOut(BaseModel):
+    """Per-mutation results and the server state of every touched row."""
+    results: List[SyncMutationResult]
+    forecast_items: List[ForecastLineItemOut] = []
+    expenses: List[ActualExpenseOut] = []
+    deleted: List[DeletedRowOut] = []
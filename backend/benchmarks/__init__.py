@@ -0,0 +1,19 @@
+"""
+Benchmarks and load tests against an in-memory Supabase stand-in.
+
+The app reads its configuration at import time, so the defaults it needs to
+start without a database or Supabase project are set here, before anything
+imports it.
+"""
+import os
+import sys
+from pathlib import Path
+
+os.environ.setdefault("ENV", "test")
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+os.environ.setdefault("SUPABASE_URL", "https://benchmark.supabase.co")
+os.environ.setdefault("SUPABASE_SERVICE_ROLE_KEY", "eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoic2VydmljZV9yb2xlIn0.benchmark")
+# Expected error paths would drown the reports; LOG_LEVEL=ERROR shows them
+os.environ.setdefault("LOG_LEVEL", "CRITICAL")
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
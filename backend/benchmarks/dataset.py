@@ -0,0 +1,344 @@
+"""
+Deterministic synthetic portfolios for performance testing.
+
+``generate()`` builds users with projects of realistic size and timing, a
+phase/trade hierarchy of forecast line items per project, expenses split
+across each item's spend to date, and a draw history. Most expense dollars
+go to a few suppliers (with the name variants vendor normalization has to
+collapse) and each project's subcontractors. Everything comes from seeded
+random generators and a fixed ``as_of`` date, and each user has their own
+generator, so a user's rows are the same whatever the number of users.
+
+Two loaders put a dataset somewhere:
+
+- ``load_store()``: the in-memory Supabase stand-in used by
+  ``benchmarks.run`` and ``benchmarks.load``
+- ``load_sql()``: the app's SQLAlchemy tables on SQLite or PostgreSQL, in
+  batched multi-row inserts (``COPY`` on PostgreSQL), one transaction per
+  table
+
+Rows carry explicit ids, so load into empty tables.
+
+    python -m benchmarks.dataset --users 50 --projects 40              # counts and timing only
+    python -m benchmarks.dataset --users 50 --projects 40 --database-url sqlite:///perf.db
+"""
+import argparse
+import csv
+import io
+import math
+import random
+import sys
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import Any, Dict, Iterable, List, Optional
+
+from api.core.vendors import normalize_vendor
+
+from .fake_supabase import InMemoryStore
+
+# Load order: referenced tables first
+TABLES = ("projects", "forecast_line_items", "actual_expenses", "draw_tracker")
+
+AS_OF = date(2025, 6, 30)
+
+# Phases in build order, with their trades and share of the budget
+PHASES = (
+    ("Pre-construction", (("Permits", 1.5), ("Design", 3.0), ("Survey", 0.5))),
+    ("Site Work", (("Excavation", 3.0), ("Grading", 1.5), ("Utilities", 3.0))),
+    ("Foundation", (("Concrete", 7.0), ("Waterproofing", 1.0))),
+    ("Framing", (("Framing Lumber", 8.0), ("Framing Labor", 6.0), ("Trusses", 2.5))),
+    ("Exterior", (("Roofing", 4.5), ("Windows", 4.0), ("Siding", 4.0), ("Gutters", 0.5))),
+    ("Mechanical", (("Plumbing", 6.0), ("Electrical", 6.0), ("HVAC", 5.5))),
+    ("Interior", (
+        ("Insulation", 2.0), ("Drywall", 4.5), ("Flooring", 5.0), ("Cabinets", 5.0),
+        ("Countertops", 2.5), ("Paint", 3.0), ("Trim", 2.5),
+    )),
+    ("Finishes", (("Appliances", 2.5), ("Fixtures", 2.0), ("Landscaping", 2.5), ("Cleanup", 0.5))),
+)
+
+UNITS = ("ls", "sq ft", "ea", "lf", "hr")
+
+# Suppliers by popularity, with the spellings that show up on receipts
+SUPPLIERS = (
+    ("Home Depot", ("HOME DEPOT #4521", "The Home Depot", "Home Depot #0612")),
+    ("Lowe's", ("LOWES #1187", "Lowes", "Lowe's Home Centers, LLC")),
+    ("84 Lumber", ("84 LUMBER CO", "84 Lumber #231")),
+    ("ABC Supply", ("ABC Supply Co., Inc.",)),
+    ("Ferguson", ("FERGUSON ENTERPRISES",)),
+    ("Sherwin-Williams", ("Sherwin Williams #7781",)),
+    ("Builders FirstSource", ()),
+    ("Menards", ("MENARDS #3310",)),
+    ("Floor & Decor", ("Floor and Decor",)),
+    ("Grainger", ()),
+    ("Fastenal", ()),
+    ("United Rentals", ()),
+    ("Sunbelt Rentals", ()),
+    ("Ace Hardware", ("ACE HARDWARE #09",)),
+    ("Beacon Roofing Supply", ()),
+    ("Graybar", ()),
+    ("Pella", ()),
+    ("Andersen", ()),
+    ("Carter Lumber", ()),
+    ("Local Ready Mix", ()),
+)
+
+SURNAMES = (
+    "Alvarez", "Baker", "Chen", "Dawson", "Ellis", "Foster", "Garcia", "Hughes", "Ito", "Jensen",
+    "Kowalski", "Lopez", "Morgan", "Nguyen", "Owens", "Patel", "Quinn", "Reyes", "Sullivan", "Turner",
+)
+
+
+def user_id(number: int) -> str:
+    # User 0 is the benchmark user of benchmarks.run. The "a" keeps SQLite's
+    # numeric affinity from turning an all-digit stored id into a number.
+    return f"00000000-0000-4000-a000-{number + 1:012x}"
+
+
+@dataclass
+class Dataset:
+    users: List[Dict[str, Any]] = field(default_factory=list)
+    tables: Dict[str, List[Dict[str, Any]]] = field(default_factory=lambda: {table: [] for table in TABLES})
+
+    def counts(self) -> Dict[str, int]:
+        return {"users": len(self.users), **{table: len(rows) for table, rows in self.tables.items()}}
+
+    def portfolios(self) -> List[Dict[int, List[int]]]:
+        """Forecast item ids by project id, per user (in ``users`` order)."""
+        by_user: Dict[str, Dict[int, List[int]]] = {user["id"]: {} for user in self.users}
+        for project in self.tables["projects"]:
+            by_user[project["user_id"]][project["id"]] = []
+        for item in self.tables["forecast_line_items"]:
+            by_user[item["user_id"]][item["project_id"]].append(item["id"])
+        return [by_user[user["id"]] for user in self.users]
+
+
+class _Ids:
+    def __init__(self):
+        self.next = {table: 1 for table in TABLES}
+
+    def __call__(self, table: str) -> int:
+        value = self.next[table]
+        self.next[table] += 1
+        return value
+
+
+def _clamp(value: float, low: float, high: float) -> float:
+    return max(low, min(high, value))
+
+
+def _split(rng: random.Random, total: int, parts: int) -> List[int]:
+    """``total`` cents in ``parts`` random shares that add up exactly."""
+    weights = [rng.expovariate(1.0) for _ in range(parts)]
+    scale = total / sum(weights)
+    amounts = [max(1, int(weight * scale)) for weight in weights]
+    amounts[0] += total - sum(amounts)
+    return amounts
+
+
+def _supplier(rng: random.Random, weights: List[float]) -> str:
+    name, variants = rng.choices(SUPPLIERS, weights)[0]
+    if variants and rng.random() < 0.3:
+        return rng.choice(variants)
+    return name
+
+
+def _project(
+    rng: random.Random, owner: str, number: int, ids: _Ids, dataset: Dataset, expenses_per_item: float, as_of: date
+) -> None:
+    sqft = int(_clamp(rng.lognormvariate(math.log(2400), 0.35), 800, 9000))
+    budget = int(sqft * rng.uniform(140, 320) * 100)
+    duration = int(150 + sqft / 20 + rng.uniform(0, 120))
+    start = as_of - timedelta(days=rng.randint(-60, 3 * 365))
+    elapsed = _clamp((as_of - start).days / duration, 0.0, 1.0)
+    status = "not_started" if start > as_of else "completed" if elapsed >= 1.0 else "in_progress"
+    # Projects run over or under as a whole, and each item around that
+    project_overrun = rng.lognormvariate(0.03, 0.08)
+
+    project_id = ids("projects")
+    dataset.tables["projects"].append({
+        "id": project_id,
+        "user_id": owner,
+        "name": f"{rng.choice(SURNAMES)} Residence {number + 1}",
+        "address": f"{rng.randint(100, 9999)} {rng.choice(SURNAMES)} {rng.choice(('St', 'Ave', 'Rd', 'Ln', 'Ct'))}",
+        "start_date": start,
+        "target_completion_date": start + timedelta(days=duration),
+        "status": status,
+        "total_sqft": sqft,
+        "total_budget_cents": budget,
+    })
+
+    supplier_weights = [1 / (rank + 1) ** 1.1 for rank in range(len(SUPPLIERS))]
+    trades = [(phase, index, trade, share) for index, (phase, trades) in enumerate(PHASES) for trade, share in trades]
+    # Not every project has every trade
+    trades = [entry for entry in trades if rng.random() < 0.85] or trades[:1]
+    total_share = sum(share for _, _, _, share in trades)
+
+    for phase, phase_index, trade, share in trades:
+        # Phases overlap: each starts a little before the previous one ends
+        phase_start = phase_index / len(PHASES) * 0.8
+        progress = _clamp((elapsed - phase_start) / 0.3, 0.0, 1.0)
+        estimate = int(budget * share / total_share * rng.uniform(0.85, 1.15))
+        spent = int(estimate * project_overrun * rng.lognormvariate(0, 0.12) * progress)
+        item_id = ids("forecast_line_items")
+        percent = round(progress * 100)
+        dataset.tables["forecast_line_items"].append({
+            "id": item_id,
+            "user_id": owner,
+            "project_id": project_id,
+            "category": trade,
+            "estimated_cost_cents": estimate,
+            "actual_cost_cents": spent,
+            "unit": rng.choice(UNITS),
+            "notes": f"Phase: {phase}",
+            "progress_percent": percent,
+            "status": "Complete" if percent == 100 else "Not Started" if percent == 0 else "In Progress",
+        })
+        if not spent:
+            continue
+
+        subcontractor = f"{rng.choice(SURNAMES)} {trade} LLC"
+        count = max(1, int(rng.expovariate(1 / expenses_per_item) * progress + 0.5))
+        window_start = start + timedelta(days=int(duration * phase_start))
+        window_days = max(1, min(int(duration * 0.3 * progress), (as_of - window_start).days))
+        for amount in _split(rng, spent, count):
+            vendor = subcontractor if rng.random() < 0.4 else _supplier(rng, supplier_weights)
+            expense_id = ids("actual_expenses")
+            dataset.tables["actual_expenses"].append({
+                "id": expense_id,
+                "user_id": owner,
+                "project_id": project_id,
+                "forecast_line_item_id": item_id,
+                "vendor": vendor,
+                "vendor_key": normalize_vendor(vendor),
+                "amount_spent_cents": amount,
+                "date": window_start + timedelta(days=rng.randrange(window_days)),
+                "receipt_url": f"https://receipts.example.com/{owner}/{expense_id}.jpg" if rng.random() < 0.4 else None,
+            })
+
+    # A draw every four to six weeks while the project runs
+    draw_date = start + timedelta(days=rng.randint(20, 40))
+    end = min(as_of, start + timedelta(days=duration))
+    draws = 0
+    while draw_date <= end:
+        draws += 1
+        cash = int(budget * rng.uniform(0.01, 0.12))
+        dataset.tables["draw_tracker"].append({
+            "id": ids("draw_tracker"),
+            "user_id": owner,
+            "project_id": project_id,
+            "cash_on_hand_cents": cash,
+            "last_draw_date": draw_date,
+            "draw_triggered": cash < budget * 0.03,
+            "notes": f"Draw {draws}",
+        })
+        draw_date += timedelta(days=rng.randint(28, 42))
+
+
+def generate(
+    users: int = 10,
+    projects_per_user: int = 20,
+    expenses_per_item: float = 12.0,
+    seed: int = 0,
+    as_of: date = AS_OF,
+) -> Dataset:
+    """A portfolio of ``projects_per_user`` projects for each of ``users`` users."""
+    dataset = Dataset()
+    ids = _Ids()
+    for number in range(users):
+        owner = user_id(number)
+        dataset.users.append({"id": owner, "email": f"builder{number + 1}@example.com"})
+        rng = random.Random(f"{seed}:{number}")
+        for project in range(projects_per_user):
+            _project(rng, owner, project, ids, dataset, expenses_per_item, as_of)
+    return dataset
+
+
+def _json_ready(row: Dict[str, Any]) -> Dict[str, Any]:
+    # PostgREST returns dates as ISO strings
+    return {column: value.isoformat() if isinstance(value, date) else value for column, value in row.items()}
+
+
+def load_store(store: InMemoryStore, dataset: Dataset) -> Dict[str, int]:
+    """Load ``dataset`` into the in-memory stand-in; rows loaded per table."""
+    return {table: len(store.load(table, map(_json_ready, dataset.tables[table]))) for table in TABLES}
+
+
+def _batches(rows: List[Dict[str, Any]], size: int) -> Iterable[List[Dict[str, Any]]]:
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+
+def _copy(connection, table, rows: List[Dict[str, Any]]) -> None:
+    """PostgreSQL ``COPY ... FROM STDIN``: the fastest way in, one round trip per table."""
+    columns = [column.name for column in table.columns if column.name in rows[0]]
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow(["" if row.get(column) is None else row[column] for column in columns])
+    buffer.seek(0)
+    cursor = connection.connection.dbapi_connection.cursor()
+    cursor.copy_expert(f"COPY {table.name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer)
+    # Explicit ids leave the serial sequence behind
+    cursor.execute(f"SELECT setval(pg_get_serial_sequence('{table.name}', 'id'), (SELECT MAX(id) FROM {table.name}))")
+
+
+def load_sql(engine, dataset: Dataset, batch_size: int = 5000) -> Dict[str, int]:
+    """Load ``dataset`` into the app's tables on ``engine``; rows loaded per table."""
+    from api.models import Base
+
+    loaded = {}
+    for name in TABLES:
+        table = Base.metadata.tables[name]
+        columns = set(table.columns.keys())
+        rows = [
+            {
+                column: uuid.UUID(value) if column == "user_id" else value
+                for column, value in row.items()
+                if column in columns
+            }
+            for row in dataset.tables[name]
+        ]
+        with engine.begin() as connection:
+            if rows and engine.dialect.name == "postgresql":
+                _copy(connection, table, rows)
+            else:
+                for batch in _batches(rows, batch_size):
+                    connection.execute(table.insert(), batch)
+        loaded[name] = len(rows)
+    return loaded
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Generate a synthetic portfolio and bulk-load it")
+    parser.add_argument("-u", "--users", type=int, default=10)
+    parser.add_argument("-p", "--projects", type=int, default=20, help="projects per user")
+    parser.add_argument("--expenses-per-item", type=float, default=12.0, help="mean expenses on a finished line item")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--as-of", type=date.fromisoformat, default=AS_OF, help="the dataset's today (YYYY-MM-DD)")
+    parser.add_argument("--database-url", help="load into this database (app tables, created if missing)")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    dataset = generate(args.users, args.projects, args.expenses_per_item, args.seed, args.as_of)
+    print(f"Generated {dataset.counts()} in {time.perf_counter() - started:.1f}s")
+
+    started = time.perf_counter()
+    if args.database_url:
+        from sqlalchemy import create_engine
+
+        from api.models import Base
+
+        engine = create_engine(args.database_url)
+        Base.metadata.create_all(engine)
+        loaded = load_sql(engine, dataset, args.batch_size)
+    else:
+        loaded = load_store(InMemoryStore(), dataset)
+    print(f"Loaded {loaded} in {time.perf_counter() - started:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
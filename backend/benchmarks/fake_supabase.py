@@ -0,0 +1,526 @@
+"""
+In-memory stand-in for the Supabase client.
+
+``FakeSupabase`` implements the slice of the supabase-py API the endpoints
+use: ``table(name)`` query builders with ``select``, ``insert``,
+``upsert``, ``update`` and ``delete``, the ``eq``/``neq``/``gt``/``gte``/
+``lt``/``lte``/``in_``/``is_`` filters, ``order``, ``limit`` and ``range``,
+``execute()`` returning an object with ``data`` and ``count``, ``rpc()``
+for the SQL functions and ``auth.get_user``, which verifies tokens minted
+by ``auth.issue_token``. Rows live in an
+``InMemoryStore``, which also plays the part of the schema's defaults and
+triggers that responses depend on: serial ids, ``version`` bumps,
+``change_seq`` and ``updated_at`` stamps, delete tombstones, the
+normalized ``vendor_key`` and the ``expense_daily_rollups`` buckets.
+Equality filters on ids, ``user_id`` and ``project_id`` go through an
+index, so reads against a large generated dataset (``benchmarks.dataset``)
+don't scan whole tables.
+
+Every ``execute()`` (and auth call) sleeps for the configured latency,
+standing in for the network round trip, and is counted per table and
+operation, so a benchmark can report how many upstream calls each endpoint
+makes.
+"""
+import base64
+import copy
+import hashlib
+import hmac
+import itertools
+import json
+import random
+import threading
+import time
+from collections import Counter
+from datetime import date, datetime, timezone
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from api.core.vendors import normalize_vendor
+
+# Tables with the updated_at/change_seq triggers and delete tombstones
+TRACKED_TABLES = ("projects", "forecast_line_items", "actual_expenses", "draw_tracker")
+
+# Column defaults from supabase_schema.sql that responses rely on
+TABLE_DEFAULTS: Dict[str, Dict[str, Any]] = {
+    "projects": {"status": "not_started"},
+    "forecast_line_items": {"actual_cost_cents": 0, "progress_percent": 0, "status": "Not Started", "version": 1},
+    "actual_expenses": {"version": 1},
+    "draw_tracker": {"draw_triggered": False, "version": 1},
+}
+
+# Primary keys other than a serial ``id``
+TABLE_KEYS: Dict[str, Tuple[str, ...]] = {
+    "cost_benchmarks": ("user_id", "category"),
+    "idempotency_keys": ("user_id", "key"),
+    "sync_mutations": ("user_id", "mutation_id"),
+    "deleted_rows": ("change_seq",),
+    "expense_daily_rollups": ("user_id", "project_id", "day", "category", "vendor"),
+}
+
+# Columns with an equality index
+INDEXED_COLUMNS = ("id", "user_id", "project_id")
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _comparable(stored: Any, value: Any) -> Tuple[Any, Any]:
+    """Coerce a filter value (often a string) to the stored column's type."""
+    if isinstance(value, (date, datetime)):
+        value = value.isoformat()
+    if stored is None or value is None:
+        return stored, value
+    if isinstance(stored, bool):
+        return stored, value in (True, "true", "True", 1)
+    if isinstance(stored, (int, float)) and not isinstance(value, (int, float)):
+        try:
+            return stored, type(stored)(value)
+        except (TypeError, ValueError):
+            return str(stored), str(value)
+    if isinstance(stored, str) and not isinstance(value, str):
+        return stored, str(value)
+    return stored, value
+
+
+class InMemoryStore:
+    """Tables of row dicts, with the schema's defaults and triggers."""
+
+    def __init__(self):
+        self.tables: Dict[str, List[Dict[str, Any]]] = {}
+        self._next_id: Dict[str, int] = {}
+        self._change_seq = itertools.count(1)
+        self._indexes: Dict[Tuple[str, str], Dict[str, List[Dict[str, Any]]]] = {}
+        self._rollups: Dict[Tuple[Any, ...], Dict[str, Any]] = {}
+        self.lock = threading.RLock()
+
+    def rows(self, table: str) -> List[Dict[str, Any]]:
+        return self.tables.setdefault(table, [])
+
+    def lookup(self, table: str, column: str, value: Any) -> List[Dict[str, Any]]:
+        """Rows of ``table`` whose indexed ``column`` equals ``value``, in insertion order."""
+        return self._indexes.get((table, column), {}).get(str(value), [])
+
+    def _index(self, table: str, row: Dict[str, Any], columns: Iterable[str] = INDEXED_COLUMNS) -> None:
+        for column in columns:
+            if row.get(column) is not None:
+                self._indexes.setdefault((table, column), {}).setdefault(str(row[column]), []).append(row)
+
+    def _unindex(self, table: str, row: Dict[str, Any], columns: Iterable[str] = INDEXED_COLUMNS) -> None:
+        for column in columns:
+            if row.get(column) is not None:
+                bucket = self._indexes[(table, column)][str(row[column])]
+                bucket[:] = [item for item in bucket if item is not row]
+
+    def _rollup(self, expense: Dict[str, Any], sign: int) -> None:
+        """The spend rollup trigger: move an expense into (+1) or out of (-1) its day bucket."""
+        if not expense.get("date"):
+            return
+        items = self.lookup("forecast_line_items", "id", expense.get("forecast_line_item_id"))
+        category = items[0]["category"] if items else "Uncategorized"
+        vendor = (expense.get("vendor") or "").strip() or "Unknown"
+        key = (expense["user_id"], expense["project_id"], str(expense["date"]), category, vendor)
+        bucket = self._rollups.get(key)
+        if bucket is None:
+            bucket = dict(zip(TABLE_KEYS["expense_daily_rollups"], key), amount_cents=0, expense_count=0)
+            self._rollups[key] = bucket
+            self.rows("expense_daily_rollups").append(bucket)
+            self._index("expense_daily_rollups", bucket)
+        bucket["amount_cents"] += sign * (expense.get("amount_spent_cents") or 0)
+        bucket["expense_count"] += sign
+        if bucket["expense_count"] <= 0:
+            del self._rollups[key]
+            rollups = self.rows("expense_daily_rollups")
+            rollups[:] = [item for item in rollups if item is not bucket]
+            self._unindex("expense_daily_rollups", bucket)
+
+    def _key(self, table: str, row: Dict[str, Any]) -> Tuple[Any, ...]:
+        return tuple(row.get(column) for column in TABLE_KEYS.get(table, ("id",)))
+
+    def _new_row(self, table: str, values: Dict[str, Any]) -> Dict[str, Any]:
+        row = {**TABLE_DEFAULTS.get(table, {}), **values}
+        if table not in TABLE_KEYS:
+            if row.get("id") is None:
+                row["id"] = self._next_id.get(table, 1)
+            # Explicitly loaded ids move the sequence past them
+            self._next_id[table] = max(self._next_id.get(table, 1), row["id"] + 1)
+        if table in TRACKED_TABLES:
+            row.setdefault("created_at", _now())
+            row.setdefault("updated_at", row["created_at"])
+            row["change_seq"] = next(self._change_seq)
+        if table == "deleted_rows":
+            row.setdefault("change_seq", next(self._change_seq))
+            row.setdefault("deleted_at", _now())
+        if table == "actual_expenses":
+            row["vendor_key"] = row.get("vendor_key") or normalize_vendor(row.get("vendor"))
+        return row
+
+    def insert(self, table: str, values: List[Dict[str, Any]], upsert: bool = False) -> List[Dict[str, Any]]:
+        rows = self.rows(table)
+        written = []
+        for value in values:
+            row = self._new_row(table, dict(value))
+            if upsert:
+                key = self._key(table, row)
+                existing = next((item for item in rows if self._key(table, item) == key), None)
+                if existing is not None:
+                    self._unindex(table, existing)
+                    existing.update(value)
+                    self._index(table, existing)
+                    written.append(existing)
+                    continue
+            rows.append(row)
+            self._index(table, row)
+            if table == "actual_expenses":
+                self._rollup(row, +1)
+            written.append(row)
+        return written
+
+    def load(self, table: str, values: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Bulk insert rows as they are (ids kept), applying column defaults."""
+        with self.lock:
+            return self.insert(table, list(values))
+
+    def update(self, table: str, rows: List[Dict[str, Any]], values: Dict[str, Any]) -> None:
+        moved = [column for column in INDEXED_COLUMNS if column in values]
+        for row in rows:
+            if table == "actual_expenses":
+                self._rollup(row, -1)
+            self._unindex(table, row, moved)
+            row.update(values)
+            self._index(table, row, moved)
+            if table == "actual_expenses":
+                self._rollup(row, +1)
+            if table in TRACKED_TABLES:
+                if "version" in row:
+                    row["version"] = (row["version"] or 0) + 1
+                row["updated_at"] = _now()
+                row["change_seq"] = next(self._change_seq)
+            if table == "actual_expenses" and "vendor" in values:
+                row["vendor_key"] = normalize_vendor(row.get("vendor"))
+
+    def delete(self, table: str, rows: List[Dict[str, Any]]) -> None:
+        doomed = {id(row) for row in rows}
+        remaining = self.rows(table)
+        remaining[:] = [row for row in remaining if id(row) not in doomed]
+        for row in rows:
+            self._unindex(table, row)
+            if table == "actual_expenses":
+                self._rollup(row, -1)
+            if table in TRACKED_TABLES and row.get("user_id") is not None:
+                self.insert("deleted_rows", [{
+                    "user_id": row["user_id"],
+                    "table_name": table,
+                    "row_id": row["id"],
+                    "project_id": row["id"] if table == "projects" else row.get("project_id"),
+                }])
+
+
+class FakeResponse:
+    def __init__(self, data: Any, count: Optional[int] = None):
+        self.data = data
+        self.count = count
+
+
+class QueryBuilder:
+    """One ``table()`` query: an operation, filters and paging."""
+
+    def __init__(self, client: "FakeSupabase", table: str):
+        self.client = client
+        self.table = table
+        self.operation = "select"
+        self.columns: Optional[List[str]] = None
+        self.count: Optional[str] = None
+        self.payload: Any = None
+        self.filters: List[Callable[[Dict[str, Any]], bool]] = []
+        self.equalities: List[Tuple[str, Any]] = []
+        self.ordering: List[Tuple[str, bool]] = []
+        self.offset = 0
+        self.row_limit: Optional[int] = None
+        self.single_row = False
+
+    # Operations
+
+    def select(self, columns: str = "*", count: Optional[str] = None) -> "QueryBuilder":
+        self.columns = None if columns.strip() == "*" else [column.strip() for column in columns.split(",")]
+        self.count = count
+        return self
+
+    def insert(self, values: Any, **options: Any) -> "QueryBuilder":
+        self.operation = "insert"
+        self.payload = values
+        return self
+
+    def upsert(self, values: Any, **options: Any) -> "QueryBuilder":
+        self.operation = "upsert"
+        self.payload = values
+        return self
+
+    def update(self, values: Dict[str, Any], **options: Any) -> "QueryBuilder":
+        self.operation = "update"
+        self.payload = values
+        return self
+
+    def delete(self, **options: Any) -> "QueryBuilder":
+        self.operation = "delete"
+        return self
+
+    # Filters
+
+    def _filter(self, column: str, value: Any, test: Callable[[Any, Any], bool]) -> "QueryBuilder":
+        def matches(row: Dict[str, Any]) -> bool:
+            stored, wanted = _comparable(row.get(column), value)
+            return stored is not None and wanted is not None and test(stored, wanted)
+
+        self.filters.append(matches)
+        return self
+
+    def eq(self, column: str, value: Any) -> "QueryBuilder":
+        if column in INDEXED_COLUMNS:
+            self.equalities.append((column, value))
+        return self._filter(column, value, lambda stored, wanted: stored == wanted)
+
+    def neq(self, column: str, value: Any) -> "QueryBuilder":
+        return self._filter(column, value, lambda stored, wanted: stored != wanted)
+
+    def gt(self, column: str, value: Any) -> "QueryBuilder":
+        return self._filter(column, value, lambda stored, wanted: stored > wanted)
+
+    def gte(self, column: str, value: Any) -> "QueryBuilder":
+        return self._filter(column, value, lambda stored, wanted: stored >= wanted)
+
+    def lt(self, column: str, value: Any) -> "QueryBuilder":
+        return self._filter(column, value, lambda stored, wanted: stored < wanted)
+
+    def lte(self, column: str, value: Any) -> "QueryBuilder":
+        return self._filter(column, value, lambda stored, wanted: stored <= wanted)
+
+    def in_(self, column: str, values: Iterable[Any]) -> "QueryBuilder":
+        values = list(values)
+        self.filters.append(lambda row: any(self._equal(row.get(column), value) for value in values))
+        return self
+
+    def is_(self, column: str, value: Any) -> "QueryBuilder":
+        if value in (None, "null"):
+            self.filters.append(lambda row: row.get(column) is None)
+        else:
+            self.filters.append(lambda row: self._equal(row.get(column), value))
+        return self
+
+    @staticmethod
+    def _equal(stored: Any, value: Any) -> bool:
+        stored, wanted = _comparable(stored, value)
+        return stored == wanted
+
+    # Shaping
+
+    def order(self, column: str, desc: bool = False, **options: Any) -> "QueryBuilder":
+        self.ordering.append((column, desc))
+        return self
+
+    def limit(self, size: int, **options: Any) -> "QueryBuilder":
+        self.row_limit = size
+        return self
+
+    def range(self, start: int, end: int, **options: Any) -> "QueryBuilder":
+        self.offset = start
+        self.row_limit = end - start + 1
+        return self
+
+    def single(self) -> "QueryBuilder":
+        self.single_row = True
+        return self
+
+    maybe_single = single
+
+    def _shape(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        if self.columns is None:
+            return copy.deepcopy(rows)
+        return [{column: copy.deepcopy(row.get(column)) for column in self.columns} for row in rows]
+
+    def execute(self) -> FakeResponse:
+        self.client.round_trip(self.table, self.operation)
+        store = self.client.store
+        with store.lock:
+            if self.operation in ("insert", "upsert"):
+                values = self.payload if isinstance(self.payload, list) else [self.payload]
+                return FakeResponse(copy.deepcopy(store.insert(self.table, values, upsert=self.operation == "upsert")))
+
+            candidates = store.rows(self.table)
+            if self.equalities:
+                # The smallest index bucket; the filters still decide
+                candidates = min((store.lookup(self.table, column, value) for column, value in self.equalities), key=len)
+            matched = [row for row in candidates if all(test(row) for test in self.filters)]
+            if self.operation == "update":
+                store.update(self.table, matched, self.payload)
+                return FakeResponse(copy.deepcopy(matched))
+            if self.operation == "delete":
+                store.delete(self.table, matched)
+                return FakeResponse(copy.deepcopy(matched))
+
+            for column, desc in reversed(self.ordering):
+                matched.sort(key=lambda row: (row.get(column) is None, row.get(column)), reverse=desc)
+            total = len(matched)
+            end = None if self.row_limit is None else self.offset + self.row_limit
+            data = self._shape(matched[self.offset:end])
+        if self.single_row:
+            return FakeResponse(data[0] if data else None)
+        return FakeResponse(data, total if self.count else None)
+
+
+class RpcCall:
+    def __init__(self, client: "FakeSupabase", name: str, params: Dict[str, Any]):
+        self.client = client
+        self.name = name
+        self.params = params
+
+    def execute(self) -> FakeResponse:
+        self.client.round_trip(self.name, "rpc")
+        function = self.client.functions.get(self.name)
+        if function is None:
+            raise RuntimeError(f"Could not find the function public.{self.name}")
+        with self.client.store.lock:
+            return FakeResponse(function(self.client.store, **self.params))
+
+
+def top_vendors(store: InMemoryStore, p_user_id, p_limit=10, p_sort="spend", p_project_id=None,
+                p_category=None, p_start=None, p_end=None) -> List[Dict[str, Any]]:
+    """The ``top_vendors`` SQL function over the store."""
+    categories = {row["id"]: row.get("category") for row in store.rows("forecast_line_items")}
+    groups: Dict[str, Dict[str, Any]] = {}
+    for row in store.rows("actual_expenses"):
+        if row.get("user_id") != p_user_id:
+            continue
+        if p_project_id is not None and row.get("project_id") != p_project_id:
+            continue
+        if p_category is not None and categories.get(row.get("forecast_line_item_id"), "Uncategorized") != p_category:
+            continue
+        day = str(row.get("date"))
+        if (p_start and day < p_start) or (p_end and day > p_end):
+            continue
+        key = row.get("vendor_key") or normalize_vendor(row.get("vendor"))
+        group = groups.setdefault(key, {"vendor_key": key, "names": Counter(), "total_cents": 0, "expense_count": 0})
+        group["names"][row.get("vendor")] += 1
+        group["total_cents"] += row.get("amount_spent_cents") or 0
+        group["expense_count"] += 1
+    grand_total = sum(group["total_cents"] for group in groups.values())
+    grand_count = sum(group["expense_count"] for group in groups.values())
+    measure = "expense_count" if p_sort == "count" else "total_cents"
+    ranked = sorted(groups.values(), key=lambda group: (-group[measure], group["vendor_key"] or ""))[:p_limit]
+    return [
+        {
+            "vendor_key": group["vendor_key"],
+            "vendor": group["names"].most_common(1)[0][0],
+            "total_cents": group["total_cents"],
+            "expense_count": group["expense_count"],
+            "grand_total_cents": grand_total,
+            "grand_count": grand_count,
+        }
+        for group in ranked
+    ]
+
+
+def change_watermark(store: InMemoryStore, p_user_id) -> int:
+    """The ``change_watermark`` SQL function over the store."""
+    return max(
+        (row["change_seq"] for table in TRACKED_TABLES + ("deleted_rows",) for row in store.lookup(table, "user_id", p_user_id)),
+        default=0,
+    )
+
+
+class AuthError(Exception):
+    """Token rejected, as the Supabase client raises for a bad JWT."""
+
+
+def _b64(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def _unb64(text: str) -> bytes:
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+class FakeAuth:
+    """
+    Local auth stand-in: issues HS256 JWTs and verifies them in ``get_user``.
+
+    Tokens carry the user id in ``sub`` like Supabase access tokens, so every
+    virtual user of a load test is its own principal.
+    """
+
+    def __init__(self, client: "FakeSupabase", secret: str):
+        self.client = client
+        self.secret = secret.encode()
+
+    def _sign(self, message: str) -> str:
+        return _b64(hmac.new(self.secret, message.encode(), hashlib.sha256).digest())
+
+    def issue_token(self, user_id: str, email: Optional[str] = None, expires_in: int = 3600) -> str:
+        header = _b64(json.dumps({"alg": "HS256", "typ": "JWT"}).encode())
+        claims = {
+            "sub": user_id,
+            "email": email or f"{user_id[:8]}@example.com",
+            "role": "authenticated",
+            "exp": int(time.time()) + expires_in,
+        }
+        message = f"{header}.{_b64(json.dumps(claims).encode())}"
+        return f"{message}.{self._sign(message)}"
+
+    def get_user(self, token: Optional[str] = None) -> SimpleNamespace:
+        self.client.round_trip("auth", "get_user")
+        try:
+            header, payload, signature = (token or "").split(".")
+            claims = json.loads(_unb64(payload))
+        except ValueError:
+            raise AuthError("Malformed token")
+        if not hmac.compare_digest(signature, self._sign(f"{header}.{payload}")):
+            raise AuthError("Invalid token signature")
+        if claims.get("exp", 0) < time.time():
+            raise AuthError("Token expired")
+        return SimpleNamespace(user=SimpleNamespace(id=claims["sub"], email=claims.get("email"), role=claims.get("role")))
+
+
+class FakeSupabase:
+    """Drop-in for the module-level ``supabase`` clients in benchmarks and tests."""
+
+    def __init__(
+        self,
+        store: Optional[InMemoryStore] = None,
+        latency_ms: float = 0.0,
+        jitter_ms: float = 0.0,
+        seed: Optional[int] = None,
+        secret: str = "benchmark-secret",
+    ):
+        self.store = store or InMemoryStore()
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.calls: Counter = Counter()
+        self.functions: Dict[str, Callable[..., Any]] = {
+            "top_vendors": top_vendors,
+            "change_watermark": change_watermark,
+        }
+        self._random = random.Random(seed)
+        self._calls_lock = threading.Lock()
+        self.auth = FakeAuth(self, secret)
+
+    def round_trip(self, target: str, operation: str) -> None:
+        """Count the call and wait out the injected latency."""
+        with self._calls_lock:
+            self.calls[(target, operation)] += 1
+        delay = self.latency_ms
+        if self.jitter_ms:
+            delay += self._random.uniform(0, self.jitter_ms)
+        if delay > 0:
+            time.sleep(delay / 1000.0)
+
+    def call_count(self) -> int:
+        with self._calls_lock:
+            return sum(self.calls.values())
+
+    def table(self, name: str) -> QueryBuilder:
+        return QueryBuilder(self, name)
+
+    from_ = table
+
+    def rpc(self, name: str, params: Optional[Dict[str, Any]] = None) -> RpcCall:
+        return RpcCall(self, name, params or {})
@@ -0,0 +1,313 @@
+"""
+Closed-loop load test with concurrent virtual users.
+
+Each virtual user is its own principal with its own generated projects
+(``benchmarks.dataset``). It repeatedly picks a journey from the weighted
+mix, runs it, then idles for an exponentially distributed think time:
+
+- ``project_view``: the project page, fetching the project, its forecast
+  items and its expenses at once, like the frontend
+- ``receipt_entry``: pick a line item, post an expense, refresh the list
+- ``site_walk``: read a few line items and PATCH their progress with
+  ``If-Match``, as on a walk around the site
+
+Tokens are minted by the local auth stand-in (``FakeAuth``); nothing talks
+to a real Supabase project. By default the app runs in this process on one
+event loop, which is one worker's worth of capacity:
+
+    python -m benchmarks.load --users 50 --duration 30 --think-time 1
+    python -m benchmarks.load --mix project_view=1 --latency-ms 20
+
+To measure several workers, serve the same stand-in over HTTP and point the
+runner at it (both sides generate the same users and share LOAD_AUTH_SECRET):
+
+    LOAD_USERS=200 uvicorn benchmarks.serve:app --workers 4 --port 8000
+    python -m benchmarks.load --url http://localhost:8000 --users 200
+
+The report gives throughput and latency percentiles per request and per
+journey, and the mean number of requests in flight (throughput times mean
+latency), which is the concurrency a deployment has to absorb at that load.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import sys
+import time
+import uuid
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import httpx
+
+from .dataset import generate, load_store, user_id
+from .fake_supabase import FakeAuth, FakeSupabase, InMemoryStore
+from .run import install, percentile
+
+LOAD_AUTH_SECRET = os.getenv("LOAD_AUTH_SECRET", "benchmark-secret")
+
+DEFAULT_MIX = "project_view=6,receipt_entry=3,site_walk=1"
+
+
+def prepare(store: InMemoryStore, users: int, projects: int = 3, seed: int = 0) -> List[Dict[int, List[int]]]:
+    """Load a generated portfolio of ``projects`` projects per user; each user's item ids per project id."""
+    dataset = generate(users, projects, seed=seed)
+    load_store(store, dataset)
+    return dataset.portfolios()
+
+
+class Recorder:
+    """Latency and status samples, by request name and by journey."""
+
+    def __init__(self):
+        self.requests: Dict[str, List[float]] = defaultdict(list)
+        self.request_errors: Dict[str, int] = defaultdict(int)
+        self.journeys: Dict[str, List[float]] = defaultdict(list)
+        self.journey_errors: Dict[str, int] = defaultdict(int)
+        self.statuses: Dict[int, int] = defaultdict(int)
+
+
+@dataclass
+class VirtualUser:
+    client: httpx.AsyncClient
+    recorder: Recorder
+    token: str
+    portfolio: Dict[int, List[int]]
+    rng: random.Random
+    failed: bool = field(default=False)
+
+    async def request(self, name: str, method: str, url: str, **options: Any) -> httpx.Response:
+        headers = {"Authorization": f"Bearer {self.token}", **options.pop("headers", {})}
+        start = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, headers=headers, **options)
+        except httpx.HTTPError:
+            self.recorder.requests[name].append(time.perf_counter() - start)
+            self.recorder.request_errors[name] += 1
+            self.failed = True
+            raise
+        self.recorder.requests[name].append(time.perf_counter() - start)
+        self.recorder.statuses[response.status_code] += 1
+        if response.status_code >= 400:
+            self.recorder.request_errors[name] += 1
+            self.failed = True
+        return response
+
+    def project(self) -> int:
+        return self.rng.choice(list(self.portfolio))
+
+
+async def project_view(user: VirtualUser) -> None:
+    project_id = user.project()
+    await asyncio.gather(
+        user.request("GET /projects/{id}", "GET", f"/api/v1/projects/{project_id}"),
+        user.request("GET /forecast-items/", "GET", "/api/v1/forecast-items/", params={"project_id": project_id}),
+        user.request("GET /expenses/", "GET", "/api/v1/expenses/", params={"project_id": project_id}),
+    )
+
+
+async def receipt_entry(user: VirtualUser) -> None:
+    project_id = user.project()
+    items = await user.request("GET /forecast-items/", "GET", "/api/v1/forecast-items/", params={"project_id": project_id})
+    item_ids = [item["id"] for item in items.json()] if items.status_code == 200 else []
+    expense = {
+        "project_id": project_id,
+        "forecast_line_item_id": user.rng.choice(item_ids) if item_ids else None,
+        "vendor": user.rng.choice(("Home Depot", "Lowe's", "ABC Supply", "Ferguson")),
+        "amount_spent": f"{user.rng.uniform(20, 2500):.2f}",
+        "date": (date(2024, 6, 1) + timedelta(days=user.rng.randrange(180))).isoformat(),
+    }
+    await user.request(
+        "POST /expenses/", "POST", "/api/v1/expenses/", json=expense, headers={"Idempotency-Key": str(uuid.uuid4())}
+    )
+    await user.request("GET /expenses/", "GET", "/api/v1/expenses/", params={"project_id": project_id})
+
+
+async def site_walk(user: VirtualUser, stops: int = 3) -> None:
+    items = user.portfolio[user.project()]
+    for item_id in user.rng.sample(items, min(stops, len(items))):
+        item = await user.request("GET /forecast-items/{id}", "GET", f"/api/v1/forecast-items/{item_id}")
+        if item.status_code != 200:
+            continue
+        progress = min(100, item.json()["progress_percent"] + user.rng.randint(1, 5))
+        await user.request(
+            "PATCH /forecast-items/{id}", "PATCH", f"/api/v1/forecast-items/{item_id}",
+            json={"progress_percent": progress},
+            headers={"If-Match": item.headers.get("ETag", "*")},
+        )
+
+
+JOURNEYS: Dict[str, Callable[[VirtualUser], Awaitable[None]]] = {
+    "project_view": project_view,
+    "receipt_entry": receipt_entry,
+    "site_walk": site_walk,
+}
+
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    """``"project_view=6,receipt_entry=3"`` as weights by journey name."""
+    weights = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in JOURNEYS:
+            raise ValueError(f"Unknown journey {name!r}; choose from {', '.join(JOURNEYS)}")
+        weights[name] = float(weight or 1)
+    if not any(weights.values()):
+        raise ValueError("The mix needs at least one journey with a positive weight")
+    return weights
+
+
+async def run_load(
+    client: httpx.AsyncClient,
+    tokens: List[str],
+    portfolios: List[Dict[int, List[int]]],
+    mix: Dict[str, float],
+    duration: float,
+    think_time: float = 1.0,
+    ramp_up: float = 0.0,
+    seed: Optional[int] = None,
+) -> Dict[str, Any]:
+    """Run one virtual user per token for ``duration`` seconds; the report."""
+    recorder = Recorder()
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    started = time.perf_counter()
+    deadline = started + ramp_up + duration
+
+    async def virtual_user(number: int) -> None:
+        rng = random.Random(None if seed is None else seed * 100_003 + number)
+        user = VirtualUser(client, recorder, tokens[number], portfolios[number], rng)
+        await asyncio.sleep(ramp_up * number / len(tokens))
+        while time.perf_counter() < deadline:
+            name = rng.choices(names, weights)[0]
+            user.failed = False
+            journey_start = time.perf_counter()
+            try:
+                await JOURNEYS[name](user)
+            except httpx.HTTPError:
+                pass
+            recorder.journeys[name].append(time.perf_counter() - journey_start)
+            if user.failed:
+                recorder.journey_errors[name] += 1
+            if think_time > 0:
+                await asyncio.sleep(rng.expovariate(1 / think_time))
+
+    await asyncio.gather(*(virtual_user(number) for number in range(len(tokens))))
+    return report(recorder, time.perf_counter() - started, len(tokens))
+
+
+def _summary(samples: List[float], errors: int, elapsed: float) -> Dict[str, Any]:
+    milliseconds = [sample * 1000 for sample in samples]
+    return {
+        "count": len(samples),
+        "errors": errors,
+        "per_second": round(len(samples) / elapsed, 1),
+        "mean_ms": round(statistics.fmean(milliseconds), 2),
+        "p50_ms": round(percentile(milliseconds, 0.50), 2),
+        "p95_ms": round(percentile(milliseconds, 0.95), 2),
+        "p99_ms": round(percentile(milliseconds, 0.99), 2),
+        "max_ms": round(max(milliseconds), 2),
+    }
+
+
+def report(recorder: Recorder, elapsed: float, users: int) -> Dict[str, Any]:
+    samples = [sample for values in recorder.requests.values() for sample in values]
+    total = len(samples)
+    throughput = total / elapsed if elapsed else 0.0
+    mean_latency = statistics.fmean(samples) if samples else 0.0
+    return {
+        "users": users,
+        "elapsed_s": round(elapsed, 2),
+        "requests": total,
+        "errors": sum(recorder.request_errors.values()),
+        "throughput_rps": round(throughput, 1),
+        # Little's law: requests in flight = arrival rate x time in system
+        "mean_in_flight": round(throughput * mean_latency, 2),
+        "statuses": {str(code): count for code, count in sorted(recorder.statuses.items())},
+        "requests_by_name": {
+            name: _summary(values, recorder.request_errors[name], elapsed) for name, values in sorted(recorder.requests.items())
+        },
+        "journeys": {
+            name: _summary(values, recorder.journey_errors[name], elapsed) for name, values in sorted(recorder.journeys.items())
+        },
+    }
+
+
+def format_report(result: Dict[str, Any]) -> str:
+    lines = [
+        f"{result['users']} users for {result['elapsed_s']}s: {result['requests']} requests, "
+        f"{result['errors']} errors, {result['throughput_rps']} req/s, "
+        f"{result['mean_in_flight']} requests in flight on average",
+        f"statuses: {result['statuses']}",
+        "",
+    ]
+    header = f"{'':30} {'count':>7} {'errors':>6} {'per s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}"
+    for title, rows in (("request", result["requests_by_name"]), ("journey", result["journeys"])):
+        lines += [f"{title:30}" + header[30:], "-" * len(header)]
+        for name, row in rows.items():
+            lines.append(
+                f"{name:30} {row['count']:>7} {row['errors']:>6} {row['per_second']:>8.1f} {row['p50_ms']:>8.2f} "
+                f"{row['p95_ms']:>8.2f} {row['p99_ms']:>8.2f} {row['max_ms']:>8.2f}"
+            )
+        lines.append("")
+    return "\n".join(lines)
+
+
+async def main_async(args: argparse.Namespace) -> Dict[str, Any]:
+    mix = parse_mix(args.mix)
+    store = InMemoryStore()
+    portfolios = prepare(store, args.users, args.projects, args.dataset_seed)
+
+    if args.url:
+        # The server seeded the same users; only the tokens are needed here
+        auth = FakeAuth(None, LOAD_AUTH_SECRET)
+        limits = httpx.Limits(max_connections=args.users, max_keepalive_connections=args.users)
+        client = httpx.AsyncClient(base_url=args.url, limits=limits, timeout=args.timeout)
+    else:
+        import main
+
+        fake = FakeSupabase(store, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, seed=args.seed, secret=LOAD_AUTH_SECRET)
+        install(fake)
+        auth = fake.auth
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://load", timeout=args.timeout)
+
+    tokens = [auth.issue_token(user_id(number), expires_in=int(args.ramp_up + args.duration) + 3600) for number in range(args.users)]
+    async with client:
+        return await run_load(client, tokens, portfolios, mix, args.duration, args.think_time, args.ramp_up, args.seed)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Closed-loop load test with concurrent virtual users")
+    parser.add_argument("-u", "--users", type=int, default=20, help="concurrent virtual users")
+    parser.add_argument("-d", "--duration", type=float, default=30.0, help="seconds of load after ramp-up")
+    parser.add_argument("--ramp-up", type=float, default=0.0, help="seconds over which users start")
+    parser.add_argument("--think-time", type=float, default=1.0, help="mean seconds between a user's journeys (0 for none)")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"journey weights (default {DEFAULT_MIX})")
+    parser.add_argument("--projects", type=int, default=3, help="projects generated per user")
+    parser.add_argument("--dataset-seed", type=int, default=0, help="seed of the generated portfolio (benchmarks.dataset)")
+    parser.add_argument("--url", help="load a running server (benchmarks.serve) instead of the app in this process")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="in-process: injected latency per Supabase call")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="in-process: random extra latency per call, up to this")
+    parser.add_argument("--timeout", type=float, default=30.0, help="seconds before a request fails")
+    parser.add_argument("--seed", type=int, help="seed for journey choice, think times and request bodies")
+    parser.add_argument("--json", type=Path, help="also write the report to this file")
+    args = parser.parse_args(argv)
+
+    try:
+        result = asyncio.run(main_async(args))
+    except ValueError as e:
+        parser.error(str(e))
+    print(format_report(result))
+    if args.json:
+        args.json.write_text(json.dumps(result, indent=2) + "\n")
+    return 1 if result["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
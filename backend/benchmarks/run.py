@@ -0,0 +1,274 @@
+"""
+Endpoint benchmarks against an in-memory Supabase stand-in.
+
+Drives the full application (middleware included) through an in-process
+ASGI client, with the Supabase client of every endpoint module replaced by
+``FakeSupabase``. What is measured is the API's own overhead plus the
+injected upstream latency, per scenario: throughput, latency percentiles,
+and how many Supabase calls and SQL statements each request makes.
+
+    python -m benchmarks.run                      # run and compare with the baseline
+    python -m benchmarks.run --update-baseline    # record a new baseline
+    python -m benchmarks.run -k expenses --latency-ms 5 --concurrency 8
+    python -m benchmarks.run --dataset-users 20    # against a generated portfolio
+
+A scenario regresses when its status code changes, when it makes more
+upstream calls per request than the baseline, or when its median or p95
+latency grows past ``--tolerance`` (and by at least ``--min-delta-ms``, so
+sub-millisecond noise doesn't fail the run; p95 gets twice both).
+Latencies are only compared when the run used the baseline's concurrency,
+injected latency and dataset, and only mean something on the machine that
+recorded them; call counts are exact everywhere. The exit status is 1 on
+any regression.
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import httpx
+
+from .dataset import generate, load_store
+from .fake_supabase import FakeSupabase, InMemoryStore
+from .scenarios import BENCH_USER_ID, SCENARIOS, Scenario, seed
+
+BASELINE_PATH = Path(__file__).resolve().parent / "baseline.json"
+
+
+def install(fake: FakeSupabase) -> Dict[Any, Any]:
+    """Point every module-level ``supabase`` client of the app at ``fake``; the replaced clients by module."""
+    import importlib
+    import pkgutil
+
+    import api.core.auth
+    import api.endpoints
+
+    modules = [api.core.auth] + [
+        importlib.import_module(f"api.endpoints.{info.name}") for info in pkgutil.iter_modules(api.endpoints.__path__)
+    ]
+    replaced = {}
+    for module in modules:
+        if hasattr(module, "supabase"):
+            replaced[module] = module.supabase
+            module.supabase = fake
+    return replaced
+
+
+class StatementCounter:
+    """Counts SQL statements on the app's engine."""
+
+    def __init__(self, engine):
+        from sqlalchemy import event
+
+        self.count = 0
+        event.listen(engine, "before_cursor_execute", self._count)
+
+    def _count(self, *args: Any) -> None:
+        self.count += 1
+
+
+def percentile(samples: List[float], fraction: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def run_scenario(
+    app,
+    fake: FakeSupabase,
+    statements: StatementCounter,
+    scenario: Scenario,
+    headers: Dict[str, str],
+    requests: int,
+    concurrency: int,
+    warmup: int,
+    populate: Callable[[InMemoryStore], Any] = seed,
+    dataset: str = "seed",
+) -> Dict[str, Any]:
+    store = InMemoryStore()
+    populate(store)
+    if scenario.setup is not None:
+        scenario.setup(store, warmup + requests)
+    fake.store = store
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+
+        async def send(index: int):
+            start = time.perf_counter()
+            response = await client.request(
+                scenario.method,
+                scenario.resolve(scenario.path, index),
+                json=scenario.resolve(scenario.body, index),
+                headers={**headers, **scenario.headers},
+            )
+            return time.perf_counter() - start, response.status_code
+
+        for index in range(warmup):
+            await send(index)
+
+        calls_before = fake.call_count()
+        statements_before = statements.count
+        latencies: List[float] = []
+        statuses: Dict[int, int] = {}
+        next_index = iter(range(warmup, warmup + requests))
+
+        async def worker() -> None:
+            for index in next_index:
+                latency, status_code = await send(index)
+                latencies.append(latency)
+                statuses[status_code] = statuses.get(status_code, 0) + 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    milliseconds = [latency * 1000 for latency in latencies]
+    return {
+        "settings": {
+            "concurrency": concurrency, "latency_ms": fake.latency_ms, "jitter_ms": fake.jitter_ms, "dataset": dataset,
+        },
+        "requests": requests,
+        "status": max(statuses, key=statuses.get),
+        "unexpected_statuses": {str(code): count for code, count in statuses.items() if code != scenario.expected_status},
+        "throughput_rps": round(requests / elapsed, 1),
+        "mean_ms": round(statistics.fmean(milliseconds), 3),
+        "p50_ms": round(percentile(milliseconds, 0.50), 3),
+        "p95_ms": round(percentile(milliseconds, 0.95), 3),
+        "p99_ms": round(percentile(milliseconds, 0.99), 3),
+        "supabase_calls_per_request": round((fake.call_count() - calls_before) / requests, 2),
+        "sql_statements_per_request": round((statements.count - statements_before) / requests, 2),
+    }
+
+
+async def run(
+    names: Optional[str] = None,
+    requests: int = 100,
+    concurrency: int = 1,
+    warmup: int = 5,
+    latency_ms: float = 0.0,
+    jitter_ms: float = 0.0,
+    dataset_users: int = 0,
+    dataset_projects: int = 20,
+) -> Dict[str, Dict[str, Any]]:
+    import main
+    from api.core.database import engine
+
+    fake = FakeSupabase(latency_ms=latency_ms, jitter_ms=jitter_ms, seed=0)
+    install(fake)
+    headers = {"Authorization": f"Bearer {fake.auth.issue_token(BENCH_USER_ID)}"}
+    statements = StatementCounter(engine)
+    populate, dataset = seed, "seed"
+    if dataset_users:
+        # Generated once; every scenario gets a fresh copy of the same portfolio
+        generated = generate(dataset_users, dataset_projects)
+        populate, dataset = (lambda store: load_store(store, generated)), f"{dataset_users}x{dataset_projects}"
+
+    results = {}
+    for scenario in SCENARIOS:
+        if names and not any(name in scenario.name for name in names.split(",")):
+            continue
+        results[scenario.name] = await run_scenario(
+            main.app, fake, statements, scenario, headers, requests, concurrency, warmup, populate, dataset
+        )
+    return results
+
+
+def compare(
+    results: Dict[str, Dict[str, Any]],
+    baseline: Dict[str, Dict[str, Any]],
+    tolerance: float = 0.25,
+    min_delta_ms: float = 2.0,
+) -> List[str]:
+    """Regressions of ``results`` against ``baseline``, as messages."""
+    regressions = []
+    for name, result in results.items():
+        expected = baseline.get(name)
+        if expected is None:
+            continue
+        if result["status"] != expected["status"]:
+            regressions.append(f"{name}: status {result['status']} (baseline {expected['status']})")
+        settings = expected.get("settings", {})
+        # Paging makes call counts depend on the data
+        if result["settings"].get("dataset") != settings.get("dataset", "seed"):
+            continue
+        for metric in ("supabase_calls_per_request", "sql_statements_per_request"):
+            if result[metric] > expected[metric]:
+                regressions.append(f"{name}: {metric} {result[metric]} (baseline {expected[metric]})")
+        # Latencies under other settings say nothing about this run
+        if result["settings"] != settings:
+            continue
+        # The tail of a hundred samples is noisier than the median: double allowance
+        for metric, allowance in (("p50_ms", 1), ("p95_ms", 2)):
+            limit = max(expected[metric] * (1 + allowance * tolerance), expected[metric] + allowance * min_delta_ms)
+            if result[metric] > limit:
+                regressions.append(f"{name}: {metric} {result[metric]:.2f} (baseline {expected[metric]:.2f}, limit {limit:.2f})")
+    return regressions
+
+
+def format_table(results: Dict[str, Dict[str, Any]]) -> str:
+    header = f"{'scenario':32} {'status':>6} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'calls':>6} {'sql':>5}"
+    lines = [header, "-" * len(header)]
+    for name, result in results.items():
+        lines.append(
+            f"{name:32} {result['status']:>6} {result['throughput_rps']:>9.1f} {result['p50_ms']:>8.2f} "
+            f"{result['p95_ms']:>8.2f} {result['p99_ms']:>8.2f} {result['supabase_calls_per_request']:>6.2f} "
+            f"{result['sql_statements_per_request']:>5.2f}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark every endpoint against an in-memory Supabase")
+    parser.add_argument("-k", "--scenarios", help="comma separated substrings of scenario names to run")
+    parser.add_argument("-n", "--requests", type=int, default=100, help="measured requests per scenario")
+    parser.add_argument("-c", "--concurrency", type=int, default=1, help="requests in flight at once")
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="injected latency per Supabase call")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="random extra latency per call, up to this")
+    parser.add_argument("--dataset-users", type=int, default=0, help="run against a generated portfolio of this many users")
+    parser.add_argument("--dataset-projects", type=int, default=20, help="projects per generated user")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--update-baseline", action="store_true", help="write the results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative latency growth")
+    parser.add_argument("--min-delta-ms", type=float, default=2.0, help="latency growth always allowed")
+    parser.add_argument("--json", type=Path, help="also write the results to this file")
+    args = parser.parse_args(argv)
+
+    results = asyncio.run(run(
+        args.scenarios, args.requests, args.concurrency, args.warmup, args.latency_ms, args.jitter_ms,
+        args.dataset_users, args.dataset_projects,
+    ))
+    print(format_table(results))
+    for name, result in results.items():
+        if result["unexpected_statuses"]:
+            print(f"warning: {name} answered {result['unexpected_statuses']}")
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2) + "\n")
+
+    if args.update_baseline:
+        baseline = json.loads(args.baseline.read_text()) if args.baseline.exists() else {}
+        # A baseline of a server error would make fixing it a regression
+        failing = [name for name, result in results.items() if result["status"] >= 500]
+        for name in failing:
+            print(f"warning: not recording {name} in the baseline (status {results[name]['status']})")
+        baseline.update({name: result for name, result in results.items() if name not in failing})
+        args.baseline.write_text(json.dumps(baseline, indent=2, sort_keys=True) + "\n")
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    if not args.baseline.exists():
+        print(f"No baseline at {args.baseline}; run with --update-baseline to record one")
+        return 0
+    regressions = compare(results, json.loads(args.baseline.read_text()), args.tolerance, args.min_delta_ms)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
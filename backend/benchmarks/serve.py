@@ -0,0 +1,37 @@
+"""
+The app served against the in-memory Supabase stand-in, for load over HTTP.
+
+    LOAD_USERS=200 uvicorn benchmarks.serve:app --workers 4 --port 8000
+    python -m benchmarks.load --url http://localhost:8000 --users 200
+
+Every worker loads the same generated ``LOAD_USERS`` users (``LOAD_PROJECTS``
+and ``LOAD_DATASET_SEED`` matching the runner's ``--projects`` and
+``--dataset-seed``) into its own store and accepts tokens
+signed with ``LOAD_AUTH_SECRET``. Writes stay in the worker that handled
+them, so with several workers a site walk's PATCH now and then lands on a
+worker holding another version of the item and gets a 412. ``LOAD_LATENCY_MS``
+and ``LOAD_JITTER_MS`` inject latency per Supabase call.
+"""
+import os
+
+from .fake_supabase import FakeSupabase, InMemoryStore
+from .load import LOAD_AUTH_SECRET, prepare
+from .run import install
+
+import main  # after the benchmarks package has set the environment
+
+store = InMemoryStore()
+prepare(
+    store,
+    int(os.getenv("LOAD_USERS", "20")),
+    int(os.getenv("LOAD_PROJECTS", "3")),
+    int(os.getenv("LOAD_DATASET_SEED", "0")),
+)
+install(FakeSupabase(
+    store,
+    latency_ms=float(os.getenv("LOAD_LATENCY_MS", "0")),
+    jitter_ms=float(os.getenv("LOAD_JITTER_MS", "0")),
+    secret=LOAD_AUTH_SECRET,
+))
+
+app = main.app
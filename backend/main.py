@@ -6,7 +6,6 @@ from fastapi.staticfiles import StaticFiles
 from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy import text
 from typing import Generator
 import logging
 
@@ -25,9 +24,23 @@ missing_vars = [var for var in required_vars if not os.getenv(var)]
 if missing_vars:
     raise ValueError(f"Missing required environment variables: {', '.join(missing_vars)}")
 
+# Structured logging through a background writer, for every module
+from api.core.logs import setup_logging
+setup_logging()
+
 # Import database and models
 from api.core.database import engine, Base, get_db
 from api.models import *  # Import all models to ensure they're registered with SQLAlchemy
+from api.core.compression import CompressionMiddleware, compression_stats
+from api.analytics.risk import shutdown_process_pool
+from api.core.events import broker as event_broker
+from api.core.idempotency import IdempotencyMiddleware, IdempotentReplay, replay_response
+from api.core.metrics import MetricsMiddleware, mark_worker_dead, metrics_response
+from api.core.supabase import supabase
+from api.core.tracing import TracingMiddleware, instrument_engine, instrument_supabase, shutdown_exporter
+from api.core.profiling import ProfilingMiddleware
+from api.core.slowlog import SlowRequestMiddleware
+from api.core.health import create_monitor
 
 # Create database tables
 Base.metadata.create_all(bind=engine)
@@ -49,6 +62,34 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Stores responses of creates sent with an Idempotency-Key (inside
+# compression, so the uncompressed body is what gets replayed)
+app.add_middleware(IdempotencyMiddleware)
+app.add_exception_handler(IdempotentReplay, replay_response)
+
+# Response compression (gzip/brotli) for large list payloads
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=int(os.getenv('COMPRESSION_MIN_SIZE', '1024')),
+    gzip_level=int(os.getenv('COMPRESSION_GZIP_LEVEL', '6')),
+    brotli_quality=int(os.getenv('COMPRESSION_BROTLI_QUALITY', '4')),
+)
+
+# Per-route request counts, latency histograms and in-flight gauges
+app.add_middleware(MetricsMiddleware)
+
+# Log requests over SLOW_REQUEST_MS and calls over SLOW_QUERY_MS (inside
+# tracing, so the log has the request's upstream call breakdown)
+app.add_middleware(SlowRequestMiddleware)
+
+# Time every Supabase and SQL call per request (Server-Timing header)
+instrument_supabase(supabase)
+instrument_engine(engine)
+app.add_middleware(TracingMiddleware)
+
+# Opt-in per-request profiles (PROFILING_TOKEN header or PROFILING_SAMPLE_RATE)
+app.add_middleware(ProfilingMiddleware)
+
 # Include API routers
 from api.api import api_router
 app.include_router(api_router, prefix="/api/v1")
@@ -59,7 +100,7 @@ async def error_middleware(request: Request, call_next):
     try:
         return await call_next(request)
     except SQLAlchemyError as e:
-        logging.error(f"Database error: {str(e)}")
+        logging.error("Database error: %s", e)
         return JSONResponse(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
             content={"detail": "Database error occurred"}
@@ -67,31 +108,86 @@ async def error_middleware(request: Request, call_next):
     except HTTPException:
         raise
     except Exception as e:
-        logging.error(f"Unexpected error: {str(e)}")
+        logging.error("Unexpected error: %s", e)
         return JSONResponse(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             content={"detail": "An unexpected error occurred"}
         )
 
+# Dependency probes run in the background; the health endpoints read their results
+health_monitor = create_monitor(engine)
+
+@app.get("/livez")
+async def liveness():
+    """The process is up and serving requests (no dependency checks)."""
+    return {"status": "alive"}
+
+@app.get("/readyz")
+async def readiness():
+    """Cached database and Supabase probe results; 503 until all pass."""
+    report = health_monitor.readiness()
+    return JSONResponse(
+        status_code=status.HTTP_200_OK if report["status"] == "ready" else status.HTTP_503_SERVICE_UNAVAILABLE,
+        content=report
+    )
+
 # Health check endpoint
 @app.get("/health")
 async def health_check():
-    try:
-        # Test database connection
-        with engine.connect() as conn:
-            result = conn.execute(text("SELECT 1"))
-            result.fetchone()
-        db_status = "connected"
-    except Exception as e:
-        logging.error(f"Database connection check failed: {str(e)}")
-        db_status = "disconnected"
-        
+    database = health_monitor.readiness()["checks"]["database"]
+    db_status = "connected" if database["ok"] else "disconnected"
+
     return {
         "status": "healthy" if db_status == "connected" else "degraded",
         "environment": env,
         "database": db_status
     }
 
+# Prometheus metrics endpoint
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics():
+    """Request metrics in the Prometheus text format (summed over workers)."""
+    return metrics_response()
+
+# Compression metrics endpoint
+@app.get("/metrics/compression")
+async def compression_metrics():
+    """Bytes sent before and after response compression since startup."""
+    return compression_stats.snapshot()
+
+# Project event fan-out (starts the LISTEN thread on the Postgres backend)
+@app.on_event("startup")
+def start_event_broker():
+    event_broker.start()
+
+@app.on_event("shutdown")
+def stop_event_broker():
+    event_broker.close()
+
+# Background health probes
+@app.on_event("startup")
+def start_health_probes():
+    health_monitor.start()
+
+@app.on_event("shutdown")
+def stop_health_probes():
+    health_monitor.close()
+
+# Drop this worker's live gauges from the shared metrics directory
+@app.on_event("shutdown")
+def release_worker_metrics():
+    mark_worker_dead()
+
+# Flush exported request traces
+@app.on_event("shutdown")
+def stop_trace_exporter():
+    shutdown_exporter()
+
+# Stop the Monte Carlo simulation workers with the app
+@app.on_event("shutdown")
+def stop_simulation_workers():
+    shutdown_process_pool()
+
 # Root endpoint
 @app.get("/")
 async def root():
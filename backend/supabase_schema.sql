@@ -4,10 +4,23 @@
 -- Note: auth.users table already has RLS enabled by Supabase
 
 -- Drop existing tables (in correct order due to foreign key constraints)
+DROP TABLE IF EXISTS idempotency_keys CASCADE;
+DROP TABLE IF EXISTS sync_mutations CASCADE;
+DROP TABLE IF EXISTS deleted_rows CASCADE;
+DROP TABLE IF EXISTS cost_benchmarks CASCADE;
+DROP TABLE IF EXISTS expense_daily_rollups CASCADE;
 DROP TABLE IF EXISTS draw_tracker CASCADE;
 DROP TABLE IF EXISTS actual_expenses CASCADE;
 DROP TABLE IF EXISTS forecast_line_items CASCADE;
 DROP TABLE IF EXISTS projects CASCADE;
+DROP SEQUENCE IF EXISTS change_seq;
+
+-- Global change counter for the delta sync feed (GET /api/v1/changes).
+-- Every insert and update of a synced row takes the next value, as does
+-- every tombstone, so one cursor orders changes across all tables. Values
+-- are taken by next_change_seq() under a per-user lock held to commit, so a
+-- user's changes become visible in sequence order (see below).
+CREATE SEQUENCE IF NOT EXISTS change_seq;
 
 -- Projects table
 CREATE TABLE IF NOT EXISTS projects (
@@ -19,8 +32,10 @@ CREATE TABLE IF NOT EXISTS projects (
     target_completion_date DATE,
     status VARCHAR DEFAULT 'not_started' CHECK (status IN ('not_started', 'in_progress', 'completed')),
     total_sqft INTEGER,
+    total_budget_cents BIGINT,  -- money is stored as integer cents
     created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
-    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    change_seq BIGINT NOT NULL  -- set by assign_change_seq()
 );
 
 -- Forecast line items table
@@ -29,14 +44,17 @@ CREATE TABLE IF NOT EXISTS forecast_line_items (
     user_id UUID NOT NULL REFERENCES auth.users(id) ON DELETE CASCADE,
     project_id INTEGER NOT NULL REFERENCES projects(id) ON DELETE CASCADE,
     category VARCHAR NOT NULL,
-    estimated_cost DECIMAL(10,2) NOT NULL,
-    actual_cost DECIMAL(10,2) DEFAULT 0.00,
+    estimated_cost_cents BIGINT NOT NULL,
+    actual_cost_cents BIGINT DEFAULT 0,
     unit VARCHAR,
     notes TEXT,
     progress_percent INTEGER DEFAULT 0 CHECK (progress_percent >= 0 AND progress_percent <= 100),
     status VARCHAR DEFAULT 'Not Started' CHECK (status IN ('Not Started', 'In Progress', 'Complete')),
+    client_id UUID,  -- id generated by an offline client, see POST /api/v1/sync
+    version INTEGER NOT NULL DEFAULT 1,
     created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
-    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    change_seq BIGINT NOT NULL  -- set by assign_change_seq()
 );
 
 -- Actual expenses table
@@ -46,11 +64,15 @@ CREATE TABLE IF NOT EXISTS actual_expenses (
     project_id INTEGER NOT NULL REFERENCES projects(id) ON DELETE CASCADE,
     forecast_line_item_id INTEGER REFERENCES forecast_line_items(id) ON DELETE SET NULL,
     vendor VARCHAR,
-    amount_spent DECIMAL(10,2) NOT NULL,
+    vendor_key VARCHAR,  -- normalized vendor name, see normalize_vendor()
+    amount_spent_cents BIGINT NOT NULL,
     date DATE,
     receipt_url VARCHAR,
+    client_id UUID,  -- id generated by an offline client, see POST /api/v1/sync
+    version INTEGER NOT NULL DEFAULT 1,
     created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
-    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    change_seq BIGINT NOT NULL  -- set by assign_change_seq()
 );
 
 -- Draw tracker table
@@ -58,12 +80,77 @@ CREATE TABLE IF NOT EXISTS draw_tracker (
     id SERIAL PRIMARY KEY,
     user_id UUID NOT NULL REFERENCES auth.users(id) ON DELETE CASCADE,
     project_id INTEGER NOT NULL REFERENCES projects(id) ON DELETE CASCADE,
-    cash_on_hand DECIMAL(10,2) NOT NULL,
+    cash_on_hand_cents BIGINT NOT NULL,
     last_draw_date DATE,
     draw_triggered BOOLEAN DEFAULT FALSE,
     notes TEXT,
+    version INTEGER NOT NULL DEFAULT 1,
     created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
-    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    change_seq BIGINT NOT NULL  -- set by assign_change_seq()
+);
+
+-- Daily spend rollups (maintained by triggers on actual_expenses)
+CREATE TABLE IF NOT EXISTS expense_daily_rollups (
+    user_id UUID NOT NULL REFERENCES auth.users(id) ON DELETE CASCADE,
+    project_id INTEGER NOT NULL REFERENCES projects(id) ON DELETE CASCADE,
+    category VARCHAR NOT NULL,
+    vendor VARCHAR NOT NULL,
+    day DATE NOT NULL,
+    amount_cents BIGINT NOT NULL DEFAULT 0,
+    expense_count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (user_id, project_id, day, category, vendor)
+);
+
+-- Cost per square foot benchmark bands per category, refreshed from
+-- completed projects by POST /api/v1/analytics/benchmarks/refresh
+CREATE TABLE IF NOT EXISTS cost_benchmarks (
+    user_id UUID NOT NULL REFERENCES auth.users(id) ON DELETE CASCADE,
+    category VARCHAR NOT NULL,
+    sample_count INTEGER NOT NULL,
+    p10_cents BIGINT NOT NULL,  -- cents per square foot
+    p25_cents BIGINT NOT NULL,
+    p50_cents BIGINT NOT NULL,
+    p75_cents BIGINT NOT NULL,
+    p90_cents BIGINT NOT NULL,
+    refreshed_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    PRIMARY KEY (user_id, category)
+);
+
+-- Tombstones for deleted rows, so delta sync clients learn about deletes
+CREATE TABLE IF NOT EXISTS deleted_rows (
+    change_seq BIGINT PRIMARY KEY,  -- set by assign_change_seq()
+    user_id UUID NOT NULL REFERENCES auth.users(id) ON DELETE CASCADE,
+    table_name VARCHAR NOT NULL,
+    row_id INTEGER NOT NULL,
+    project_id INTEGER,
+    deleted_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+-- Offline mutations already applied by POST /api/v1/sync, so a batch
+-- replayed after a dropped connection is not applied twice
+CREATE TABLE IF NOT EXISTS sync_mutations (
+    user_id UUID NOT NULL REFERENCES auth.users(id) ON DELETE CASCADE,
+    mutation_id UUID NOT NULL,
+    entity VARCHAR NOT NULL,
+    row_id INTEGER,
+    applied_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    PRIMARY KEY (user_id, mutation_id)
+);
+
+-- Responses of creates sent with an Idempotency-Key header, replayed to
+-- retries (IDEMPOTENCY_BACKEND=table). Expired keys can be purged with
+-- DELETE FROM idempotency_keys WHERE expires_at < NOW();
+CREATE TABLE IF NOT EXISTS idempotency_keys (
+    user_id UUID NOT NULL REFERENCES auth.users(id) ON DELETE CASCADE,
+    key VARCHAR(255) NOT NULL,
+    request_hash VARCHAR NOT NULL,
+    status_code INTEGER,  -- NULL while the first request is in progress
+    response_body TEXT,
+    content_type VARCHAR,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    expires_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    PRIMARY KEY (user_id, key)
 );
 
 -- Enable RLS on all tables
@@ -71,6 +158,11 @@ ALTER TABLE projects ENABLE ROW LEVEL SECURITY;
 ALTER TABLE forecast_line_items ENABLE ROW LEVEL SECURITY;
 ALTER TABLE actual_expenses ENABLE ROW LEVEL SECURITY;
 ALTER TABLE draw_tracker ENABLE ROW LEVEL SECURITY;
+ALTER TABLE expense_daily_rollups ENABLE ROW LEVEL SECURITY;
+ALTER TABLE cost_benchmarks ENABLE ROW LEVEL SECURITY;
+ALTER TABLE deleted_rows ENABLE ROW LEVEL SECURITY;
+ALTER TABLE sync_mutations ENABLE ROW LEVEL SECURITY;
+ALTER TABLE idempotency_keys ENABLE ROW LEVEL SECURITY;
 
 -- RLS Policies for projects
 CREATE POLICY "Users can view own projects" ON projects
@@ -124,20 +216,113 @@ CREATE POLICY "Users can update own draws" ON draw_tracker
 CREATE POLICY "Users can delete own draws" ON draw_tracker
     FOR DELETE USING (user_id = auth.uid());
 
+-- RLS Policies for expense_daily_rollups (written only by triggers)
+CREATE POLICY "Users can view own spend rollups" ON expense_daily_rollups
+    FOR SELECT USING (user_id = auth.uid());
+
+-- RLS Policies for cost_benchmarks
+CREATE POLICY "Users can view own benchmarks" ON cost_benchmarks
+    FOR SELECT USING (user_id = auth.uid());
+
+CREATE POLICY "Users can insert own benchmarks" ON cost_benchmarks
+    FOR INSERT WITH CHECK (user_id = auth.uid());
+
+CREATE POLICY "Users can update own benchmarks" ON cost_benchmarks
+    FOR UPDATE USING (user_id = auth.uid());
+
+CREATE POLICY "Users can delete own benchmarks" ON cost_benchmarks
+    FOR DELETE USING (user_id = auth.uid());
+
+-- RLS Policies for deleted_rows (written only by triggers)
+CREATE POLICY "Users can view own tombstones" ON deleted_rows
+    FOR SELECT USING (user_id = auth.uid());
+
+-- RLS Policies for sync_mutations
+CREATE POLICY "Users can view own sync mutations" ON sync_mutations
+    FOR SELECT USING (user_id = auth.uid());
+
+-- RLS Policies for idempotency_keys (written by the API's service role)
+CREATE POLICY "Users can view own idempotency keys" ON idempotency_keys
+    FOR SELECT USING (user_id = auth.uid());
+
 -- Indexes for performance
 CREATE INDEX IF NOT EXISTS idx_projects_user_id ON projects(user_id);
 CREATE INDEX IF NOT EXISTS idx_forecast_line_items_user_id ON forecast_line_items(user_id);
 CREATE INDEX IF NOT EXISTS idx_forecast_line_items_project_id ON forecast_line_items(project_id);
 CREATE INDEX IF NOT EXISTS idx_actual_expenses_user_id ON actual_expenses(user_id);
 CREATE INDEX IF NOT EXISTS idx_actual_expenses_project_id ON actual_expenses(project_id);
+CREATE INDEX IF NOT EXISTS idx_actual_expenses_fingerprint ON actual_expenses(project_id, vendor_key, amount_spent_cents, date);
 CREATE INDEX IF NOT EXISTS idx_draw_tracker_user_id ON draw_tracker(user_id);
 CREATE INDEX IF NOT EXISTS idx_draw_tracker_project_id ON draw_tracker(project_id);
+CREATE INDEX IF NOT EXISTS idx_expense_daily_rollups_user_day ON expense_daily_rollups(user_id, day);
+CREATE INDEX IF NOT EXISTS idx_projects_user_change ON projects(user_id, change_seq);
+CREATE INDEX IF NOT EXISTS idx_forecast_line_items_user_change ON forecast_line_items(user_id, change_seq);
+CREATE INDEX IF NOT EXISTS idx_actual_expenses_user_change ON actual_expenses(user_id, change_seq);
+CREATE INDEX IF NOT EXISTS idx_draw_tracker_user_change ON draw_tracker(user_id, change_seq);
+CREATE INDEX IF NOT EXISTS idx_deleted_rows_user_change ON deleted_rows(user_id, change_seq);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_forecast_line_items_client_id ON forecast_line_items(user_id, client_id);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_actual_expenses_client_id ON actual_expenses(user_id, client_id);
+CREATE INDEX IF NOT EXISTS idx_idempotency_keys_expires_at ON idempotency_keys(expires_at);
+
+-- Change sequence numbers. nextval() hands out numbers in write order but
+-- they become visible in commit order: if one transaction took 10 and
+-- another took 11 and committed first, a client could pull 11 and never see
+-- 10. Taking the number under a per-user transaction lock means a user's
+-- next change can't be numbered until their previous writer has committed,
+-- so for every user (the feed is per user) sequence order is commit order.
+-- Writes of one user serialize; writes of different users don't contend.
+CREATE OR REPLACE FUNCTION next_change_seq(p_user_id UUID)
+RETURNS BIGINT AS $$
+BEGIN
+    PERFORM pg_advisory_xact_lock(hashtextextended('change_seq:' || p_user_id::TEXT, 0));
+    RETURN nextval('change_seq');
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION assign_change_seq()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.change_seq = next_change_seq(NEW.user_id);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER assign_projects_change_seq BEFORE INSERT ON projects
+    FOR EACH ROW EXECUTE FUNCTION assign_change_seq();
+
+CREATE TRIGGER assign_forecast_line_items_change_seq BEFORE INSERT ON forecast_line_items
+    FOR EACH ROW EXECUTE FUNCTION assign_change_seq();
+
+CREATE TRIGGER assign_actual_expenses_change_seq BEFORE INSERT ON actual_expenses
+    FOR EACH ROW EXECUTE FUNCTION assign_change_seq();
+
+CREATE TRIGGER assign_draw_tracker_change_seq BEFORE INSERT ON draw_tracker
+    FOR EACH ROW EXECUTE FUNCTION assign_change_seq();
 
--- Updated at triggers (optional but recommended)
+CREATE TRIGGER assign_deleted_rows_change_seq BEFORE INSERT ON deleted_rows
+    FOR EACH ROW EXECUTE FUNCTION assign_change_seq();
+
+-- Highest committed change of a user. GET /api/v1/changes reads it before
+-- its per-table queries and caps the page there, so a write committing
+-- between those queries can't push the cursor past a change it hasn't read.
+CREATE OR REPLACE FUNCTION change_watermark(p_user_id UUID)
+RETURNS BIGINT AS $$
+    SELECT GREATEST(
+        (SELECT MAX(change_seq) FROM projects WHERE user_id = p_user_id),
+        (SELECT MAX(change_seq) FROM forecast_line_items WHERE user_id = p_user_id),
+        (SELECT MAX(change_seq) FROM actual_expenses WHERE user_id = p_user_id),
+        (SELECT MAX(change_seq) FROM draw_tracker WHERE user_id = p_user_id),
+        (SELECT MAX(change_seq) FROM deleted_rows WHERE user_id = p_user_id),
+        0
+    );
+$$ LANGUAGE sql STABLE;
+
+-- Updated at triggers; also move the row to the head of the change feed
 CREATE OR REPLACE FUNCTION update_updated_at_column()
 RETURNS TRIGGER AS $$
 BEGIN
     NEW.updated_at = NOW();
+    NEW.change_seq = next_change_seq(NEW.user_id);
     RETURN NEW;
 END;
 $$ language 'plpgsql';
@@ -153,3 +338,315 @@ CREATE TRIGGER update_actual_expenses_updated_at BEFORE UPDATE ON actual_expense
 
 CREATE TRIGGER update_draw_tracker_updated_at BEFORE UPDATE ON draw_tracker
     FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
+
+-- Row versions for conflict detection. Writers that set the version
+-- themselves (POST /sync checks and bumps it) are left alone; any other
+-- update bumps it here.
+CREATE OR REPLACE FUNCTION bump_row_version()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF NEW.version IS NOT DISTINCT FROM OLD.version THEN
+        NEW.version = OLD.version + 1;
+    END IF;
+    RETURN NEW;
+END;
+$$ language 'plpgsql';
+
+CREATE TRIGGER bump_forecast_line_items_version BEFORE UPDATE ON forecast_line_items
+    FOR EACH ROW EXECUTE FUNCTION bump_row_version();
+
+CREATE TRIGGER bump_actual_expenses_version BEFORE UPDATE ON actual_expenses
+    FOR EACH ROW EXECUTE FUNCTION bump_row_version();
+
+CREATE TRIGGER bump_draw_tracker_version BEFORE UPDATE ON draw_tracker
+    FOR EACH ROW EXECUTE FUNCTION bump_row_version();
+
+-- Tombstones for the change feed (cascaded deletes are recorded too)
+CREATE OR REPLACE FUNCTION record_deleted_row()
+RETURNS TRIGGER AS $$
+BEGIN
+    INSERT INTO deleted_rows (user_id, table_name, row_id, project_id)
+    VALUES (
+        OLD.user_id,
+        TG_TABLE_NAME,
+        OLD.id,
+        CASE WHEN TG_TABLE_NAME = 'projects' THEN OLD.id ELSE (to_jsonb(OLD) ->> 'project_id')::INTEGER END
+    );
+    RETURN OLD;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+CREATE TRIGGER record_projects_deleted AFTER DELETE ON projects
+    FOR EACH ROW EXECUTE FUNCTION record_deleted_row();
+
+CREATE TRIGGER record_forecast_line_items_deleted AFTER DELETE ON forecast_line_items
+    FOR EACH ROW EXECUTE FUNCTION record_deleted_row();
+
+CREATE TRIGGER record_actual_expenses_deleted AFTER DELETE ON actual_expenses
+    FOR EACH ROW EXECUTE FUNCTION record_deleted_row();
+
+CREATE TRIGGER record_draw_tracker_deleted AFTER DELETE ON draw_tracker
+    FOR EACH ROW EXECUTE FUNCTION record_deleted_row();
+
+-- Vendor name normalization for duplicate detection and vendor rollups.
+-- Mirrors api/core/vendors.py: "Home Depot #123" and "HOME DEPOT" both become
+-- "home depot". The API writes vendor_key itself; the trigger fills it for
+-- rows written by other clients.
+CREATE OR REPLACE FUNCTION normalize_vendor(p_vendor TEXT)
+RETURNS VARCHAR AS $$
+    SELECT COALESCE(string_agg(token, ' ' ORDER BY position), '')
+    FROM regexp_split_to_table(
+        regexp_replace(
+            regexp_replace(
+                replace(regexp_replace(lower(COALESCE(p_vendor, '')), '[''’`]', '', 'g'), '&', ' and '),
+                '(#|\m(store|str|no|number|num)\M\.?)\s*#?\s*\d+', ' ', 'g'
+            ),
+            '[^a-z0-9]+', ' ', 'g'
+        ),
+        ' '
+    ) WITH ORDINALITY AS t(token, position)
+    WHERE token <> '' AND token NOT IN ('inc', 'llc', 'ltd', 'co', 'corp', 'corporation', 'company', 'the');
+$$ LANGUAGE sql IMMUTABLE;
+
+CREATE OR REPLACE FUNCTION set_expense_vendor_key()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF NEW.vendor_key IS NULL
+       OR (TG_OP = 'UPDATE' AND NEW.vendor IS DISTINCT FROM OLD.vendor AND NEW.vendor_key IS NOT DISTINCT FROM OLD.vendor_key) THEN
+        NEW.vendor_key = normalize_vendor(NEW.vendor);
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER set_actual_expenses_vendor_key BEFORE INSERT OR UPDATE ON actual_expenses
+    FOR EACH ROW EXECUTE FUNCTION set_expense_vendor_key();
+
+-- Top-k vendors by spend (or count) for any filter set, grouped by
+-- normalized vendor. Called through PostgREST RPC by GET /analytics/vendors.
+CREATE OR REPLACE FUNCTION top_vendors(
+    p_user_id UUID,
+    p_limit INTEGER DEFAULT 10,
+    p_sort TEXT DEFAULT 'spend',
+    p_project_id INTEGER DEFAULT NULL,
+    p_category VARCHAR DEFAULT NULL,
+    p_start DATE DEFAULT NULL,
+    p_end DATE DEFAULT NULL
+)
+RETURNS TABLE (
+    vendor_key VARCHAR,
+    vendor VARCHAR,
+    total_cents BIGINT,
+    expense_count BIGINT,
+    grand_total_cents BIGINT,
+    grand_count BIGINT
+) AS $$
+    WITH filtered AS (
+        SELECT COALESCE(e.vendor_key, normalize_vendor(e.vendor)) AS vendor_key,
+               e.vendor,
+               e.amount_spent_cents
+        FROM actual_expenses e
+        LEFT JOIN forecast_line_items f ON f.id = e.forecast_line_item_id
+        WHERE e.user_id = p_user_id
+          AND (p_project_id IS NULL OR e.project_id = p_project_id)
+          AND (p_category IS NULL OR COALESCE(f.category, 'Uncategorized') = p_category)
+          AND (p_start IS NULL OR e.date >= p_start)
+          AND (p_end IS NULL OR e.date <= p_end)
+    ), grouped AS (
+        SELECT vendor_key,
+               mode() WITHIN GROUP (ORDER BY vendor) AS vendor,
+               SUM(amount_spent_cents)::BIGINT AS total_cents,
+               COUNT(*) AS expense_count
+        FROM filtered
+        GROUP BY vendor_key
+    )
+    SELECT g.vendor_key,
+           g.vendor,
+           g.total_cents,
+           g.expense_count,
+           (SUM(g.total_cents) OVER ())::BIGINT,
+           (SUM(g.expense_count) OVER ())::BIGINT
+    FROM grouped g
+    ORDER BY CASE WHEN p_sort = 'count' THEN g.expense_count ELSE g.total_cents END DESC, g.vendor_key
+    LIMIT p_limit;
+$$ LANGUAGE sql STABLE;
+
+-- Incremental daily spend rollups
+-- Every expense write moves its amount out of the old (day, category, vendor)
+-- bucket and into the new one, so spend charts read a few rows per day
+-- instead of every expense. Undated expenses are not charted.
+CREATE OR REPLACE FUNCTION expense_rollup_category(p_forecast_line_item_id INTEGER)
+RETURNS VARCHAR AS $$
+    SELECT COALESCE(
+        (SELECT category FROM forecast_line_items WHERE id = p_forecast_line_item_id),
+        'Uncategorized'
+    );
+$$ LANGUAGE sql STABLE;
+
+CREATE OR REPLACE FUNCTION expense_rollup_vendor(p_vendor VARCHAR)
+RETURNS VARCHAR AS $$
+    SELECT COALESCE(NULLIF(TRIM(p_vendor), ''), 'Unknown');
+$$ LANGUAGE sql IMMUTABLE;
+
+CREATE OR REPLACE FUNCTION apply_expense_rollup()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.date IS NOT NULL THEN
+        UPDATE expense_daily_rollups
+        SET amount_cents = amount_cents - OLD.amount_spent_cents,
+            expense_count = expense_count - 1
+        WHERE user_id = OLD.user_id
+          AND project_id = OLD.project_id
+          AND day = OLD.date
+          AND category = expense_rollup_category(OLD.forecast_line_item_id)
+          AND vendor = expense_rollup_vendor(OLD.vendor);
+
+        DELETE FROM expense_daily_rollups
+        WHERE user_id = OLD.user_id
+          AND project_id = OLD.project_id
+          AND day = OLD.date
+          AND expense_count <= 0;
+    END IF;
+
+    IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.date IS NOT NULL THEN
+        INSERT INTO expense_daily_rollups (user_id, project_id, category, vendor, day, amount_cents, expense_count)
+        VALUES (
+            NEW.user_id,
+            NEW.project_id,
+            expense_rollup_category(NEW.forecast_line_item_id),
+            expense_rollup_vendor(NEW.vendor),
+            NEW.date,
+            NEW.amount_spent_cents,
+            1
+        )
+        ON CONFLICT (user_id, project_id, day, category, vendor) DO UPDATE
+        SET amount_cents = expense_daily_rollups.amount_cents + EXCLUDED.amount_cents,
+            expense_count = expense_daily_rollups.expense_count + 1;
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+CREATE TRIGGER apply_actual_expenses_rollup
+    AFTER INSERT OR UPDATE OF user_id, project_id, forecast_line_item_id, vendor, amount_spent_cents, date
+    OR DELETE ON actual_expenses
+    FOR EACH ROW EXECUTE FUNCTION apply_expense_rollup();
+
+-- Rebuild one project's rollups (used when line items are recategorized or
+-- deleted, and to backfill: SELECT rebuild_expense_daily_rollups(id) FROM projects;)
+CREATE OR REPLACE FUNCTION rebuild_expense_daily_rollups(p_project_id INTEGER)
+RETURNS VOID AS $$
+BEGIN
+    DELETE FROM expense_daily_rollups WHERE project_id = p_project_id;
+
+    INSERT INTO expense_daily_rollups (user_id, project_id, category, vendor, day, amount_cents, expense_count)
+    SELECT e.user_id,
+           e.project_id,
+           COALESCE(f.category, 'Uncategorized'),
+           expense_rollup_vendor(e.vendor),
+           e.date,
+           SUM(e.amount_spent_cents),
+           COUNT(*)
+    FROM actual_expenses e
+    LEFT JOIN forecast_line_items f ON f.id = e.forecast_line_item_id
+    WHERE e.project_id = p_project_id AND e.date IS NOT NULL
+    GROUP BY 1, 2, 3, 4, 5;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+CREATE OR REPLACE FUNCTION rebuild_rollups_on_recategorize()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM rebuild_expense_daily_rollups(NEW.project_id);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+CREATE TRIGGER rebuild_rollups_on_forecast_category
+    AFTER UPDATE OF category ON forecast_line_items
+    FOR EACH ROW WHEN (OLD.category IS DISTINCT FROM NEW.category)
+    EXECUTE FUNCTION rebuild_rollups_on_recategorize();
+
+-- Deleting line items rebuilds each affected project once per statement,
+-- not once per row: a project delete cascades to all of its line items.
+-- Projects that are gone (that cascade) have no rollups left to rebuild.
+CREATE OR REPLACE FUNCTION rebuild_rollups_on_forecast_delete()
+RETURNS TRIGGER AS $$
+DECLARE
+    affected INTEGER;
+BEGIN
+    FOR affected IN
+        SELECT DISTINCT d.project_id
+        FROM deleted_items d
+        WHERE EXISTS (SELECT 1 FROM projects p WHERE p.id = d.project_id)
+    LOOP
+        PERFORM rebuild_expense_daily_rollups(affected);
+    END LOOP;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+CREATE TRIGGER rebuild_rollups_on_forecast_delete
+    AFTER DELETE ON forecast_line_items
+    REFERENCING OLD TABLE AS deleted_items
+    FOR EACH STATEMENT EXECUTE FUNCTION rebuild_rollups_on_forecast_delete();
+
+-- Migrating an existing database to integer-cents money columns
+-- (run once instead of the DROP/CREATE statements above):
+--
+-- ALTER TABLE projects ADD COLUMN IF NOT EXISTS total_budget_cents BIGINT;
+-- ALTER TABLE forecast_line_items RENAME COLUMN estimated_cost TO estimated_cost_cents;
+-- ALTER TABLE forecast_line_items ALTER COLUMN estimated_cost_cents TYPE BIGINT USING ROUND(estimated_cost_cents * 100);
+-- ALTER TABLE forecast_line_items RENAME COLUMN actual_cost TO actual_cost_cents;
+-- ALTER TABLE forecast_line_items ALTER COLUMN actual_cost_cents TYPE BIGINT USING ROUND(actual_cost_cents * 100);
+-- ALTER TABLE forecast_line_items ALTER COLUMN actual_cost_cents SET DEFAULT 0;
+-- ALTER TABLE actual_expenses RENAME COLUMN amount_spent TO amount_spent_cents;
+-- ALTER TABLE actual_expenses ALTER COLUMN amount_spent_cents TYPE BIGINT USING ROUND(amount_spent_cents * 100);
+-- ALTER TABLE draw_tracker RENAME COLUMN cash_on_hand TO cash_on_hand_cents;
+-- ALTER TABLE draw_tracker ALTER COLUMN cash_on_hand_cents TYPE BIGINT USING ROUND(cash_on_hand_cents * 100);
+
+-- Adding vendor keys to an existing database (after creating normalize_vendor):
+--
+-- ALTER TABLE actual_expenses ADD COLUMN IF NOT EXISTS vendor_key VARCHAR;
+-- UPDATE actual_expenses SET vendor_key = normalize_vendor(vendor);
+-- CREATE INDEX IF NOT EXISTS idx_actual_expenses_fingerprint ON actual_expenses(project_id, vendor_key, amount_spent_cents, date);
+
+-- Adding the change feed to an existing database (after creating the
+-- change_seq sequence, deleted_rows and the functions above):
+--
+-- ALTER TABLE projects ADD COLUMN IF NOT EXISTS change_seq BIGINT NOT NULL DEFAULT nextval('change_seq');
+-- ALTER TABLE forecast_line_items ADD COLUMN IF NOT EXISTS change_seq BIGINT NOT NULL DEFAULT nextval('change_seq');
+-- ALTER TABLE actual_expenses ADD COLUMN IF NOT EXISTS change_seq BIGINT NOT NULL DEFAULT nextval('change_seq');
+-- ALTER TABLE draw_tracker ADD COLUMN IF NOT EXISTS change_seq BIGINT NOT NULL DEFAULT nextval('change_seq');
+--
+-- Databases that added it that way still number inserts through the column
+-- defaults, outside the per-user lock. Drop them (the assign_*_change_seq
+-- triggers above number inserts instead):
+--
+-- ALTER TABLE projects ALTER COLUMN change_seq DROP DEFAULT;
+-- ALTER TABLE forecast_line_items ALTER COLUMN change_seq DROP DEFAULT;
+-- ALTER TABLE actual_expenses ALTER COLUMN change_seq DROP DEFAULT;
+-- ALTER TABLE draw_tracker ALTER COLUMN change_seq DROP DEFAULT;
+-- ALTER TABLE deleted_rows ALTER COLUMN change_seq DROP DEFAULT;
+
+-- Adding offline sync to an existing database (after creating sync_mutations
+-- and bump_row_version):
+--
+-- ALTER TABLE forecast_line_items ADD COLUMN IF NOT EXISTS client_id UUID;
+-- ALTER TABLE forecast_line_items ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 1;
+-- ALTER TABLE actual_expenses ADD COLUMN IF NOT EXISTS client_id UUID;
+-- ALTER TABLE actual_expenses ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 1;
+-- CREATE UNIQUE INDEX IF NOT EXISTS idx_forecast_line_items_client_id ON forecast_line_items(user_id, client_id);
+-- CREATE UNIQUE INDEX IF NOT EXISTS idx_actual_expenses_client_id ON actual_expenses(user_id, client_id);
+
+-- Adding If-Match preconditions on draw updates to an existing database:
+--
+-- ALTER TABLE draw_tracker ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 1;
+-- CREATE TRIGGER bump_draw_tracker_version BEFORE UPDATE ON draw_tracker
+--     FOR EACH ROW EXECUTE FUNCTION bump_row_version();
+
+-- Replacing the per-row line item delete trigger of an existing database
+-- (then run the rebuild_rollups_on_forecast_delete definitions above):
+--
+-- DROP TRIGGER IF EXISTS rebuild_rollups_on_forecast_delete ON forecast_line_items;
@@ -165,7 +165,7 @@ def create_test_forecast_item(db_session, project_id, **kwargs):
     defaults = {
         "project_id": project_id,
         "category": "Materials",
-        "estimated_cost": 5000.00,
+        "estimated_cost_cents": 500000,
         "unit": "sqft",
         "notes": "Test forecast item",
         "progress_percent": 0,
@@ -185,7 +185,7 @@ def create_test_expense(db_session, project_id, forecast_line_item_id=None, **kw
         "project_id": project_id,
         "forecast_line_item_id": forecast_line_item_id,
         "vendor": "Test Vendor",
-        "amount_spent": 1500.00,
+        "amount_spent_cents": 150000,
         "date": date(2024, 1, 15),
         "receipt_url": "https://example.com/receipt.pdf"
     }
@@ -201,7 +201,7 @@ def create_test_draw(db_session, project_id, **kwargs):
     """Create a test draw tracker with default or custom values"""
     defaults = {
         "project_id": project_id,
-        "cash_on_hand": 50000.00,
+        "cash_on_hand_cents": 5000000,
         "last_draw_date": date(2024, 1, 1),
         "draw_triggered": False,
         "notes": "Test draw tracker"
@@ -237,7 +237,7 @@ def test_forecast_item(db_session, test_project):
     item = ForecastLineItem(
         project_id=test_project.id,
         category="Materials",
-        estimated_cost=5000.00,
+        estimated_cost_cents=500000,
         unit="sqft",
         notes="Test forecast item",
         progress_percent=0,
@@ -255,7 +255,7 @@ def test_expense(db_session, test_project, test_forecast_item):
         project_id=test_project.id,
         forecast_line_item_id=test_forecast_item.id,
         vendor="Test Vendor",
-        amount_spent=1500.00,
+        amount_spent_cents=150000,
         date=date(2024, 1, 15),
         receipt_url="https://example.com/receipt.pdf"
     )
@@ -269,7 +269,7 @@ def test_draw(db_session, test_project):
     """Create a test draw tracker"""
     draw = DrawTracker(
         project_id=test_project.id,
-        cash_on_hand=50000.00,
+        cash_on_hand_cents=5000000,
         last_draw_date=date(2024, 1, 1),
         draw_triggered=False,
         notes="Test draw tracker"
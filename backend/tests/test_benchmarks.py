@@ -0,0 +1,107 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from api.analytics.benchmarks import (
+    NO_BENCHMARK,
+    OUTLIER_HIGH,
+    OUTLIER_LOW,
+    TYPICAL,
+    compare_project,
+    compute_benchmarks,
+    project_square_feet,
+)
+from api.analytics.cost import LineItemFrame, compute_cost_report
+
+
+def make_item(item_id, project_id, category, estimated, actual=0, progress=0, status="Not Started"):
+    return {
+        "id": item_id,
+        "project_id": project_id,
+        "category": category,
+        "estimated_cost_cents": estimated,
+        "actual_cost_cents": actual,
+        "progress_percent": progress,
+        "status": status,
+    }
+
+
+@pytest.fixture
+def projects():
+    return [
+        {"id": 1, "status": "completed", "total_sqft": 1000},
+        {"id": 2, "status": "completed", "total_sqft": 2000},
+        {"id": 3, "status": "completed", "total_sqft": 1000},
+        {"id": 4, "status": "completed", "total_sqft": 1000},
+        {"id": 5, "status": "completed", "total_sqft": 0},
+        {"id": 9, "status": "in_progress", "total_sqft": 1000},
+    ]
+
+
+@pytest.fixture
+def frame():
+    # Framing costs $10, $12, $14 and $20 per sqft; roofing only has two projects
+    items = [
+        make_item(1, 1, "Framing", 1, 1000000, 100, "Complete"),
+        make_item(2, 2, "Framing", 1, 2400000, 100, "Complete"),
+        make_item(3, 3, "Framing", 1, 1400000, 100, "Complete"),
+        make_item(4, 4, "Framing", 1, 2000000, 100, "Complete"),
+        make_item(5, 1, "Roofing", 1, 500000, 100, "Complete"),
+        make_item(6, 2, "Roofing", 1, 800000, 100, "Complete"),
+        make_item(7, 5, "Framing", 1, 9999999, 100, "Complete"),
+    ]
+    return LineItemFrame.from_rows(items)
+
+
+class TestBenchmarks:
+    """Test cost per square foot benchmark bands"""
+
+    def test_square_feet_of_completed_projects(self, projects):
+        assert project_square_feet(projects, completed_only=True) == {1: 1000, 2: 2000, 3: 1000, 4: 1000}
+        assert 9 in project_square_feet(projects)
+
+    def test_percentile_bands_per_category(self, frame, projects):
+        rows = {row["category"]: row for row in compute_benchmarks(frame, project_square_feet(projects, completed_only=True))}
+
+        assert rows["Framing"]["sample_count"] == 4
+        assert rows["Framing"]["p50_cents"] == 1300
+        assert rows["Framing"]["p10_cents"] == 1060
+        assert rows["Framing"]["p90_cents"] == 1820
+        assert rows["Roofing"]["sample_count"] == 2
+
+    def test_no_completed_projects(self, frame):
+        assert compute_benchmarks(frame, {}) == []
+
+
+class TestProjectComparison:
+    """Test flagging a project's outlier categories"""
+
+    @pytest.fixture
+    def benchmarks(self, frame, projects):
+        return compute_benchmarks(frame, project_square_feet(projects, completed_only=True))
+
+    def test_flags_outliers(self, benchmarks):
+        items = [
+            make_item(10, 9, "Framing", 2500000),
+            make_item(11, 9, "Roofing", 100000),
+            make_item(12, 9, "Tile", 300000),
+        ]
+        report = compute_cost_report(LineItemFrame.from_rows(items))
+
+        rows = {row["category"]: row for row in compare_project(report, 9, 1000, benchmarks)}
+
+        assert rows["Framing"]["cost_per_sqft_cents"] == 2500
+        assert rows["Framing"]["position"] == OUTLIER_HIGH
+        # Only two roofing projects, so no verdict
+        assert rows["Roofing"]["position"] == NO_BENCHMARK
+        assert rows["Tile"]["benchmark"] is None
+
+    @pytest.mark.parametrize("estimate,position", [(1000000, OUTLIER_LOW), (1300000, TYPICAL)])
+    def test_band_positions(self, benchmarks, estimate, position):
+        report = compute_cost_report(LineItemFrame.from_rows([make_item(10, 9, "Framing", estimate)]))
+
+        assert compare_project(report, 9, 1000, benchmarks)[0]["position"] == position
@@ -0,0 +1,106 @@
+import sys
+from datetime import date
+from pathlib import Path
+
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from api.analytics.cashflow import latest_draws, project_cash_flow
+
+TODAY = date(2024, 6, 1)
+
+
+@pytest.fixture
+def draws():
+    return [
+        {"id": 1, "project_id": 1, "cash_on_hand_cents": 5, "last_draw_date": "2024-01-01"},
+        {"id": 2, "project_id": 1, "cash_on_hand_cents": 100000, "last_draw_date": "2024-05-20",
+         "created_at": "2024-05-20T10:00:00+00:00"},
+        {"id": 3, "project_id": 2, "cash_on_hand_cents": 900000, "last_draw_date": "2024-05-15"},
+    ]
+
+
+@pytest.fixture
+def expenses():
+    return [
+        {"project_id": 1, "amount_spent_cents": 30000, "date": "2024-05-25"},
+        {"project_id": 1, "amount_spent_cents": 15000, "date": "2024-05-10"},
+        {"project_id": 2, "amount_spent_cents": 3000, "date": "2024-05-30"},
+        {"project_id": 3, "amount_spent_cents": 6000, "date": "2024-05-30"},
+    ]
+
+
+class TestCashFlowProjection:
+    """Test cash runway and draw date forecasting"""
+
+    def test_latest_draw_per_project(self, draws):
+        latest = latest_draws(draws)
+
+        assert latest[1]["id"] == 2
+        assert latest[2]["id"] == 3
+
+    def test_cash_is_reduced_by_spend_after_snapshot(self, draws, expenses):
+        rows = {row["project_id"]: row for row in project_cash_flow(
+            [1, 2, 3], draws, expenses, {1: 500000, 2: 100000, 3: 1000}, today=TODAY
+        ).rows()}
+
+        # Only the 2024-05-25 expense is after the 2024-05-20 snapshot
+        assert rows[1]["cash_on_hand"] == 70000
+        assert rows[1]["burn_rate_per_day"] == 1500
+
+    def test_editing_a_draw_does_not_move_its_snapshot(self, draws, expenses):
+        edited = [dict(row, notes="Lender called", updated_at="2024-05-31T09:00:00+00:00") for row in draws]
+
+        before = project_cash_flow([1], draws, expenses, {1: 500000}, today=TODAY).rows()
+        after = project_cash_flow([1], edited, expenses, {1: 500000}, today=TODAY).rows()
+
+        assert after[0]["cash_on_hand"] == before[0]["cash_on_hand"] == 70000
+        assert after[0]["runway_days"] == before[0]["runway_days"]
+
+    def test_snapshot_without_draw_date_uses_created_at(self, expenses):
+        draws = [{"id": 1, "project_id": 1, "cash_on_hand_cents": 100000, "last_draw_date": None,
+                  "created_at": "2024-05-15T08:00:00+00:00", "updated_at": "2024-05-31T08:00:00+00:00"}]
+
+        (row,) = project_cash_flow([1], draws, expenses, {1: 500000}, today=TODAY).rows()
+
+        assert row["cash_on_hand"] == 70000
+
+    def test_predicts_cash_out_and_draw_dates(self, draws, expenses):
+        rows = {row["project_id"]: row for row in project_cash_flow(
+            [1, 2, 3], draws, expenses, {1: 500000, 2: 100000}, today=TODAY, lead_time_days=10
+        ).rows()}
+
+        assert rows[1]["runway_days"] == 46
+        assert rows[1]["funding_gap"] == 430000
+        assert rows[1]["cash_out_date"] == date(2024, 7, 17)
+        assert rows[1]["next_draw_date"] == date(2024, 7, 7)
+        assert rows[1]["draw_recommended"] is False
+
+    def test_no_draw_needed_when_cash_covers_remaining_cost(self, draws, expenses):
+        rows = {row["project_id"]: row for row in project_cash_flow(
+            [2], draws, expenses, {2: 100000}, today=TODAY
+        ).rows()}
+
+        assert rows[2]["funding_gap"] == 0
+        assert rows[2]["next_draw_date"] is None
+        assert rows[2]["draw_recommended"] is False
+
+    def test_draw_recommended_inside_lead_time(self, draws, expenses):
+        rows = {row["project_id"]: row for row in project_cash_flow(
+            [1], draws, expenses, {1: 500000}, today=TODAY, lead_time_days=60
+        ).rows()}
+
+        assert rows[1]["next_draw_date"] == TODAY
+        assert rows[1]["draw_recommended"] is True
+
+    def test_project_without_tracker(self, draws, expenses):
+        rows = {row["project_id"]: row for row in project_cash_flow(
+            [3], draws, expenses, {3: 1000}, today=TODAY
+        ).rows()}
+
+        assert rows[3]["has_draw_tracker"] is False
+        assert rows[3]["cash_on_hand"] is None
+        assert rows[3]["burn_rate_per_day"] == 200
+        assert rows[3]["draw_recommended"] is False
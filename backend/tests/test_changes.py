@@ -0,0 +1,147 @@
+import os
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+# Set up test environment
+os.environ["ENV"] = "test"
+os.environ["DATABASE_URL"] = "sqlite:///:memory:"
+os.environ["SUPABASE_URL"] = "https://mock-supabase-url.supabase.co"
+os.environ.setdefault("SUPABASE_SERVICE_ROLE_KEY", "eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoic2VydmljZV9yb2xlIn0.mock")
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from api.endpoints import sync
+
+USER = {"id": "test-user-id"}
+
+
+class TableQuery:
+    """Just enough of the PostgREST builder for the change feed queries."""
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    def select(self, columns):
+        return self
+
+    def eq(self, column, value):
+        return TableQuery([row for row in self.rows if row.get(column) == value])
+
+    def gt(self, column, value):
+        return TableQuery([row for row in self.rows if row[column] > value])
+
+    def lte(self, column, value):
+        return TableQuery([row for row in self.rows if row[column] <= value])
+
+    def order(self, column):
+        return TableQuery(sorted(self.rows, key=lambda row: row[column]))
+
+    def limit(self, count):
+        return TableQuery(self.rows[:count])
+
+    def execute(self):
+        return SimpleNamespace(data=self.rows)
+
+
+class Database:
+    """Tables, the change_watermark function and writers that commit mid-read."""
+
+    def __init__(self, data):
+        self.data = data
+        self.writers = []
+
+    def commit_before_reading(self, read_table, table, row):
+        """Commit ``row`` into ``table`` just before the feed queries ``read_table``."""
+        self.writers.append((read_table, table, row))
+
+    def table(self, name):
+        for writer in [writer for writer in self.writers if writer[0] == name]:
+            self.writers.remove(writer)
+            self.data[writer[1]].append(writer[2])
+        return TableQuery(self.data[name])
+
+    def rpc(self, name, params):
+        assert name == "change_watermark"
+        seqs = [row["change_seq"] for rows in self.data.values() for row in rows if row["user_id"] == params["p_user_id"]]
+        return SimpleNamespace(execute=lambda: SimpleNamespace(data=max(seqs, default=0)))
+
+
+@pytest.fixture
+def tables(monkeypatch):
+    user = USER["id"]
+    data = {
+        "projects": [{"id": 1, "user_id": user, "name": "House", "change_seq": 1}],
+        "forecast_line_items": [
+            {"id": 10, "user_id": user, "project_id": 1, "category": "Framing", "estimated_cost_cents": 500, "change_seq": 2},
+            {"id": 11, "user_id": user, "project_id": 1, "category": "Roofing", "estimated_cost_cents": 700, "change_seq": 5},
+        ],
+        "actual_expenses": [
+            {"id": 20, "user_id": user, "project_id": 1, "amount_spent_cents": 250, "date": "2024-05-01", "change_seq": 3},
+            {"id": 21, "user_id": "someone-else", "project_id": 2, "amount_spent_cents": 1, "date": "2024-05-01", "change_seq": 6},
+        ],
+        "draw_tracker": [],
+        "deleted_rows": [{"user_id": user, "table_name": "actual_expenses", "row_id": 19, "project_id": 1, "change_seq": 4}],
+    }
+    database = Database(data)
+    monkeypatch.setattr(sync, "supabase", database)
+    return database
+
+
+class TestChangeFeed:
+    """Test paging through changes across tables"""
+
+    def test_pages_in_change_order(self, tables):
+        first = sync.list_changes(since=0, limit=3, project_id=None, current_user=USER)
+
+        assert first["cursor"] == 3
+        assert first["has_more"] is True
+        assert [row["id"] for row in first["forecast_items"]] == [10]
+        assert [row["id"] for row in first["expenses"]] == [20]
+
+        second = sync.list_changes(since=first["cursor"], limit=3, project_id=None, current_user=USER)
+
+        assert second["cursor"] == 5
+        assert second["has_more"] is False
+        assert second["deleted"] == [{"entity": "expenses", "id": 19, "project_id": 1}]
+        assert [row["id"] for row in second["forecast_items"]] == [11]
+
+    def test_caught_up_keeps_cursor(self, tables):
+        result = sync.list_changes(since=5, limit=10, project_id=None, current_user=USER)
+
+        assert result["cursor"] == 5
+        assert result["has_more"] is False
+        assert not any(result[entity] for entity in ("projects", "forecast_items", "expenses", "draws", "deleted"))
+
+    def test_project_filter(self, tables):
+        result = sync.list_changes(since=0, limit=10, project_id=2, current_user=USER)
+
+        assert result["projects"] == []
+        assert result["expenses"] == []
+
+    def test_writes_committing_mid_read_are_not_skipped(self, tables):
+        user = USER["id"]
+        # Two writers, numbered 7 and 8 in commit order, both commit while
+        # the feed is between queries: 7 into a table it has already read,
+        # 8 into one it hasn't read yet
+        tables.commit_before_reading("forecast_line_items", "projects", {"id": 2, "user_id": user, "name": "Barn", "change_seq": 7})
+        tables.commit_before_reading(
+            "actual_expenses", "actual_expenses",
+            {"id": 22, "user_id": user, "project_id": 2, "amount_spent_cents": 900, "date": "2024-05-02", "change_seq": 8},
+        )
+
+        first = sync.list_changes(since=5, limit=10, project_id=None, current_user=USER)
+
+        # Capped at the watermark read before the queries: 8 is held back
+        # rather than returned ahead of 7
+        assert first["cursor"] == 5
+        assert first["expenses"] == []
+
+        second = sync.list_changes(since=first["cursor"], limit=10, project_id=None, current_user=USER)
+
+        assert second["cursor"] == 8
+        assert [row["id"] for row in second["projects"]] == [2]
+        assert [row["id"] for row in second["expenses"]] == [22]
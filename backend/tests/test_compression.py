@@ -0,0 +1,143 @@
+import os
+import sys
+import zlib
+from pathlib import Path
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import Response, StreamingResponse
+from fastapi.testclient import TestClient
+
+# Set up test environment
+os.environ["ENV"] = "test"
+os.environ["DATABASE_URL"] = "sqlite:///:memory:"
+os.environ["SUPABASE_URL"] = "https://mock-supabase-url.supabase.co"
+os.environ.setdefault("SUPABASE_SERVICE_ROLE_KEY", "eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoic2VydmljZV9yb2xlIn0.mock")
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from api.core.compression import (
+    CompressionMiddleware,
+    CompressionStats,
+    is_compressible,
+    negotiate_encoding,
+)
+
+
+@pytest.fixture
+def stats():
+    return CompressionStats()
+
+
+@pytest.fixture
+def client(stats):
+    """Small app with list and streaming endpoints behind the middleware"""
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=500, stats=stats)
+
+    @app.get("/small")
+    def small():
+        return {"ok": True}
+
+    @app.get("/expenses")
+    def expenses():
+        return [{"id": i, "vendor": "Home Depot", "amount_spent": "125.00"} for i in range(500)]
+
+    @app.get("/random")
+    def random_bytes():
+        # Random bytes don't get any smaller compressed
+        return Response(os.urandom(2000), media_type="text/plain")
+
+    @app.get("/export")
+    def export():
+        def rows():
+            yield "id,vendor,amount\n"
+            for i in range(200):
+                yield f"{i},Home Depot,125.00\n"
+        return StreamingResponse(rows(), media_type="text/csv")
+
+    return TestClient(app)
+
+
+class TestNegotiation:
+    """Test Accept-Encoding negotiation"""
+
+    def test_prefers_brotli_when_available(self):
+        assert negotiate_encoding("gzip, deflate, br", brotli_available=True) == "br"
+
+    def test_falls_back_to_gzip_without_brotli(self):
+        assert negotiate_encoding("gzip, br", brotli_available=False) == "gzip"
+
+    def test_respects_quality_values(self):
+        assert negotiate_encoding("br;q=0.5, gzip;q=1.0", brotli_available=True) == "gzip"
+        assert negotiate_encoding("gzip;q=0", brotli_available=False) is None
+
+    def test_identity_only(self):
+        assert negotiate_encoding("identity") is None
+        assert negotiate_encoding("") is None
+
+    def test_compressible_types(self):
+        assert is_compressible("application/json")
+        assert is_compressible("text/csv; charset=utf-8")
+        assert not is_compressible("image/png")
+        assert not is_compressible("text/event-stream")
+
+
+class TestCompressionMiddleware:
+    """Test response compression behavior"""
+
+    def test_large_json_is_gzipped(self, client, stats):
+        response = client.get("/expenses", headers={"Accept-Encoding": "gzip"})
+
+        assert response.status_code == 200
+        assert response.headers["content-encoding"] == "gzip"
+        assert "accept-encoding" in response.headers["vary"].lower()
+        assert len(response.json()) == 500
+
+        snapshot = stats.snapshot()
+        assert snapshot["responses"] == 1
+        assert snapshot["bytes_saved"] > 0
+
+    def test_small_response_is_not_compressed(self, client, stats):
+        response = client.get("/small", headers={"Accept-Encoding": "gzip"})
+
+        assert "content-encoding" not in response.headers
+        assert response.json() == {"ok": True}
+        assert stats.snapshot()["responses"] == 0
+
+    def test_incompressible_body_is_sent_as_is_with_vary(self, client, stats):
+        response = client.get("/random", headers={"Accept-Encoding": "gzip"})
+
+        assert "content-encoding" not in response.headers
+        assert "accept-encoding" in response.headers["vary"].lower()
+        assert stats.snapshot()["responses"] == 0
+
+    def test_no_accept_encoding(self, client):
+        response = client.get("/expenses", headers={"Accept-Encoding": "identity"})
+
+        assert "content-encoding" not in response.headers
+
+    def test_streaming_response_stays_streaming(self, client, stats):
+        with client.stream("GET", "/export", headers={"Accept-Encoding": "gzip"}) as response:
+            assert response.headers["content-encoding"] == "gzip"
+            assert "content-length" not in response.headers
+            raw = b"".join(response.iter_raw())
+
+        text = zlib.decompress(raw, 31).decode()
+        assert text.startswith("id,vendor,amount\n")
+        assert text.count("\n") == 201
+        assert stats.snapshot()["encodings"]["gzip"]["responses"] == 1
+
+    def test_gzip_level_is_configurable(self, stats):
+        app = FastAPI()
+        app.add_middleware(CompressionMiddleware, minimum_size=0, gzip_level=1, stats=stats)
+
+        @app.get("/data")
+        def data():
+            return {"values": list(range(1000))}
+
+        response = TestClient(app).get("/data", headers={"Accept-Encoding": "gzip"})
+
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.json()["values"][-1] == 999
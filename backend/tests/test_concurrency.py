@@ -0,0 +1,144 @@
+import os
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+# Set up test environment
+os.environ["ENV"] = "test"
+os.environ["DATABASE_URL"] = "sqlite:///:memory:"
+os.environ["SUPABASE_URL"] = "https://mock-supabase-url.supabase.co"
+os.environ.setdefault("SUPABASE_SERVICE_ROLE_KEY", "eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoic2VydmljZV9yb2xlIn0.mock")
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from api.core.concurrency import (
+    ANY_VERSION,
+    PreconditionFailed,
+    etag,
+    parse_if_match,
+    precondition_failed_response,
+    update_if_match,
+)
+from api.schemas.draw import DrawTrackerOut
+
+USER = "test-user-id"
+
+
+class TableQuery:
+    """PostgREST builder over a list of rows, bumping ``version`` like the trigger."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.filters = []
+        self.payload = None
+
+    def select(self, columns):
+        return self
+
+    def update(self, payload):
+        self.payload = payload
+        return self
+
+    def eq(self, column, value):
+        self.filters.append(lambda row: row.get(column) == value)
+        return self
+
+    def in_(self, column, values):
+        self.filters.append(lambda row: row.get(column) in values)
+        return self
+
+    def execute(self):
+        matched = [row for row in self.rows if all(check(row) for check in self.filters)]
+        if self.payload is not None:
+            for row in matched:
+                version = row["version"]
+                row.update(self.payload)
+                if row["version"] == version:
+                    row["version"] = version + 1
+        return SimpleNamespace(data=[dict(row) for row in matched])
+
+
+@pytest.fixture
+def rows():
+    return [{"id": 1, "user_id": USER, "project_id": 7, "cash_on_hand_cents": 1000, "version": 3}]
+
+
+@pytest.fixture
+def client(rows):
+    return SimpleNamespace(table=lambda name: TableQuery(rows))
+
+
+class TestParseIfMatch:
+    """Test reading If-Match headers"""
+
+    def test_absent(self):
+        assert parse_if_match(None) is None
+
+    def test_wildcard(self):
+        assert parse_if_match(" * ") == ANY_VERSION
+
+    def test_list_of_tags(self):
+        assert parse_if_match('"3", W/"4"') == [3, 4]
+
+    def test_round_trips_etag(self):
+        assert parse_if_match(etag(12)) == [12]
+
+    def test_invalid_tag(self):
+        with pytest.raises(HTTPException) as exc:
+            parse_if_match('"abc"')
+        assert exc.value.status_code == 400
+
+
+class TestUpdateIfMatch:
+    """Test version-guarded updates"""
+
+    def test_matching_version_updates_and_bumps(self, client, rows):
+        row = update_if_match(client, "draw_tracker", 1, USER, {"notes": "x"}, [3])
+
+        assert row["notes"] == "x"
+        assert row["version"] == 4
+        assert rows[0]["version"] == 4
+
+    def test_stale_version_returns_current_row(self, client, rows):
+        with pytest.raises(PreconditionFailed) as exc:
+            update_if_match(client, "draw_tracker", 1, USER, {"notes": "x"}, [2])
+
+        assert exc.value.row["version"] == 3
+        assert "notes" not in rows[0]
+
+    def test_any_of_several_versions(self, client):
+        row = update_if_match(client, "draw_tracker", 1, USER, {"notes": "x"}, [1, 3])
+
+        assert row["version"] == 4
+
+    def test_without_precondition(self, client):
+        row = update_if_match(client, "draw_tracker", 1, USER, {"notes": "x"})
+
+        assert row["version"] == 4
+
+    def test_missing_row_is_404(self, client):
+        for if_match in (None, ANY_VERSION, [3]):
+            with pytest.raises(HTTPException) as exc:
+                update_if_match(client, "draw_tracker", 2, USER, {"notes": "x"}, if_match, not_found="Draw not found")
+            assert exc.value.status_code == 404
+            assert exc.value.detail == "Draw not found"
+
+    def test_other_users_row_is_404(self, client):
+        with pytest.raises(HTTPException) as exc:
+            update_if_match(client, "draw_tracker", 1, "someone-else", {"notes": "x"}, [3])
+        assert exc.value.status_code == 404
+
+
+class TestPreconditionFailedResponse:
+    """Test the 412 body"""
+
+    def test_carries_current_row_and_etag(self, rows):
+        response = precondition_failed_response(DrawTrackerOut, rows[0])
+
+        assert response.status_code == 412
+        assert response.headers["ETag"] == '"3"'
+        assert b'"cash_on_hand":"10.00"' in response.body
@@ -0,0 +1,82 @@
+import os
+import sys
+from collections import defaultdict
+from pathlib import Path
+
+from sqlalchemy import create_engine, func, select
+
+# Set up test environment
+os.environ["ENV"] = "test"
+os.environ["DATABASE_URL"] = "sqlite:///:memory:"
+os.environ["SUPABASE_URL"] = "https://mock-supabase-url.supabase.co"
+os.environ.setdefault("SUPABASE_SERVICE_ROLE_KEY", "eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoic2VydmljZV9yb2xlIn0.mock")
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from api.models import ActualExpense, Base, Project
+from benchmarks.dataset import generate, load_sql, load_store, user_id
+from benchmarks.fake_supabase import InMemoryStore
+
+
+class TestDatasetGenerator:
+    """Test the synthetic portfolio generator and its loaders"""
+
+    def test_deterministic(self):
+        assert generate(users=2, projects_per_user=3, seed=7).tables == generate(users=2, projects_per_user=3, seed=7).tables
+        assert generate(users=2, projects_per_user=3, seed=7).tables != generate(users=2, projects_per_user=3, seed=8).tables
+
+    def test_users_do_not_depend_on_user_count(self):
+        small = generate(users=2, projects_per_user=3)
+        large = generate(users=4, projects_per_user=3)
+
+        for table, rows in small.tables.items():
+            assert large.tables[table][:len(rows)] == rows
+
+    def test_rows_reference_their_own_user(self):
+        dataset = generate(users=3, projects_per_user=4)
+        owners = {project["id"]: project["user_id"] for project in dataset.tables["projects"]}
+        items = {item["id"]: item for item in dataset.tables["forecast_line_items"]}
+
+        spent = defaultdict(int)
+        for expense in dataset.tables["actual_expenses"]:
+            item = items[expense["forecast_line_item_id"]]
+            assert item["project_id"] == expense["project_id"]
+            assert owners[expense["project_id"]] == expense["user_id"] == item["user_id"]
+            spent[item["id"]] += expense["amount_spent_cents"]
+        # Line item actuals are the sum of their expenses
+        assert all(item["actual_cost_cents"] == spent[item["id"]] for item in items.values())
+        assert all(owners[draw["project_id"]] == draw["user_id"] for draw in dataset.tables["draw_tracker"])
+
+    def test_vendor_variants_collapse(self):
+        dataset = generate(users=2, projects_per_user=5)
+        spellings = defaultdict(set)
+        for expense in dataset.tables["actual_expenses"]:
+            spellings[expense["vendor_key"]].add(expense["vendor"])
+
+        assert len(spellings["home depot"]) > 1
+
+    def test_load_store(self):
+        dataset = generate(users=2, projects_per_user=2)
+        store = InMemoryStore()
+
+        loaded = load_store(store, dataset)
+
+        assert loaded == {table: len(rows) for table, rows in dataset.tables.items()}
+        project = store.lookup("projects", "user_id", user_id(1))[0]
+        assert isinstance(project["start_date"], str)
+        # The rollup trigger saw every expense
+        total = sum(expense["amount_spent_cents"] for expense in dataset.tables["actual_expenses"])
+        assert sum(row["amount_cents"] for row in store.rows("expense_daily_rollups")) == total
+
+    def test_load_sql(self):
+        dataset = generate(users=2, projects_per_user=2)
+        engine = create_engine("sqlite:///:memory:")
+        Base.metadata.create_all(engine)
+
+        load_sql(engine, dataset, batch_size=50)
+
+        with engine.connect() as connection:
+            assert connection.scalar(select(func.count()).select_from(Project)) == 4
+            total = connection.scalar(select(func.sum(ActualExpense.amount_spent_cents)))
+        assert total == sum(expense["amount_spent_cents"] for expense in dataset.tables["actual_expenses"])
@@ -21,7 +21,7 @@ class TestDrawTrackerRouters:
         assert response.status_code == status.HTTP_200_OK
         data = response.json()
         assert data["project_id"] == draw_data["project_id"]
-        assert data["cash_on_hand"] == draw_data["cash_on_hand"]
+        assert data["cash_on_hand"] == "50000.00"
         assert data["draw_triggered"] == draw_data["draw_triggered"]
         assert data["notes"] == draw_data["notes"]
         assert "id" in data
@@ -57,7 +57,7 @@ class TestDrawTrackerRouters:
         data = response.json()
         assert data["id"] == test_draw.id
         assert data["project_id"] == test_draw.project_id
-        assert data["cash_on_hand"] == test_draw.cash_on_hand
+        assert data["cash_on_hand"] == "50000.00"
 
     def test_get_draw_not_found(self, client):
         """Test getting a non-existent draw"""
@@ -80,7 +80,7 @@ class TestDrawTrackerRouters:
         
         assert response.status_code == status.HTTP_200_OK
         data = response.json()
-        assert data["cash_on_hand"] == update_data["cash_on_hand"]
+        assert data["cash_on_hand"] == "75000.00"
         assert data["draw_triggered"] == update_data["draw_triggered"]
         assert data["notes"] == update_data["notes"]
 
@@ -140,7 +140,7 @@ class TestDrawTrackerRouters:
         # Update draw to trigger it
         update_data = {
             "project_id": test_draw.project_id,
-            "cash_on_hand": test_draw.cash_on_hand,
+            "cash_on_hand": test_draw.cash_on_hand_cents / 100,
             "draw_triggered": True,
             "last_draw_date": "2024-02-01"
         }
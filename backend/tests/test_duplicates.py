@@ -0,0 +1,116 @@
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+# Set up test environment
+os.environ["ENV"] = "test"
+os.environ["DATABASE_URL"] = "sqlite:///:memory:"
+os.environ["SUPABASE_URL"] = "https://mock-supabase-url.supabase.co"
+os.environ.setdefault("SUPABASE_SERVICE_ROLE_KEY", "eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoic2VydmljZV9yb2xlIn0.mock")
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from api.core.duplicates import dedupe_batch, find_matches
+from api.core.vendors import normalize_vendor
+from api.endpoints import expenses
+from api.schemas.expense import ActualExpenseCreate
+from benchmarks.fake_supabase import FakeSupabase
+
+
+def make_expense(vendor, amount, day, project_id=1, expense_id=None):
+    row = {"project_id": project_id, "vendor": vendor, "amount_spent_cents": amount, "date": day}
+    if expense_id is not None:
+        row["id"] = expense_id
+    return row
+
+
+class TestNormalizeVendor:
+    """Test vendor name normalization"""
+
+    @pytest.mark.parametrize("name", [
+        "Home Depot #123",
+        "HOME DEPOT",
+        "The Home Depot, Inc.",
+        "home depot store 0612",
+        "  Home   Depot No. 7 ",
+    ])
+    def test_variants_collapse(self, name):
+        assert normalize_vendor(name) == "home depot"
+
+    def test_apostrophes_and_ampersands(self):
+        assert normalize_vendor("Lowe's #2241") == normalize_vendor("LOWES")
+        assert normalize_vendor("Smith & Sons LLC") == "smith and sons"
+
+    def test_keeps_numbers_that_are_part_of_the_name(self):
+        assert normalize_vendor("84 Lumber") == "84 lumber"
+        assert normalize_vendor("A-1 Concrete Co") == "a 1 concrete"
+
+    def test_missing_vendor(self):
+        assert normalize_vendor(None) == ""
+        assert normalize_vendor("") == ""
+
+
+class TestDuplicateDetection:
+    """Test fingerprint matching within a date window"""
+
+    def test_find_matches_within_window(self):
+        existing = [
+            make_expense("HOME DEPOT", 4210, "2024-05-08", expense_id=1),
+            make_expense("Home Depot", 4210, "2024-05-20", expense_id=2),
+            make_expense("Home Depot", 4211, "2024-05-06", expense_id=3),
+            make_expense("Home Depot", 4210, "2024-05-06", project_id=2, expense_id=4),
+        ]
+
+        assert find_matches(make_expense("Home Depot #123", 4210, "2024-05-06"), existing) == [1]
+
+    def test_dedupe_batch_keeps_first_of_each_receipt(self):
+        rows = [
+            make_expense("Home Depot", 4210, "2024-05-06"),
+            make_expense("Lumber Yard", 9900, "2024-05-06"),
+            make_expense("HOME DEPOT #5", 4210, "2024-05-07"),
+            make_expense("Home Depot", 4210, "2024-05-30"),
+        ]
+
+        keep, duplicates = dedupe_batch(rows)
+
+        assert keep == [0, 1, 3]
+        assert duplicates == {2: 0}
+
+    def test_dedupe_batch_orders_by_date(self):
+        rows = [
+            make_expense("Home Depot", 4210, "2024-05-09"),
+            make_expense("Home Depot", 4210, "2024-05-07"),
+        ]
+
+        keep, duplicates = dedupe_batch(rows, window_days=3)
+
+        assert keep == [1]
+        assert duplicates == {0: 1}
+
+
+class TestBulkImportLookup:
+    """Test the duplicate lookup of bulk imports"""
+
+    def test_lookup_is_chunked_and_finds_matches_in_every_chunk(self, monkeypatch):
+        client = FakeSupabase()
+        # One existing receipt per vendor, for the first and last of 250 imports
+        client.store.load("actual_expenses", [
+            {"id": 1, "user_id": "user-1", "project_id": 1, "vendor": "Vendor 000", "vendor_key": "vendor 000",
+             "amount_spent_cents": 1000, "date": "2024-05-01"},
+            {"id": 2, "user_id": "user-1", "project_id": 1, "vendor": "Vendor 249", "vendor_key": "vendor 249",
+             "amount_spent_cents": 1249, "date": "2024-05-01"},
+        ])
+        monkeypatch.setattr(expenses, "supabase", client)
+        batch = [
+            ActualExpenseCreate(project_id=1, vendor=f"Vendor {n:03d}", amount_spent=f"{10 + n / 100:.2f}", date="2024-05-02")
+            for n in range(250)
+        ]
+
+        result = expenses.create_expenses_bulk(batch, skip_duplicates=True, db=None, current_user={"id": "user-1"})
+
+        assert client.calls[("actual_expenses", "select")] == 3
+        assert sorted(item["index"] for item in result["skipped"]) == [0, 249]
+        assert len(result["created"]) == 248
@@ -0,0 +1,127 @@
+import asyncio
+import json
+import os
+import sys
+import threading
+from pathlib import Path
+
+# Set up test environment
+os.environ["ENV"] = "test"
+os.environ["DATABASE_URL"] = "sqlite:///:memory:"
+os.environ["SUPABASE_URL"] = "https://mock-supabase-url.supabase.co"
+os.environ.setdefault("SUPABASE_SERVICE_ROLE_KEY", "eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoic2VydmljZV9yb2xlIn0.mock")
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from api.core import events
+from api.core.events import EventBroker, format_sse, project_event
+
+
+class TestEventBroker:
+    """Test fan-out of project change events"""
+
+    def test_delivers_to_project_subscribers_only(self):
+        async def scenario():
+            broker = EventBroker()
+            first = broker.subscribe(1)
+            other = broker.subscribe(2)
+
+            broker.publish(project_event("expense", "created", {"id": 5, "project_id": 1}))
+
+            event = await first.get(1)
+            assert event["type"] == "expense.created"
+            assert event["data"] == {"id": 5, "project_id": 1}
+            assert await other.get(0.05) is None
+
+        asyncio.run(scenario())
+
+    def test_publish_from_worker_thread(self):
+        async def scenario():
+            broker = EventBroker()
+            subscription = broker.subscribe(1)
+
+            thread = threading.Thread(
+                target=broker.publish,
+                args=(project_event("draw", "deleted", {"id": 3, "project_id": 1}),),
+            )
+            thread.start()
+            thread.join()
+
+            event = await subscription.get(1)
+            assert event["action"] == "deleted"
+            assert event["data"] is None
+
+        asyncio.run(scenario())
+
+    def test_slow_subscriber_drops_oldest(self):
+        async def scenario():
+            broker = EventBroker(max_queue=2)
+            subscription = broker.subscribe(1)
+
+            for record_id in range(5):
+                broker.publish(project_event("expense", "updated", {"id": record_id, "project_id": 1}))
+            await asyncio.sleep(0)
+
+            assert subscription.take_dropped() == 3
+            assert [(await subscription.get(1))["id"] for _ in range(2)] == [3, 4]
+
+        asyncio.run(scenario())
+
+    def test_unsubscribe(self):
+        async def scenario():
+            broker = EventBroker()
+            subscription = broker.subscribe(1)
+            broker.unsubscribe(subscription)
+
+            assert broker.subscriber_count() == 0
+
+        asyncio.run(scenario())
+
+
+class TestEventHelpers:
+    """Test event framing and publishing"""
+
+    def test_format_sse(self):
+        text = format_sse({"a": 1}, event="expense.created", event_id=7)
+
+        assert text == 'id: 7\nevent: expense.created\ndata: {"a": 1}\n\n'
+        assert json.loads(text.splitlines()[2][len("data: "):]) == {"a": 1}
+
+    def test_published_record_matches_rest_schema(self, monkeypatch):
+        published = []
+        monkeypatch.setattr(events.broker, "publish", published.append)
+        row = {
+            "id": 7, "project_id": 1, "user_id": "test-user-id", "forecast_line_item_id": None,
+            "vendor": "Home Depot #123", "vendor_key": "home depot", "amount_spent_cents": 12550,
+            "date": "2024-05-01", "receipt_url": None, "version": 2, "change_seq": 41,
+            "updated_at": "2024-05-01T10:00:00+00:00",
+        }
+
+        events.publish_change("expense", "updated", row)
+
+        (event,) = published
+        assert event["data"] == {
+            "id": 7, "project_id": 1, "forecast_line_item_id": None, "vendor": "Home Depot #123",
+            "amount_spent": "125.50", "date": "2024-05-01", "receipt_url": None, "version": 2,
+            "client_id": None, "duplicate_of": [],
+        }
+        assert (event["id"], event["project_id"], event["change_seq"]) == (7, 1, 41)
+
+    def test_delete_event_has_no_id(self, monkeypatch):
+        published = []
+        monkeypatch.setattr(events.broker, "publish", published.append)
+
+        events.publish_change("expense", "deleted", {"id": 7, "project_id": 1})
+
+        (event,) = published
+        assert event["change_seq"] is None
+        assert not format_sse(event, event=event["type"], event_id=event["change_seq"]).startswith("id:")
+
+    def test_publish_failure_does_not_raise(self, monkeypatch):
+        def fail(event):
+            raise RuntimeError("backend down")
+
+        monkeypatch.setattr(events.broker, "publish", fail)
+
+        events.publish_change("expense", "created", {"id": 1, "project_id": 1})
@@ -24,7 +24,7 @@ class TestActualExpenseRouters:
         assert data["project_id"] == expense_data["project_id"]
         assert data["forecast_line_item_id"] == expense_data["forecast_line_item_id"]
         assert data["vendor"] == expense_data["vendor"]
-        assert data["amount_spent"] == expense_data["amount_spent"]
+        assert data["amount_spent"] == "1500.00"
         assert "id" in data
 
     def test_create_expense_without_forecast_item(self, client, test_project):
@@ -99,7 +99,7 @@ class TestActualExpenseRouters:
         assert response.status_code == status.HTTP_200_OK
         data = response.json()
         assert data["vendor"] == update_data["vendor"]
-        assert data["amount_spent"] == update_data["amount_spent"]
+        assert data["amount_spent"] == "2000.00"
 
     def test_update_expense_not_found(self, client, test_project):
         """Test updating a non-existent expense"""
@@ -0,0 +1,205 @@
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+# Set up test environment
+os.environ["ENV"] = "test"
+os.environ["DATABASE_URL"] = "sqlite:///:memory:"
+os.environ["SUPABASE_URL"] = "https://mock-supabase-url.supabase.co"
+os.environ.setdefault("SUPABASE_SERVICE_ROLE_KEY", "eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoic2VydmljZV9yb2xlIn0.mock")
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmarks.fake_supabase import AuthError, FakeSupabase, InMemoryStore
+from benchmarks.run import compare, percentile
+
+USER_ID = "00000000-0000-4000-a000-000000000001"
+
+
+def make_client():
+    store = InMemoryStore()
+    store.load("actual_expenses", [
+        {"id": 1, "user_id": USER_ID, "project_id": 1, "vendor": "Home Depot #123", "amount_spent_cents": 500},
+        {"id": 2, "user_id": USER_ID, "project_id": 1, "vendor": "Lowe's", "amount_spent_cents": 1500},
+        {"id": 3, "user_id": USER_ID, "project_id": 2, "vendor": "Ferguson", "amount_spent_cents": 1000},
+    ])
+    return FakeSupabase(store)
+
+
+class TestFakeSupabase:
+    """Test the in-memory Supabase stand-in used by the benchmarks"""
+
+    def test_select_filters_order_and_count(self):
+        client = make_client()
+
+        response = client.table("actual_expenses")\
+            .select("id, amount_spent_cents", count="exact")\
+            .eq("project_id", "1")\
+            .gte("amount_spent_cents", 500)\
+            .order("amount_spent_cents", desc=True)\
+            .range(0, 0)\
+            .execute()
+
+        assert response.data == [{"id": 2, "amount_spent_cents": 1500}]
+        assert response.count == 2
+
+    def test_in_and_single(self):
+        client = make_client()
+
+        rows = client.table("actual_expenses").select("id").in_("id", [1, 3]).execute().data
+        row = client.table("actual_expenses").select("*").eq("id", 2).single().execute().data
+
+        assert [r["id"] for r in rows] == [1, 3]
+        assert row["vendor"] == "Lowe's"
+
+    def test_insert_applies_schema_defaults(self):
+        client = make_client()
+
+        (row,) = client.table("actual_expenses").insert({"user_id": USER_ID, "project_id": 1, "vendor": "Home Depot"}).execute().data
+
+        assert row["id"] == 4
+        assert row["version"] == 1
+        assert row["vendor_key"] == "home depot"
+        assert row["change_seq"] > 0
+
+    def test_update_bumps_version_and_change_seq(self):
+        client = make_client()
+        before = client.table("actual_expenses").select("*").eq("id", 1).single().execute().data
+
+        (after,) = client.table("actual_expenses").update({"vendor": "Ferguson"}).eq("id", 1).execute().data
+
+        assert after["version"] == before["version"] + 1
+        assert after["change_seq"] > before["change_seq"]
+        assert after["vendor_key"] == "ferguson"
+
+    def test_delete_writes_tombstone(self):
+        client = make_client()
+
+        client.table("actual_expenses").delete().eq("id", 3).execute()
+
+        assert [row["id"] for row in client.store.rows("actual_expenses")] == [1, 2]
+        (tombstone,) = client.store.rows("deleted_rows")
+        assert tombstone["table_name"] == "actual_expenses"
+        assert tombstone["row_id"] == 3
+        assert tombstone["project_id"] == 2
+
+    def test_index_follows_updates(self):
+        client = make_client()
+
+        client.table("actual_expenses").update({"project_id": 2}).eq("id", 1).execute()
+        rows = client.table("actual_expenses").select("id").eq("project_id", 2).execute().data
+
+        assert [row["id"] for row in rows] == [3, 1]
+        assert client.store.lookup("actual_expenses", "project_id", 1)[0]["id"] == 2
+
+    def test_spend_rollups(self):
+        client = make_client()
+        client.table("actual_expenses").insert([
+            {"user_id": USER_ID, "project_id": 1, "vendor": "Ferguson", "amount_spent_cents": 300, "date": "2024-01-02"},
+            {"user_id": USER_ID, "project_id": 1, "vendor": "Ferguson", "amount_spent_cents": 200, "date": "2024-01-02"},
+        ]).execute()
+
+        (bucket,) = client.store.rows("expense_daily_rollups")
+        assert (bucket["category"], bucket["amount_cents"], bucket["expense_count"]) == ("Uncategorized", 500, 2)
+
+        client.table("actual_expenses").update({"date": "2024-01-03"}).eq("id", 4).execute()
+        client.table("actual_expenses").delete().eq("id", 5).execute()
+        (bucket,) = client.store.rows("expense_daily_rollups")
+        assert (bucket["day"], bucket["amount_cents"], bucket["expense_count"]) == ("2024-01-03", 300, 1)
+
+    def test_responses_are_copies(self):
+        client = make_client()
+
+        row = client.table("actual_expenses").select("*").eq("id", 1).single().execute().data
+        row["amount_spent_cents"] = 0
+
+        assert client.store.rows("actual_expenses")[0]["amount_spent_cents"] == 500
+
+    def test_calls_are_counted(self):
+        client = make_client()
+
+        client.table("actual_expenses").select("*").execute()
+        client.table("actual_expenses").delete().eq("id", 1).execute()
+        client.auth.get_user(client.auth.issue_token(USER_ID))
+
+        assert client.call_count() == 3
+        assert client.calls[("actual_expenses", "delete")] == 1
+        assert client.calls[("auth", "get_user")] == 1
+
+
+class TestBenchmarkCompare:
+    """Test regression detection against a baseline"""
+
+    baseline = {
+        "projects.list": {
+            "settings": {"concurrency": 1, "latency_ms": 0.0, "jitter_ms": 0.0, "dataset": "seed"},
+            "status": 200,
+            "p50_ms": 10.0,
+            "p95_ms": 20.0,
+            "supabase_calls_per_request": 2.0,
+            "sql_statements_per_request": 0.0,
+        }
+    }
+
+    def result(self, **changes):
+        return {"projects.list": {**self.baseline["projects.list"], **changes}}
+
+    def test_within_tolerance(self):
+        assert compare(self.result(p50_ms=12.0, p95_ms=29.0), self.baseline, tolerance=0.25) == []
+
+    def test_latency_regression(self):
+        (regression,) = compare(self.result(p50_ms=13.0), self.baseline, tolerance=0.25)
+
+        assert regression.startswith("projects.list: p50_ms")
+        (regression,) = compare(self.result(p95_ms=31.0), self.baseline, tolerance=0.25)
+        assert regression.startswith("projects.list: p95_ms")
+
+    def test_small_absolute_growth_is_allowed(self):
+        baseline = {"projects.list": {**self.baseline["projects.list"], "p50_ms": 1.0, "p95_ms": 1.0}}
+
+        assert compare(self.result(p50_ms=2.5, p95_ms=2.5), baseline, min_delta_ms=2.0) == []
+
+    def test_extra_upstream_calls_and_status(self):
+        regressions = compare(self.result(supabase_calls_per_request=3.0, status=500), self.baseline)
+
+        assert len(regressions) == 2
+
+    def test_latency_under_other_settings_is_not_compared(self):
+        settings = {"concurrency": 8, "latency_ms": 5.0, "jitter_ms": 0.0, "dataset": "seed"}
+
+        assert compare(self.result(settings=settings, p50_ms=100.0), self.baseline) == []
+
+    def test_other_dataset_only_compares_status(self):
+        settings = {**self.baseline["projects.list"]["settings"], "dataset": "20x20"}
+
+        assert compare(self.result(settings=settings, supabase_calls_per_request=4.0), self.baseline) == []
+        assert len(compare(self.result(settings=settings, status=500), self.baseline)) == 1
+
+    def test_percentile(self):
+        assert percentile([5.0, 1.0, 3.0, 2.0, 4.0], 0.5) == 3.0
+        assert percentile([5.0, 1.0, 3.0, 2.0, 4.0], 0.99) == 5.0
+
+
+class TestLocalAuth:
+    """Test tokens issued and verified by the auth stand-in"""
+
+    def test_token_identifies_user(self):
+        client = FakeSupabase()
+        token = client.auth.issue_token("user-2", email="two@example.com")
+
+        user = client.auth.get_user(token).user
+
+        assert user.id == "user-2"
+        assert user.email == "two@example.com"
+
+    def test_rejects_foreign_expired_and_malformed_tokens(self):
+        client = FakeSupabase()
+        foreign = FakeSupabase(secret="other").auth.issue_token("user-2")
+        expired = client.auth.issue_token("user-2", expires_in=-1)
+
+        for token in (foreign, expired, "not-a-token"):
+            with pytest.raises(AuthError):
+                client.auth.get_user(token)
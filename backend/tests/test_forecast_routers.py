@@ -24,7 +24,7 @@ class TestForecastLineItemRouters:
         data = response.json()
         assert data["project_id"] == forecast_data["project_id"]
         assert data["category"] == forecast_data["category"]
-        assert data["estimated_cost"] == forecast_data["estimated_cost"]
+        assert data["estimated_cost"] == "5000.00"
         assert data["unit"] == forecast_data["unit"]
         assert "id" in data
 
@@ -84,7 +84,7 @@ class TestForecastLineItemRouters:
         assert response.status_code == status.HTTP_200_OK
         data = response.json()
         assert data["category"] == update_data["category"]
-        assert data["estimated_cost"] == update_data["estimated_cost"]
+        assert data["estimated_cost"] == "7500.00"
         assert data["progress_percent"] == update_data["progress_percent"]
 
     def test_update_forecast_item_not_found(self, client, test_project):
@@ -0,0 +1,116 @@
+import os
+import sys
+import time
+from pathlib import Path
+
+import httpx
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.pool import QueuePool
+
+# Set up test environment
+os.environ["ENV"] = "test"
+os.environ["DATABASE_URL"] = "sqlite:///:memory:"
+os.environ["SUPABASE_URL"] = "https://mock-supabase-url.supabase.co"
+os.environ.setdefault("SUPABASE_SERVICE_ROLE_KEY", "eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoic2VydmljZV9yb2xlIn0.mock")
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from api.core import health
+from api.core.health import HealthMonitor, database_probe, http_probe
+
+
+def failing_probe():
+    raise ConnectionError("connection refused")
+
+
+class TestHealthMonitor:
+    """Test cached dependency probes"""
+
+    def test_unready_until_probed(self):
+        monitor = HealthMonitor({"database": lambda: None})
+
+        report = monitor.readiness()
+
+        assert report["status"] == "unready"
+        assert report["checks"]["database"] == {"ok": False, "error": "not checked yet"}
+
+    def test_ready_with_latency(self):
+        monitor = HealthMonitor({"database": lambda: {"checked_out": 0}, "supabase_auth": lambda: None})
+
+        monitor.run_probes()
+        report = monitor.readiness()
+
+        assert report["status"] == "ready"
+        assert report["checks"]["database"]["ok"] is True
+        assert report["checks"]["database"]["checked_out"] == 0
+        assert report["checks"]["supabase_auth"]["latency_ms"] >= 0
+
+    def test_failed_probe(self):
+        monitor = HealthMonitor({"database": lambda: None, "supabase_rest": failing_probe})
+
+        monitor.run_probes()
+        report = monitor.readiness()
+
+        assert report["status"] == "unready"
+        assert report["checks"]["database"]["ok"] is True
+        assert report["checks"]["supabase_rest"]["error"] == "ConnectionError: connection refused"
+
+    def test_stale_results_fail(self):
+        monitor = HealthMonitor({"database": lambda: None}, stale_after=0.05)
+
+        monitor.run_probes()
+        time.sleep(0.1)
+
+        check = monitor.readiness()["checks"]["database"]
+        assert check["ok"] is False
+        assert check["error"].startswith("no result for")
+
+    def test_readiness_does_not_probe(self):
+        calls = []
+        monitor = HealthMonitor({"database": lambda: calls.append(1)})
+
+        monitor.run_probes()
+        for _ in range(10):
+            monitor.readiness()
+
+        assert calls == [1]
+
+    def test_background_thread(self):
+        calls = []
+        monitor = HealthMonitor({"database": lambda: calls.append(1)}, interval=0.01)
+
+        monitor.start()
+        time.sleep(0.1)
+        monitor.close()
+
+        assert len(calls) > 1
+        assert monitor.readiness()["status"] == "ready"
+
+
+class TestProbes:
+    """Test the database and HTTP probes"""
+
+    def test_database_probe_reports_pool(self):
+        engine = create_engine("sqlite://", poolclass=QueuePool, pool_size=2)
+
+        details = database_probe(engine)()
+
+        assert details == {"pool_size": 2, "checked_out": 0, "overflow": -1}
+
+    def test_http_probe(self, monkeypatch):
+        statuses = iter([404, 503])
+        requests = []
+
+        def fake_request(method, url, **kwargs):
+            requests.append((method, url))
+            return httpx.Response(next(statuses))
+
+        monkeypatch.setattr(health.httpx, "request", fake_request)
+        probe = http_probe("https://example.supabase.co/rest/v1/", {}, method="HEAD")
+
+        probe()
+        with pytest.raises(RuntimeError, match="HTTP 503"):
+            probe()
+        assert requests[0] == ("HEAD", "https://example.supabase.co/rest/v1/")
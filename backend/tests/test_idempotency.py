@@ -0,0 +1,107 @@
+import os
+import sys
+from pathlib import Path
+
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+
+# Set up test environment
+os.environ["ENV"] = "test"
+os.environ["DATABASE_URL"] = "sqlite:///:memory:"
+os.environ["SUPABASE_URL"] = "https://mock-supabase-url.supabase.co"
+os.environ.setdefault("SUPABASE_SERVICE_ROLE_KEY", "eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoic2VydmljZV9yb2xlIn0.mock")
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from api.core import idempotency
+from api.core.auth import get_current_active_user
+from api.core.idempotency import (
+    REPLAY_HEADER,
+    IdempotencyMiddleware,
+    IdempotentReplay,
+    MemoryIdempotencyStore,
+    idempotency_key,
+    replay_response,
+)
+
+
+class TestMemoryStore:
+    """Test key reservation and expiry"""
+
+    def test_reserve_complete_replay(self):
+        store = MemoryIdempotencyStore()
+
+        assert store.reserve("user", "key", "hash") is None
+        assert store.reserve("user", "key", "hash").completed is False
+
+        store.complete("user", "key", 201, b"{}", "application/json")
+        record = store.reserve("user", "key", "hash")
+
+        assert (record.status_code, record.body) == (201, b"{}")
+        # Keys are scoped per user
+        assert store.reserve("other", "key", "hash") is None
+
+    def test_expired_keys_can_be_reused(self):
+        store = MemoryIdempotencyStore(ttl_seconds=-1)
+        store.reserve("user", "key", "hash")
+        store.complete("user", "key", 200, b"{}", None)
+
+        assert store.reserve("user", "key", "other-hash") is None
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(idempotency, "idempotency_store", MemoryIdempotencyStore())
+    calls = []
+    app = FastAPI()
+    app.add_middleware(IdempotencyMiddleware)
+    app.add_exception_handler(IdempotentReplay, replay_response)
+    app.dependency_overrides[get_current_active_user] = lambda: {"id": "user-1"}
+
+    @app.post("/items", dependencies=[Depends(idempotency_key)])
+    def create_item(item: dict):
+        calls.append(item)
+        if item.get("fail"):
+            raise RuntimeError("database down")
+        return {"id": len(calls), **item}
+
+    test_client = TestClient(app, raise_server_exceptions=False)
+    test_client.calls = calls
+    return test_client
+
+
+class TestIdempotencyKeyHeader:
+    """Test replaying creates sent with an Idempotency-Key"""
+
+    def test_replay_returns_original_response(self, client):
+        headers = {"Idempotency-Key": "abc"}
+        first = client.post("/items", json={"name": "a"}, headers=headers)
+        second = client.post("/items", json={"name": "a"}, headers=headers)
+
+        assert second.json() == first.json() == {"id": 1, "name": "a"}
+        assert second.headers[REPLAY_HEADER] == "true"
+        assert len(client.calls) == 1
+
+    def test_key_reused_for_different_body(self, client):
+        client.post("/items", json={"name": "a"}, headers={"Idempotency-Key": "abc"})
+
+        response = client.post("/items", json={"name": "b"}, headers={"Idempotency-Key": "abc"})
+
+        assert response.status_code == 422
+        assert len(client.calls) == 1
+
+    def test_server_error_releases_key(self, client):
+        headers = {"Idempotency-Key": "abc"}
+        assert client.post("/items", json={"fail": True}, headers=headers).status_code == 500
+
+        client.post("/items", json={"fail": True}, headers=headers)
+
+        assert len(client.calls) == 2
+
+    def test_without_header(self, client):
+        client.post("/items", json={"name": "a"})
+        client.post("/items", json={"name": "a"})
+
+        assert len(client.calls) == 2
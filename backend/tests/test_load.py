@@ -0,0 +1,73 @@
+import asyncio
+import os
+import sys
+from pathlib import Path
+
+import httpx
+import pytest
+
+# Set up test environment
+os.environ["ENV"] = "test"
+os.environ["DATABASE_URL"] = "sqlite:///:memory:"
+os.environ["SUPABASE_URL"] = "https://mock-supabase-url.supabase.co"
+os.environ.setdefault("SUPABASE_SERVICE_ROLE_KEY", "eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoic2VydmljZV9yb2xlIn0.mock")
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmarks.fake_supabase import FakeSupabase, InMemoryStore
+from benchmarks.dataset import user_id
+from benchmarks.load import parse_mix, prepare, run_load
+from benchmarks.run import install
+
+
+@pytest.fixture
+def fake():
+    """The stand-in installed in every endpoint module, restored afterwards."""
+    fake = FakeSupabase(InMemoryStore())
+    replaced = install(fake)
+    yield fake
+    for module, client in replaced.items():
+        module.supabase = client
+
+
+class TestLoadRunner:
+    """Test the closed-loop load runner against the app in-process"""
+
+    def test_users_run_every_journey(self, fake):
+        import main
+
+        portfolios = prepare(fake.store, users=3, projects=2)
+        tokens = [fake.auth.issue_token(user_id(number)) for number in range(3)]
+
+        async def scenario():
+            transport = httpx.ASGITransport(app=main.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://load") as client:
+                mix = parse_mix("project_view=1,receipt_entry=1,site_walk=1")
+                return await run_load(client, tokens, portfolios, mix, duration=0.5, think_time=0, seed=1)
+
+        result = asyncio.run(scenario())
+
+        assert result["errors"] == 0
+        assert set(result["journeys"]) == {"project_view", "receipt_entry", "site_walk"}
+        assert result["requests_by_name"]["POST /expenses/"]["count"] > 0
+        assert result["throughput_rps"] > 0
+        # Each user only ever touched its own rows
+        owners = {row["user_id"] for row in fake.store.rows("actual_expenses")}
+        assert owners == {user_id(number) for number in range(3)}
+
+    def test_users_get_their_own_projects(self):
+        store = InMemoryStore()
+
+        first, second = prepare(store, users=2, projects=2)
+
+        assert set(first).isdisjoint(second)
+        assert len(first) == len(second) == 2
+        assert all(items for items in first.values())
+
+    def test_parse_mix(self):
+        assert parse_mix("project_view=6,site_walk") == {"project_view": 6.0, "site_walk": 1.0}
+        with pytest.raises(ValueError):
+            parse_mix("checkout=1")
+        with pytest.raises(ValueError):
+            parse_mix("site_walk=0")
@@ -0,0 +1,127 @@
+import io
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+# Set up test environment
+os.environ["ENV"] = "test"
+os.environ["DATABASE_URL"] = "sqlite:///:memory:"
+os.environ["SUPABASE_URL"] = "https://mock-supabase-url.supabase.co"
+os.environ.setdefault("SUPABASE_SERVICE_ROLE_KEY", "eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoic2VydmljZV9yb2xlIn0.mock")
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from api.core.logs import REDACTED, JsonFormatter, NonBlockingQueueHandler, redact
+
+
+@pytest.fixture
+def pipeline():
+    """A logger writing JSON through the queue handler and a listener"""
+    log_queue = queue.Queue(maxsize=100)
+    stream = io.StringIO()
+    output = logging.StreamHandler(stream)
+    output.setFormatter(JsonFormatter())
+    listener = logging.handlers.QueueListener(log_queue, output)
+    handler = NonBlockingQueueHandler(log_queue)
+
+    logger = logging.getLogger("tests.logs")
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    logger.addHandler(handler)
+    listener.start()
+
+    def lines():
+        listener.stop()
+        return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+    yield logger, lines
+    logger.removeHandler(handler)
+    if listener._thread is not None:
+        listener.stop()
+
+
+class TestRedaction:
+    """Test masking secrets in log output"""
+
+    def test_bearer_and_jwt(self):
+        jwt = "eyJhbGciOiJIUzI1NiJ9.eyJzdWIiOiJ1MSJ9.c2ln"
+
+        assert redact("Authorization: Bearer abc.def-123") == f"Authorization: Bearer {REDACTED}"
+        assert jwt not in redact(f"session {jwt} expired")
+
+    def test_secret_pairs(self):
+        text = redact("{'id': 'u1', 'token': 'abc', 'email': 'a@b.c'} password=hunter2")
+
+        assert "abc" not in text and "hunter2" not in text
+        assert "'id': 'u1'" in text and "a@b.c" in text
+
+
+class TestQueuedJsonLogging:
+    """Test the queue handler and JSON output"""
+
+    def test_json_with_extra_fields(self, pipeline):
+        logger, lines = pipeline
+
+        logger.error("Error creating expense: %s", "boom", extra={"project_id": 7, "access_token": "secret"})
+
+        (entry,) = lines()
+        assert entry["level"] == "ERROR"
+        assert entry["logger"] == "tests.logs"
+        assert entry["message"] == "Error creating expense: boom"
+        assert entry["project_id"] == 7
+        assert entry["access_token"] == REDACTED
+
+    def test_messages_are_rendered_on_the_writer_thread(self, pipeline):
+        logger, lines = pipeline
+        rendered_on = []
+
+        class Argument:
+            def __str__(self):
+                rendered_on.append(threading.current_thread().name)
+                return "argument"
+
+        logger.info("Lazy %s", Argument())
+        logger.debug("Filtered %s", Argument())
+
+        assert lines()[0]["message"] == "Lazy argument"
+        assert len(rendered_on) == 1
+        assert rendered_on[0] != threading.current_thread().name
+
+    def test_exceptions(self, pipeline):
+        logger, lines = pipeline
+
+        try:
+            raise ValueError("token=abc123")
+        except ValueError:
+            logger.exception("Failed")
+
+        (entry,) = lines()
+        assert "ValueError" in entry["exception"]
+        assert "abc123" not in entry["exception"]
+
+    def test_full_queue_drops_instead_of_blocking(self):
+        log_queue = queue.Queue(maxsize=2)
+        handler = NonBlockingQueueHandler(log_queue)
+        logger = logging.getLogger("tests.logs.full")
+        logger.propagate = False
+        logger.addHandler(handler)
+
+        for index in range(5):
+            logger.warning("record %s", index)
+        assert handler.dropped == 3
+
+        log_queue.get_nowait()
+        log_queue.get_nowait()
+        logger.warning("after")
+        notice = log_queue.get_nowait()
+        assert notice.getMessage() == "Dropped 3 log records: log queue full"
+        assert log_queue.get_nowait().getMessage() == "after"
+        logger.removeHandler(handler)
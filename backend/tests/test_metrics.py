@@ -0,0 +1,114 @@
+import os
+import sys
+from pathlib import Path
+
+import pytest
+from fastapi import APIRouter, FastAPI, HTTPException
+from fastapi.testclient import TestClient
+
+# Set up test environment
+os.environ["ENV"] = "test"
+os.environ["DATABASE_URL"] = "sqlite:///:memory:"
+os.environ["SUPABASE_URL"] = "https://mock-supabase-url.supabase.co"
+os.environ.setdefault("SUPABASE_SERVICE_ROLE_KEY", "eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoic2VydmljZV9yb2xlIn0.mock")
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+prometheus_client = pytest.importorskip("prometheus_client")
+
+from api.core.metrics import REGISTRY, MetricsMiddleware, UNMATCHED_ROUTE, metrics_response
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+@pytest.fixture
+def client():
+    """Small app behind the metrics middleware"""
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware)
+
+    @app.get("/items/{item_id}")
+    def get_item(item_id: int):
+        if item_id == 0:
+            raise HTTPException(status_code=404, detail="Not found")
+        return {"id": item_id}
+
+    @app.get("/boom")
+    def boom():
+        raise RuntimeError("boom")
+
+    @app.get("/metrics")
+    def metrics():
+        return metrics_response()
+
+    router = APIRouter()
+
+    @router.get("/{expense_id}")
+    def get_expense(expense_id: int):
+        return {"id": expense_id}
+
+    app.include_router(router, prefix="/api/v1/expenses")
+
+    return TestClient(app, raise_server_exceptions=False)
+
+
+class TestMetricsMiddleware:
+    """Test per-route request metrics"""
+
+    def test_counts_by_route_template(self, client):
+        before = sample("http_requests_total", method="GET", route="/items/{item_id}", status="200")
+
+        client.get("/items/1")
+        client.get("/items/2")
+
+        assert sample("http_requests_total", method="GET", route="/items/{item_id}", status="200") == before + 2
+
+    def test_records_status_codes(self, client):
+        before = sample("http_requests_total", method="GET", route="/items/{item_id}", status="404")
+
+        client.get("/items/0")
+
+        assert sample("http_requests_total", method="GET", route="/items/{item_id}", status="404") == before + 1
+
+    def test_included_routes_keep_their_prefix(self, client):
+        before = sample("http_requests_total", method="GET", route="/api/v1/expenses/{expense_id}", status="200")
+
+        client.get("/api/v1/expenses/7")
+
+        assert sample("http_requests_total", method="GET", route="/api/v1/expenses/{expense_id}", status="200") == before + 1
+
+    def test_unhandled_errors_count_as_500(self, client):
+        before = sample("http_requests_total", method="GET", route="/boom", status="500")
+
+        assert client.get("/boom").status_code == 500
+
+        assert sample("http_requests_total", method="GET", route="/boom", status="500") == before + 1
+
+    def test_unknown_paths_share_one_label(self, client):
+        before = sample("http_requests_total", method="GET", route=UNMATCHED_ROUTE, status="404")
+
+        client.get("/nope/1")
+        client.get("/nope/2")
+
+        assert sample("http_requests_total", method="GET", route=UNMATCHED_ROUTE, status="404") == before + 2
+
+    def test_latency_histogram(self, client):
+        before = sample("http_request_duration_seconds_count", method="GET", route="/items/{item_id}")
+
+        client.get("/items/3")
+
+        assert sample("http_request_duration_seconds_count", method="GET", route="/items/{item_id}") == before + 1
+        assert sample("http_requests_in_progress", method="GET") == 0
+
+    def test_metrics_endpoint(self, client):
+        client.get("/items/4")
+
+        response = client.get("/metrics")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        assert 'http_requests_total{method="GET",route="/items/{item_id}",status="200"}' in response.text
+        assert 'route="/metrics"' not in response.text
@@ -0,0 +1,92 @@
+import os
+import sys
+from decimal import Decimal
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+from pydantic import ValidationError
+
+# Set up test environment
+os.environ["ENV"] = "test"
+os.environ["DATABASE_URL"] = "sqlite:///:memory:"
+os.environ["SUPABASE_URL"] = "https://mock-supabase-url.supabase.co"
+os.environ.setdefault("SUPABASE_SERVICE_ROLE_KEY", "eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoic2VydmljZV9yb2xlIn0.mock")
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from api.core.money import Cents, format_cents, from_cents, sum_cents, to_cents
+from api.schemas.expense import ActualExpenseCreate, ActualExpenseOut
+from api.schemas.project import ProjectOut, ProjectUpdate
+
+
+class TestMoneyConversion:
+    """Test conversion between dollar amounts and integer cents"""
+
+    @pytest.mark.parametrize("value,expected", [
+        (1500, 150000),
+        (1500.0, 150000),
+        (0.1, 10),
+        ("19.99", 1999),
+        (Decimal("0.005"), 1),
+        ("-12.345", -1235),
+        (Cents(4250), 4250),
+    ])
+    def test_to_cents(self, value, expected):
+        assert to_cents(value) == expected
+
+    @pytest.mark.parametrize("value", ["abc", None, True, float("nan")])
+    def test_to_cents_rejects_invalid(self, value):
+        with pytest.raises(ValueError):
+            to_cents(value)
+
+    def test_format_cents(self):
+        assert format_cents(150000) == "1500.00"
+        assert format_cents(5) == "0.05"
+        assert format_cents(-1205) == "-12.05"
+        assert format_cents(None) is None
+
+    def test_from_cents_is_exact(self):
+        assert from_cents(1999) == Decimal("19.99")
+
+    def test_sum_is_exact(self):
+        # 0.1 added a million times drifts as a float but not as cents
+        assert sum_cents([to_cents(0.1)] * 1_000_000) == 10_000_000
+        assert sum_cents([100, None, 250]) == 350
+
+
+class TestMoneySchemas:
+    """Test money fields on request/response schemas"""
+
+    def test_create_schema_holds_cents(self):
+        expense = ActualExpenseCreate(project_id=1, amount_spent=1500.25, date="2024-01-15")
+
+        assert expense.amount_spent == 150025
+        row = expense.to_row()
+        assert row["amount_spent_cents"] == 150025
+        assert "amount_spent" not in row
+
+    def test_out_schema_reads_cents_column(self):
+        row = {"id": 7, "project_id": 1, "amount_spent_cents": 150025, "date": "2024-01-15"}
+
+        expense = ActualExpenseOut.model_validate(row)
+
+        assert expense.amount_spent == 150025
+        assert expense.model_dump(mode="json")["amount_spent"] == "1500.25"
+
+    def test_out_schema_reads_orm_objects(self):
+        project = SimpleNamespace(id=3, name="Lake House", total_budget_cents=45000000)
+
+        out = ProjectOut.model_validate(project, from_attributes=True)
+
+        assert out.model_dump(mode="json")["total_budget"] == "450000.00"
+
+    def test_update_schema_only_dumps_set_fields(self):
+        update = ProjectUpdate(total_budget="1250.50")
+
+        assert update.to_row(exclude_unset=True) == {"total_budget_cents": 125050}
+
+    def test_invalid_amount_is_rejected(self):
+        with pytest.raises(ValidationError):
+            ActualExpenseCreate(project_id=1, amount_spent="twelve", date="2024-01-15")
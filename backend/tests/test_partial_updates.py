@@ -0,0 +1,141 @@
+import os
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException, Response
+from pydantic import ValidationError
+
+# Set up test environment
+os.environ["ENV"] = "test"
+os.environ["DATABASE_URL"] = "sqlite:///:memory:"
+os.environ["SUPABASE_URL"] = "https://mock-supabase-url.supabase.co"
+os.environ.setdefault("SUPABASE_SERVICE_ROLE_KEY", "eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoic2VydmljZV9yb2xlIn0.mock")
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from api.endpoints import draws, expenses, forecast
+from api.schemas.draw import DrawTrackerUpdate
+from api.schemas.expense import ActualExpenseUpdate
+from api.schemas.forecast import ForecastLineItemUpdate
+
+USER = {"id": "test-user-id"}
+
+
+class TableQuery:
+    """PostgREST builder over a list of rows that records what updates write."""
+
+    def __init__(self, rows, writes):
+        self.rows = rows
+        self.writes = writes
+        self.filters = []
+        self.payload = None
+
+    def select(self, columns):
+        return self
+
+    def update(self, payload):
+        self.payload = payload
+        self.writes.append(payload)
+        return self
+
+    def eq(self, column, value):
+        self.filters.append(lambda row: row.get(column) == value)
+        return self
+
+    def execute(self):
+        matched = [row for row in self.rows if all(check(row) for check in self.filters)]
+        if self.payload is not None:
+            for row in matched:
+                row.update(self.payload)
+                row["version"] += 1
+        return SimpleNamespace(data=[dict(row) for row in matched])
+
+
+@pytest.fixture
+def writes(monkeypatch):
+    user = USER["id"]
+    data = {
+        "actual_expenses": [{
+            "id": 1, "user_id": user, "project_id": 7, "vendor": "Lumber Co", "vendor_key": "lumber co",
+            "amount_spent_cents": 1000, "date": "2024-05-01", "version": 1,
+        }],
+        "forecast_line_items": [{
+            "id": 2, "user_id": user, "project_id": 7, "category": "Framing", "estimated_cost_cents": 5000,
+            "actual_cost_cents": 0, "notes": "long notes", "progress_percent": 0, "status": "not_started", "version": 1,
+        }],
+        "draw_tracker": [{
+            "id": 3, "user_id": user, "project_id": 7, "cash_on_hand_cents": 20000,
+            "draw_triggered": False, "notes": "long notes", "version": 1,
+        }],
+    }
+    recorded = []
+    client = SimpleNamespace(table=lambda name: TableQuery(data[name], recorded))
+    for module in (expenses, forecast, draws):
+        monkeypatch.setattr(module, "supabase", client)
+    return recorded
+
+
+class TestUpdateSchemas:
+    """Test sparse update schemas"""
+
+    def test_only_sent_fields_are_dumped(self):
+        changes = ForecastLineItemUpdate.model_validate({"progress_percent": 50, "actual_cost": "12.50"})
+
+        assert changes.to_row(exclude_unset=True) == {"progress_percent": 50, "actual_cost_cents": 1250}
+
+    def test_optional_columns_can_be_cleared(self):
+        changes = ActualExpenseUpdate.model_validate({"forecast_line_item_id": None})
+
+        assert changes.to_row(exclude_unset=True) == {"forecast_line_item_id": None}
+
+    @pytest.mark.parametrize("schema, field", [
+        (ActualExpenseUpdate, "amount_spent"),
+        (ActualExpenseUpdate, "date"),
+        (ForecastLineItemUpdate, "category"),
+        (DrawTrackerUpdate, "cash_on_hand"),
+    ])
+    def test_required_columns_cannot_be_nulled(self, schema, field):
+        with pytest.raises(ValidationError):
+            schema.model_validate({field: None})
+
+
+class TestPatchEndpoints:
+    """Test that PATCH writes only the changed columns"""
+
+    def test_patch_expense(self, writes):
+        changes = ActualExpenseUpdate.model_validate({"vendor": "Home Depot", "date": "2024-05-02"})
+
+        row = expenses.patch_expense(1, changes, Response(), None, None, USER)
+
+        assert writes == [{"vendor": "Home Depot", "vendor_key": "home depot", "date": "2024-05-02"}]
+        assert row["amount_spent_cents"] == 1000
+
+    def test_patch_forecast_item(self, writes):
+        response = Response()
+        row = forecast.patch_forecast_item(2, ForecastLineItemUpdate(progress_percent=40), response, None, None, USER)
+
+        assert writes == [{"progress_percent": 40}]
+        assert row["notes"] == "long notes"
+        assert response.headers["ETag"] == '"2"'
+
+    def test_patch_draw(self, writes):
+        changes = DrawTrackerUpdate.model_validate({"draw_triggered": True, "last_draw_date": "2024-06-01"})
+
+        draws.patch_draw(3, changes, Response(), '"1"', None, USER)
+
+        assert writes == [{"draw_triggered": True, "last_draw_date": "2024-06-01", "version": 2}]
+
+    def test_stale_if_match_returns_412(self, writes):
+        response = draws.patch_draw(3, DrawTrackerUpdate(notes="x"), Response(), '"5"', None, USER)
+
+        assert response.status_code == 412
+
+    def test_empty_patch_is_rejected(self, writes):
+        with pytest.raises(HTTPException) as exc:
+            expenses.patch_expense(1, ActualExpenseUpdate(), Response(), None, None, USER)
+
+        assert exc.value.status_code == 400
+        assert writes == []
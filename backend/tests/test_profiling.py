@@ -0,0 +1,174 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+# Set up test environment
+os.environ["ENV"] = "test"
+os.environ["DATABASE_URL"] = "sqlite:///:memory:"
+os.environ["SUPABASE_URL"] = "https://mock-supabase-url.supabase.co"
+os.environ.setdefault("SUPABASE_SERVICE_ROLE_KEY", "eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoic2VydmljZV9yb2xlIn0.mock")
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from api.core import profiling
+from api.core.profiling import ProfileStore, ProfilingMiddleware
+from api.endpoints import profiles
+
+TOKEN = "profile-secret"
+
+
+def crunch(n):
+    return sum(i * i for i in range(n))
+
+
+def spin(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = ProfileStore(str(tmp_path / "profiles"), max_profiles=3)
+    monkeypatch.setattr(profiles, "profile_store", store)
+    monkeypatch.setattr(profiling, "PROFILING_TOKEN", TOKEN)
+    return store
+
+
+def make_client(store, **options):
+    app = FastAPI()
+    app.add_middleware(ProfilingMiddleware, store=store, **{"token": TOKEN, **options})
+
+    @app.get("/report")
+    def report():
+        threading.Event().wait(0.03)
+        return {"total": crunch(1000000)}
+
+    @app.get("/work/{kind}")
+    def work(kind: str):
+        return {"total": crunch(1000000) if kind == "crunch" else spin(0.5)}
+
+    @app.get("/async-report")
+    async def async_report():
+        await asyncio.sleep(0.01)
+        return {"total": crunch(1000000)}
+
+    app.include_router(profiles.router, prefix="/api/v1/admin/profiles")
+    return TestClient(app)
+
+
+@pytest.fixture
+def client(store):
+    return make_client(store)
+
+
+class TestProfilingMiddleware:
+    """Test capturing per-request profiles"""
+
+    def test_requests_without_token_are_not_profiled(self, client, store):
+        response = client.get("/report")
+
+        assert "X-Profile-Id" not in response.headers
+        assert store.list() == []
+
+    def test_wrong_token_is_ignored(self, client, store):
+        response = client.get("/report", headers={"X-Profile-Token": "guess"})
+
+        assert "X-Profile-Id" not in response.headers
+
+    def test_sync_endpoint_in_threadpool(self, client, store):
+        response = client.get("/report", headers={"X-Profile-Token": TOKEN})
+
+        profile = store.get(response.headers["X-Profile-Id"])
+        assert profile["route"] == "/report"
+        assert profile["status"] == 200
+        assert profile["trigger"] == "header"
+        assert profile["samples"] > 0
+        assert "crunch (test_profiling.py" in profile["folded"]
+        # Stacks from the worker thread start at the endpoint (the event loop
+        # thread's samples start at the middleware)
+        assert any(
+            line.startswith("report (") and "crunch (test_profiling.py" in line
+            for line in profile["folded"].splitlines()
+        )
+
+    def test_concurrent_request_to_same_route_is_not_sampled(self, client, store):
+        other = threading.Thread(target=client.get, args=("/work/spin",))
+        other.start()
+        time.sleep(0.1)
+        try:
+            response = client.get("/work/crunch", headers={"X-Profile-Token": TOKEN})
+        finally:
+            other.join()
+
+        folded = store.get(response.headers["X-Profile-Id"])["folded"]
+        assert "crunch (test_profiling.py" in folded
+        assert "spin (test_profiling.py" not in folded
+
+    def test_async_endpoint_on_event_loop(self, client, store):
+        response = client.get("/async-report", headers={"X-Profile-Token": TOKEN})
+
+        profile = store.get(response.headers["X-Profile-Id"])
+        assert "async_report (test_profiling.py" in profile["folded"]
+        assert "crunch (test_profiling.py" in profile["folded"]
+
+    def test_cpu_mode_drops_waiting_samples(self, client, store):
+        wall = client.get("/report", headers={"X-Profile-Token": TOKEN})
+        cpu = client.get("/report", headers={"X-Profile-Token": TOKEN, "X-Profile-Mode": "cpu"})
+
+        assert ";wait (threading.py" in store.get(wall.headers["X-Profile-Id"])["folded"]
+        cpu_profile = store.get(cpu.headers["X-Profile-Id"])
+        assert cpu_profile["mode"] == "cpu"
+        assert ";wait (threading.py" not in cpu_profile["folded"]
+
+    def test_sampling_rate(self, store):
+        client = make_client(store, token=None, sample_rate=1.0)
+
+        response = client.get("/report")
+
+        assert store.get(response.headers["X-Profile-Id"])["trigger"] == "sample"
+
+    def test_ring_buffer_keeps_newest(self, client, store):
+        ids = [client.get("/async-report", headers={"X-Profile-Token": TOKEN}).headers["X-Profile-Id"] for _ in range(5)]
+
+        assert {item["id"] for item in store.list()} <= set(ids)
+        assert len(store.list()) == 3
+        assert store.list()[0]["id"] == ids[-1]
+
+
+class TestProfileEndpoints:
+    """Test the admin profile endpoints"""
+
+    def test_require_token(self, client):
+        assert client.get("/api/v1/admin/profiles/").status_code == 403
+        assert client.get("/api/v1/admin/profiles/", headers={"X-Profile-Token": "guess"}).status_code == 403
+
+    def test_list_get_delete(self, client, store):
+        profile_id = client.get("/report", headers={"X-Profile-Token": TOKEN}).headers["X-Profile-Id"]
+        headers = {"X-Profile-Token": TOKEN}
+
+        listed = client.get("/api/v1/admin/profiles/", headers=headers).json()
+        assert [item["id"] for item in listed] == [profile_id]
+        assert "folded" not in listed[0]
+
+        folded = client.get(f"/api/v1/admin/profiles/{profile_id}?format=folded", headers=headers)
+        assert folded.headers["content-type"].startswith("text/plain")
+        assert folded.text == store.get(profile_id)["folded"]
+
+        assert client.delete(f"/api/v1/admin/profiles/{profile_id}", headers=headers).json() == {"deleted": True}
+        assert client.get(f"/api/v1/admin/profiles/{profile_id}", headers=headers).status_code == 404
+
+    def test_reading_profiles_does_not_record_profiles(self, client, store):
+        client.get("/report", headers={"X-Profile-Token": TOKEN})
+        for _ in range(4):
+            client.get("/api/v1/admin/profiles/", headers={"X-Profile-Token": TOKEN})
+
+        assert len(store.list()) == 1
@@ -0,0 +1,192 @@
+import asyncio
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+# Set up test environment
+os.environ["ENV"] = "test"
+os.environ["DATABASE_URL"] = "sqlite:///:memory:"
+os.environ["SUPABASE_URL"] = "https://mock-supabase-url.supabase.co"
+os.environ.setdefault("SUPABASE_SERVICE_ROLE_KEY", "eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoic2VydmljZV9yb2xlIn0.mock")
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from api.analytics.cost import LineItemFrame
+from api.analytics.risk import (
+    FIT_CATEGORY,
+    FIT_POOLED,
+    SimulationCache,
+    build_risk_inputs,
+    fit_overrun_model,
+    risk_report,
+    simulate,
+)
+from api.endpoints import analytics
+
+
+def make_item(item_id, project_id, category, estimated, actual=0, progress=0, status="Not Started"):
+    return {
+        "id": item_id,
+        "project_id": project_id,
+        "category": category,
+        "estimated_cost_cents": estimated,
+        "actual_cost_cents": actual,
+        "progress_percent": progress,
+        "status": status,
+    }
+
+
+@pytest.fixture
+def frame():
+    # Finished project 1: framing always runs 10-30% over, roofing has two samples
+    items = [
+        make_item(i, 1, "Framing", 10000, 10000 + 1000 * (i % 3 + 1), 100, "Complete")
+        for i in range(1, 7)
+    ]
+    items += [
+        make_item(7, 1, "Roofing", 10000, 9000, 100, "Complete"),
+        make_item(8, 1, "Roofing", 10000, 12000, 100, "Complete"),
+        # Open project 2
+        make_item(9, 2, "Framing", 50000, 10000, 20, "In Progress"),
+        make_item(10, 2, "Roofing", 20000),
+        make_item(11, 2, "Framing", 5000, 5500, 100, "Complete"),
+    ]
+    return LineItemFrame.from_rows(items)
+
+
+class TestOverrunModel:
+    """Test fitting overrun distributions from completed line items"""
+
+    def test_category_with_history_uses_own_fit(self, frame):
+        model = fit_overrun_model(frame)
+        framing = model.index("Framing")
+
+        assert model.source[framing] == FIT_CATEGORY
+        assert model.samples[framing] == 7
+        assert model.mu[framing] > 0
+
+    def test_sparse_category_falls_back_to_pooled(self, frame):
+        model = fit_overrun_model(frame)
+        roofing = model.index("Roofing")
+
+        assert model.source[roofing] == FIT_POOLED
+        assert model.samples[roofing] == 2
+        pooled = np.log(frame.actual[frame.complete] / frame.budget[frame.complete])
+        assert model.mu[roofing] == pytest.approx(pooled.mean())
+        assert model.sigma[roofing] == pytest.approx(pooled.std(ddof=1))
+
+
+class TestRiskSimulation:
+    """Test the vectorized Monte Carlo simulation"""
+
+    def test_percentiles_are_ordered_and_include_committed_cost(self, frame):
+        inputs = build_risk_inputs(frame, 2, fit_overrun_model(frame), total_budget=80000)
+        report = risk_report(inputs, simulate(inputs, 20000, seed=1))
+
+        assert report["committed"] == 15500
+        assert report["committed"] < report["p50"] <= report["p80"] <= report["p95"]
+        assert 0.0 <= report["probability_over_budget"] <= 1.0
+        assert {row["category"] for row in report["categories"]} == {"Framing", "Roofing"}
+
+    def test_same_seed_is_reproducible(self, frame):
+        inputs = build_risk_inputs(frame, 2, fit_overrun_model(frame))
+
+        first = simulate(inputs, 5000, seed=42)
+        second = simulate(inputs, 5000, seed=42)
+
+        np.testing.assert_array_equal(first.percentiles, second.percentiles)
+
+    def test_chunking_does_not_change_results(self, frame):
+        inputs = build_risk_inputs(frame, 2, fit_overrun_model(frame))
+
+        whole = simulate(inputs, 5000, seed=3)
+        chunked = simulate(inputs, 5000, seed=3, chunk_elements=7)
+
+        np.testing.assert_allclose(whole.percentiles, chunked.percentiles)
+        np.testing.assert_allclose(whole.category_percentiles, chunked.category_percentiles)
+
+    def test_category_percentiles_from_a_bounded_sample(self, frame):
+        inputs = build_risk_inputs(frame, 2, fit_overrun_model(frame))
+
+        full = simulate(inputs, 20000, seed=5)
+        sampled = simulate(inputs, 20000, seed=5, chunk_elements=1000, category_sample_trials=5000)
+
+        # Totals and category means still cover every trial
+        np.testing.assert_array_equal(full.percentiles, sampled.percentiles)
+        np.testing.assert_allclose(full.category_mean, sampled.category_mean)
+        np.testing.assert_allclose(full.category_percentiles, sampled.category_percentiles, rtol=0.02)
+
+    def test_finished_project_has_no_spread(self, frame):
+        inputs = build_risk_inputs(frame, 1, fit_overrun_model(frame))
+        report = risk_report(inputs, simulate(inputs, 1000, seed=0))
+
+        assert report["p50"] == report["p95"] == report["committed"]
+
+    def test_digest_changes_with_inputs(self, frame):
+        model = fit_overrun_model(frame)
+        inputs = build_risk_inputs(frame, 2, model)
+
+        assert inputs.digest(1000, None) == build_risk_inputs(frame, 2, model).digest(1000, None)
+        assert inputs.digest(1000, None) != inputs.digest(2000, None)
+        assert inputs.digest(1000, None) != build_risk_inputs(frame, 2, model, 1).digest(1000, None)
+
+
+class TestSimulationCache:
+    """Test the LRU cache of simulation results"""
+
+    def test_evicts_least_recently_used(self):
+        cache = SimulationCache(max_entries=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+        cache.put("c", 3)
+
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+        assert cache.get("c") == 3
+
+
+class TestRiskEndpointCache:
+    """Test that cached simulations skip loading the portfolio"""
+
+    @pytest.fixture
+    def endpoint(self, monkeypatch, frame):
+        state = {"version": 1, "loads": 0}
+
+        def load(user_id, project_id):
+            state["loads"] += 1
+            return build_risk_inputs(frame, project_id, fit_overrun_model(frame))
+
+        monkeypatch.setattr(analytics, "change_watermark", lambda client, user_id: state["version"])
+        monkeypatch.setattr(analytics, "_risk_inputs", load)
+        monkeypatch.setattr(analytics, "get_process_pool", lambda workers: ThreadPoolExecutor(1))
+        monkeypatch.setattr(analytics, "risk_cache", SimulationCache())
+
+        def call(user_id="user-1"):
+            return asyncio.run(analytics.get_project_risk(2, trials=1000, seed=None, current_user={"id": user_id}))
+
+        return call, state
+
+    def test_hit_does_not_load_inputs(self, endpoint):
+        call, state = endpoint
+
+        first = call()
+        second = call()
+
+        assert (first["cached"], second["cached"]) == (False, True)
+        assert second["p50"] == first["p50"]
+        assert state["loads"] == 1
+
+    def test_new_portfolio_version_or_user_misses(self, endpoint):
+        call, state = endpoint
+        call()
+
+        state["version"] = 2
+        assert call()["cached"] is False
+        assert call(user_id="user-2")["cached"] is False
+        assert state["loads"] == 3
@@ -0,0 +1,163 @@
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+# Set up test environment
+os.environ["ENV"] = "test"
+os.environ["DATABASE_URL"] = "sqlite:///:memory:"
+os.environ["SUPABASE_URL"] = "https://mock-supabase-url.supabase.co"
+os.environ.setdefault("SUPABASE_SERVICE_ROLE_KEY", "eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoic2VydmljZV9yb2xlIn0.mock")
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from api.analytics.cost import LineItemFrame
+from api.analytics.similarity import ProjectFeatureIndex, ProjectIndexRegistry
+from api.endpoints import forecast
+from api.schemas.forecast import ForecastGenerateRequest
+from benchmarks.fake_supabase import FakeSupabase
+
+
+def make_item(item_id, project_id, category, actual):
+    return {
+        "id": item_id,
+        "project_id": project_id,
+        "category": category,
+        "estimated_cost_cents": actual,
+        "actual_cost_cents": actual,
+        "progress_percent": 100,
+        "status": "Complete",
+    }
+
+
+def completed_projects(count=5):
+    return [
+        {"id": pid, "status": "completed", "total_sqft": 1000 * pid, "total_budget_cents": 10_000_000 * pid}
+        for pid in range(1, count + 1)
+    ]
+
+
+def load_frame(project_ids):
+    # Framing at $20/sqft, roofing at $8/sqft; only project 5 has a pool
+    items = []
+    for pid in project_ids:
+        items.append(make_item(10 * pid, pid, "Framing", 2000 * 1000 * pid))
+        items.append(make_item(10 * pid + 1, pid, "Roofing", 800 * 1000 * pid))
+        if pid == 5:
+            items.append(make_item(10 * pid + 2, pid, "Pool", 5_000_000))
+    return LineItemFrame.from_rows(items)
+
+
+@pytest.fixture
+def index():
+    index = ProjectFeatureIndex()
+    index.sync(completed_projects(), load_frame)
+    return index
+
+
+class TestProjectFeatureIndex:
+    """Test nearest completed projects and blended proposals"""
+
+    def test_nearest_by_size_and_budget(self, index):
+        neighbors = index.nearest(2, square_feet=2100, budget=21_000_000)
+
+        assert neighbors.project_id.tolist()[0] == 2
+        assert set(neighbors.project_id.tolist()) <= {1, 2, 3}
+        assert neighbors.similarity[0] >= neighbors.similarity[1]
+
+    def test_excluded_projects_are_skipped(self, index):
+        neighbors = index.nearest(5, square_feet=2000, exclude=[2])
+
+        assert 2 not in neighbors.project_id.tolist()
+        assert len(neighbors.project_id) == 4
+
+    def test_proposals_scale_to_floor_area(self, index):
+        neighbors = index.nearest(3, square_feet=2100, budget=21_000_000)
+
+        proposals = {row["category"]: row for row in index.propose(neighbors, square_feet=2100)}
+
+        assert proposals["Framing"]["estimated_cost_cents"] == 2000 * 2100
+        assert proposals["Roofing"]["estimated_cost_cents"] == 800 * 2100
+        assert proposals["Roofing"]["support"] == 1.0
+        assert "Pool" not in proposals
+
+    def test_rare_category_needs_support(self, index):
+        neighbors = index.nearest(5, square_feet=5000)
+
+        assert "Pool" not in {row["category"] for row in index.propose(neighbors, square_feet=5000)}
+        assert "Pool" in {row["category"] for row in index.propose(neighbors, square_feet=5000, min_support=0.1)}
+
+    def test_sync_only_loads_new_projects(self, index):
+        loaded = []
+
+        def tracking_loader(project_ids):
+            loaded.append(list(project_ids))
+            return load_frame(project_ids)
+
+        projects = completed_projects(6)
+        projects.pop(0)
+
+        assert index.sync(projects, tracking_loader) == 1
+        assert loaded == [[6]]
+        assert sorted(index.project_id.tolist()) == [2, 3, 4, 5, 6]
+
+    def test_sync_reloads_stale_projects(self, index):
+        loaded = []
+
+        def tracking_loader(project_ids):
+            loaded.append(list(project_ids))
+            return load_frame(project_ids)
+
+        assert index.sync(completed_projects(), tracking_loader, stale=[2, 9], watermark=7) == 1
+        assert loaded == [[2]]
+        assert sorted(index.project_id.tolist()) == [1, 2, 3, 4, 5]
+        assert index.watermark == 7
+
+    def test_empty_index(self):
+        index = ProjectFeatureIndex()
+
+        neighbors = index.nearest(3, square_feet=1000)
+
+        assert len(neighbors.project_id) == 0
+        assert index.propose(neighbors) == []
+
+
+class TestProjectIndexRegistry:
+    """Test per-user index eviction"""
+
+    def test_evicts_least_recently_used(self):
+        registry = ProjectIndexRegistry(max_users=2)
+        first = registry.get("a")
+        registry.get("b")
+        registry.get("a")
+        registry.get("c")
+
+        assert registry.get("a") is first
+        assert "b" not in registry._indexes
+
+
+class TestGenerateForecast:
+    """Test that forecast generation sees cost changes of indexed projects"""
+
+    def test_changed_costs_are_reloaded(self, monkeypatch):
+        client = FakeSupabase()
+        client.store.load("projects", [
+            {"id": 1, "user_id": "user-1", "name": "Done", "status": "completed", "total_sqft": 1000},
+            {"id": 2, "user_id": "user-1", "name": "New", "status": "active", "total_sqft": 1000},
+        ])
+        client.store.load("forecast_line_items", [
+            {**make_item(1, 1, "Framing", 2_000_000), "user_id": "user-1"},
+        ])
+        monkeypatch.setattr(forecast, "supabase", client)
+        monkeypatch.setattr(forecast, "project_indexes", ProjectIndexRegistry())
+        request = ForecastGenerateRequest(project_id=2, dry_run=True)
+        user = {"id": "user-1"}
+
+        first = forecast.generate_forecast(request, db=None, current_user=user)
+        client.table("forecast_line_items").update({"actual_cost_cents": 3_000_000}).eq("id", 1).execute()
+        second = forecast.generate_forecast(request, db=None, current_user=user)
+
+        assert [row["estimated_cost_cents"] for row in first["proposals"]] == [2_000_000]
+        assert [row["estimated_cost_cents"] for row in second["proposals"]] == [3_000_000]
@@ -0,0 +1,154 @@
+import logging
+import os
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from fastapi import Depends, FastAPI, Request
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+from postgrest import SyncPostgrestClient
+from postgrest.utils import SyncClient
+
+# Set up test environment
+os.environ["ENV"] = "test"
+os.environ["DATABASE_URL"] = "sqlite:///:memory:"
+os.environ["SUPABASE_URL"] = "https://mock-supabase-url.supabase.co"
+os.environ.setdefault("SUPABASE_SERVICE_ROLE_KEY", "eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoic2VydmljZV9yb2xlIn0.mock")
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from api.core.slowlog import LogLimiter, SlowRequestMiddleware
+from api.core.tracing import TracingMiddleware, instrument_supabase
+
+
+def postgrest_handler(request: httpx.Request) -> httpx.Response:
+    if "actual_expenses" in request.url.path:
+        time.sleep(0.06)
+    return httpx.Response(200, json=[{"id": 1}, {"id": 2}, {"id": 3}])
+
+
+@pytest.fixture
+def postgrest():
+    instrument_supabase(SimpleNamespace())
+    client = SyncPostgrestClient("http://postgrest.test")
+    client.session = SyncClient(base_url="http://postgrest.test", transport=httpx.MockTransport(postgrest_handler))
+    return client
+
+
+def make_client(postgrest, limiter=None):
+    app = FastAPI()
+    app.add_middleware(
+        SlowRequestMiddleware,
+        request_threshold_ms=50,
+        query_threshold_ms=40,
+        limiter=limiter or LogLimiter(sample_rate=1.0, per_minute=100),
+    )
+    app.add_middleware(TracingMiddleware, enabled=True, export=lambda trace: None)
+
+    def principal(request: Request):
+        request.state.principal_id = "user-1"
+
+    @app.post("/projects/{project_id}/report", dependencies=[Depends(principal)])
+    def report(project_id: int, payload: dict):
+        postgrest.table("forecast_line_items").select("*").execute()
+        postgrest.table("actual_expenses").select("*").execute()
+        return {"ok": True}
+
+    @app.get("/fast")
+    def fast():
+        postgrest.table("forecast_line_items").select("*").execute()
+        return {"ok": True}
+
+    @app.get("/stream")
+    def stream():
+        def events():
+            yield "data: 1\n\n"
+            time.sleep(0.06)
+            yield "data: 2\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    return TestClient(app)
+
+
+def entries(caplog):
+    return [record.slow_log for record in caplog.records if record.name == "api.core.slowlog"]
+
+
+class TestSlowRequestLog:
+    """Test logging requests and queries over budget"""
+
+    def test_slow_request_context(self, postgrest, caplog):
+        client = make_client(postgrest)
+
+        with caplog.at_level(logging.WARNING, logger="api.core.slowlog"):
+            client.post("/projects/7/report", json={"note": "x" * 100})
+
+        request = next(entry for entry in entries(caplog) if entry["event"] == "slow_request")
+        assert request["route"] == "/projects/{project_id}/report"
+        assert request["path"] == "/projects/7/report"
+        assert request["principal_id"] == "user-1"
+        assert request["status"] == 200
+        assert request["duration_ms"] >= 50
+        assert request["request_bytes"] > 100
+        assert request["response_bytes"] == len(b'{"ok":true}')
+        assert request["upstream"]["supabase"]["count"] == 2
+        assert request["upstream"]["supabase"]["rows"] == 6
+        assert request["slowest_calls"][0]["table"] == "actual_expenses"
+        assert request["slowest_calls"][0]["rows"] == 3
+
+    def test_slow_query(self, postgrest, caplog):
+        client = make_client(postgrest)
+
+        with caplog.at_level(logging.WARNING, logger="api.core.slowlog"):
+            client.post("/projects/7/report", json={})
+
+        (query,) = [entry for entry in entries(caplog) if entry["event"] == "slow_query"]
+        assert query["name"] == "select actual_expenses"
+        assert query["route"] == "/projects/{project_id}/report"
+        assert query["principal_id"] == "user-1"
+
+    def test_fast_requests_are_not_logged(self, postgrest, caplog):
+        client = make_client(postgrest)
+
+        with caplog.at_level(logging.WARNING, logger="api.core.slowlog"):
+            client.get("/fast")
+
+        assert entries(caplog) == []
+
+    def test_event_streams_are_not_logged(self, postgrest, caplog):
+        client = make_client(postgrest)
+
+        with caplog.at_level(logging.WARNING, logger="api.core.slowlog"):
+            response = client.get("/stream")
+
+        assert response.text == "data: 1\n\ndata: 2\n\n"
+        assert entries(caplog) == []
+
+    def test_rate_limit_reports_suppressed(self, postgrest, caplog):
+        limiter = LogLimiter(sample_rate=1.0, per_minute=2)
+        client = make_client(postgrest, limiter)
+
+        with caplog.at_level(logging.WARNING, logger="api.core.slowlog"):
+            for _ in range(3):
+                client.post("/projects/7/report", json={})
+        assert len(entries(caplog)) == 2
+
+        limiter.tokens = 1
+        caplog.clear()
+        with caplog.at_level(logging.WARNING, logger="api.core.slowlog"):
+            client.get("/fast")
+            client.post("/projects/7/report", json={})
+        (entry,) = entries(caplog)
+        assert entry["suppressed_since_last"] == 4
+
+    def test_sampling(self):
+        limiter = LogLimiter(sample_rate=0.0, per_minute=100)
+
+        assert limiter.allow() is None
+        assert limiter.suppressed == 1
@@ -0,0 +1,110 @@
+import sys
+import uuid
+from datetime import date
+from pathlib import Path
+
+import numpy as np
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from api.analytics.spend import aggregate_spend, bucket_start, query_daily_spend
+from api.models import ActualExpense, Base, ForecastLineItem, Project
+
+USER_ID = "8c0e7b8e-5d1a-4c39-9a57-1f0b3c2d4e5f"
+
+
+@pytest.fixture
+def rollup_rows():
+    return [
+        {"project_id": 1, "category": "Framing", "vendor": "HD", "day": "2024-05-06", "amount_cents": 1000, "expense_count": 1},
+        {"project_id": 1, "category": "Framing", "vendor": "HD", "day": "2024-05-12", "amount_cents": 500, "expense_count": 2},
+        {"project_id": 1, "category": "Roofing", "vendor": "ABC", "day": "2024-05-13", "amount_cents": 700, "expense_count": 1},
+        {"project_id": 2, "category": "Framing", "vendor": "HD", "day": "2024-07-02", "amount_cents": 300, "expense_count": 1},
+    ]
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    owner = uuid.UUID(USER_ID)
+    session.add(Project(id=1, user_id=owner, name="House"))
+    session.add(ForecastLineItem(id=5, user_id=owner, project_id=1, category="Framing", estimated_cost_cents=1))
+    session.add_all([
+        ActualExpense(user_id=owner, project_id=1, forecast_line_item_id=5, vendor="HD", amount_spent_cents=100, date=date(2024, 5, 6)),
+        ActualExpense(user_id=owner, project_id=1, forecast_line_item_id=5, vendor=" ", amount_spent_cents=250, date=date(2024, 5, 20)),
+        ActualExpense(user_id=owner, project_id=1, vendor="X", amount_spent_cents=999, date=date(2024, 5, 21)),
+        ActualExpense(user_id=owner, project_id=1, vendor="X", amount_spent_cents=1, date=None),
+    ])
+    session.commit()
+    yield session
+    session.close()
+
+
+class TestBuckets:
+    """Test truncating days to bucket starts"""
+
+    @pytest.mark.parametrize("bucket,expected", [
+        ("day", "2024-05-15"),
+        ("week", "2024-05-13"),
+        ("month", "2024-05-01"),
+        ("quarter", "2024-04-01"),
+        ("year", "2024-01-01"),
+    ])
+    def test_bucket_start(self, bucket, expected):
+        days = np.array(["2024-05-15"], dtype="datetime64[D]")
+
+        assert str(bucket_start(days, bucket)[0]) == expected
+
+    def test_sunday_belongs_to_previous_week(self):
+        days = np.array(["2024-05-12"], dtype="datetime64[D]")
+
+        assert str(bucket_start(days, "week")[0]) == "2024-05-06"
+
+
+class TestAggregateSpend:
+    """Test re-bucketing daily spend rows"""
+
+    def test_weekly_totals_by_category(self, rollup_rows):
+        rows = aggregate_spend(rollup_rows, "week", ["category"])
+
+        assert [(str(row["period"]), row["category"], row["amount"], row["expense_count"]) for row in rows] == [
+            ("2024-05-06", "Framing", 1500, 3),
+            ("2024-05-13", "Roofing", 700, 1),
+            ("2024-07-01", "Framing", 300, 1),
+        ]
+
+    def test_multiple_dimensions(self, rollup_rows):
+        rows = aggregate_spend(rollup_rows, "quarter", ["project", "vendor"])
+
+        assert [(str(row["period"]), row["project_id"], row["vendor"], row["amount"]) for row in rows] == [
+            ("2024-04-01", 1, "ABC", 700),
+            ("2024-04-01", 1, "HD", 1500),
+            ("2024-07-01", 2, "HD", 300),
+        ]
+
+    def test_empty(self):
+        assert aggregate_spend([], "month") == []
+
+
+class TestSqlFallback:
+    """Test the grouped SQL path over actual_expenses"""
+
+    def test_groups_by_category_with_uncategorized(self, db):
+        rows = aggregate_spend(query_daily_spend(db, USER_ID, "month", ["category"]), "month", ["category"])
+
+        assert [(row["category"], row["amount"], row["expense_count"]) for row in rows] == [
+            ("Framing", 350, 2),
+            ("Uncategorized", 999, 1),
+        ]
+
+    def test_filters_by_line_item_and_normalizes_blank_vendor(self, db):
+        daily = query_daily_spend(db, USER_ID, "week", ["vendor"], forecast_line_item_id=5, start=date(2024, 5, 10))
+        rows = aggregate_spend(daily, "week", ["vendor"])
+
+        assert [(str(row["period"]), row["vendor"], row["amount"]) for row in rows] == [("2024-05-20", "Unknown", 250)]
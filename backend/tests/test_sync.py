@@ -0,0 +1,157 @@
+import os
+import sys
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+# Set up test environment
+os.environ["ENV"] = "test"
+os.environ["DATABASE_URL"] = "sqlite:///:memory:"
+os.environ["SUPABASE_URL"] = "https://mock-supabase-url.supabase.co"
+os.environ.setdefault("SUPABASE_SERVICE_ROLE_KEY", "eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoic2VydmljZV9yb2xlIn0.mock")
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from api.core.sync import APPLIED, CONFLICT, DUPLICATE, REJECTED, apply_mutations
+from api.models import ActualExpense, Base, ForecastLineItem, ForecastStatusEnum, Project
+from api.schemas.sync import SyncMutationIn
+
+USER_ID = "8c0e7b8e-5d1a-4c39-9a57-1f0b3c2d4e5f"
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    owner = uuid.UUID(USER_ID)
+    session.add(Project(id=1, user_id=owner, name="House"))
+    session.add(Project(id=2, user_id=uuid.uuid4(), name="Someone else's"))
+    session.commit()
+    yield session
+    session.close()
+
+
+def mutation(entity, action, **fields):
+    return SyncMutationIn(mutation_id=uuid.uuid4(), entity=entity, action=action, **fields)
+
+
+def expense_data(**overrides):
+    return {"project_id": 1, "vendor": "Home Depot", "amount_spent": "125.50", "date": "2024-05-01", **overrides}
+
+
+class TestApplyMutations:
+    """Test replaying offline mutations"""
+
+    def test_create_then_reference_by_client_id(self, db):
+        item_id, expense_id = uuid.uuid4(), uuid.uuid4()
+        batch = apply_mutations(db, USER_ID, [
+            mutation("forecast_item", "create", client_id=item_id,
+                     data={"project_id": 1, "category": "Framing", "estimated_cost": "1000.00", "status": "Not Started"}),
+            mutation("expense", "create", client_id=expense_id,
+                     data=expense_data(forecast_line_item_client_id=str(item_id))),
+        ])
+        db.commit()
+
+        assert [result["status"] for result in batch.results] == [APPLIED, APPLIED]
+        expense = db.query(ActualExpense).filter_by(client_id=expense_id).one()
+        item = db.query(ForecastLineItem).filter_by(client_id=item_id).one()
+        assert expense.forecast_line_item_id == item.id
+        assert expense.amount_spent_cents == 12550
+        assert expense.vendor_key == "home depot"
+        assert item.status == ForecastStatusEnum.not_started
+
+    def test_replayed_batch_is_not_applied_twice(self, db):
+        create = mutation("expense", "create", client_id=uuid.uuid4(), data=expense_data())
+        apply_mutations(db, USER_ID, [create])
+        db.commit()
+
+        batch = apply_mutations(db, USER_ID, [create])
+        retried = apply_mutations(db, USER_ID, [mutation("expense", "create", client_id=create.client_id, data=expense_data())])
+        db.commit()
+
+        assert batch.results[0]["status"] == DUPLICATE
+        assert retried.results[0]["status"] == DUPLICATE
+        assert db.query(ActualExpense).count() == 1
+
+    def test_version_conflict(self, db):
+        client_id = uuid.uuid4()
+        apply_mutations(db, USER_ID, [mutation("expense", "create", client_id=client_id, data=expense_data())])
+        db.commit()
+
+        batch = apply_mutations(db, USER_ID, [
+            mutation("expense", "update", client_id=client_id, base_version=1, data={"amount_spent": "130.00"}),
+            mutation("expense", "update", client_id=client_id, base_version=1, data={"amount_spent": "999.00"}),
+        ])
+        db.commit()
+
+        assert [result["status"] for result in batch.results] == [APPLIED, CONFLICT]
+        assert batch.results[0]["version"] == 2
+        row = db.query(ActualExpense).filter_by(client_id=client_id).one()
+        assert (row.amount_spent_cents, row.vendor, row.version) == (13000, "Home Depot", 2)
+
+    def test_last_writer_wins_on_timestamps(self, db):
+        client_id = uuid.uuid4()
+        apply_mutations(db, USER_ID, [mutation("expense", "create", client_id=client_id, data=expense_data())])
+        db.commit()
+        long_ago = datetime.now(timezone.utc) - timedelta(days=1)
+        later = datetime.now(timezone.utc) + timedelta(minutes=1)
+
+        batch = apply_mutations(db, USER_ID, [
+            mutation("expense", "update", client_id=client_id, client_updated_at=long_ago, data={"vendor": "Old"}),
+            mutation("expense", "update", client_id=client_id, client_updated_at=later, data={"vendor": "New"}),
+        ])
+        db.commit()
+
+        assert [result["status"] for result in batch.results] == [CONFLICT, APPLIED]
+        assert db.query(ActualExpense).filter_by(client_id=client_id).one().vendor == "New"
+
+    def test_rejects_foreign_project_and_bad_data(self, db):
+        batch = apply_mutations(db, USER_ID, [
+            mutation("expense", "create", client_id=uuid.uuid4(), data=expense_data(project_id=2)),
+            mutation("expense", "create", client_id=uuid.uuid4(), data=expense_data(amount_spent="abc")),
+            mutation("expense", "update", id=999, data={"vendor": "x"}),
+        ])
+        db.commit()
+
+        assert [result["status"] for result in batch.results] == [REJECTED] * 3
+        assert db.query(ActualExpense).count() == 0
+
+    def test_database_rejection_only_fails_its_mutation(self, db):
+        db.execute(text(
+            "CREATE TRIGGER refuse_vendor BEFORE INSERT ON actual_expenses WHEN NEW.vendor = 'Refused' "
+            "BEGIN SELECT RAISE(ABORT, 'CHECK constraint failed'); END"
+        ))
+        db.commit()
+
+        batch = apply_mutations(db, USER_ID, [
+            mutation("expense", "create", client_id=uuid.uuid4(), data=expense_data(vendor="Refused")),
+            mutation("forecast_item", "create", client_id=uuid.uuid4(),
+                     data={"project_id": 1, "category": "Framing", "estimated_cost": "10.00", "progress_percent": 150}),
+            mutation("expense", "create", client_id=uuid.uuid4(), data=expense_data()),
+        ])
+        db.commit()
+
+        assert [result["status"] for result in batch.results] == [REJECTED, REJECTED, APPLIED]
+        assert [change[1] for change in batch.changes] == ["created"]
+        assert db.query(ActualExpense).one().vendor == "Home Depot"
+
+    def test_delete_is_idempotent(self, db):
+        client_id = uuid.uuid4()
+        apply_mutations(db, USER_ID, [mutation("expense", "create", client_id=client_id, data=expense_data())])
+        db.commit()
+
+        batch = apply_mutations(db, USER_ID, [
+            mutation("expense", "delete", client_id=client_id),
+            mutation("expense", "delete", client_id=client_id),
+        ])
+        db.commit()
+
+        assert [result["status"] for result in batch.results] == [APPLIED, APPLIED]
+        assert batch.deleted[0]["entity"] == "expenses"
+        assert db.query(ActualExpense).count() == 0
@@ -0,0 +1,160 @@
+import json
+import os
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from postgrest import SyncPostgrestClient
+from postgrest.utils import SyncClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import StaticPool
+
+# Set up test environment
+os.environ["ENV"] = "test"
+os.environ["DATABASE_URL"] = "sqlite:///:memory:"
+os.environ["SUPABASE_URL"] = "https://mock-supabase-url.supabase.co"
+os.environ.setdefault("SUPABASE_SERVICE_ROLE_KEY", "eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoic2VydmljZV9yb2xlIn0.mock")
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from api.core.tracing import (
+    AUTH,
+    SQL,
+    SUPABASE,
+    TracingMiddleware,
+    instrument_engine,
+    instrument_supabase,
+    span,
+)
+
+
+def postgrest_handler(request: httpx.Request) -> httpx.Response:
+    if request.method == "GET":
+        return httpx.Response(200, json=[{"id": 1, "category": "Framing"}])
+    return httpx.Response(201, json=[{"id": 2}])
+
+
+@pytest.fixture
+def postgrest():
+    client = SyncPostgrestClient("http://postgrest.test")
+    client.session = SyncClient(base_url="http://postgrest.test", transport=httpx.MockTransport(postgrest_handler))
+    return client
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    instrument_engine(engine)
+    return engine
+
+
+@pytest.fixture
+def traces():
+    return []
+
+
+@pytest.fixture
+def client(postgrest, engine, traces):
+    """App whose handlers make PostgREST, auth and SQL calls"""
+    auth = SimpleNamespace(get_user=lambda token: SimpleNamespace(user={"id": "u1"}))
+    instrument_supabase(SimpleNamespace(auth=auth))
+
+    app = FastAPI()
+    app.add_middleware(TracingMiddleware, enabled=True, export=traces.append)
+
+    @app.get("/items")
+    def items():
+        auth.get_user("token")
+        rows = postgrest.table("forecast_line_items").select("*").eq("project_id", 1).execute().data
+        postgrest.table("actual_expenses").insert({"amount_spent_cents": 100}).execute()
+        with span("summarize"):
+            with engine.connect() as conn:
+                conn.execute(text("SELECT 1")).fetchone()
+        return rows
+
+    @app.get("/quiet")
+    def quiet():
+        return {"ok": True}
+
+    return TestClient(app)
+
+
+class TestTracingMiddleware:
+    """Test per-request upstream call traces"""
+
+    def test_server_timing_totals(self, client):
+        response = client.get("/items")
+
+        assert response.status_code == 200
+        timing = response.headers["Server-Timing"]
+        assert 'auth;dur=' in timing and 'desc="1 calls"' in timing
+        assert 'supabase;dur=' in timing and 'desc="2 calls"' in timing
+        assert 'sql;dur=' in timing
+        assert timing.split(", ")[-1].startswith("app;dur=")
+
+    def test_span_tree(self, client, traces):
+        client.get("/items")
+
+        root = traces[-1].root
+        assert root.attributes["status"] == 200
+        assert root.attributes["route"] == "/items"
+        calls = [(child.kind, child.name) for child in root.children]
+        assert calls == [
+            (AUTH, "auth get_user"),
+            (SUPABASE, "select forecast_line_items"),
+            (SUPABASE, "insert actual_expenses"),
+            ("internal", "summarize"),
+        ]
+        (statement,) = root.children[-1].children
+        assert statement.kind == SQL
+        assert statement.attributes["operation"] == "select"
+        assert all(child.end is not None for child in root.walk())
+
+    def test_requests_without_calls(self, client, traces):
+        response = client.get("/quiet")
+
+        assert response.headers["Server-Timing"].startswith("app;dur=")
+        assert traces[-1].root.children == []
+
+    def test_calls_outside_requests_are_not_traced(self, postgrest, engine):
+        instrument_supabase(SimpleNamespace())
+
+        assert postgrest.table("forecast_line_items").select("*").execute().data
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+        with span("outside") as outside:
+            assert outside is None
+
+    def test_render(self, client, traces):
+        client.get("/items")
+
+        tree = traces[-1].render().splitlines()
+        assert tree[0].startswith("GET /items ")
+        assert tree[2].startswith("  select forecast_line_items ")
+        assert tree[-1].startswith("    select ")
+
+
+class TestOTelExport:
+    """Test exporting traces as OpenTelemetry spans"""
+
+    def test_writes_json_lines(self, client, traces, tmp_path):
+        pytest.importorskip("opentelemetry.sdk")
+        from api.core.tracing import OTelFileExporter
+
+        client.get("/items")
+        exporter = OTelFileExporter(str(tmp_path / "traces.jsonl"))
+        exporter.export(traces[-1])
+        exporter.shutdown()
+
+        spans = [json.loads(line) for line in (tmp_path / "traces.jsonl").read_text().splitlines()]
+        names = {item["name"] for item in spans}
+        assert {"GET /items", "select forecast_line_items", "summarize"} <= names
+        root = next(item for item in spans if item["name"] == "GET /items")
+        child = next(item for item in spans if item["name"] == "summarize")
+        assert child["parent_id"] == root["context"]["span_id"]
+        assert len({item["context"]["trace_id"] for item in spans}) == 1
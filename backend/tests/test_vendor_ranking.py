@@ -0,0 +1,119 @@
+import os
+import random
+import sys
+import uuid
+from collections import Counter
+from datetime import date
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+# Set up test environment
+os.environ["ENV"] = "test"
+os.environ["DATABASE_URL"] = "sqlite:///:memory:"
+os.environ["SUPABASE_URL"] = "https://mock-supabase-url.supabase.co"
+os.environ.setdefault("SUPABASE_SERVICE_ROLE_KEY", "eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoic2VydmljZV9yb2xlIn0.mock")
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from api.analytics.vendors import SpaceSaving, stream_top_vendors, vendor_report
+from api.models import ActualExpense, Base, Project
+
+USER_ID = "8c0e7b8e-5d1a-4c39-9a57-1f0b3c2d4e5f"
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    owner = uuid.UUID(USER_ID)
+    session.add(Project(id=1, user_id=owner, name="House"))
+    session.add_all([
+        ActualExpense(user_id=owner, project_id=1, vendor=vendor, amount_spent_cents=amount, date=date(2024, 5, day))
+        for vendor, amount, day in [
+            ("Home Depot #123", 10000, 1),
+            ("HOME DEPOT", 30000, 2),
+            ("ABC Supply", 90000, 3),
+            ("Lowe's", 2500, 4),
+            ("Lowes #9", 2500, 20),
+        ]
+    ])
+    session.commit()
+    yield session
+    session.close()
+
+
+class TestSpaceSaving:
+    """Test the bounded-memory heavy hitters summary"""
+
+    def test_exact_when_capacity_suffices(self):
+        summary = SpaceSaving(capacity=10)
+        for key, weight in [("a", 5), ("b", 3), ("a", 2), ("c", 1)]:
+            summary.add(key, weight, weight)
+
+        top = summary.top(2)
+
+        assert [(entry["key"], entry["weight"], entry["count"], entry["error"]) for entry in top] == [
+            ("a", 7, 2, 0),
+            ("b", 3, 1, 0),
+        ]
+
+    def test_bounded_memory_keeps_heavy_hitters(self):
+        rng = random.Random(11)
+        heavy = {"heavy-1": 500, "heavy-2": 300}
+        stream = [(key, 100) for key, repeats in heavy.items() for _ in range(repeats)]
+        stream += [(f"tail-{rng.randrange(5000)}", rng.randrange(1, 50)) for _ in range(20000)]
+        rng.shuffle(stream)
+        truth = Counter()
+        summary = SpaceSaving(capacity=50)
+        for key, weight in stream:
+            truth[key] += weight
+            summary.add(key, weight, weight)
+
+        top = summary.top(2)
+
+        assert len(summary) <= 50
+        assert [entry["key"] for entry in top] == ["heavy-1", "heavy-2"]
+        for entry in top:
+            assert entry["weight"] - entry["error"] <= truth[entry["key"]] <= entry["weight"]
+
+    def test_rejects_empty_capacity(self):
+        with pytest.raises(ValueError):
+            SpaceSaving(capacity=0)
+
+
+class TestVendorRanking:
+    """Test vendor ranking from SQL rows and the streaming path"""
+
+    def test_report_from_sql_rows(self):
+        rows = [
+            {"vendor_key": "abc supply", "vendor": "ABC Supply", "total_cents": 90000, "expense_count": 3,
+             "grand_total_cents": 120000, "grand_count": 5},
+        ]
+
+        report = vendor_report(rows)
+
+        assert report["total_spend"] == 120000
+        assert report["vendors"][0]["average_ticket"] == 30000
+        assert report["vendors"][0]["share"] == 0.75
+
+    def test_stream_collapses_vendor_variants(self, db):
+        report = stream_top_vendors(db, USER_ID, k=3)
+
+        assert [(vendor["vendor_key"], vendor["total_spend"], vendor["expense_count"]) for vendor in report["vendors"]] == [
+            ("abc supply", 90000, 1),
+            ("home depot", 40000, 2),
+            ("lowes", 5000, 2),
+        ]
+        assert report["total_spend"] == 135000
+        assert report["approximate"] is False
+
+    def test_stream_by_count_with_date_filter(self, db):
+        report = stream_top_vendors(db, USER_ID, k=1, sort="count", end=date(2024, 5, 10))
+
+        assert report["vendors"][0]["vendor_key"] == "home depot"
+        assert report["total_count"] == 4
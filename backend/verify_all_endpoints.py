@@ -1,209 +0,0 @@
-#!/usr/bin/env python3
-"""
-Verification script for all API endpoints using existing auth
-"""
-
-import requests
-import json
-
-def verify_endpoints():
-    """Verify all endpoints work with Supabase"""
-    
-    # Use the working auth from our previous test
-    token = "eyJhbGciOiJIUzI1NiIsImtpZCI6IkJCdEJ1TFE1WDhQRCtyYWYiLCJ0eXAiOiJKV1QifQ.eyJpc3MiOiJodHRwczovL2ZuYXZnZG9lZHpsdGpqaHphdmFjLnN1cGFiYXNlLmNvL2F1dGgvdjEiLCJzdWIiOiJlOWZiNWVkYi04OWFhLTRmZTAtYTRiMy0yNjQ3NzY5YzZiZGIiLCJhdWQiOiJhdXRoZW50aWNhdGVkIiwiZXhwIjoxNzU2MjYwMzE3LCJpYXQiOjE3NTYyNTY3MTcsImVtYWlsIjoidGVzdF8xNzU2MjU2NzE2QGV4YW1wbGUuY29tIiwicGhvbmUiOiIiLCJhcHBfbWV0YWRhdGEiOnsicHJvdmlkZXIiOiJlbWFpbCIsInByb3ZpZGVycyI6WyJlbWFpbCJdfSwidXNlcl9tZXRhZGF0YSI6eyJlbWFpbF92ZXJpZmllZCI6dHJ1ZX0sInJvbGUiOiJhdXRoZW50aWNhdGVkIiwiYWFsIjoiYWFsMSIsImFtciI6W3sibWV0aG9kIjoicGFzc3dvcmQiLCJ0aW1lc3RhbXAiOjE3NTYyNTY3MTd9XSwic2Vzc2lvbl9pZCI6IjQzZWM3NmU4LTRlYzctNGJmYi05M2M1LWZmZmJiZGNmOGU4ZCIsImlzX2Fub255bW91cyI6ZmFsc2V9.r397eGN3XawyaOY6rqylG6DGiN_s4tOWDMfRSCxzqKc"
-    headers = {"Authorization": f"Bearer {token}", "Content-Type": "application/json"}
-    
-    print("🔍 Verifying All Endpoints with Supabase Integration")
-    print("=" * 60)
-    
-    results = []
-    
-    # Test 1: Projects CRUD
-    print("\n📁 Testing Projects...")
-    project_data = {
-        "name": "Verification Project",
-        "address": "123 Verify St",
-        "total_sqft": 1500
-    }
-    
-    try:
-        # Create
-        response = requests.post("http://localhost:8000/api/v1/projects/", json=project_data, headers=headers)
-        if response.status_code == 201:
-            project_id = response.json()["id"]
-            print(f"✅ Project CREATE: Success (ID: {project_id})")
-            
-            # List
-            response = requests.get("http://localhost:8000/api/v1/projects/", headers=headers)
-            if response.status_code == 200:
-                print(f"✅ Project LIST: Success ({len(response.json())} projects)")
-                
-                # Get specific
-                response = requests.get(f"http://localhost:8000/api/v1/projects/{project_id}", headers=headers)
-                if response.status_code == 200:
-                    print("✅ Project GET: Success")
-                    results.append(("Projects", "✅ PASS"))
-                else:
-                    print(f"❌ Project GET: Failed ({response.status_code})")
-                    results.append(("Projects", "❌ FAIL"))
-            else:
-                print(f"❌ Project LIST: Failed ({response.status_code})")
-                results.append(("Projects", "❌ FAIL"))
-        else:
-            print(f"❌ Project CREATE: Failed ({response.status_code})")
-            results.append(("Projects", "❌ FAIL"))
-            project_id = 12  # Use existing project ID
-    except Exception as e:
-        print(f"❌ Projects: Error - {str(e)}")
-        results.append(("Projects", "❌ ERROR"))
-        project_id = 12
-    
-    # Test 2: Forecast CRUD
-    print("\n📊 Testing Forecast...")
-    forecast_data = {
-        "project_id": project_id,
-        "category": "Verification Labor",
-        "estimated_cost": 10000.00,
-        "unit": "sq ft",
-        "notes": "Verification test",
-        "progress_percent": 0,
-        "status": "Not Started"
-    }
-    
-    try:
-        # Create
-        response = requests.post("http://localhost:8000/api/v1/forecast-items/", json=forecast_data, headers=headers)
-        if response.status_code == 200:
-            forecast_id = response.json()["id"]
-            print(f"✅ Forecast CREATE: Success (ID: {forecast_id})")
-            
-            # List
-            response = requests.get("http://localhost:8000/api/v1/forecast-items/", headers=headers)
-            if response.status_code == 200:
-                print(f"✅ Forecast LIST: Success ({len(response.json())} items)")
-                
-                # Get specific
-                response = requests.get(f"http://localhost:8000/api/v1/forecast-items/{forecast_id}", headers=headers)
-                if response.status_code == 200:
-                    print("✅ Forecast GET: Success")
-                    results.append(("Forecast", "✅ PASS"))
-                else:
-                    print(f"❌ Forecast GET: Failed ({response.status_code})")
-                    results.append(("Forecast", "❌ FAIL"))
-            else:
-                print(f"❌ Forecast LIST: Failed ({response.status_code})")
-                results.append(("Forecast", "❌ FAIL"))
-        else:
-            print(f"❌ Forecast CREATE: Failed ({response.status_code}) - {response.text}")
-            results.append(("Forecast", "❌ FAIL"))
-    except Exception as e:
-        print(f"❌ Forecast: Error - {str(e)}")
-        results.append(("Forecast", "❌ ERROR"))
-    
-    # Test 3: Expenses CRUD
-    print("\n💰 Testing Expenses...")
-    expense_data = {
-        "project_id": project_id,
-        "forecast_line_item_id": None,
-        "vendor": "Verification Vendor",
-        "amount_spent": 750.00,
-        "date": "2024-01-15",
-        "receipt_url": None
-    }
-    
-    try:
-        # Create
-        response = requests.post("http://localhost:8000/api/v1/expenses/", json=expense_data, headers=headers)
-        if response.status_code == 200:
-            expense_id = response.json()["id"]
-            print(f"✅ Expense CREATE: Success (ID: {expense_id})")
-            
-            # List
-            response = requests.get("http://localhost:8000/api/v1/expenses/", headers=headers)
-            if response.status_code == 200:
-                print(f"✅ Expense LIST: Success ({len(response.json())} expenses)")
-                
-                # Get specific
-                response = requests.get(f"http://localhost:8000/api/v1/expenses/{expense_id}", headers=headers)
-                if response.status_code == 200:
-                    print("✅ Expense GET: Success")
-                    results.append(("Expenses", "✅ PASS"))
-                else:
-                    print(f"❌ Expense GET: Failed ({response.status_code})")
-                    results.append(("Expenses", "❌ FAIL"))
-            else:
-                print(f"❌ Expense LIST: Failed ({response.status_code})")
-                results.append(("Expenses", "❌ FAIL"))
-        else:
-            print(f"❌ Expense CREATE: Failed ({response.status_code}) - {response.text}")
-            results.append(("Expenses", "❌ FAIL"))
-    except Exception as e:
-        print(f"❌ Expenses: Error - {str(e)}")
-        results.append(("Expenses", "❌ ERROR"))
-    
-    # Test 4: Draws CRUD
-    print("\n🏦 Testing Draws...")
-    draw_data = {
-        "project_id": project_id,
-        "cash_on_hand": 25000.00,
-        "last_draw_date": "2024-01-20",
-        "draw_triggered": True,
-        "notes": "Verification draw"
-    }
-    
-    try:
-        # Create
-        response = requests.post("http://localhost:8000/api/v1/draws/", json=draw_data, headers=headers)
-        if response.status_code == 200:
-            draw_id = response.json()["id"]
-            print(f"✅ Draw CREATE: Success (ID: {draw_id})")
-            
-            # List
-            response = requests.get("http://localhost:8000/api/v1/draws/", headers=headers)
-            if response.status_code == 200:
-                print(f"✅ Draw LIST: Success ({len(response.json())} draws)")
-                
-                # Get specific
-                response = requests.get(f"http://localhost:8000/api/v1/draws/{draw_id}", headers=headers)
-                if response.status_code == 200:
-                    print("✅ Draw GET: Success")
-                    results.append(("Draws", "✅ PASS"))
-                else:
-                    print(f"❌ Draw GET: Failed ({response.status_code})")
-                    results.append(("Draws", "❌ FAIL"))
-            else:
-                print(f"❌ Draw LIST: Failed ({response.status_code})")
-                results.append(("Draws", "❌ FAIL"))
-        else:
-            print(f"❌ Draw CREATE: Failed ({response.status_code}) - {response.text}")
-            results.append(("Draws", "❌ FAIL"))
-    except Exception as e:
-        print(f"❌ Draws: Error - {str(e)}")
-        results.append(("Draws", "❌ ERROR"))
-    
-    # Summary
-    print("\n" + "=" * 60)
-    print("🏁 VERIFICATION SUMMARY")
-    print("=" * 60)
-    
-    passed = 0
-    for endpoint, status in results:
-        print(f"{endpoint:12} {status}")
-        if "PASS" in status:
-            passed += 1
-    
-    print(f"\n📊 Results: {passed}/{len(results)} endpoints PASSED")
-    
-    if passed == len(results):
-        print("🎉 ALL ENDPOINTS WORKING WITH SUPABASE!")
-        print("✅ Authentication: JWT tokens")
-        print("✅ Data Storage: Supabase only")
-        print("✅ User Isolation: RLS policies")
-        print("✅ CRUD Operations: Full coverage")
-        return True
-    else:
-        print("⚠️  Some endpoints need attention")
-        return False
-
-if __name__ == "__main__":
-    verify_endpoints()